@@ -0,0 +1,44 @@
+"""
+Metrics endpoint and per-route latency middleware
+"""
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.metrics import metrics, CONTENT_TYPE
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """All service metrics in the Prometheus text format"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
+async def record_request_metrics(request: Request, call_next):
+    """
+    HTTP middleware timing every request by method, route template and status
+
+    The route template (e.g. /api/resume/{username}/{job_id}) is used
+    instead of the raw path so label cardinality stays bounded.
+    """
+    start = time.monotonic()
+    status = 500
+    metrics.inc("aro_http_requests_in_flight")
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.inc("aro_http_requests_in_flight", -1)
+        metrics.observe(
+            "aro_http_request_duration_seconds", time.monotonic() - start,
+            method=request.method, route=getattr(route, "path", "unmatched"), status=str(status)
+        )
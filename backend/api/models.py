@@ -4,6 +4,12 @@ Pydantic Models for API Request/Response
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 
+# LLM output schemas live with the pipeline; responses reuse them
+from src.schemas import (
+    Resume, SectionScores, SectionFeedback, EvaluationResult,
+    SectionCheck, FactualityResult
+)
+
 
 # Request Models
 
@@ -52,20 +58,13 @@ class EvaluateResponse(BaseModel):
     total_score: float
     keyword_score: float
     llm_score: float
-    section_scores: Dict[str, float]
+    section_scores: SectionScores
     feedback: str
-    section_feedback: Dict[str, str]
+    section_feedback: SectionFeedback
 
 
-class FactualityResponse(BaseModel):
+class FactualityResponse(FactualityResult):
     """Response from factuality endpoint"""
-    is_factual: bool
-    factuality_score: float
-    issues: List[str]
-    summary_check: Dict[str, Any]
-    experience_check: Dict[str, Any]
-    projects_check: Dict[str, Any]
-    skills_check: Dict[str, Any]
 
 
 class ResumeResponse(BaseModel):
@@ -90,6 +89,8 @@ class HealthResponse(BaseModel):
     status: str
     gemini_api: str
     version: str
+    circuit_breaker: Optional[Dict[str, Any]] = None
+    providers: Optional[Dict[str, Dict[str, Any]]] = None
 
 
 class ErrorResponse(BaseModel):
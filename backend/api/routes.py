@@ -7,6 +7,7 @@ from pathlib import Path
 import json
 import sys
 import os
+import asyncio
 
 # Add parent to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -25,8 +26,12 @@ from src.factuality_checker import FactualityChecker
 from src.reviser import Reviser
 from src.renderer import Renderer
 from src.providers import UserProvider, JobProvider, ResumeProvider
-from src.streaming_pipeline import optimize_resume_stream
-from aro.llm_adapter import create_llm_adapter
+from src.streaming_pipeline import aoptimize_resume_stream
+from src.run_planner import plan_run
+from aro.llm_adapter import get_llm_adapter
+from aro.retry import get_circuit_breaker, CircuitBreaker
+from aro.routing import get_stage_router, stage_stats
+from aro.telemetry import get_telemetry
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -34,8 +39,8 @@ load_dotenv()
 
 router = APIRouter()
 
-# Initialize LLM (reuse across requests)
-llm = create_llm_adapter("gemini")
+# Shared process-wide LLM pool (reused across requests and pipelines)
+llm = get_llm_adapter()
 
 
 @router.post("/generate", response_model=GenerateResponse)
@@ -60,27 +65,34 @@ async def generate_resume(request: GenerateRequest):
             json.dump(job_data, f, indent=2)
         
         if request.optimize:
-            # Run full optimization pipeline
-            from src.main import optimize_resume
-            # Temporarily save job, run optimization
-            resume, eval_result, fact_result = optimize_resume(request.username, job_id)
+            # Run the full optimization pipeline on the event loop; only the final update matters here
+            result = None
+            async for update in aoptimize_resume_stream(
+                request.username, request.jd_text, request.company, request.role, llm, flush_delay=0
+            ):
+                result = update
+            if result is None or result["stage"] != "complete":
+                raise RuntimeError(result.get("error") if result else "Optimization did not complete")
             
+            data = result["data"]
+            paths = data["paths"]
             return GenerateResponse(
                 success=True,
-                resume=resume,
+                resume=data["resume"],
                 scores={
-                    "evaluation": eval_result['total_score'],
-                    "factuality": fact_result['factuality_score']
+                    "evaluation": data["scores"]["evaluation"]['total_score'],
+                    "factuality": data["scores"]["factuality"]['factuality_score']
                 },
                 paths={
-                    "json": str(ResumeProvider.save(resume, request.username, job_id)),
-                    "docx": f"output/{request.username}_{job_id}.docx"
+                    name: str(path)
+                    for name, path in (("json", paths["json_path"]), ("docx", paths["docx_path"]))
+                    if path
                 }
             )
         else:
             # Just generate, no optimization
             generator = Generator(llm)
-            resume = generator.generate(request.jd_text, user_profile, request.company, request.role)
+            resume = await generator.agenerate(request.jd_text, user_profile, request.company, request.role)
             
             return GenerateResponse(
                 success=True,
@@ -101,7 +113,7 @@ async def evaluate_resume(request: EvaluateRequest):
         job = JobProvider.get(request.job_id)
         
         evaluator = Evaluator(llm)
-        result = evaluator.evaluate(resume, job['jd_text'])
+        result = await evaluator.aevaluate(resume, job['jd_text'])
         
         return EvaluateResponse(**result)
         
@@ -119,7 +131,7 @@ async def check_factuality(request: FactualityRequest):
         profile = UserProvider.get(request.username)
         
         checker = FactualityChecker(llm)
-        result = checker.check(resume, profile)
+        result = await checker.acheck(resume, profile)
         
         return FactualityResponse(**result)
         
@@ -265,14 +277,23 @@ async def list_resumes(username: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/generate/plan")
+async def plan_generation(request: GenerateRequest):
+    """Estimated tokens, latency and cost of a full optimization run, without running it"""
+    try:
+        user_profile = UserProvider.get(request.username)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return plan_run(request.jd_text, user_profile, request.company, request.role, llm)
+
+
 @router.post("/generate/stream")
 async def generate_resume_stream(request: GenerateRequest):
     """Generate resume with real-time status updates via SSE"""
-    import asyncio
     
-    def event_generator():
+    async def event_generator():
         try:
-            for update in optimize_resume_stream(
+            async for update in aoptimize_resume_stream(
                 username=request.username,
                 jd_text=request.jd_text,
                 company=request.company,
@@ -300,18 +321,53 @@ async def generate_resume_stream(request: GenerateRequest):
     )
 
 
+@router.get("/stages")
+async def stage_routing():
+    """Per-stage routing table and the latency/cost recorded for each stage"""
+    return {
+        "routes": get_stage_router().table(),
+        "stats": stage_stats.snapshot()
+    }
+
+
+@router.get("/telemetry")
+async def llm_telemetry(limit: int = Query(20, ge=0, le=1000)):
+    """Per-stage LLM call histograms and the most recent call records"""
+    telemetry = get_telemetry()
+    return {
+        "stages": telemetry.snapshot(),
+        "recent": telemetry.recent(limit)
+    }
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """API health check"""
-    try:
-        # Quick test of Gemini API with higher token limit
-        test_response = llm.generate("test", max_tokens=100)
-        gemini_status = "available" if test_response else "unavailable"
-    except:
+    breaker = get_circuit_breaker("gemini")
+    
+    if breaker.state == CircuitBreaker.OPEN:
+        # Provider is known to be down, don't spend a call finding out again
         gemini_status = "unavailable"
+    else:
+        try:
+            # Quick test of Gemini API with higher token limit
+            test_response = await llm.agenerate("test", max_tokens=100)
+            gemini_status = "available" if test_response else "unavailable"
+        except:
+            gemini_status = "unavailable"
+    
+    # With LLM_PROVIDER=failover, report how each provider is being routed
+    layer, providers = llm, None
+    while layer is not None:
+        if callable(getattr(layer, "health", None)):
+            providers = layer.health()
+            break
+        layer = getattr(layer, "inner", None)
     
     return HealthResponse(
         status="healthy",
         gemini_api=gemini_status,
-        version="0.1.0"
+        version="0.1.0",
+        circuit_breaker=breaker.snapshot(),
+        providers=providers
     )
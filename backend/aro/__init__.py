@@ -7,11 +7,57 @@ Multi-agent system for resume generation and optimization.
 __version__ = "0.1.0"
 __author__ = "Chandan Gowda K S"
 
-from .llm_adapter import LLMAdapter, GeminiAdapter, MockAdapter, create_llm_adapter
+from .llm_adapter import (
+    LLMAdapter, LLMAdapterWrapper, GeminiAdapter, MockAdapter, PooledAdapter,
+    TokenBucket, AIMDLimiter, RateLimitedAdapter,
+    create_llm_adapter, get_llm_adapter, reset_llm_adapters
+)
+from .llm_cache import LLMCache, CachedAdapter, get_default_cache
+from .retry import RetryPolicy, CircuitBreaker, LLMError, classify_error, get_circuit_breaker
+from .singleflight import SingleFlight, CoalescingAdapter
+from .hedging import HedgedAdapter
+from .routing import StageRoute, StageRouter, get_stage_router
+from .context_cache import ContextCache, PrefixCacheAdapter, get_context_cache
+from .cassette import RecordingAdapter, ReplayAdapter, CassetteMissError
+from .telemetry import Telemetry, CallRecord, get_telemetry
+from .openai_compat import OpenAICompatibleAdapter
+from .failover import FailoverAdapter
 
 __all__ = [
     "LLMAdapter",
+    "LLMAdapterWrapper",
     "GeminiAdapter",
     "MockAdapter",
-    "create_llm_adapter"
+    "PooledAdapter",
+    "TokenBucket",
+    "AIMDLimiter",
+    "RateLimitedAdapter",
+    "create_llm_adapter",
+    "get_llm_adapter",
+    "reset_llm_adapters",
+    "LLMCache",
+    "CachedAdapter",
+    "get_default_cache",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "LLMError",
+    "classify_error",
+    "get_circuit_breaker",
+    "SingleFlight",
+    "CoalescingAdapter",
+    "HedgedAdapter",
+    "StageRoute",
+    "StageRouter",
+    "get_stage_router",
+    "ContextCache",
+    "PrefixCacheAdapter",
+    "get_context_cache",
+    "RecordingAdapter",
+    "ReplayAdapter",
+    "CassetteMissError",
+    "Telemetry",
+    "CallRecord",
+    "get_telemetry",
+    "OpenAICompatibleAdapter",
+    "FailoverAdapter"
 ]
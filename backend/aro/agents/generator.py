@@ -17,7 +17,8 @@ import re
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from aro.llm_adapter import LLMAdapter, create_llm_adapter
+from aro.llm_adapter import LLMAdapter, get_llm_adapter
+from aro.routing import StageRoute, get_stage_router
 from aro.prompts import prompts
 from config.user_profile import UserProfileLoader
 
@@ -25,14 +26,16 @@ from config.user_profile import UserProfileLoader
 class GeneratorAgent:
     """Agent responsible for generating resume content"""
     
-    def __init__(self, llm: LLMAdapter):
+    def __init__(self, llm: Optional[LLMAdapter] = None, route: Optional[StageRoute] = None):
         """
         Initialize generator agent
         
         Args:
-            llm: LLM adapter instance
+            llm: LLM adapter instance (defaults to the shared adapter for LLM_PROVIDER)
+            route: Model/token routing (defaults to the "generator_agent" stage)
         """
-        self.llm = llm
+        self.llm = llm or get_llm_adapter()
+        self.route = route or get_stage_router().route("generator_agent")
         self.generation_count = 0
     
     def extract_keywords(self, jd_text: str, top_n: int = 30) -> List[str]:
@@ -116,19 +119,24 @@ class GeneratorAgent:
         # Build prompt
         print("   📝 Building generation prompt...")
         system_prompt = prompts.generator_system_prompt(company, job_title)
-        user_prompt = prompts.generator_user_prompt(jd_text, profile_data, keywords)
+        revision = iteration_context.get('context_for_generator', '') if iteration_context else None
         
-        # Add iteration context if refinement
-        if iteration_context:
-            user_prompt += f"\n\nREVISION INSTRUCTIONS:\n{iteration_context.get('context_for_generator', '')}"
+        def build(jd_text: str) -> str:
+            user_prompt = prompts.generator_user_prompt(jd_text, profile_data, keywords)
+            # Add iteration context if refinement
+            if revision is not None:
+                user_prompt += f"\n\nREVISION INSTRUCTIONS:\n{revision}"
+            # Combine system and user prompts
+            return f"{system_prompt}\n\n{user_prompt}"
         
-        # Combine system and user prompts
-        full_prompt = f"{system_prompt}\n\n{user_prompt}"
+        # Keywords were already extracted from the full JD, so only the prompt copy is shortened
+        full_prompt, budget = self.route.fit_prompt(build, {"jd_text": jd_text}, llm=self.llm)
+        print(f"   📏 Prompt ~{budget.input_tokens} tokens (budget {budget.max_input_tokens}), max cost ~${budget.max_cost_usd:.4f}")
         
         # Call LLM
         print("   🧠 Calling LLM to generate resume...")
         try:
-            resume_json = self.llm.generate_json(full_prompt, max_tokens=8000)
+            resume_json = self.route.generate_json(self.llm, full_prompt)
             print(f"   ✅ Resume generated successfully!")
             
             # Validate structure
@@ -249,7 +257,7 @@ def test_generator():
     provider = os.getenv("LLM_PROVIDER", "mock")
     print(f"\nUsing LLM provider: {provider}")
     
-    llm = create_llm_adapter(provider)
+    llm = get_llm_adapter(provider)
     
     # Create generator agent
     generator = GeneratorAgent(llm)
@@ -0,0 +1,230 @@
+"""
+Cassettes - Record real LLM traffic once, replay it offline
+
+RecordingAdapter wraps a real adapter and appends every prompt -> response
+pair (with its latency, and per-chunk timing for streams) to a JSON Lines
+cassette file. ReplayAdapter serves those responses back without network
+access, optionally sleeping for the recorded latency, so full-pipeline
+runs and benchmarks are deterministic and reproducible.
+
+Record a cassette from a real run:
+    LLM_CASSETTE_MODE=record LLM_CASSETTE=cassettes/run1.jsonl python src/main.py
+
+Replay it:
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE=cassettes/run1.jsonl python src/main.py
+"""
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List
+import asyncio
+import json
+import threading
+import time
+
+from .llm_adapter import LLMAdapter, LLMAdapterWrapper, _parse_json_text
+from .llm_cache import request_key
+
+
+DEFAULT_CASSETTE = Path(__file__).parent.parent / ".cache" / "cassettes" / "default.jsonl"
+
+
+class CassetteMissError(LookupError):
+    """Replay was asked for a request that is not on the cassette"""
+
+
+def _key(kind: str, model: str, prompt: str, temperature: float, max_tokens: int, kwargs: Dict[str, Any]) -> str:
+    return request_key(kind, model, prompt, temperature, max_tokens, **kwargs)
+
+
+class RecordingAdapter(LLMAdapterWrapper):
+    """Passes calls through to `inner` and appends each interaction to a cassette"""
+
+    def __init__(self, inner: LLMAdapter, path: Path = DEFAULT_CASSETTE):
+        super().__init__(inner)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _write(self, kind: str, prompt: str, temperature: float, max_tokens: int, kwargs: Dict[str, Any], **fields) -> None:
+        record = {
+            "key": _key(kind, self.model, prompt, temperature, max_tokens, kwargs),
+            "kind": kind,
+            "adapter_model": self.model,
+            "model": kwargs.get("model", self.model),
+            "prompt_preview": prompt[:200],
+            "recorded_at": time.time(),
+            **fields,
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        start = time.monotonic()
+        text = self.inner.generate(prompt, max_tokens, temperature, **kwargs)
+        self._write("text", prompt, temperature, max_tokens, kwargs, response=text, latency=time.monotonic() - start)
+        return text
+
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        start = time.monotonic()
+        result = self.inner.generate_json(prompt, max_tokens, **kwargs)
+        self._write("json", prompt, 0, max_tokens, kwargs, response=result, latency=time.monotonic() - start)
+        return result
+
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        start = time.monotonic()
+        text = await self.inner.agenerate(prompt, max_tokens, temperature, **kwargs)
+        self._write("text", prompt, temperature, max_tokens, kwargs, response=text, latency=time.monotonic() - start)
+        return text
+
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        start = time.monotonic()
+        result = await self.inner.agenerate_json(prompt, max_tokens, **kwargs)
+        self._write("json", prompt, 0, max_tokens, kwargs, response=result, latency=time.monotonic() - start)
+        return result
+
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> Iterator[str]:
+        start = time.monotonic()
+        chunks = []
+        for delta in self.inner.generate_stream(prompt, max_tokens, temperature, **kwargs):
+            chunks.append([round(time.monotonic() - start, 4), delta])
+            yield delta
+        self._write("stream", prompt, temperature, max_tokens, kwargs, chunks=chunks, latency=time.monotonic() - start)
+
+    async def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> AsyncIterator[str]:
+        start = time.monotonic()
+        chunks = []
+        async for delta in self.inner.agenerate_stream(prompt, max_tokens, temperature, **kwargs):
+            chunks.append([round(time.monotonic() - start, 4), delta])
+            yield delta
+        self._write("stream", prompt, temperature, max_tokens, kwargs, chunks=chunks, latency=time.monotonic() - start)
+
+    async def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs) -> AsyncIterator[str]:
+        start = time.monotonic()
+        chunks = []
+        async for delta in self.inner.agenerate_json_stream(prompt, max_tokens, **kwargs):
+            chunks.append([round(time.monotonic() - start, 4), delta])
+            yield delta
+        self._write("json_stream", prompt, 0, max_tokens, kwargs, chunks=chunks, latency=time.monotonic() - start)
+
+
+class ReplayAdapter(LLMAdapter):
+    """
+    Serves recorded responses with no network access
+
+    Identical requests recorded several times are replayed in recording
+    order (the last one repeats). JSON requests can be served from a
+    recorded stream and vice versa.
+
+    Args:
+        path: Cassette file written by RecordingAdapter
+        playback_latency: Sleep for the recorded latency (and chunk timing)
+        speed: Playback speed multiplier when playback_latency is on
+    """
+
+    supports_prefix = True
+
+    def __init__(self, path: Path = DEFAULT_CASSETTE, playback_latency: bool = False, speed: float = 1.0):
+        self.path = Path(path)
+        self.playback_latency = playback_latency
+        self.speed = speed
+        self._records: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.model = None
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self.model = self.model or record.get("adapter_model")
+                self._records.setdefault(record["key"], []).append(record)
+        self.model = self.model or "replay"
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _lookup(self, prompt: str, temperature: float, max_tokens: int, kwargs: Dict[str, Any], kinds: List[str]) -> Dict[str, Any]:
+        """Next recorded interaction for this request (kinds in preference order)"""
+        with self._lock:
+            for kind in kinds:
+                key = _key(kind, self.model, prompt, temperature, max_tokens, kwargs)
+                records = self._records.get(key)
+                if records:
+                    index = self._served.get(key, 0)
+                    self._served[key] = index + 1
+                    self._stats["hits"] += 1
+                    return records[min(index, len(records) - 1)]
+            self._stats["misses"] += 1
+        raise CassetteMissError(
+            f"No recorded {kinds[0]} response in {self.path.name} for prompt: {prompt[:120]!r}"
+        )
+
+    def _delay(self, record: Dict[str, Any]) -> float:
+        return record.get("latency", 0) / self.speed if self.playback_latency else 0
+
+    @staticmethod
+    def _text(record: Dict[str, Any]) -> str:
+        if "chunks" in record:
+            return "".join(delta for _, delta in record["chunks"])
+        response = record["response"]
+        return response if isinstance(response, str) else json.dumps(response)
+
+    @classmethod
+    def _json(cls, record: Dict[str, Any]) -> Dict[str, Any]:
+        if "chunks" in record:
+            return _parse_json_text(cls._text(record))
+        return json.loads(json.dumps(record["response"]))
+
+    def _chunks(self, record: Dict[str, Any]) -> List[List[Any]]:
+        if "chunks" in record:
+            return record["chunks"]
+        return [[record.get("latency", 0), self._text(record)]]
+
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        record = self._lookup(prompt, temperature, max_tokens, kwargs, ["text", "stream"])
+        time.sleep(self._delay(record))
+        return self._text(record)
+
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        record = self._lookup(prompt, 0, max_tokens, kwargs, ["json", "json_stream"])
+        time.sleep(self._delay(record))
+        return self._json(record)
+
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        record = self._lookup(prompt, temperature, max_tokens, kwargs, ["text", "stream"])
+        await asyncio.sleep(self._delay(record))
+        return self._text(record)
+
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        record = self._lookup(prompt, 0, max_tokens, kwargs, ["json", "json_stream"])
+        await asyncio.sleep(self._delay(record))
+        return self._json(record)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, interactions=sum(len(r) for r in self._records.values()))
+
+    def _timeline(self, record: Dict[str, Any]):
+        """(seconds to wait before the chunk, chunk) pairs"""
+        previous = 0.0
+        for offset, delta in self._chunks(record):
+            wait = (offset - previous) / self.speed if self.playback_latency else 0
+            previous = offset
+            yield wait, delta
+
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> Iterator[str]:
+        record = self._lookup(prompt, temperature, max_tokens, kwargs, ["stream", "text"])
+        for wait, delta in self._timeline(record):
+            time.sleep(wait)
+            yield delta
+
+    async def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> AsyncIterator[str]:
+        record = self._lookup(prompt, temperature, max_tokens, kwargs, ["stream", "text"])
+        for wait, delta in self._timeline(record):
+            await asyncio.sleep(wait)
+            yield delta
+
+    async def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs) -> AsyncIterator[str]:
+        record = self._lookup(prompt, 0, max_tokens, kwargs, ["json_stream", "json"])
+        for wait, delta in self._timeline(record):
+            await asyncio.sleep(wait)
+            yield delta
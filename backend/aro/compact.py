@@ -0,0 +1,96 @@
+"""
+Compact Notation - Token-efficient, lossless encoding of JSON data in prompts
+
+Resumes, profiles and feedback used to be pasted into prompts as
+json.dumps(..., indent=2), where indentation, quotes, braces and commas
+cost a large share of the input tokens. They are now written as YAML
+with leaf lists and objects inline:
+
+    title: Orion Platform
+    tech_stack: [Go, Kubernetes, Operator SDK, Docker]
+    metrics: {code_lines: 1.5K+, sync_time: sub-second}
+    features: [Custom Kubernetes operator in Go, 'Automated PostgreSQL, Redis, MinIO setup']
+
+Models read it as easily as JSON. Strings are quoted only where YAML
+would otherwise change their meaning, so decode(encode(data)) == data
+for any JSON value. decode() also reads plain JSON, which lets the
+output parser accept a response written in the notation it was shown.
+
+PROMPT_COMPACT=0 switches prompts back to indented JSON (for comparing
+prompt sizes, see benchmarks/bench_prompt_tokens.py).
+"""
+from typing import Any
+import json
+import os
+
+import yaml
+
+
+# Never wrap long strings: a wrapped bullet costs tokens and reads worse
+_NO_WRAP = 10 ** 9
+
+
+class _Dumper(yaml.SafeDumper):
+    """
+    SafeDumper for prompts: block style at the top level, leaf collections
+    inline, no anchors/aliases, and dict/list/str subclasses (e.g.
+    RepairedJSON) written like their base type
+    """
+
+    def ignore_aliases(self, data):
+        return True
+
+    def represent(self, data):
+        node = self.represent_data(data)
+        if isinstance(node, (yaml.MappingNode, yaml.SequenceNode)):
+            node.flow_style = False
+        self.serialize(node)
+        self.represented_objects = {}
+        self.object_keeper = []
+        self.alias_key = None
+
+
+_Dumper.add_multi_representer(dict, yaml.SafeDumper.represent_dict)
+_Dumper.add_multi_representer(list, yaml.SafeDumper.represent_list)
+_Dumper.add_multi_representer(tuple, yaml.SafeDumper.represent_list)
+_Dumper.add_multi_representer(str, yaml.SafeDumper.represent_str)
+
+
+def encode(data: Any) -> str:
+    """Compact notation for a JSON value (key order kept)"""
+    text = yaml.dump(
+        data,
+        Dumper=_Dumper,
+        sort_keys=False,
+        allow_unicode=True,
+        width=_NO_WRAP,
+        default_flow_style=None,
+    )
+    # Top-level scalars end with a YAML document end marker
+    if text.endswith("\n...\n"):
+        text = text[:-5]
+    return text.rstrip("\n")
+
+
+def decode(text: str) -> Any:
+    """
+    Parse compact notation (or JSON) back into Python data
+
+    Raises:
+        ValueError if the text is not valid compact notation
+    """
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid compact notation: {e}") from e
+
+
+def compact_enabled() -> bool:
+    return os.getenv("PROMPT_COMPACT", "1") != "0"
+
+
+def to_prompt(data: Any) -> str:
+    """Data as prompt text: compact notation, or indented JSON with PROMPT_COMPACT=0"""
+    if compact_enabled():
+        return encode(data)
+    return json.dumps(data, indent=2)
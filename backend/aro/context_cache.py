@@ -0,0 +1,172 @@
+"""
+Context Cache - Upload a shared prompt prefix once and reference it
+
+Every pipeline stage sends the same large user profile ahead of its own
+instructions. Callers pass that text as `prefix=` and adapters that
+support provider-side context caching (Gemini cached content) upload it
+once per model and prefix version, then reference the handle on later
+calls until its TTL runs out.
+
+PrefixCacheAdapter is a local stand-in for providers without native
+caching: it concatenates prefix + prompt but keeps the same reuse
+accounting, so tests can check how often a prefix would be re-sent.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import os
+import threading
+import time
+
+from .llm_adapter import LLMAdapter, LLMAdapterWrapper
+
+
+class ContextCache:
+    """
+    Registry of uploaded prefixes keyed by (model, prefix hash)
+
+    Prefixes shorter than min_prefix_tokens are not uploaded (providers
+    reject small caches and they are cheap to resend anyway). A failed
+    upload is not retried until failure_backoff seconds have passed.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600,
+        min_prefix_tokens: int = 1024,
+        failure_backoff: float = 300,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.min_prefix_tokens = min_prefix_tokens
+        self.failure_backoff = failure_backoff
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # key -> (handle or None after a failed upload, valid until)
+        self._entries: Dict[str, Tuple[Optional[str], float]] = {}
+        self._stats = {"uploads": 0, "reuses": 0, "skipped": 0, "failures": 0, "reused_tokens": 0}
+
+    @staticmethod
+    def key(model: str, prefix: str) -> str:
+        return hashlib.sha256(f"{model}\n{prefix}".encode("utf-8")).hexdigest()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    def get_or_create(self, model: str, prefix: str, create: Callable[[str, str, float], str]) -> Optional[str]:
+        """
+        Handle for a cached prefix, uploading it with create(model, prefix, ttl) if needed
+
+        Returns None when the prefix should be sent inline instead.
+        """
+        if len(prefix) // 4 < self.min_prefix_tokens:
+            self._count("skipped")
+            return None
+
+        key = self.key(model, prefix)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # One upload per key even when several calls arrive together
+        with key_lock:
+            now = self._clock()
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                handle = entry[0]
+                if handle is not None:
+                    self._count("reuses")
+                    self._count("reused_tokens", len(prefix) // 4)
+                return handle
+
+            try:
+                handle = create(model, prefix, self.ttl_seconds)
+            except Exception as e:
+                print(f"⚠️  Context cache upload failed, sending prefix inline: {str(e)[:100]}")
+                self._entries[key] = (None, now + self.failure_backoff)
+                self._count("failures")
+                return None
+
+            # Expire locally a little early so we never reference a dead handle
+            self._entries[key] = (handle, now + self.ttl_seconds * 0.9)
+            self._count("uploads")
+            return handle
+
+    def invalidate(self, model: str, prefix: str) -> None:
+        """Forget a handle the provider no longer recognises"""
+        with self._lock:
+            self._entries.pop(self.key(model, prefix), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = sum(1 for handle, _ in self._entries.values() if handle is not None)
+        return stats
+
+
+class PrefixCacheAdapter(LLMAdapterWrapper):
+    """Local stand-in for provider context caching (prefix is sent inline)"""
+
+    supports_prefix = True
+
+    def __init__(self, inner: LLMAdapter, cache: Optional[ContextCache] = None):
+        super().__init__(inner)
+        self.cache = cache or ContextCache(min_prefix_tokens=0)
+
+    def _inline(self, prompt: str, kwargs: Dict[str, Any]) -> str:
+        prefix = kwargs.pop("prefix", None)
+        if not prefix:
+            return prompt
+        self.cache.get_or_create(self.model, prefix, lambda model, text, ttl: f"local/{self.cache.key(model, text)[:16]}")
+        return prefix + prompt
+
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return self.inner.generate(self._inline(prompt, kwargs), max_tokens, temperature, **kwargs)
+
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return self.inner.generate_json(self._inline(prompt, kwargs), max_tokens, **kwargs)
+
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return await self.inner.agenerate(self._inline(prompt, kwargs), max_tokens, temperature, **kwargs)
+
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return await self.inner.agenerate_json(self._inline(prompt, kwargs), max_tokens, **kwargs)
+
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs):
+        return self.inner.generate_stream(self._inline(prompt, kwargs), max_tokens, temperature, **kwargs)
+
+    def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs):
+        return self.inner.agenerate_stream(self._inline(prompt, kwargs), max_tokens, temperature, **kwargs)
+
+    def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs):
+        return self.inner.agenerate_json_stream(self._inline(prompt, kwargs), max_tokens, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+_context_caches: Dict[str, ContextCache] = {}
+_context_caches_lock = threading.Lock()
+
+
+def get_context_cache(provider: str) -> ContextCache:
+    """
+    Process-wide context cache for a provider, shared by pooled clients
+
+    Configured via LLM_CONTEXT_CACHE_TTL (seconds) and
+    LLM_CONTEXT_CACHE_MIN_TOKENS.
+    """
+    with _context_caches_lock:
+        if provider not in _context_caches:
+            _context_caches[provider] = ContextCache(
+                ttl_seconds=float(os.getenv("LLM_CONTEXT_CACHE_TTL", "3600")),
+                min_prefix_tokens=int(os.getenv("LLM_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+            )
+        return _context_caches[provider]
+
+
+def context_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every process-wide context cache, by provider"""
+    with _context_caches_lock:
+        caches = dict(_context_caches)
+    return {provider: cache.stats() for provider, cache in caches.items()}
@@ -0,0 +1,286 @@
+"""
+Failover - Route calls across providers by health and latency
+
+FailoverAdapter holds one adapter stack per provider (e.g. Gemini and a
+local OpenAI-compatible server) and sends each call to the best healthy
+one, falling through to the next on failure so optimizations keep
+flowing during a provider brownout:
+
+- health: a provider whose circuit breaker is open, or that just failed
+  with a provider-level error (5xx, timeout, empty output, 429 after
+  retries), is ejected for `cooldown` seconds; after that real traffic
+  probes it again. Ejected providers are still tried last rather than
+  failing the call outright.
+- latency: the first provider in the configured order is the primary.
+  Another healthy provider takes over only while its smoothed (EWMA)
+  latency is at least `latency_ratio` times better, so a slow brownout
+  shifts traffic without flapping between providers of similar speed.
+
+Streams fail over only until their first delta; once text has reached
+the caller it is never replayed from another provider. A per-call
+`model` only goes to the primary (other providers use their own
+default model), and `prefix` is prepended for providers that cannot
+take it separately.
+
+Configured with LLM_PROVIDER=failover and LLM_FAILOVER_PROVIDERS (in
+priority order, default "gemini,openai").
+"""
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+import threading
+import time
+
+from .llm_adapter import LLMAdapter
+from .retry import (
+    PROVIDER_FAILURES, CircuitBreaker, CircuitOpenError, DeadlineExceededError,
+    EmptyResponseError, RateLimitError, classify_error, get_circuit_breaker
+)
+
+
+# Errors that say the provider (not the request) is in trouble
+HEALTH_FAILURES = PROVIDER_FAILURES + (RateLimitError, CircuitOpenError, DeadlineExceededError)
+
+
+@dataclass
+class ProviderState:
+    """Health and latency of one provider as seen by the FailoverAdapter"""
+
+    name: str
+    adapter: LLMAdapter
+    breaker: Optional[CircuitBreaker] = None
+    ewma_seconds: Optional[float] = None
+    ejected_until: float = 0.0
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+
+
+class FailoverAdapter(LLMAdapter):
+    """
+    Composite adapter over several providers in priority order
+
+    Args:
+        providers: Adapter per provider name, highest priority first
+        cooldown: Seconds a provider is skipped after a provider-level failure
+        latency_ratio: How much faster (EWMA) a secondary must be to take
+            over from the primary
+        alpha: EWMA smoothing factor for call latency
+        breakers: Circuit breaker per provider to consult before routing
+            (defaults to the shared per-provider breakers)
+    """
+
+    supports_prefix = True
+
+    def __init__(
+        self,
+        providers: Dict[str, LLMAdapter],
+        cooldown: float = 30.0,
+        latency_ratio: float = 2.0,
+        alpha: float = 0.2,
+        breakers: Optional[Dict[str, CircuitBreaker]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not providers:
+            raise ValueError("FailoverAdapter needs at least one provider")
+        breakers = breakers if breakers is not None else {name: get_circuit_breaker(name) for name in providers}
+        self.providers = dict(providers)
+        self.cooldown = cooldown
+        self.latency_ratio = latency_ratio
+        self.alpha = alpha
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._states = [ProviderState(name, adapter, breakers.get(name)) for name, adapter in providers.items()]
+        self._failovers = 0
+
+    @property
+    def model(self) -> str:
+        adapter = self._states[0].adapter
+        return getattr(adapter, "model", type(adapter).__name__)
+
+    def _healthy(self, state: ProviderState, now: float) -> bool:
+        if state.ejected_until > now:
+            return False
+        return state.breaker is None or state.breaker.state != CircuitBreaker.OPEN
+
+    def candidates(self) -> List[ProviderState]:
+        """Providers in the order the next call should try them"""
+        now = self._clock()
+        with self._lock:
+            healthy = [state for state in self._states if self._healthy(state, now)]
+            ejected = [state for state in self._states if state not in healthy]
+            if healthy:
+                best = healthy[0]
+                for state in healthy[1:]:
+                    if (
+                        state.ewma_seconds is not None and best.ewma_seconds is not None
+                        and state.ewma_seconds * self.latency_ratio < best.ewma_seconds
+                    ):
+                        best = state
+                healthy.remove(best)
+                healthy.insert(0, best)
+            return healthy + ejected
+
+    def _options(self, state: ProviderState, prompt: str, kwargs: Dict[str, Any]):
+        """(prompt, kwargs) for one provider"""
+        kwargs = dict(kwargs)
+        if state is not self._states[0]:
+            kwargs.pop("model", None)
+        prefix = kwargs.pop("prefix", None)
+        if prefix:
+            if state.adapter.supports_prefix:
+                kwargs["prefix"] = prefix
+            else:
+                prompt = prefix + prompt
+        return prompt, kwargs
+
+    def _success(self, state: ProviderState, seconds: Optional[float]) -> None:
+        with self._lock:
+            state.calls += 1
+            state.consecutive_failures = 0
+            state.ejected_until = 0.0
+            if seconds is not None:
+                state.ewma_seconds = seconds if state.ewma_seconds is None else (
+                    self.alpha * seconds + (1 - self.alpha) * state.ewma_seconds
+                )
+
+    def _failure(self, state: ProviderState, error: Exception, last: bool) -> None:
+        error = classify_error(error)
+        with self._lock:
+            state.calls += 1
+            state.failures += 1
+            if isinstance(error, HEALTH_FAILURES):
+                state.consecutive_failures += 1
+                state.ejected_until = self._clock() + self.cooldown
+            if not last:
+                self._failovers += 1
+        if not last:
+            print(f"   ⚠️  {state.name} failed ({type(error).__name__}), failing over...")
+
+    def _call(self, method: str, prompt: str, *args, **kwargs) -> Any:
+        candidates = self.candidates()
+        for index, state in enumerate(candidates):
+            provider_prompt, options = self._options(state, prompt, kwargs)
+            start = self._clock()
+            try:
+                result = getattr(state.adapter, method)(provider_prompt, *args, **options)
+            except Exception as e:
+                self._failure(state, e, index == len(candidates) - 1)
+                if index == len(candidates) - 1:
+                    raise
+                continue
+            self._success(state, self._clock() - start)
+            return result
+
+    async def _acall(self, method: str, prompt: str, *args, **kwargs) -> Any:
+        candidates = self.candidates()
+        for index, state in enumerate(candidates):
+            provider_prompt, options = self._options(state, prompt, kwargs)
+            start = self._clock()
+            try:
+                result = await getattr(state.adapter, method)(provider_prompt, *args, **options)
+            except Exception as e:
+                self._failure(state, e, index == len(candidates) - 1)
+                if index == len(candidates) - 1:
+                    raise
+                continue
+            self._success(state, self._clock() - start)
+            return result
+
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return self._call("generate", prompt, max_tokens, temperature, **kwargs)
+
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return self._call("generate_json", prompt, max_tokens, **kwargs)
+
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return await self._acall("agenerate", prompt, max_tokens, temperature, **kwargs)
+
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return await self._acall("agenerate_json", prompt, max_tokens, **kwargs)
+
+    def _open_stream(self, method: str, prompt: str, *args, **kwargs):
+        """(first delta, rest of the stream) from the first provider that starts one"""
+        candidates = self.candidates()
+        for index, state in enumerate(candidates):
+            provider_prompt, options = self._options(state, prompt, kwargs)
+            stream = getattr(state.adapter, method)(provider_prompt, *args, **options)
+            try:
+                first = next(stream)
+            except Exception as e:
+                if isinstance(e, StopIteration):
+                    e = EmptyResponseError("Stream ended before any output")
+                self._failure(state, e, index == len(candidates) - 1)
+                if index == len(candidates) - 1:
+                    raise e
+                continue
+            # Stream latency varies with output length; only health is updated
+            self._success(state, None)
+            return first, stream
+
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> Iterator[str]:
+        first, stream = self._open_stream("generate_stream", prompt, max_tokens, temperature, **kwargs)
+        yield first
+        yield from stream
+
+    async def _aopen_stream(self, method: str, prompt: str, *args, **kwargs):
+        """Async variant of _open_stream()"""
+        candidates = self.candidates()
+        for index, state in enumerate(candidates):
+            provider_prompt, options = self._options(state, prompt, kwargs)
+            stream = getattr(state.adapter, method)(provider_prompt, *args, **options)
+            try:
+                first = await stream.__anext__()
+            except Exception as e:
+                if isinstance(e, StopAsyncIteration):
+                    e = EmptyResponseError("Stream ended before any output")
+                self._failure(state, e, index == len(candidates) - 1)
+                if index == len(candidates) - 1:
+                    raise e
+                continue
+            self._success(state, None)
+            return first, stream
+
+    async def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> AsyncIterator[str]:
+        first, stream = await self._aopen_stream("agenerate_stream", prompt, max_tokens, temperature, **kwargs)
+        yield first
+        async for delta in stream:
+            yield delta
+
+    async def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs) -> AsyncIterator[str]:
+        first, stream = await self._aopen_stream("agenerate_json_stream", prompt, max_tokens, **kwargs)
+        yield first
+        async for delta in stream:
+            yield delta
+
+    async def aclose(self) -> None:
+        for adapter in self.providers.values():
+            await adapter.aclose()
+
+    def health(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider routing state for health checks"""
+        now = self._clock()
+        order = [state.name for state in self.candidates()]
+        with self._lock:
+            return {
+                state.name: {
+                    "healthy": self._healthy(state, now),
+                    "rank": order.index(state.name),
+                    "ewma_seconds": round(state.ewma_seconds, 3) if state.ewma_seconds is not None else None,
+                    "ejected_for_seconds": round(max(0.0, state.ejected_until - now), 2),
+                    "calls": state.calls,
+                    "failures": state.failures,
+                    "consecutive_failures": state.consecutive_failures,
+                }
+                for state in self._states
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Failover count and per-provider counters (flat, for /metrics)"""
+        stats: Dict[str, Any] = {"failovers": self._failovers}
+        for name, entry in self.health().items():
+            stats[f"{name}_healthy"] = int(entry["healthy"])
+            stats[f"{name}_calls"] = entry["calls"]
+            stats[f"{name}_failures"] = entry["failures"]
+            if entry["ewma_seconds"] is not None:
+                stats[f"{name}_ewma_seconds"] = entry["ewma_seconds"]
+        return stats
@@ -0,0 +1,307 @@
+"""
+Hedged Requests - Cut tail latency by racing a duplicate of slow calls
+
+If a call has not returned after a high percentile of recently observed
+latency for the same kind of call, a second identical call is launched.
+The first success wins and the other attempt is cancelled.
+
+Latency is tracked per (model, max_tokens): an 8000-token generation and
+a short evaluator call have very different normal latencies, and a
+single window would make short calls never hedge and long calls hedge
+near their median.
+
+A running thread cannot be interrupted, so once a kind of call can be
+hedged, sync calls race two streams (generate_stream) instead: the loser
+stops reading at its next chunk and closes its stream, which ends the
+provider request and frees its rate limiter slot instead of letting it
+generate to the end. While the window warms up, calls go straight to
+generate/generate_json (and their retry behaviour). The thread pool is
+sized for two attempts per concurrency slot of the rate limiter below.
+
+A budget caps the extra spend: every primary call earns a fraction of a
+hedge token and every hedge spends one, so with budget_ratio=0.1 at most
+~10% of calls are duplicated.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+from .llm_adapter import LLMAdapter, LLMAdapterWrapper, _json_prompt, _parse_json_text
+
+
+def _max_concurrency(adapter: LLMAdapter) -> int:
+    """Concurrency cap of the first rate limiter in an adapter stack (LLM_MAX_CONCURRENCY if none)"""
+    layer = adapter
+    while layer is not None:
+        limiter = getattr(layer, "limiter", None)
+        if limiter is not None:
+            return int(limiter.max_limit)
+        layer = getattr(layer, "inner", None)
+    return int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+
+# Calls whose latencies are comparable: (model override, max_tokens)
+CallKey = Tuple[Optional[str], int]
+
+
+class LatencyWindow:
+    """Sliding window of recent successful call latencies (seconds)"""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile (0-100), or None until min_samples have been seen"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class HedgeBudget:
+    """Token budget limiting hedges to a fraction of primary calls"""
+
+    def __init__(self, ratio: float = 0.1, burst: float = 2.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def earn(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class HedgedAdapter(LLMAdapterWrapper):
+    """Launches a duplicate call when the first one is slower than usual"""
+
+    def __init__(
+        self,
+        inner: LLMAdapter,
+        percentile: float = 95,
+        min_delay: float = 1.0,
+        budget_ratio: float = 0.1,
+        window_size: int = 200,
+        min_samples: int = 20,
+        max_workers: Optional[int] = None
+    ):
+        super().__init__(inner)
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self._windows: Dict[CallKey, LatencyWindow] = {}
+        self._windows_lock = threading.Lock()
+        self.budget = HedgeBudget(budget_ratio)
+        # A primary and a hedge per slot, so primaries never queue behind each other
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or 2 * _max_concurrency(inner), thread_name_prefix="llm-hedge"
+        )
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def call_key(max_tokens: int, kwargs: Dict[str, Any]) -> CallKey:
+        return (kwargs.get("model"), max_tokens)
+
+    def window(self, key: CallKey) -> LatencyWindow:
+        """Latency window for one kind of call (created on first use)"""
+        with self._windows_lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = LatencyWindow(self.window_size, self.min_samples)
+            return window
+
+    def hedge_delay(self, key: CallKey) -> Optional[float]:
+        """Seconds to wait before hedging this kind of call, or None while its window warms up"""
+        observed = self.window(key).percentile(self.percentile)
+        if observed is None:
+            return None
+        return max(self.min_delay, observed)
+
+    def _consume(self, open_stream: Callable[[], Iterator[str]], window: LatencyWindow, lost: threading.Event) -> Optional[str]:
+        """Read a stream to the end (None if the other attempt won first)"""
+        start = time.monotonic()
+        stream = open_stream()
+        parts = []
+        try:
+            for delta in stream:
+                if lost.is_set():
+                    return None
+                parts.append(delta)
+        finally:
+            # Closing ends the provider request and releases its limiter slot
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        window.record(time.monotonic() - start)
+        return "".join(parts)
+
+    def _run(
+        self,
+        key: CallKey,
+        call: Callable[[], Any],
+        open_stream: Callable[[], Iterator[str]],
+        finish: Callable[[str], Any]
+    ) -> Any:
+        """
+        call() while this kind of call cannot be hedged yet; otherwise
+        finish() of the streamed text, racing a second stream if the first
+        is slow
+        """
+        self._count("calls")
+        self.budget.earn()
+        window = self.window(key)
+        delay = self.hedge_delay(key)
+        if delay is None:
+            start = time.monotonic()
+            result = call()
+            window.record(time.monotonic() - start)
+            return result
+
+        # Worker threads get a copy of the caller's context (its telemetry record)
+        finished = threading.Event()
+        primary = self._executor.submit(contextvars.copy_context().run, self._consume, open_stream, window, finished)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._try_hedge():
+            return finish(primary.result())
+
+        hedge = self._executor.submit(contextvars.copy_context().run, self._consume, open_stream, window, finished)
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None and future.result() is not None:
+                        if future is hedge:
+                            self._count("hedge_wins")
+                        return finish(future.result())
+                    error = error or future.exception()
+            raise error
+        finally:
+            # The loser stops at its next chunk
+            finished.set()
+
+    async def _arun(self, key: CallKey, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self._count("calls")
+        self.budget.earn()
+        window = self.window(key)
+
+        async def timed():
+            start = time.monotonic()
+            result = await fn()
+            window.record(time.monotonic() - start)
+            return result
+
+        delay = self.hedge_delay(key)
+        if delay is None:
+            return await timed()
+
+        primary = asyncio.ensure_future(timed())
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._try_hedge():
+                return await primary
+
+            hedge = asyncio.ensure_future(timed())
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _try_hedge(self) -> bool:
+        if self.budget.try_spend():
+            self._count("hedged")
+            return True
+        self._count("budget_denied")
+        return False
+
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return self._run(
+            self.call_key(max_tokens, kwargs),
+            lambda: self.inner.generate(prompt, max_tokens, temperature, **kwargs),
+            lambda: self.inner.generate_stream(prompt, max_tokens, temperature, **kwargs),
+            lambda text: text
+        )
+
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        options = dict(kwargs)
+        temperature = options.pop("temperature", 0)
+        return self._run(
+            self.call_key(max_tokens, kwargs),
+            lambda: self.inner.generate_json(prompt, max_tokens, **kwargs),
+            lambda: self.inner.generate_stream(_json_prompt(prompt, max_tokens), max_tokens, temperature, **options),
+            lambda text: _parse_json_text(text, kwargs.get("response_schema"))
+        )
+
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return await self._arun(
+            self.call_key(max_tokens, kwargs),
+            lambda: self.inner.agenerate(prompt, max_tokens, temperature, **kwargs)
+        )
+
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return await self._arun(
+            self.call_key(max_tokens, kwargs),
+            lambda: self.inner.agenerate_json(prompt, max_tokens, **kwargs)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Call/hedge counters and the hedge delay per kind of call ("model/max_tokens")"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._windows_lock:
+            keys = list(self._windows)
+        stats["hedge_delays"] = {f"{model or 'default'}/{max_tokens}": self.hedge_delay((model, max_tokens)) for model, max_tokens in keys}
+        stats["samples"] = sum(len(self.window(key)) for key in keys)
+        return stats
+
+    @classmethod
+    def from_env(cls, inner: LLMAdapter) -> "HedgedAdapter":
+        """Configured via LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_DELAY and LLM_HEDGE_BUDGET"""
+        return cls(
+            inner,
+            percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+            min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0")),
+            budget_ratio=float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))
+        )
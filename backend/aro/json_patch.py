@@ -0,0 +1,111 @@
+"""
+JSON Patch - Apply RFC 6902 edits to JSON data locally
+
+Lets a stage ask the LLM for the edits to a document instead of the whole
+rewritten document, so output tokens scale with the size of the change:
+
+    apply_patch(resume, [
+        {"op": "replace", "path": "/experience/0/bullets/2", "value": "Built ..."},
+        {"op": "remove", "path": "/experience/1/bullets/3"},
+        {"op": "add", "path": "/experience/1/bullets/-", "value": "Led ..."},
+    ])
+
+Supported operations: add, remove, replace. Paths are JSON Pointers
+(RFC 6901, "~1" for "/" and "~0" for "~"); "-" appends to a list.
+Operations apply in order and the input is never modified.
+"""
+import copy
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+PATCH_OPS = ("add", "remove", "replace")
+
+
+class PatchError(ValueError):
+    """Raised when a patch operation is malformed or its path does not exist"""
+
+
+def parse_pointer(path: str) -> List[str]:
+    """JSON Pointer -> list of reference tokens ("" is the whole document)"""
+    if not isinstance(path, str) or (path and not path.startswith("/")):
+        raise PatchError(f"Invalid JSON Pointer: {path!r}")
+    if not path:
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def _index(container: list, token: str, path: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid list index {token!r} in {path}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"List index {index} out of range in {path}")
+    return index
+
+
+def _resolve(document: Any, tokens: List[str], path: str) -> Tuple[Any, str]:
+    """Parent container of the pointer's target and the last token"""
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                raise PatchError(f"Path not found: {path}")
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_index(target, token, path, allow_end=False)]
+        else:
+            raise PatchError(f"Path not found: {path}")
+    return target, tokens[-1]
+
+
+def _apply_one(document: Any, operation: Dict[str, Any]) -> Any:
+    if not isinstance(operation, dict):
+        raise PatchError(f"Patch operation must be an object, got {type(operation).__name__}")
+    op, path = operation.get("op"), operation.get("path")
+    if op not in PATCH_OPS:
+        raise PatchError(f"Unsupported patch op: {op!r}")
+    if op != "remove" and "value" not in operation:
+        raise PatchError(f"'{op}' at {path} needs a value")
+
+    tokens = parse_pointer(path)
+    if not tokens:
+        if op == "remove":
+            raise PatchError("Cannot remove the whole document")
+        return copy.deepcopy(operation["value"])
+
+    parent, token = _resolve(document, tokens, path)
+    value = copy.deepcopy(operation.get("value"))
+    if isinstance(parent, dict):
+        if op != "add" and token not in parent:
+            raise PatchError(f"Path not found: {path}")
+        if op == "remove":
+            del parent[token]
+        else:
+            parent[token] = value
+    elif isinstance(parent, list):
+        index = _index(parent, token, path, allow_end=(op == "add"))
+        if op == "add":
+            parent.insert(index, value)
+        elif op == "remove":
+            del parent[index]
+        else:
+            parent[index] = value
+    else:
+        raise PatchError(f"Path not found: {path}")
+    return document
+
+
+def apply_patch(document: Any, operations: Iterable[Dict[str, Any]]) -> Any:
+    """
+    Apply patch operations in order to a copy of `document`
+
+    Raises:
+        PatchError: if an operation is malformed or addresses a missing path
+            (nothing is applied in that case)
+    """
+    result = copy.deepcopy(document)
+    for operation in operations:
+        result = _apply_one(result, operation)
+    return result
@@ -0,0 +1,325 @@
+"""
+Incremental JSON parsing for streamed LLM output
+
+Consumes text chunks as they arrive from a streaming call and reports
+each top-level member of the root object (e.g. "summary", "skills")
+as soon as its value is complete, before the full response has ended.
+
+When a response is cut off (e.g. at max_output_tokens), repair_json()
+closes it at the last complete value so the finished part can be kept
+and only the remaining keys re-requested.
+"""
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class PartialJSONError(ValueError):
+    """Raised when a response could not be parsed and nothing was salvageable"""
+
+    def __init__(self, message: str, sections: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.sections = sections or {}
+
+
+class IncrementalJSONParser:
+    """
+    Streaming scanner for a single top-level JSON object
+
+    Usage:
+        parser = IncrementalJSONParser()
+        for chunk in stream:
+            for key, value in parser.feed(chunk):
+                ...  # section finished
+        result = parser.finish()
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.sections: Dict[str, Any] = {}
+
+        self._pos = 0               # next char of buffer to scan
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+        self._state = "key"         # key | value | scalar | done (within the root object)
+
+    @property
+    def complete(self) -> bool:
+        """True once the root object has been closed"""
+        return self._root_end is not None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Add a chunk of streamed text
+
+        Returns:
+            (key, value) pairs for top-level members completed by this chunk
+        """
+        self.buffer += chunk
+        completed = []
+
+        while self._pos < len(self.buffer) and not self.complete:
+            i = self._pos
+            ch = self.buffer[i]
+            self._pos += 1
+
+            # Skip markdown fences / preamble before the root object
+            if self._root_start is None:
+                if ch == "{":
+                    self._root_start = i
+                    self._depth = 1
+                    self._member_start = i + 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == "value":
+                        self._emit(i, completed)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._state == "scalar":
+                        self._emit(i - 1, completed)
+                    self._root_end = i
+                elif self._depth == 1 and self._state == "value":
+                    self._emit(i, completed)
+            elif self._depth == 1:
+                if ch == ":" and self._state == "key":
+                    self._state = "value"
+                elif ch == ",":
+                    if self._state == "scalar":
+                        self._emit(i - 1, completed)
+                    self._state = "key"
+                    self._member_start = i + 1
+                elif self._state == "value" and not ch.isspace():
+                    self._state = "scalar"
+
+        return completed
+
+    def _emit(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        """Parse the member text ending at `end` and record it"""
+        self._state = "done"
+        member = self.buffer[self._member_start:end + 1]
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return
+
+        for key, value in parsed.items():
+            self.sections[key] = value
+            completed.append((key, value))
+
+    def finish(self, allow_partial: bool = False) -> Dict[str, Any]:
+        """
+        Return the fully parsed root object
+
+        Args:
+            allow_partial: If the object is truncated or malformed, return
+                the top-level sections that did complete instead of raising
+
+        Raises:
+            PartialJSONError if no complete object (or, with allow_partial,
+            no complete section) was produced
+        """
+        if self.complete:
+            try:
+                return json.loads(self.buffer[self._root_start:self._root_end + 1])
+            except json.JSONDecodeError as e:
+                reason = f"Malformed JSON object in stream: {e}"
+        else:
+            reason = "Incomplete JSON object in stream"
+
+        if allow_partial and self.sections:
+            return dict(self.sections)
+        raise PartialJSONError(reason, dict(self.sections))
+
+
+def parse_sections(text: str) -> Dict[str, Any]:
+    """
+    Parse a complete response, salvaging finished top-level sections
+    when the tail is truncated or malformed
+
+    Raises:
+        PartialJSONError if not even one section could be recovered
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.finish(allow_partial=True)
+
+
+def missing_sections(result: Dict[str, Any], required: Iterable[str]) -> List[str]:
+    """List required top-level keys absent from a (possibly salvaged) result"""
+    return [key for key in required if key not in result]
+
+
+class RepairedJSON(dict):
+    """
+    Object rebuilt from a truncated response by repair_json()
+
+    `truncated` lists the top-level keys whose values were cut off (and
+    closed by the repair) rather than completed by the model.
+    """
+
+    def __init__(self, data: Dict[str, Any], truncated: Optional[List[str]] = None):
+        super().__init__(data)
+        self.truncated = truncated or []
+
+
+def _string_end(text: str, start: int) -> Optional[int]:
+    """Index of the quote closing the string opened at `start`, or None"""
+    escape = False
+    for i in range(start + 1, len(text)):
+        ch = text[i]
+        if escape:
+            escape = False
+        elif ch == "\\":
+            escape = True
+        elif ch == '"':
+            return i
+    return None
+
+
+def _close_string(fragment: str) -> str:
+    """Drop a partial escape from an unterminated string and close it"""
+    fragment = re.sub(r"\\u[0-9a-fA-F]{0,3}$", "", fragment)
+    trailing = len(fragment) - len(fragment.rstrip("\\"))
+    if trailing % 2:
+        fragment = fragment[:-1]
+    return fragment + '"'
+
+
+def repair_json(text: str) -> str:
+    """
+    Close a JSON document that was cut off mid-output
+
+    Keeps everything up to the last complete value, closes an unterminated
+    string value, drops a dangling trailing element (partial key, key with
+    no value, trailing comma, partial number or literal, nested container
+    with nothing complete in it) and appends the brackets still open. Text
+    after the root value is ignored.
+
+    Raises:
+        PartialJSONError if the text contains no JSON object or array
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise PartialJSONError("No JSON object to repair")
+    start = min(starts)
+
+    # [closer, state] per open container; states:
+    #   object: first | key | colon | value | after
+    #   array:  first | value | after
+    stack: List[List[str]] = []
+    good_end, good_closers = start, ""
+    dangling_string: Optional[int] = None
+    token_start: Optional[int] = None
+
+    def closers() -> str:
+        return "".join(closer for closer, _ in reversed(stack))
+
+    def accepts_value() -> bool:
+        return not stack or stack[-1][1] == "value" or (stack[-1][0] == "]" and stack[-1][1] == "first")
+
+    i = start
+    while i < len(text):
+        ch = text[i]
+
+        if token_start is not None:
+            if ch in ",]}" or ch.isspace():
+                try:
+                    json.loads(text[token_start:i])
+                except json.JSONDecodeError:
+                    break
+                token_start = None
+                stack[-1][1] = "after"
+                good_end, good_closers = i, closers()
+                continue
+            i += 1
+            continue
+
+        if ch.isspace():
+            i += 1
+            continue
+
+        if ch == '"':
+            end = _string_end(text, i)
+            is_key = stack and stack[-1][0] == "}" and stack[-1][1] in ("first", "key")
+            if not is_key and not accepts_value():
+                break
+            if end is None:
+                if not is_key:
+                    dangling_string = i
+                break
+            stack[-1][1] = "colon" if is_key else "after"
+            if not is_key:
+                good_end, good_closers = end + 1, closers()
+            i = end + 1
+            continue
+
+        if ch in "{[":
+            if not accepts_value():
+                break
+            stack.append(["}" if ch == "{" else "]", "first"])
+            if len(stack) == 1:
+                good_end, good_closers = i + 1, closers()
+        elif ch in "}]":
+            if stack[-1][0] != ch or stack[-1][1] not in ("first", "after"):
+                break
+            stack.pop()
+            if not stack:
+                return text[start:i + 1]
+            stack[-1][1] = "after"
+            good_end, good_closers = i + 1, closers()
+        elif ch == ",":
+            if stack[-1][1] != "after":
+                break
+            stack[-1][1] = "key" if stack[-1][0] == "}" else "value"
+        elif ch == ":":
+            if stack[-1][0] != "}" or stack[-1][1] != "colon":
+                break
+            stack[-1][1] = "value"
+        else:
+            if not accepts_value():
+                break
+            token_start = i
+        i += 1
+
+    if dangling_string is not None:
+        return text[start:dangling_string] + _close_string(text[dangling_string:]) + closers()
+    if token_start is not None and i == len(text) and text[token_start:] in ("true", "false", "null"):
+        return text[start:] + closers()
+    return text[start:good_end] + good_closers
+
+
+def repair_truncated(text: str) -> RepairedJSON:
+    """
+    Parse a truncated or malformed response after repair_json()
+
+    Raises:
+        PartialJSONError if the repaired text is not a non-empty object
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    try:
+        repaired = json.loads(repair_json(text))
+    except json.JSONDecodeError as e:
+        raise PartialJSONError(f"Unrepairable JSON: {e}", dict(parser.sections))
+
+    if not isinstance(repaired, dict) or not repaired:
+        raise PartialJSONError("Nothing salvageable in JSON response", dict(parser.sections))
+    return RepairedJSON(repaired, [key for key in repaired if key not in parser.sections])
@@ -2,14 +2,42 @@
 LLM Adapter - Google Gemini using NEW SDK
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator, AsyncIterator, Callable, Deque, Tuple
 import os
 import json
+import math
 import time
+import random
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from . import telemetry
+from .json_stream import repair_truncated, PartialJSONError
+from .compact import compact_enabled, decode as decode_compact
+from .retry import (
+    RetryPolicy, CircuitBreaker, get_circuit_breaker, classify_error,
+    EmptyResponseError, InvalidRequestError, LLMTimeoutError, RateLimitError,
+    SchemaValidationError, ServiceUnavailableError
+)
 
 
 class LLMAdapter(ABC):
-    """Abstract base class for LLM providers"""
+    """
+    Abstract base class for LLM providers
+    
+    Per-call options are passed as keyword arguments: `model` overrides
+    the adapter's default model, the JSON methods accept `temperature`
+    (default 0), `prefix` is a large shared context sent ahead of the
+    prompt that providers may cache (see aro.context_cache), and
+    `response_schema` is a Pydantic model the JSON output should follow
+    (providers that support it constrain generation to the schema).
+    Wrappers forward any keyword arguments unchanged.
+    """
+    
+    # Adapters that accept `prefix=` set this; callers prepend it otherwise
+    supports_prefix = False
     
     @abstractmethod
     def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7) -> str:
@@ -20,12 +48,205 @@ class LLMAdapter(ABC):
     def generate_json(self, prompt: str, max_tokens: int = 4000) -> Dict[str, Any]:
         """Generate structured JSON from prompt"""
         pass
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        """
+        Async text generation.
+        
+        Providers without a native async client fall back to running the
+        blocking call in a worker thread so the event loop stays free.
+        """
+        return await asyncio.to_thread(self.generate, prompt, max_tokens, temperature, **kwargs)
+    
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        """Async structured JSON generation"""
+        return await asyncio.to_thread(self.generate_json, prompt, max_tokens, **kwargs)
+    
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> Iterator[str]:
+        """
+        Stream generated text as incremental deltas.
+        
+        Providers without native streaming yield the full response once.
+        """
+        yield self.generate(prompt, max_tokens, temperature, **kwargs)
+    
+    async def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> AsyncIterator[str]:
+        """Async variant of generate_stream()"""
+        yield await self.agenerate(prompt, max_tokens, temperature, **kwargs)
+    
+    async def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream the raw text of a JSON response (temperature=0 by default).
+        
+        Feed the deltas to aro.json_stream.IncrementalJSONParser to get
+        sections as they complete.
+        """
+        async for delta in self.agenerate_stream(_json_prompt(prompt, max_tokens), max_tokens, temperature, **kwargs):
+            yield delta
+    
+    async def aclose(self) -> None:
+        """
+        Close async connections bound to the running event loop
+        
+        Call before closing a short-lived loop that made async calls
+        (connections cannot be closed once their loop is gone).
+        """
+
+
+class LLMAdapterWrapper(LLMAdapter):
+    """
+    Base class for adapters that add behaviour around another adapter
+    (caching, rate limiting, ...). Every call is delegated to `inner`
+    unless a subclass overrides it.
+    """
+    
+    def __init__(self, inner: LLMAdapter):
+        self.inner = inner
+    
+    @property
+    def model(self) -> str:
+        return getattr(self.inner, "model", type(self.inner).__name__)
+    
+    @property
+    def supports_prefix(self) -> bool:
+        return self.inner.supports_prefix
+    
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return self.inner.generate(prompt, max_tokens, temperature, **kwargs)
+    
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return self.inner.generate_json(prompt, max_tokens, **kwargs)
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return await self.inner.agenerate(prompt, max_tokens, temperature, **kwargs)
+    
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return await self.inner.agenerate_json(prompt, max_tokens, **kwargs)
+    
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> Iterator[str]:
+        return self.inner.generate_stream(prompt, max_tokens, temperature, **kwargs)
+    
+    def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> AsyncIterator[str]:
+        return self.inner.agenerate_stream(prompt, max_tokens, temperature, **kwargs)
+    
+    def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs) -> AsyncIterator[str]:
+        return self.inner.agenerate_json_stream(prompt, max_tokens, **kwargs)
+    
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def _json_prompt(prompt: str, max_tokens: int) -> str:
+    """Append the JSON-only output instruction to a prompt"""
+    return f"{prompt}\n\nReturn ONLY valid JSON, no markdown, no explanation. Keep under {max_tokens} tokens."
+
+
+def _parse_compact_text(text: str, schema=None) -> Optional[Dict[str, Any]]:
+    """
+    Object from a compact-notation response (None if it is not one)
+    
+    Only accepted when prompts use the notation (PROMPT_COMPACT) and the
+    object's top-level keys match the response schema: prose such as
+    "Note: I could not ..." is valid YAML too.
+    """
+    fields = getattr(schema, "model_fields", None)
+    if not fields or not compact_enabled() or text.startswith(("{", "[")):
+        return None
+    try:
+        data = decode_compact(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not data:
+        return None
+    required = {name for name, field in fields.items() if field.is_required()}
+    if not required <= data.keys() <= fields.keys():
+        return None
+    return data
+
+
+def _parse_json_text(response: str, schema=None) -> Dict[str, Any]:
+    """
+    Strip markdown fences from an LLM response and parse it as JSON.
+    
+    If the tail is truncated or malformed, the output is repaired at the
+    last complete value instead of being discarded; the result is then a
+    RepairedJSON listing the top-level keys that were cut off. A response
+    written in compact notation (see aro.compact) is parsed as such when
+    its keys match the response schema.
+    """
+    if not response:
+        raise Exception("Empty response from generate()")
+    
+    # Clean response
+    text = response.strip()
+    if text.startswith('```json'):
+        text = text[7:]
+    if text.startswith('```'):
+        text = text[3:]
+    if text.endswith('```'):
+        text = text[:-3]
+    text = text.strip()
+    
+    if not text:
+        raise Exception("Empty text after cleaning")
+    
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        try:
+            repaired = repair_truncated(text)
+        except PartialJSONError:
+            # A model may answer in the compact notation its prompt used
+            data = _parse_compact_text(text, schema)
+            if data is not None:
+                print("   ⚠️  Response was in compact notation, not JSON; parsed it as such")
+                return data
+            print(f"\n❌ Failed to parse JSON response")
+            print(f"Response was: {response[:200]}")
+            raise Exception(f"Invalid JSON: {e}")
+        
+        print(f"   ⚠️  Truncated JSON response repaired, cut off: {', '.join(repaired.truncated) or 'nothing'}")
+        return repaired
+
+
+def validate_json(data: Dict[str, Any], schema) -> Dict[str, Any]:
+    """
+    Validate parsed output against a Pydantic response schema
+    
+    Returns the coerced data with only the fields the model produced
+    (optional fields it left out are not filled with defaults).
+    
+    Raises:
+        SchemaValidationError: if the output does not match the schema
+    """
+    from pydantic import ValidationError
+    
+    try:
+        return schema.model_validate(data).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or '<root>'}: {error['msg']}"
+            for error in e.errors()[:5]
+        )
+        raise SchemaValidationError(f"Response does not match {schema.__name__}: {problems}")
 
 
 class GeminiAdapter(LLMAdapter):
     """Google Gemini adapter using NEW google-genai SDK"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    model = 'gemini-2.5-flash'
+    supports_prefix = True
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 120.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        context_cache=None,
+        base_url: Optional[str] = None
+    ):
         try:
             from google import genai
             from google.genai import types
@@ -38,120 +259,1090 @@ class GeminiAdapter(LLMAdapter):
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY not found")
         
-        self.client = genai.Client(api_key=self.api_key)
         self.types = types
+        # Point at another endpoint, e.g. the local fake server in benchmarks/fake_gemini.py
+        self.base_url = base_url or os.getenv("GEMINI_BASE_URL") or None
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        # Shared across all Gemini adapters so pooled clients fail fast together
+        self.breaker = breaker or get_circuit_breaker("gemini")
+        # Shared so a prefix is uploaded once, not once per pooled client
+        from .context_cache import get_context_cache
+        self.context_cache = context_cache or get_context_cache("gemini")
+        self.client = genai.Client(
+            api_key=self.api_key,
+            http_options=self._http_options(max_keepalive_connections, keepalive_expiry)
+        )
     
-    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7) -> str:
-        """Generate text using Gemini with retry logic"""
+    def _http_options(self, max_keepalive_connections: int, keepalive_expiry: float):
+        """
+        Keep idle connections open between calls so repeated requests reuse
+        the TLS session instead of reconnecting (LLM calls are often tens of
+        seconds apart, well past httpx's 5 s default expiry).
+        """
+        import httpx
+        import importlib.util
         
+        limits = httpx.Limits(
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        options = {"client_args": {"limits": limits}}
+        # The async client only uses httpx when aiohttp is not installed
+        if importlib.util.find_spec("aiohttp") is None:
+            options["async_client_args"] = {"limits": limits}
+        if self.base_url:
+            options["base_url"] = self.base_url
+        return self.types.HttpOptions(**options)
+    
+    def _request(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        timeout: Optional[float] = None,
+        model: Optional[str] = None,
+        cached_content: Optional[str] = None,
+        response_schema=None
+    ) -> Dict[str, Any]:
+        """Build generate_content kwargs shared by the sync and async paths"""
         # Add token limit instruction to prompt
         prompt_with_limit = f"{prompt}\n\nIMPORTANT: Keep response under {max_tokens} tokens."
         
-        max_retries = 3
-        retry_delay = 2
-        last_error = None
-        
-        for attempt in range(max_retries):
-            try:
-                response = self.client.models.generate_content(
-                    model='gemini-2.5-flash',
-                    contents=prompt_with_limit,
-                    config=self.types.GenerateContentConfig(
-                        temperature=temperature,
-                        max_output_tokens=max_tokens,
-                    )
-                )
-                
-                # Check if response is valid
-                if not response:
-                    raise Exception("No response from API")
-                
-                print(response)
-                
-                if not hasattr(response, 'text') or not response.text:
-                    raise Exception("Empty response (API may be overloaded)")
-                
-                return response.text
-                
-            except Exception as e:
-                last_error = e
-                error_msg = str(e)
-                
-                # Check if retriable error
-                is_retriable = (
-                    '503' in error_msg or 
-                    'overloaded' in error_msg.lower() or 
-                    'unavailable' in error_msg.lower() or
-                    'empty response' in error_msg.lower()
-                )
-                
-                if is_retriable and attempt < max_retries - 1:
-                    wait_time = retry_delay * (attempt + 1)
-                    print(f"   ⚠️  API issue, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                elif is_retriable:
-                    print(f"\n❌ Gemini API failed after {max_retries} attempts.")
-                    print("💡 The API is overloaded or unavailable.")
-                    print("📝 Wait a few minutes and try again.")
-                    raise Exception("API unavailable. Try again later.")
-                else:
-                    # Non-retriable error
-                    print(f"\n❌ API Error: {error_msg}")
-                    raise
-        
-        raise Exception(f"Failed after {max_retries} attempts: {last_error}")
+        return {
+            "model": model or self.model,
+            "contents": prompt_with_limit,
+            "config": self.types.GenerateContentConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                cached_content=cached_content,
+                # Constrained decoding: output is always JSON matching the schema
+                response_mime_type="application/json" if response_schema else None,
+                response_schema=response_schema,
+                http_options=self.types.HttpOptions(timeout=int(timeout * 1000)) if timeout else None,
+            )
+        }
     
-    def generate_json(self, prompt: str, max_tokens: int = 4000) -> Dict[str, Any]:
-        """Generate JSON using Gemini"""
+    def _create_cached_content(self, model: str, prefix: str, ttl_seconds: float) -> str:
+        """Upload a prompt prefix as Gemini cached content, return its name"""
+        cached = self.client.caches.create(
+            model=model,
+            config=self.types.CreateCachedContentConfig(
+                contents=[prefix],
+                ttl=f"{int(ttl_seconds)}s",
+                display_name="aro-prefix"
+            )
+        )
+        return cached.name
+    
+    def _resolve_prefix(self, model: str, prefix: Optional[str], prompt: str) -> Tuple[str, Optional[str]]:
+        """Contents to send, and the cached-content name when the prefix is cached"""
+        if not prefix:
+            return prompt, None
+        handle = self.context_cache.get_or_create(model, prefix, self._create_cached_content)
+        return (prompt, handle) if handle else (prefix + prompt, None)
+    
+    def _with_prefix(self, run: Callable, model: str, prefix: Optional[str], prompt: str):
+        """Call run(contents, cached_content), resending the prefix inline if the cache is gone"""
+        contents, handle = self._resolve_prefix(model, prefix, prompt)
+        try:
+            return run(contents, handle)
+        except InvalidRequestError:
+            if handle is None:
+                raise
+            # Cached content expired or was deleted upstream
+            self.context_cache.invalidate(model, prefix)
+            return run(prefix + prompt, None)
+    
+    async def _awith_prefix(self, run: Callable, model: str, prefix: Optional[str], prompt: str):
+        """Async variant of _with_prefix() (uploads run in a worker thread)"""
+        contents, handle = prompt, None
+        if prefix:
+            contents, handle = await asyncio.to_thread(self._resolve_prefix, model, prefix, prompt)
+        try:
+            return await run(contents, handle)
+        except InvalidRequestError:
+            if handle is None:
+                raise
+            self.context_cache.invalidate(model, prefix)
+            return await run(prefix + prompt, None)
+    
+    @staticmethod
+    def _response_text(response) -> str:
+        """Extract text from a Gemini response, raising on empty output"""
+        # Check if response is valid
+        if not response:
+            raise EmptyResponseError("No response from API")
         
-        json_prompt = f"{prompt}\n\nReturn ONLY valid JSON, no markdown, no explanation. Keep under {max_tokens} tokens."
+        if not hasattr(response, 'text') or not response.text:
+            raise EmptyResponseError("Empty response (API may be overloaded)")
         
-        try:
-            response = self.generate(json_prompt, max_tokens, temperature=0)
-            
-            if not response:
-                raise Exception("Empty response from generate()")
+        return response.text
+    
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> str:
+        """Generate text using Gemini with the configured retry policy"""
+        model = model or self.model
+        
+        def run(contents: str, cached_content: Optional[str]) -> str:
+            def attempt(timeout: Optional[float]) -> str:
+                with telemetry.upstream():
+                    response = self.client.models.generate_content(
+                        **self._request(contents, max_tokens, temperature, timeout, model, cached_content, response_schema)
+                    )
+                telemetry.add_usage_metadata(response)
+                return self._response_text(response)
             
-            # Clean response
-            text = response.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            text = text.strip()
+            return self.retry_policy.call(attempt, self.breaker)
+        
+        return self._with_prefix(run, model, prefix, prompt)
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> str:
+        """Generate text using the async Gemini client with the configured retry policy"""
+        model = model or self.model
+        
+        async def run(contents: str, cached_content: Optional[str]) -> str:
+            async def attempt(timeout: Optional[float]) -> str:
+                with telemetry.upstream():
+                    response = await self.client.aio.models.generate_content(
+                        **self._request(contents, max_tokens, temperature, timeout, model, cached_content, response_schema)
+                    )
+                telemetry.add_usage_metadata(response)
+                return self._response_text(response)
             
-            if not text:
-                raise Exception("Empty text after cleaning")
+            return await self.retry_policy.acall(attempt, self.breaker)
+        
+        return await self._awith_prefix(run, model, prefix, prompt)
+    
+    def generate_json(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> Dict[str, Any]:
+        """
+        Generate JSON using Gemini
+        
+        With a response_schema the output is constrained to that schema
+        (JSON mime type), so it parses unless it was cut off.
+        """
+        response = self.generate(_json_prompt(prompt, max_tokens), max_tokens, temperature, model, prefix, response_schema)
+        return _parse_json_text(response, response_schema)
+    
+    async def agenerate_json(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> Dict[str, Any]:
+        """Generate JSON using the async Gemini client"""
+        response = await self.agenerate(_json_prompt(prompt, max_tokens), max_tokens, temperature, model, prefix, response_schema)
+        return _parse_json_text(response, response_schema)
+    
+    def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> Iterator[str]:
+        """
+        Stream text deltas using generate_content_stream
+        
+        Only opening the stream (up to the first chunk) is retried; once
+        output has reached the caller it is never replayed.
+        """
+        model = model or self.model
+        
+        def run(contents: str, cached_content: Optional[str]):
+            def open_stream(timeout: Optional[float]):
+                with telemetry.upstream():
+                    stream = iter(self.client.models.generate_content_stream(
+                        **self._request(contents, max_tokens, temperature, timeout, model, cached_content, response_schema)
+                    ))
+                    for chunk in stream:
+                        if chunk.text:
+                            return chunk, stream
+                raise EmptyResponseError("Empty response (API may be overloaded)")
             
-            return json.loads(text)
+            return self.retry_policy.call(open_stream, self.breaker)
+        
+        last, stream = self._with_prefix(run, model, prefix, prompt)
+        yield last.text
+        for chunk in stream:
+            last = chunk
+            if chunk.text:
+                yield chunk.text
+        # Every chunk carries usage so far; the last one has the totals
+        telemetry.add_usage_metadata(last)
+    
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> AsyncIterator[str]:
+        """Stream text deltas using the async generate_content_stream"""
+        model = model or self.model
+        
+        async def run(contents: str, cached_content: Optional[str]):
+            async def open_stream(timeout: Optional[float]):
+                with telemetry.upstream():
+                    stream = await self.client.aio.models.generate_content_stream(
+                        **self._request(contents, max_tokens, temperature, timeout, model, cached_content, response_schema)
+                    )
+                    async for chunk in stream:
+                        if chunk.text:
+                            return chunk, stream
+                raise EmptyResponseError("Empty response (API may be overloaded)")
             
-        except json.JSONDecodeError as e:
-            print(f"\n❌ Failed to parse JSON response")
-            print(f"Response was: {response[:200]}")
-            raise Exception(f"Invalid JSON: {e}")
-        except Exception:
-            raise
+            return await self.retry_policy.acall(open_stream, self.breaker)
+        
+        last, stream = await self._awith_prefix(run, model, prefix, prompt)
+        yield last.text
+        async for chunk in stream:
+            last = chunk
+            if chunk.text:
+                yield chunk.text
+        telemetry.add_usage_metadata(last)
 
 
 class MockAdapter(LLMAdapter):
-    """Mock adapter for testing"""
+    """
+    Mock adapter for tests and load testing
     
-    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7) -> str:
-        return "Mock response"
+    Prompts from known pipeline stages get stage-appropriate JSON (see
+    aro.mock_responses) so the whole pipeline runs end to end; anything
+    else gets "Mock response" / {"mock": "data"}.
     
-    def generate_json(self, prompt: str, max_tokens: int = 4000) -> Dict[str, Any]:
-        return {"mock": "data"}
+    The latency and fault options make it behave like a provider under
+    load: every attempt waits a lognormal base latency (given by its p50
+    and p99) plus seconds_per_token per output token, and may fail with a
+    503, return empty output, truncate its JSON or wrap it in malformed
+    markdown fences. Errors go through the retry policy and circuit
+    breaker when given, and JSON goes through the same parser as Gemini's.
+    
+    Args:
+        latency_p50: Median base latency per attempt (seconds, 0 = none)
+        latency_p99: 99th percentile base latency (None = always p50)
+        seconds_per_token: Extra delay per output token (~4 characters)
+        error_rate: Fraction of attempts failing with a 503
+        empty_rate: Fraction of attempts returning no text
+        truncate_rate: Fraction of responses cut off part-way
+        bad_fence_rate: Fraction of responses wrapped in prose and fences
+        seed: Seed for reproducible latency and fault sequences
+        retry_policy: Retry injected failures like a real provider would
+        breaker: Circuit breaker shared with retry_policy
+    """
+    
+    CHUNK_SIZE = 16
+    supports_prefix = True
+    FAULTS = ("unavailable", "empty", "truncated", "bad_fence")
+    BAD_FENCES = (
+        "Here is the resume JSON you asked for:\n```json\n{text}\n```",
+        "```JSON\n{text}\n```\nLet me know if you want any changes.",
+        "``json\n{text}\n``",
+    )
+    
+    def __init__(
+        self,
+        latency_p50: float = 0.0,
+        latency_p99: Optional[float] = None,
+        seconds_per_token: float = 0.0,
+        error_rate: float = 0.0,
+        empty_rate: float = 0.0,
+        truncate_rate: float = 0.0,
+        bad_fence_rate: float = 0.0,
+        seed: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.latency_p50 = latency_p50
+        self.latency_p99 = latency_p99
+        self.seconds_per_token = seconds_per_token
+        self.rates = (error_rate, empty_rate, truncate_rate, bad_fence_rate)
+        self.retry_policy = retry_policy
+        self.breaker = breaker
+        
+        # Lognormal with median p50: mu = ln(p50), p99 = exp(mu + 2.326 * sigma)
+        self._mu = math.log(latency_p50) if latency_p50 > 0 else 0.0
+        self._sigma = 0.0
+        if latency_p50 > 0 and latency_p99 and latency_p99 > latency_p50:
+            self._sigma = math.log(latency_p99 / latency_p50) / 2.3263
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, **{fault: 0 for fault in self.FAULTS}}
+    
+    def _body(self, prompt: str, json_mode: bool) -> str:
+        """Response text before any fault is applied"""
+        from .mock_responses import mock_response
+        with self._lock:
+            response = mock_response(prompt, self._rng)
+        if response is None:
+            return json.dumps({"mock": "data"}) if json_mode else "Mock response"
+        return json.dumps(response, indent=2)
+    
+    def simulate_attempt(self, prompt: str, json_mode: bool) -> Tuple[float, Any]:
+        """Simulate one attempt: (base latency, response text or the error to raise)"""
+        with self._lock:
+            self._stats["calls"] += 1
+            latency = self._rng.lognormvariate(self._mu, self._sigma) if self.latency_p50 > 0 else 0.0
+            draw = self._rng.random()
+            fault = None
+            for name, rate in zip(self.FAULTS, self.rates):
+                if draw < rate:
+                    fault = name
+                    break
+                draw -= rate
+            if fault:
+                self._stats[fault] += 1
+            cut = self._rng.uniform(0.25, 0.75)
+            fence = self._rng.choice(self.BAD_FENCES)
+        
+        if fault == "unavailable":
+            return latency, ServiceUnavailableError("503 UNAVAILABLE: The model is overloaded (mock)", status=503)
+        if fault == "empty":
+            return latency, EmptyResponseError("Empty response (API may be overloaded)")
+        
+        text = self._body(prompt, json_mode)
+        if fault == "truncated":
+            text = text[:int(len(text) * cut)]
+        elif fault == "bad_fence":
+            text = fence.format(text=text)
+        return latency, text
+    
+    def token_delay(self, text: str) -> float:
+        """Generation time for a piece of output"""
+        return self.seconds_per_token * (len(text) // 4)
+    
+    @staticmethod
+    def _wait(delay: float, timeout: Optional[float]) -> None:
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise LLMTimeoutError(f"Mock call took longer than {timeout:.0f}s")
+        if delay > 0:
+            time.sleep(delay)
+    
+    def _call(self, attempt: Callable[[Optional[float]], Any]) -> Any:
+        if self.retry_policy is None:
+            return attempt(None)
+        return self.retry_policy.call(attempt, self.breaker)
+    
+    async def _acall(self, attempt: Callable[[Optional[float]], Any]) -> Any:
+        if self.retry_policy is None:
+            return await attempt(None)
+        return await self.retry_policy.acall(attempt, self.breaker)
+    
+    @staticmethod
+    def _usage(prompt: str, output: str) -> None:
+        """Report token counts the way a provider's usage_metadata would (~4 chars/token)"""
+        telemetry.add_usage(len(prompt) // 4, len(output) // 4)
+    
+    def _complete(self, prompt: str, json_mode: bool) -> str:
+        def attempt(timeout: Optional[float]) -> str:
+            with telemetry.upstream():
+                latency, outcome = self.simulate_attempt(prompt, json_mode)
+                if isinstance(outcome, Exception):
+                    self._wait(latency, timeout)
+                    raise outcome
+                self._wait(latency + self.token_delay(outcome), timeout)
+            self._usage(prompt, outcome)
+            return outcome
+        
+        return self._call(attempt)
+    
+    async def _acomplete(self, prompt: str, json_mode: bool) -> str:
+        # acall() enforces the per-attempt timeout with asyncio.wait_for
+        async def attempt(timeout: Optional[float]) -> str:
+            with telemetry.upstream():
+                latency, outcome = self.simulate_attempt(prompt, json_mode)
+                if isinstance(outcome, Exception):
+                    await asyncio.sleep(latency)
+                    raise outcome
+                await asyncio.sleep(latency + self.token_delay(outcome))
+            self._usage(prompt, outcome)
+            return outcome
+        
+        return await self._acall(attempt)
+    
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return self._complete(prompt, json_mode=False)
+    
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return _parse_json_text(self._complete(_json_prompt(prompt, max_tokens), json_mode=True), kwargs.get("response_schema"))
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return await self._acomplete(prompt, json_mode=False)
+    
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return _parse_json_text(await self._acomplete(_json_prompt(prompt, max_tokens), json_mode=True), kwargs.get("response_schema"))
+    
+    def _chunks(self, text: str) -> Iterator[str]:
+        for i in range(0, len(text), self.CHUNK_SIZE):
+            yield text[i:i + self.CHUNK_SIZE]
+    
+    def _open_stream(self, prompt: str, json_mode: bool) -> str:
+        """Full text of a stream, after waiting for the first token (retried like Gemini)"""
+        def attempt(timeout: Optional[float]) -> str:
+            with telemetry.upstream():
+                latency, outcome = self.simulate_attempt(prompt, json_mode)
+                self._wait(latency, timeout)
+                if isinstance(outcome, Exception):
+                    raise outcome
+            self._usage(prompt, outcome)
+            return outcome
+        
+        return self._call(attempt)
+    
+    async def _aopen_stream(self, prompt: str, json_mode: bool) -> str:
+        async def attempt(timeout: Optional[float]) -> str:
+            with telemetry.upstream():
+                latency, outcome = self.simulate_attempt(prompt, json_mode)
+                await asyncio.sleep(latency)
+                if isinstance(outcome, Exception):
+                    raise outcome
+            self._usage(prompt, outcome)
+            return outcome
+        
+        return await self._acall(attempt)
+    
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> Iterator[str]:
+        for chunk in self._chunks(self._open_stream(prompt, json_mode=False)):
+            self._wait(self.token_delay(chunk), None)
+            yield chunk
+    
+    async def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> AsyncIterator[str]:
+        for chunk in self._chunks(await self._aopen_stream(prompt, json_mode=False)):
+            await asyncio.sleep(self.token_delay(chunk))
+            yield chunk
+    
+    async def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs) -> AsyncIterator[str]:
+        for chunk in self._chunks(await self._aopen_stream(_json_prompt(prompt, max_tokens), json_mode=True)):
+            await asyncio.sleep(self.token_delay(chunk))
+            yield chunk
+    
+    def stats(self) -> Dict[str, int]:
+        """Attempts made and faults injected"""
+        with self._lock:
+            return dict(self._stats)
+    
+    @classmethod
+    def from_env(cls, retry_policy: Optional[RetryPolicy] = None) -> "MockAdapter":
+        """
+        Configured via LLM_MOCK_P50, LLM_MOCK_P99, LLM_MOCK_SECONDS_PER_TOKEN,
+        LLM_MOCK_ERROR_RATE, LLM_MOCK_EMPTY_RATE, LLM_MOCK_TRUNCATE_RATE,
+        LLM_MOCK_BAD_FENCE_RATE and LLM_MOCK_SEED (all off by default);
+        retry_policy is used when failures are injected
+        """
+        rates = {
+            name: float(os.getenv(f"LLM_MOCK_{name.upper()}", "0"))
+            for name in ("error_rate", "empty_rate", "truncate_rate", "bad_fence_rate")
+        }
+        seed = os.getenv("LLM_MOCK_SEED")
+        # Injected failures are retried like real ones so load tests see retry amplification
+        faulty = rates["error_rate"] > 0 or rates["empty_rate"] > 0
+        return cls(
+            latency_p50=float(os.getenv("LLM_MOCK_P50", "0")),
+            latency_p99=float(os.getenv("LLM_MOCK_P99", "0")) or None,
+            seconds_per_token=float(os.getenv("LLM_MOCK_SECONDS_PER_TOKEN", "0")),
+            seed=int(seed) if seed else None,
+            retry_policy=(retry_policy or RetryPolicy.from_env()) if faulty else None,
+            breaker=get_circuit_breaker("mock") if faulty else None,
+            **rates
+        )
+
+
+def _is_overload_error(error: Exception) -> bool:
+    """Check if an error means the provider is shedding load (429/503)"""
+    return isinstance(classify_error(error), (RateLimitError, ServiceUnavailableError))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute`
+    
+    reserve() always succeeds: it deducts the amount (the balance may go
+    negative) and returns how long the caller must wait, so excess calls
+    queue in arrival order instead of failing.
+    """
+    
+    def __init__(self, per_minute: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def reserve(self, amount: float = 1) -> float:
+        """Take `amount` tokens, return seconds to wait before using them"""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+    
+    def refund(self, amount: float) -> None:
+        """Return tokens that were reserved but not used"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit (additive increase, multiplicative decrease)
+    
+    The limit grows by ~1 per `limit` successful calls and is cut by
+    `decrease_factor` when the provider reports overload, at most once per
+    `cooldown` seconds so one burst of 503s counts as a single signal.
+    Overload is reported per call by release(overloaded=True) and per
+    provider attempt by observe() (wired as the RetryPolicy on_error hook,
+    so throttling is seen before the retries below the limiter give up).
+    
+    Threads block in acquire(); coroutines wait in aacquire() on a future
+    that release() completes when it hands them a slot.
+    """
+    
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        decrease_factor: float = 0.5,
+        cooldown: float = 2.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._clock = clock
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = deque()
+    
+    def acquire(self) -> None:
+        """Block until a concurrency slot is free"""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+    
+    async def aacquire(self) -> None:
+        """Wait (without blocking the event loop) until a slot is free"""
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._cond:
+                try:
+                    self._waiters.remove((loop, waiter))
+                except ValueError:
+                    # The slot was handed over just before the cancel: give it back
+                    self.in_flight -= 1
+                    self._wake()
+            raise
+    
+    def release(self, overloaded: bool = False) -> None:
+        """Free a slot and adapt the limit to the call outcome"""
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                self._decrease()
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._wake()
+    
+    def observe(self, error: Exception) -> None:
+        """Cut the limit if a single provider attempt failed with overload (429/503)"""
+        if _is_overload_error(error):
+            with self._cond:
+                self._decrease()
+    
+    def _decrease(self) -> None:
+        now = self._clock()
+        if now - self._last_decrease >= self.cooldown:
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self._last_decrease = now
+    
+    def _wake(self) -> None:
+        """Hand free slots to waiting coroutines in arrival order, then wake threads"""
+        while self._waiters and self.in_flight < int(self.limit):
+            loop, waiter = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_grant, waiter)
+            except RuntimeError:
+                continue  # its event loop is closed
+            self.in_flight += 1
+        self._cond.notify_all()
+
+
+def _grant(waiter: "asyncio.Future[None]") -> None:
+    if not waiter.done():
+        waiter.set_result(None)
 
 
-def create_llm_adapter(provider: str = "gemini", api_key: Optional[str] = None) -> LLMAdapter:
-    """Factory function to create LLM adapter"""
+class RateLimitedAdapter(LLMAdapterWrapper):
+    """
+    Client-side rate limiting for a provider adapter
+    
+    - requests-per-minute and tokens-per-minute buckets (calls queue
+      rather than fail when a budget is exhausted)
+    - AIMD concurrency limit that backs off on 429/503 and recovers
+      on success
+    """
+    
+    def __init__(
+        self,
+        inner: LLMAdapter,
+        requests_per_minute: float = 1000,
+        tokens_per_minute: float = 1_000_000,
+        limiter: Optional[AIMDLimiter] = None
+    ):
+        super().__init__(inner)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.limiter = limiter or AIMDLimiter()
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "overloaded": 0, "queued": 0, "queue_seconds": 0.0}
+    
+    @staticmethod
+    def _estimate_tokens(prompt: str, max_tokens: int) -> int:
+        # ~4 characters per token; reserve the full output budget up front
+        return len(prompt) // 4 + max_tokens
+    
+    @staticmethod
+    def _input(prompt: str, kwargs: Dict[str, Any]) -> str:
+        """Everything billed as input, including a shared prefix (cached or not)"""
+        prefix = kwargs.get("prefix")
+        return prefix + prompt if prefix else prompt
+    
+    def _reserve(self, prompt: str, max_tokens: int) -> float:
+        """Reserve RPM/TPM budget, return seconds to wait before calling"""
+        return max(
+            self.requests.reserve(1),
+            self.tokens.reserve(self._estimate_tokens(prompt, max_tokens))
+        )
+    
+    def _record(self, wait: float, overloaded: bool) -> None:
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            if wait > 0:
+                self._stats["queued"] += 1
+                self._stats["queue_seconds"] += wait
+            if overloaded:
+                self._stats["overloaded"] += 1
+    
+    def _settle(self, max_tokens: int, output: Any) -> None:
+        """Refund the unused part of the output token reservation"""
+        text = output if isinstance(output, str) else json.dumps(output)
+        self.tokens.refund(max(0, max_tokens - len(text) // 4))
+    
+    def _call(self, fn: Callable, prompt: str, max_tokens: int):
+        queued = time.monotonic()
+        wait = self._reserve(prompt, max_tokens)
+        if wait > 0:
+            time.sleep(wait)
+        self.limiter.acquire()
+        telemetry.add_queue(time.monotonic() - queued)
+        overloaded = False
+        try:
+            result = fn()
+            self._settle(max_tokens, result)
+            return result
+        except Exception as e:
+            overloaded = _is_overload_error(e)
+            raise
+        finally:
+            self.limiter.release(overloaded)
+            self._record(wait, overloaded)
+    
+    async def _acall(self, fn: Callable, prompt: str, max_tokens: int):
+        queued = time.monotonic()
+        wait = self._reserve(prompt, max_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await self.limiter.aacquire()
+        telemetry.add_queue(time.monotonic() - queued)
+        overloaded = False
+        try:
+            result = await fn()
+            self._settle(max_tokens, result)
+            return result
+        except Exception as e:
+            overloaded = _is_overload_error(e)
+            raise
+        finally:
+            self.limiter.release(overloaded)
+            self._record(wait, overloaded)
+    
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return self._call(
+            lambda: self.inner.generate(prompt, max_tokens, temperature, **kwargs), self._input(prompt, kwargs), max_tokens
+        )
+    
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return self._call(
+            lambda: self.inner.generate_json(prompt, max_tokens, **kwargs), self._input(prompt, kwargs), max_tokens
+        )
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        return await self._acall(
+            lambda: self.inner.agenerate(prompt, max_tokens, temperature, **kwargs), self._input(prompt, kwargs), max_tokens
+        )
+    
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        return await self._acall(
+            lambda: self.inner.agenerate_json(prompt, max_tokens, **kwargs), self._input(prompt, kwargs), max_tokens
+        )
+    
+    def _stream(self, stream: Iterator[str], prompt: str, max_tokens: int) -> Iterator[str]:
+        queued = time.monotonic()
+        wait = self._reserve(prompt, max_tokens)
+        if wait > 0:
+            time.sleep(wait)
+        self.limiter.acquire()
+        telemetry.add_queue(time.monotonic() - queued)
+        overloaded = False
+        output = []
+        try:
+            for delta in stream:
+                output.append(delta)
+                yield delta
+            self._settle(max_tokens, "".join(output))
+        except Exception as e:
+            overloaded = _is_overload_error(e)
+            raise
+        finally:
+            self.limiter.release(overloaded)
+            self._record(wait, overloaded)
+    
+    async def _astream(self, stream: AsyncIterator[str], prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        queued = time.monotonic()
+        wait = self._reserve(prompt, max_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await self.limiter.aacquire()
+        telemetry.add_queue(time.monotonic() - queued)
+        overloaded = False
+        output = []
+        try:
+            async for delta in stream:
+                output.append(delta)
+                yield delta
+            self._settle(max_tokens, "".join(output))
+        except Exception as e:
+            overloaded = _is_overload_error(e)
+            raise
+        finally:
+            self.limiter.release(overloaded)
+            self._record(wait, overloaded)
+    
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> Iterator[str]:
+        return self._stream(self.inner.generate_stream(prompt, max_tokens, temperature, **kwargs), self._input(prompt, kwargs), max_tokens)
+    
+    def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> AsyncIterator[str]:
+        return self._astream(self.inner.agenerate_stream(prompt, max_tokens, temperature, **kwargs), self._input(prompt, kwargs), max_tokens)
+    
+    def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs) -> AsyncIterator[str]:
+        return self._astream(self.inner.agenerate_json_stream(prompt, max_tokens, **kwargs), self._input(prompt, kwargs), max_tokens)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = int(self.limiter.limit)
+        stats["in_flight"] = self.limiter.in_flight
+        return stats
+
+
+class PooledAdapter(LLMAdapter):
+    """
+    Thread-safe pool of provider adapters sharing one process-wide entry point
+    
+    Each member owns its own client and keep-alive connection pool; calls
+    go to the member with the fewest requests in flight.
+    """
+    
+    def __init__(self, factory: Callable[[], LLMAdapter], size: int = 4):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.members = [factory() for _ in range(size)]
+        self._in_flight = [0] * size
+        self._lock = threading.Lock()
+    
+    @property
+    def model(self) -> str:
+        return getattr(self.members[0], "model", type(self.members[0]).__name__)
+    
+    @property
+    def supports_prefix(self) -> bool:
+        return self.members[0].supports_prefix
+    
+    @property
+    def size(self) -> int:
+        return len(self.members)
+    
+    @contextmanager
+    def _lease(self):
+        with self._lock:
+            index = min(range(len(self.members)), key=self._in_flight.__getitem__)
+            self._in_flight[index] += 1
+        try:
+            yield self.members[index]
+        finally:
+            with self._lock:
+                self._in_flight[index] -= 1
+    
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        with self._lease() as member:
+            return member.generate(prompt, max_tokens, temperature, **kwargs)
+    
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        with self._lease() as member:
+            return member.generate_json(prompt, max_tokens, **kwargs)
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        with self._lease() as member:
+            return await member.agenerate(prompt, max_tokens, temperature, **kwargs)
+    
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        with self._lease() as member:
+            return await member.agenerate_json(prompt, max_tokens, **kwargs)
+    
+    def generate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> Iterator[str]:
+        with self._lease() as member:
+            yield from member.generate_stream(prompt, max_tokens, temperature, **kwargs)
+    
+    async def agenerate_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> AsyncIterator[str]:
+        with self._lease() as member:
+            async for delta in member.agenerate_stream(prompt, max_tokens, temperature, **kwargs):
+                yield delta
+    
+    async def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs) -> AsyncIterator[str]:
+        with self._lease() as member:
+            async for delta in member.agenerate_json_stream(prompt, max_tokens, **kwargs):
+                yield delta
+    
+    async def aclose(self) -> None:
+        for member in self.members:
+            await member.aclose()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": self.size, "in_flight": list(self._in_flight)}
+
+
+def default_provider() -> str:
+    """Provider used when none is named: LLM_PROVIDER (default "gemini")"""
+    return os.getenv("LLM_PROVIDER", "gemini")
+
+
+def failover_providers() -> list:
+    """Providers behind LLM_PROVIDER=failover, highest priority first"""
+    names = os.getenv("LLM_FAILOVER_PROVIDERS", "gemini,openai")
+    return [name.strip() for name in names.split(",") if name.strip()]
+
+
+def _failover_retry_policy() -> RetryPolicy:
+    """
+    Retry policy for providers behind a FailoverAdapter: fewer attempts
+    (LLM_FAILOVER_MAX_ATTEMPTS, default 2) so a browned-out provider hands
+    over to the next one instead of backing off for the whole deadline
+    """
+    policy = RetryPolicy.from_env()
+    policy.max_attempts = int(os.getenv("LLM_FAILOVER_MAX_ATTEMPTS", "2"))
+    return policy
+
+
+def _failover_adapter(providers: Dict[str, LLMAdapter]) -> LLMAdapter:
+    from .failover import FailoverAdapter
+    return FailoverAdapter(
+        providers,
+        cooldown=float(os.getenv("LLM_FAILOVER_COOLDOWN", "30")),
+        latency_ratio=float(os.getenv("LLM_FAILOVER_LATENCY_RATIO", "2.0"))
+    )
+
+
+def create_llm_adapter(
+    provider: Optional[str] = None,
+    api_key: Optional[str] = None,
+    cache: Optional[bool] = None,
+    retry_policy: Optional[RetryPolicy] = None
+) -> LLMAdapter:
+    """
+    Factory function to create LLM adapter
+    
+    Args:
+        provider: "gemini", "openai" (any OpenAI-compatible server, see
+            aro.openai_compat), "failover" (LLM_FAILOVER_PROVIDERS behind a
+            FailoverAdapter) or "mock"; defaults to LLM_PROVIDER
+        api_key: Provider API key (defaults to environment)
+        cache: Wrap the adapter in the shared response cache. Defaults to
+            on for real providers unless LLM_CACHE=0 is set.
+        retry_policy: Retry policy for the provider client (defaults to
+            the LLM_* retry environment)
+    """
+    provider = provider or default_provider()
     
     if provider == "gemini":
-        return GeminiAdapter(api_key)
+        adapter = GeminiAdapter(api_key, retry_policy=retry_policy)
+    elif provider == "openai":
+        from .openai_compat import OpenAICompatibleAdapter
+        adapter = OpenAICompatibleAdapter(api_key=api_key, retry_policy=retry_policy)
+    elif provider == "failover":
+        adapter = _failover_adapter({
+            name: create_llm_adapter(name, cache=False, retry_policy=_failover_retry_policy())
+            for name in failover_providers()
+        })
     elif provider == "mock":
-        return MockAdapter()
+        adapter = MockAdapter.from_env(retry_policy)
     else:
         raise ValueError(f"Unknown provider: {provider}")
+    
+    if cache is None:
+        cache = provider != "mock" and os.getenv("LLM_CACHE", "1") != "0"
+    
+    if cache:
+        from .llm_cache import CachedAdapter, get_default_cache
+        adapter = CachedAdapter(adapter, get_default_cache())
+    
+    return adapter
+
+
+def _limited_pool(provider: str, size: int, retry_policy: Optional[RetryPolicy] = None) -> LLMAdapter:
+    """
+    Client pool for one provider behind its own rate limiter
+    
+    The clients' retry policy reports every failed attempt to the AIMD
+    limiter, so it backs off on the first 429/503 rather than after the
+    retries below it are exhausted.
+    """
+    limiter = AIMDLimiter(
+        initial=int(os.getenv("LLM_CONCURRENCY", "8")),
+        max_limit=int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    )
+    retry_policy = retry_policy or RetryPolicy.from_env()
+    retry_policy.on_error = limiter.observe
+    pool = PooledAdapter(lambda: create_llm_adapter(provider, cache=False, retry_policy=retry_policy), size)
+    return RateLimitedAdapter(
+        pool,
+        requests_per_minute=float(os.getenv("LLM_RPM", "1000")),
+        tokens_per_minute=float(os.getenv("LLM_TPM", "1000000")),
+        limiter=limiter
+    )
+
+
+_shared_adapters: Dict[str, LLMAdapter] = {}
+_shared_lock = threading.Lock()
+
+
+def get_llm_adapter(provider: Optional[str] = None, pool_size: Optional[int] = None) -> LLMAdapter:
+    """
+    Shared, thread-safe adapter for a provider (created once per process)
+    
+    Use this from request handlers and pipelines instead of
+    create_llm_adapter() so clients, connections and TLS sessions are
+    reused across requests. The stack is:
+    response cache -> single-flight coalescing -> hedging (opt-in)
+    -> rate limiter (RPM/TPM + AIMD concurrency) -> client pool
+    
+    With provider "failover" every provider in LLM_FAILOVER_PROVIDERS
+    gets its own rate limiter and client pool, and a FailoverAdapter
+    routes between them under the shared cache, coalescing and hedging.
+    
+    LLM_CASSETTE_MODE=record wraps the stack in a RecordingAdapter and
+    LLM_CASSETTE_MODE=replay serves the LLM_CASSETTE file offline instead
+    (see aro.cassette).
+    
+    Args:
+        provider: "gemini", "openai", "failover" or "mock" (defaults to
+            LLM_PROVIDER, or "gemini")
+        pool_size: Number of pooled clients on first creation
+            (defaults to LLM_POOL_SIZE, or 4)
+    """
+    provider = provider or default_provider()
+    with _shared_lock:
+        adapter = _shared_adapters.get(provider)
+        if adapter is None and os.getenv("LLM_CASSETTE_MODE") == "replay":
+            from .cassette import ReplayAdapter, DEFAULT_CASSETTE
+            adapter = _shared_adapters[provider] = ReplayAdapter(
+                os.getenv("LLM_CASSETTE", str(DEFAULT_CASSETTE)),
+                playback_latency=os.getenv("LLM_CASSETTE_LATENCY", "0") == "1"
+            )
+        if adapter is None:
+            size = pool_size or int(os.getenv("LLM_POOL_SIZE", "4"))
+            if provider == "failover":
+                adapter = _failover_adapter({
+                    name: _limited_pool(name, size, _failover_retry_policy())
+                    for name in failover_providers()
+                })
+            else:
+                adapter = _limited_pool(provider, size)
+            if os.getenv("LLM_HEDGE", "0") == "1":
+                from .hedging import HedgedAdapter
+                adapter = HedgedAdapter.from_env(adapter)
+            if os.getenv("LLM_COALESCE", "1") != "0":
+                from .singleflight import CoalescingAdapter
+                adapter = CoalescingAdapter(adapter)
+            if provider != "mock" and os.getenv("LLM_CACHE", "1") != "0":
+                from .llm_cache import CachedAdapter, get_default_cache
+                adapter = CachedAdapter(adapter, get_default_cache())
+            if os.getenv("LLM_CASSETTE_MODE") == "record":
+                from .cassette import RecordingAdapter, DEFAULT_CASSETTE
+                adapter = RecordingAdapter(adapter, os.getenv("LLM_CASSETTE", str(DEFAULT_CASSETTE)))
+            
+            _shared_adapters[provider] = adapter
+        return adapter
+
+
+def shared_adapters() -> Dict[str, LLMAdapter]:
+    """Shared adapters created so far, by provider"""
+    with _shared_lock:
+        return dict(_shared_adapters)
+
+
+def reset_llm_adapters() -> None:
+    """Drop shared adapters (tests, or after changing credentials)"""
+    with _shared_lock:
+        _shared_adapters.clear()
@@ -0,0 +1,379 @@
+"""
+LLM Response Cache - Content-addressed cache for deterministic LLM calls
+
+Identical prompts (tests, reruns, repeated JDs) are served from:
+- an in-memory LRU (hot entries, per process)
+- an on-disk SQLite store (shared across runs, TTL + size capped)
+
+Only deterministic calls are cached: generate() and the JSON calls
+(temperature=0 unless a caller asks otherwise) are cached when
+temperature == 0; sampled calls go straight to the provider.
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, AsyncIterator
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .llm_adapter import LLMAdapter, LLMAdapterWrapper, _parse_json_text, validate_json
+from .retry import SchemaValidationError
+from .json_stream import RepairedJSON
+from . import telemetry
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache" / "llm"
+
+
+def _jsonable(value: Any) -> Any:
+    """Key form of non-JSON options (response schemas hash by their JSON schema)"""
+    if hasattr(value, "model_json_schema"):
+        return value.model_json_schema()
+    return str(value)
+
+
+def request_key(kind: str, model: str, prompt: str, temperature: float, max_tokens: int, **extra) -> str:
+    """
+    Hash every input that affects an LLM response into a cache key
+
+    Args:
+        kind: "text" or "json"
+        model: Model name
+        prompt: Full prompt text
+        temperature: Sampling temperature
+        max_tokens: Output token limit
+        extra: Any other call options (included so they never collide)
+
+    Returns:
+        Hex sha256 digest
+    """
+    payload = {
+        "kind": kind,
+        "model": model,
+        "prompt": prompt,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "extra": extra,
+    }
+    raw = json.dumps(payload, sort_keys=True, default=_jsonable)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """Thread-safe LRU of serialized responses"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskCache:
+    """SQLite-backed response store with TTL and total size cap"""
+
+    def __init__(self, path: Path, ttl_seconds: float = 7 * 24 * 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used until under max_bytes"""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"disk_entries": entries, "disk_bytes": total}
+
+
+class LLMCache:
+    """Two-tier (memory LRU + disk) cache with hit/miss accounting"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_memory_entries: int = 512,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        use_disk: bool = True
+    ):
+        self.memory = MemoryCache(max_memory_entries)
+        self.disk = None
+        if use_disk:
+            cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+            self.disk = DiskCache(cache_dir / "responses.sqlite3", ttl_seconds, max_disk_bytes)
+
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the serialized response for key, or None"""
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                self._count("disk_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a serialized response in both tiers"""
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        self._count("stores")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current sizes"""
+        with self._lock:
+            stats = dict(self._counts)
+
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        if self.disk is not None:
+            stats.update(self.disk.stats())
+        return stats
+
+
+class CachedAdapter(LLMAdapterWrapper):
+    """Serves repeated deterministic calls from an LLMCache"""
+
+    def __init__(self, inner: LLMAdapter, cache: LLMCache):
+        super().__init__(inner)
+        self.cache = cache
+
+    def _key(self, kind: str, prompt: str, temperature: float, max_tokens: int, kwargs: Dict[str, Any]) -> str:
+        extra = {name: value for name, value in kwargs.items() if name != "temperature"}
+        return request_key(kind, self.model, prompt, temperature, max_tokens, **extra)
+
+    def _store(self, key: str, result: Dict[str, Any], kwargs: Dict[str, Any]) -> None:
+        """
+        Cache a parsed JSON response, unless it was repaired from truncated
+        output or does not match the call's response schema (a rerun should
+        ask the model again, not replay the invalid payload)
+        """
+        if isinstance(result, RepairedJSON):
+            return
+        schema = kwargs.get("response_schema")
+        if schema is not None:
+            try:
+                validate_json(result, schema)
+            except SchemaValidationError:
+                return
+        self.cache.set(key, json.dumps(result))
+
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        if temperature != 0:
+            return self.inner.generate(prompt, max_tokens, temperature, **kwargs)
+
+        key = self._key("text", prompt, temperature, max_tokens, kwargs)
+        cached = self.cache.get(key)
+        telemetry.note_cache(cached is not None)
+        if cached is not None:
+            return cached
+
+        text = self.inner.generate(prompt, max_tokens, temperature, **kwargs)
+        self.cache.set(key, text)
+        return text
+
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        if kwargs.get("temperature", 0) != 0:
+            return self.inner.generate_json(prompt, max_tokens, **kwargs)
+
+        key = self._key("json", prompt, 0, max_tokens, kwargs)
+        cached = self.cache.get(key)
+        telemetry.note_cache(cached is not None)
+        if cached is not None:
+            return json.loads(cached)
+
+        result = self.inner.generate_json(prompt, max_tokens, **kwargs)
+        self._store(key, result, kwargs)
+        return result
+
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        if temperature != 0:
+            return await self.inner.agenerate(prompt, max_tokens, temperature, **kwargs)
+
+        key = self._key("text", prompt, temperature, max_tokens, kwargs)
+        cached = self.cache.get(key)
+        telemetry.note_cache(cached is not None)
+        if cached is not None:
+            return cached
+
+        text = await self.inner.agenerate(prompt, max_tokens, temperature, **kwargs)
+        self.cache.set(key, text)
+        return text
+
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        if kwargs.get("temperature", 0) != 0:
+            return await self.inner.agenerate_json(prompt, max_tokens, **kwargs)
+
+        key = self._key("json", prompt, 0, max_tokens, kwargs)
+        cached = self.cache.get(key)
+        telemetry.note_cache(cached is not None)
+        if cached is not None:
+            return json.loads(cached)
+
+        result = await self.inner.agenerate_json(prompt, max_tokens, **kwargs)
+        self._store(key, result, kwargs)
+        return result
+
+    async def agenerate_json_stream(self, prompt: str, max_tokens: int = 4000, **kwargs) -> AsyncIterator[str]:
+        """Replay a cached JSON response as one delta, or stream and store it"""
+        if kwargs.get("temperature", 0) != 0:
+            async for delta in self.inner.agenerate_json_stream(prompt, max_tokens, **kwargs):
+                yield delta
+            return
+
+        key = self._key("json", prompt, 0, max_tokens, kwargs)
+        cached = self.cache.get(key)
+        telemetry.note_cache(cached is not None)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        async for delta in self.inner.agenerate_json_stream(prompt, max_tokens, **kwargs):
+            chunks.append(delta)
+            yield delta
+
+        try:
+            result = _parse_json_text("".join(chunks), kwargs.get("response_schema"))
+        except Exception:
+            return
+        self._store(key, result, kwargs)
+
+
+_default_cache: Optional[LLMCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> LLMCache:
+    """
+    Process-wide cache shared by every adapter from create_llm_adapter()
+
+    Configured via LLM_CACHE_DIR, LLM_CACHE_TTL (seconds),
+    LLM_CACHE_MAX_MB and LLM_CACHE_MEMORY_ENTRIES.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(
+                cache_dir=Path(os.getenv("LLM_CACHE_DIR", str(DEFAULT_CACHE_DIR))),
+                max_memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512")),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                max_disk_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            )
+        return _default_cache
+
+
+def default_cache_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the process-wide cache, or None if it was never created"""
+    with _default_cache_lock:
+        cache = _default_cache
+    return cache.stats() if cache is not None else None
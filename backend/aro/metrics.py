@@ -0,0 +1,270 @@
+"""
+Metrics - Prometheus text exposition with no external dependencies
+
+A small registry of counters, gauges and histograms rendered in the
+Prometheus text format (0.0.4), served by the API at GET /metrics.
+
+Values recorded directly:
+- aro_http_request_duration_seconds   per-route latency (api.metrics middleware)
+- aro_pipeline_stage_duration_seconds per-stage time of one optimization run
+- aro_pipeline_in_flight / aro_pipeline_runs_total
+
+Values that already live elsewhere are read at scrape time by collectors
+instead of being duplicated: LLM telemetry (calls, tokens, latency,
+attempts), per-stage repair/continuation counts, the response and
+context caches, the shared adapter stack and the circuit breakers.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import threading
+
+from .telemetry import Histogram, LATENCY_BUCKETS, get_telemetry
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PIPELINE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class MetricFamily:
+    """One metric name with its samples: (name suffix, labels, value)"""
+
+    name: str
+    type: str
+    help: str
+    samples: List[Tuple[str, Dict[str, str], float]] = field(default_factory=list)
+
+    def add(self, value: float, suffix: str = "", **labels) -> "MetricFamily":
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def add_histogram(self, histogram: Histogram, **labels) -> "MetricFamily":
+        """Cumulative _bucket, _sum and _count samples of a Histogram"""
+        bounds = [*histogram.buckets, math.inf]
+        for bound, count in zip(bounds, histogram.cumulative()):
+            self.samples.append(("_bucket", dict(labels, le=_format(bound)), count))
+        self.samples.append(("_sum", labels, histogram.sum))
+        self.samples.append(("_count", labels, histogram.count))
+        return self
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_families(families: Iterable[MetricFamily]) -> str:
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for suffix, labels, value in family.samples:
+            label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+            lines.append(f"{family.name}{suffix}{{{label_text}}} {_format(value)}" if label_text else f"{family.name}{suffix} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms plus scrape-time collectors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str, Optional[Sequence[float]]]] = {}
+        self._values: Dict[str, Dict[Labels, Any]] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def _declare(self, name: str, kind: str, help: str, buckets: Optional[Sequence[float]] = None) -> None:
+        with self._lock:
+            self._meta.setdefault(name, (kind, help, buckets))
+            self._values.setdefault(name, {})
+
+    def counter(self, name: str, help: str) -> None:
+        self._declare(name, "counter", help)
+
+    def gauge(self, name: str, help: str) -> None:
+        self._declare(name, "gauge", help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self._declare(name, "histogram", help, buckets)
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        """Add to a counter, or to a gauge (amount may be negative for gauges)"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._values[name][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._values[name]
+            if key not in values:
+                values[key] = Histogram(self._meta[name][2])
+            values[key].observe(value)
+
+    def value(self, name: str, **labels) -> Any:
+        """Current counter/gauge value or Histogram (None if never recorded)"""
+        with self._lock:
+            return self._values[name].get(tuple(sorted(labels.items())))
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Register a function returning MetricFamily objects at scrape time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def families(self) -> List[MetricFamily]:
+        with self._lock:
+            families = []
+            for name, (kind, help, _) in self._meta.items():
+                family = MetricFamily(name, kind, help)
+                for key, value in self._values[name].items():
+                    if kind == "histogram":
+                        family.add_histogram(value, **dict(key))
+                    else:
+                        family.add(value, **dict(key))
+                families.append(family)
+            collectors = list(self._collectors)
+
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        return render_families(self.families())
+
+
+def llm_families() -> List[MetricFamily]:
+    """LLM call telemetry and per-stage repair/continuation counts"""
+    from .routing import stage_stats
+
+    calls = MetricFamily("aro_llm_calls_total", "counter", "Routed LLM calls by pipeline stage")
+    errors = MetricFamily("aro_llm_call_errors_total", "counter", "Routed LLM calls that raised")
+    tokens = MetricFamily("aro_llm_tokens_total", "counter", "Tokens reported by the provider's usage_metadata")
+    cache = MetricFamily("aro_llm_cache_lookups_total", "counter", "Response cache lookups made by routed calls")
+    histograms = {
+        "latency_seconds": MetricFamily("aro_llm_call_duration_seconds", "histogram", "Wall time of a routed LLM call"),
+        "queue_seconds": MetricFamily("aro_llm_queue_seconds", "histogram", "Time waiting for rate limit budget or a concurrency slot"),
+        "upstream_seconds": MetricFamily("aro_llm_upstream_seconds", "histogram", "Time inside provider attempts (to first token for streams)"),
+        "prompt_tokens": MetricFamily("aro_llm_prompt_tokens", "histogram", "Prompt tokens per call"),
+        "output_tokens": MetricFamily("aro_llm_output_tokens", "histogram", "Output tokens per call"),
+        "attempts": MetricFamily("aro_llm_attempts", "histogram", "Provider attempts per call, retries and hedges included"),
+    }
+
+    for stage, entry in get_telemetry().stages().items():
+        calls.add(entry["calls"], stage=stage)
+        errors.add(entry["errors"], stage=stage)
+        for kind, count in entry["tokens"].items():
+            tokens.add(count, stage=stage, type=kind)
+        cache.add(entry["cache_hits"], stage=stage, result="hit")
+        cache.add(entry["cache_misses"], stage=stage, result="miss")
+        for name, family in histograms.items():
+            family.add_histogram(entry["histograms"][name], stage=stage)
+
+    counters = {
+        "fallbacks": MetricFamily("aro_llm_fallbacks_total", "counter", "Calls retried on a stage's fallback model"),
+        "repairs": MetricFamily("aro_llm_repairs_total", "counter", "JSON responses repaired after being cut off"),
+        "continuations": MetricFamily("aro_llm_continuations_total", "counter", "Continuation calls for unfinished JSON keys"),
+        "continuation_failures": MetricFamily("aro_llm_continuation_failures_total", "counter", "Continuations that left keys unfinished"),
+        "prompts_shrunk": MetricFamily("aro_llm_prompts_shrunk_total", "counter", "Prompts whose inputs were shrunk to fit the stage budget"),
+        "prompts_over_budget": MetricFamily("aro_llm_prompts_over_budget_total", "counter", "Prompts sent while still over the stage input budget"),
+        "cost_usd": MetricFamily("aro_llm_cost_usd_total", "counter", "Estimated LLM spend in USD"),
+    }
+    for stage, entry in stage_stats.snapshot().items():
+        for name, family in counters.items():
+            family.add(entry[name], stage=stage)
+
+    return [calls, errors, tokens, cache, *histograms.values(), *counters.values()]
+
+
+def cache_families() -> List[MetricFamily]:
+    """Response cache and provider context cache statistics"""
+    from .llm_cache import default_cache_stats
+    from .context_cache import context_cache_stats
+
+    families = []
+    stats = default_cache_stats()
+    if stats is not None:
+        lookups = MetricFamily("aro_response_cache_lookups_total", "counter", "Response cache lookups by result")
+        lookups.add(stats["memory_hits"], result="memory_hit")
+        lookups.add(stats["disk_hits"], result="disk_hit")
+        lookups.add(stats["misses"], result="miss")
+        entries = MetricFamily("aro_response_cache_entries", "gauge", "Responses held per cache tier")
+        entries.add(stats["memory_entries"], tier="memory")
+        families += [
+            lookups,
+            MetricFamily("aro_response_cache_stores_total", "counter", "Responses written to the cache").add(stats["stores"]),
+            entries,
+        ]
+        if "disk_entries" in stats:
+            entries.add(stats["disk_entries"], tier="disk")
+            families.append(MetricFamily("aro_response_cache_disk_bytes", "gauge", "Size of the on-disk response store").add(stats["disk_bytes"]))
+
+    events = MetricFamily("aro_context_cache_events_total", "counter", "Prompt prefix cache uploads, reuses, skips and failures")
+    context_entries = MetricFamily("aro_context_cache_entries", "gauge", "Live cached prompt prefixes")
+    for provider, stats in context_cache_stats().items():
+        for event in ("uploads", "reuses", "skipped", "failures"):
+            events.add(stats[event], provider=provider, event=event)
+        context_entries.add(stats["entries"], provider=provider)
+    return families + [events, context_entries]
+
+
+def adapter_families() -> List[MetricFamily]:
+    """Numeric stats of every layer in the shared adapter stacks, and circuit breakers"""
+    from .llm_adapter import shared_adapters
+    from .retry import circuit_breaker_states
+
+    layers = MetricFamily(
+        "aro_llm_adapter_stat", "gauge",
+        "Adapter stack counters and gauges (rate limiter queue and concurrency, coalescing, hedging, pool, failover)"
+    )
+    # (provider label, layer); a FailoverAdapter's stacks are labelled "failover/<name>"
+    pending = list(shared_adapters().items())
+    while pending:
+        provider, layer = pending.pop(0)
+        stats = layer.stats() if callable(getattr(layer, "stats", None)) else {}
+        for stat, value in stats.items():
+            if isinstance(value, list):
+                value = sum(value)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                layers.add(value, provider=provider, layer=type(layer).__name__, stat=stat)
+        if getattr(layer, "inner", None) is not None:
+            pending.append((provider, layer.inner))
+        for name, inner in (getattr(layer, "providers", None) or {}).items():
+            pending.append((f"{provider}/{name}", inner))
+
+    state = MetricFamily("aro_circuit_breaker_state", "gauge", "1 for the current state of each circuit breaker")
+    rejected = MetricFamily("aro_circuit_breaker_rejected_calls_total", "counter", "Calls failed fast while a breaker was open")
+    for name, snapshot in circuit_breaker_states().items():
+        for value in ("closed", "open", "half_open"):
+            state.add(1 if snapshot["state"] == value else 0, name=name, state=value)
+        rejected.add(snapshot["rejected_calls"], name=name)
+    return [layers, state, rejected]
+
+
+metrics = MetricsRegistry()
+
+metrics.histogram("aro_http_request_duration_seconds", "HTTP request latency by route (to response headers for streams)")
+metrics.gauge("aro_http_requests_in_flight", "HTTP requests being handled")
+metrics.histogram("aro_pipeline_stage_duration_seconds", "Time spent in each stage of one optimization run", PIPELINE_BUCKETS)
+metrics.gauge("aro_pipeline_in_flight", "Optimization pipelines currently running")
+metrics.counter("aro_pipeline_runs_total", "Finished optimization pipelines by outcome")
+
+metrics.add_collector(llm_families)
+metrics.add_collector(cache_families)
+metrics.add_collector(adapter_families)
@@ -0,0 +1,215 @@
+"""
+Mock Responses - Stage-appropriate canned LLM output
+
+MockAdapter recognises which pipeline stage a prompt comes from
+(generator, generator sections, evaluator, factuality, reviser, reviser
+patches, section revisions) and answers with JSON that
+matches what that stage parses, so the whole pipeline can run end to end
+without a provider. The resume passes the generator's section checks.
+"""
+from typing import Any, Dict, Optional
+import copy
+import random
+import re
+
+from .compact import decode
+
+
+# (stage, prompt markers) checked in order - the reviser prompt also
+# mentions "expert resume writer", so it must be matched first
+STAGE_MARKERS = [
+    ("factuality", ("strict factuality checker",)),
+    ("evaluator", ("expert resume evaluator", "strict hiring manager")),
+    ("reviser_section", ("Revise ONE section",)),
+    ("reviser_patch", ("as a JSON Patch (RFC 6902)",)),
+    ("reviser", ("Revise this resume",)),
+    ("generator_section", ("Write ONE section",)),
+    ("generator", ("Generate a tailored resume", "expert resume writer and recruiter")),
+]
+
+
+MOCK_RESUME = {
+    "header": {"title": "Software Engineer | MS CS @ Northeastern | Python, AWS, Distributed Systems"},
+    "summary": (
+        "Software Engineer with **4+ years** building **distributed backend systems** at **LSEG** and **Infosys**, "
+        "now pursuing an **MS in Computer Science at Northeastern**. Designed **Python** and **Java** microservices "
+        "on **AWS** that processed **7.5M+ records daily**, cut API latency by **40%** with **Redis** caching, and "
+        "shipped **CI/CD** pipelines on **Docker** and **Kubernetes**. Comfortable owning services end to end, from "
+        "data modeling in **PostgreSQL** to observability and on-call, and eager to deliver reliable systems at scale."
+    ),
+    "skills": [
+        {"category": "Languages", "items": "Python, Java, Go, TypeScript, JavaScript, SQL, C++, Bash, HTML/CSS, Kotlin, YAML"},
+        {"category": "Backend Development", "items": "FastAPI, Spring Boot, Django, Flask, Node.js, Express, REST APIs, gRPC, GraphQL"},
+        {"category": "Cloud & DevOps", "items": "AWS (EC2, S3, Lambda, SQS), GCP, Docker, Kubernetes, Terraform, Jenkins, GitHub Actions"},
+        {"category": "Databases", "items": "PostgreSQL, MySQL, MongoDB, Redis, DynamoDB, Elasticsearch, Snowflake, SQL Server, SQLite"},
+        {"category": "Data & Streaming", "items": "Kafka, Spark, Airflow, ETL Pipelines, Pandas, NumPy, Event-Driven Design, RabbitMQ"},
+        {"category": "Machine Learning", "items": "PyTorch, TensorFlow, scikit-learn, LLM APIs, RAG, Hugging Face, Computer Vision, NLP"},
+        {"category": "Practices & Tools", "items": "Microservices, System Design, TDD, Agile, Git, Linux, Prometheus, Grafana, Jira"},
+    ],
+    "experience": [
+        {
+            "company": "London Stock Exchange Group (LSEG)",
+            "role": "Software Engineer",
+            "location": "Bengaluru",
+            "duration": "08-2022 to 12-2024",
+            "bullets": [
+                "Engineered **Python** and **Java** microservices on **AWS** that ingested **7.5M+ market data records daily**, keeping end-to-end processing under **2 minutes**",
+                "Reduced **API latency by 40%** by introducing **Redis** read-through caching and query tuning in **PostgreSQL** for the reference data platform serving 30+ teams",
+                "Built **event-driven** pipelines with **SQS** and **Lambda** that replaced nightly batch jobs, cutting data freshness from **24 hours to 15 minutes** for analysts",
+                "Automated deployments with **Docker**, **Kubernetes** and **Jenkins** **CI/CD**, raising release frequency from monthly to **weekly** with zero-downtime rollouts",
+                "Mentored **3 junior engineers** and led design reviews for a service migration to **Spring Boot**, improving test coverage from **55% to 85%** across the codebase",
+            ],
+        },
+        {
+            "company": "Infosys",
+            "role": "Software Engineer",
+            "location": "Bengaluru",
+            "duration": "10-2020 to 07-2022",
+            "bullets": [
+                "Developed **REST APIs** in **Java Spring** for a banking client handling **1M+ transactions per day**, meeting a **99.9% availability** target in production",
+                "Optimized **SQL** stored procedures and indexes in **MySQL**, shrinking report generation time by **60%** and removing a recurring overnight batch failure",
+                "Implemented **JUnit** and integration test suites with **Jenkins** pipelines, cutting production defects by **35%** over two release cycles for the client",
+                "Collaborated with **5 cross-functional teams** in **Agile** sprints to deliver a customer onboarding portal **2 weeks early**, used by **200K+ customers**",
+            ],
+        },
+    ],
+    "projects": [
+        {
+            "title": "Multi-Agent Resume Optimizer",
+            "tech": "Python, FastAPI, Gemini, React",
+            "bullet1": "Built a **multi-agent LLM pipeline** in **Python** and **FastAPI** that generates, scores and revises resumes with **streamed** progress to a **React** UI",
+            "bullet2": "Added **caching**, **rate limiting** and **retry policies** around the **Gemini** API, cutting repeat-run latency by **70%** and API spend by **50%**",
+        },
+        {
+            "title": "Distributed Task Scheduler",
+            "tech": "Go, gRPC, etcd, Docker",
+            "bullet1": "Designed a **fault-tolerant scheduler** in **Go** with **gRPC** workers and **etcd** leader election, sustaining **10K tasks/minute** across **5 nodes**",
+            "bullet2": "Containerized with **Docker** and load tested failover, keeping **p99 scheduling latency under 50 ms** while nodes were killed during the test runs",
+        },
+        {
+            "title": "Real-Time Object Detection",
+            "tech": "Python, PyTorch, OpenCV",
+            "bullet1": "Trained a **1.5M parameter** **PyTorch** detector for edge devices, reaching **16.67 FPS** on CPU with **OpenCV** pre-processing and batching",
+            "bullet2": "Applied **quantization** and pruning to shrink the model by **4x** while keeping **mAP within 2%** of the full-precision baseline on the test set",
+        },
+    ],
+}
+
+
+def detect_stage(prompt: str) -> Optional[str]:
+    """Pipeline stage a prompt belongs to, or None if it is not recognised"""
+    for stage, markers in STAGE_MARKERS:
+        if any(marker in prompt for marker in markers):
+            return stage
+    return None
+
+
+def mock_evaluation(rng: random.Random) -> Dict[str, Any]:
+    """Evaluator output (LLM part, 0-65) with a consistent section breakdown"""
+    section_scores = {
+        "experience": rng.randint(17, 23),
+        "skills": rng.randint(14, 19),
+        "projects": rng.randint(10, 14),
+        "presentation": rng.randint(3, 5),
+    }
+    return {
+        "score": sum(section_scores.values()),
+        "section_scores": section_scores,
+        "feedback": "Strong backend profile with relevant cloud experience. Metrics are specific; tie more bullets to the JD's core stack.",
+        "section_feedback": {
+            "experience": "Good quantified impact. Lead with the achievements closest to the role's responsibilities.",
+            "skills": "Key technologies are present. Move the JD's primary languages and cloud services to the front.",
+            "projects": "Relevant projects selected. Add one detail on scale or users for each project.",
+            "presentation": "Concise and well formatted. Bold markers are used consistently.",
+        },
+    }
+
+
+def mock_factuality(rng: random.Random) -> Dict[str, Any]:
+    """Factuality checker output with no issues found"""
+    return {
+        "is_factual": True,
+        "factuality_score": rng.randint(92, 100),
+        "issues": [],
+        "summary_check": {"is_accurate": True, "issues": []},
+        "experience_check": {"is_accurate": True, "issues": []},
+        "projects_check": {"is_accurate": True, "issues": []},
+        "skills_check": {"is_accurate": True, "issues": []},
+    }
+
+
+def mock_revision(prompt: str) -> Dict[str, Any]:
+    """Reviser output: the resume from the prompt, or the mock resume if it can't be read"""
+    start = prompt.find("CURRENT RESUME:")
+    end = prompt.find("FEEDBACK TO ADDRESS:")
+    if start != -1 and end > start:
+        try:
+            # Compact notation or (with PROMPT_COMPACT=0) JSON
+            resume = decode(prompt[start + len("CURRENT RESUME:"):end])
+            if isinstance(resume, dict) and resume.get("summary"):
+                return resume
+        except ValueError:
+            pass
+    return copy.deepcopy(MOCK_RESUME)
+
+
+def mock_patch(prompt: str) -> Dict[str, Any]:
+    """Patch-mode reviser output: one edit that rewrites the first bullet with its current text"""
+    bullet = mock_revision(prompt)["experience"][0]["bullets"][0]
+    return {"edits": [{"op": "replace", "path": "/experience/0/bullets/0", "value": bullet}]}
+
+
+def mock_section_revision(prompt: str) -> Dict[str, Any]:
+    """Section reviser output: the section from the prompt unchanged, or the mock resume's part"""
+    start = prompt.find("CURRENT SECTION:")
+    end = prompt.find("FEEDBACK TO ADDRESS:")
+    if start != -1 and end > start:
+        try:
+            section = decode(prompt[start + len("CURRENT SECTION:"):end])
+            if isinstance(section, dict) and section:
+                return section
+        except ValueError:
+            pass
+    return mock_section(prompt)
+
+
+def mock_section(prompt: str) -> Dict[str, Any]:
+    """Section-parallel generator output: the mock resume's part for the prompt's SECTION"""
+    match = re.search(r"^SECTION: (\w+)$", prompt, re.MULTILINE)
+    name = match.group(1) if match else "summary"
+    resume = copy.deepcopy(MOCK_RESUME)
+    if name == "skills":
+        return {"skills": resume["skills"]}
+    if name == "lseg":
+        return {"job": resume["experience"][0]}
+    if name == "infosys":
+        return {"job": resume["experience"][1]}
+    if name == "projects":
+        return {"projects": resume["projects"]}
+    return {"header": resume["header"], "summary": resume["summary"]}
+
+
+def mock_response(prompt: str, rng: Optional[random.Random] = None) -> Optional[Dict[str, Any]]:
+    """
+    Stage-appropriate JSON for a prompt
+
+    Returns:
+        Response dict, or None for prompts that don't belong to a known stage
+    """
+    rng = rng or random.Random()
+    stage = detect_stage(prompt)
+    if stage == "generator":
+        return copy.deepcopy(MOCK_RESUME)
+    if stage == "evaluator":
+        return mock_evaluation(rng)
+    if stage == "factuality":
+        return mock_factuality(rng)
+    if stage == "reviser":
+        return mock_revision(prompt)
+    if stage == "reviser_patch":
+        return mock_patch(prompt)
+    if stage == "reviser_section":
+        return mock_section_revision(prompt)
+    if stage == "generator_section":
+        return mock_section(prompt)
+    return None
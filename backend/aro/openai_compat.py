@@ -0,0 +1,369 @@
+"""
+OpenAI-Compatible Adapter - Chat completions over plain httpx
+
+Speaks the /v1/chat/completions protocol served by OpenAI and by local
+inference servers (llama.cpp server, vLLM, Ollama, LM Studio), so a
+self-hosted model can stand in when Gemini is unavailable:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8080/v1   # default
+    OPENAI_MODEL=qwen2.5-14b-instruct
+    OPENAI_API_KEY=...                         # optional for local servers
+
+The shared profile prefix is sent as a leading system message, which
+keeps it byte-identical across calls so servers with prefix caching
+(vLLM automatic prefix caching, llama.cpp cache_prompt) reuse its KV
+cache. A response_schema is sent as a json_schema response_format.
+Errors are mapped to the same typed LLMErrors as Gemini's and go
+through the same retry policy and a per-provider circuit breaker.
+
+Async calls use one httpx.AsyncClient per event loop. A sync wrapper that
+runs calls on its own short-lived loop must `await adapter.aclose()`
+before closing the loop, or that loop's connections leak.
+"""
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import json
+import os
+import threading
+import weakref
+
+import httpx
+
+from . import telemetry
+from .llm_adapter import LLMAdapter, _json_prompt, _parse_json_text
+from .retry import (
+    RetryPolicy, CircuitBreaker, get_circuit_breaker,
+    EmptyResponseError, InvalidRequestError, LLMTimeoutError, RateLimitError,
+    ServiceUnavailableError
+)
+
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8080/v1"
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    """Map an error response to a typed LLMError"""
+    if response.status_code < 400:
+        return
+    message = f"HTTP {response.status_code}: {response.text[:500]}"
+    retry_after = response.headers.get("retry-after")
+    try:
+        retry_after = float(retry_after) if retry_after else None
+    except ValueError:
+        retry_after = None
+    if response.status_code == 429:
+        raise RateLimitError(message, 429, retry_after)
+    if response.status_code >= 500:
+        raise ServiceUnavailableError(message, response.status_code, retry_after)
+    raise InvalidRequestError(message, response.status_code)
+
+
+def _transport_error(error: Exception) -> Exception:
+    """Timeouts and unreachable servers as retriable provider failures"""
+    if isinstance(error, httpx.TimeoutException):
+        return LLMTimeoutError(f"LLM call timed out: {error}")
+    if isinstance(error, httpx.TransportError):
+        return ServiceUnavailableError(f"LLM server unreachable: {error}", 503)
+    return error
+
+
+def _add_usage(usage: Optional[Dict[str, Any]]) -> None:
+    if usage:
+        details = usage.get("prompt_tokens_details") or {}
+        telemetry.add_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"), details.get("cached_tokens"))
+
+
+def _sse_data(line: str) -> Optional[Dict[str, Any]]:
+    """Parsed `data:` event of a chat completions stream (None for other lines and [DONE])"""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    return json.loads(data)
+
+
+def _delta_text(event: Dict[str, Any]) -> str:
+    choices = event.get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+class OpenAICompatibleAdapter(LLMAdapter):
+    """Adapter for any server implementing the OpenAI chat completions API"""
+
+    model = "local-model"
+    supports_prefix = True
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 120.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.model = model or os.getenv("OPENAI_MODEL") or self.model
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self.breaker = breaker or get_circuit_breaker("openai")
+
+        self._client_args = {
+            "base_url": self.base_url,
+            "headers": {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {},
+            # Same long keep-alive as GeminiAdapter; timeouts are set per attempt
+            "limits": httpx.Limits(max_keepalive_connections=max_keepalive_connections, keepalive_expiry=keepalive_expiry),
+            "timeout": None,
+        }
+        self.client = httpx.Client(transport=transport, **self._client_args)
+        self._async_transport = async_transport
+        # Clients are bound to the loop they were created on; entries go away with their loop
+        self._aclients: "weakref.WeakKeyDictionary[Any, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._aclients_lock = threading.Lock()
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """Async client bound to the running event loop (sync wrappers run their own loops)"""
+        loop = asyncio.get_running_loop()
+        with self._aclients_lock:
+            client = self._aclients.get(loop)
+            if client is None:
+                client = self._aclients[loop] = httpx.AsyncClient(transport=self._async_transport, **self._client_args)
+            return client
+
+    async def aclose(self) -> None:
+        """Close the running event loop's async client and its connections"""
+        with self._aclients_lock:
+            client = self._aclients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _body(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        model: Optional[str],
+        prefix: Optional[str],
+        response_schema,
+        stream: bool = False
+    ) -> Dict[str, Any]:
+        messages: List[Dict[str, str]] = []
+        if prefix:
+            messages.append({"role": "system", "content": prefix})
+        messages.append({"role": "user", "content": prompt})
+        body = {
+            "model": model or self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if response_schema is not None:
+            body["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": response_schema.__name__, "schema": response_schema.model_json_schema()},
+            }
+        if stream:
+            body["stream"] = True
+            body["stream_options"] = {"include_usage": True}
+        return body
+
+    @staticmethod
+    def _response_text(data: Dict[str, Any]) -> str:
+        _add_usage(data.get("usage"))
+        choices = data.get("choices") or []
+        text = (choices[0].get("message") or {}).get("content") if choices else None
+        if not text:
+            raise EmptyResponseError("Empty response (server may be overloaded)")
+        return text
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> str:
+        """Generate text with the configured retry policy"""
+        body = self._body(prompt, max_tokens, temperature, model, prefix, response_schema)
+
+        def attempt(timeout: Optional[float]) -> str:
+            with telemetry.upstream():
+                try:
+                    response = self.client.post("/chat/completions", json=body, timeout=timeout)
+                except httpx.HTTPError as e:
+                    raise _transport_error(e) from e
+            _raise_for_status(response)
+            return self._response_text(response.json())
+
+        return self.retry_policy.call(attempt, self.breaker)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> str:
+        """Async variant of generate()"""
+        body = self._body(prompt, max_tokens, temperature, model, prefix, response_schema)
+
+        async def attempt(timeout: Optional[float]) -> str:
+            with telemetry.upstream():
+                try:
+                    response = await self._async_client().post("/chat/completions", json=body, timeout=timeout)
+                except httpx.HTTPError as e:
+                    raise _transport_error(e) from e
+            _raise_for_status(response)
+            return self._response_text(response.json())
+
+        return await self.retry_policy.acall(attempt, self.breaker)
+
+    def generate_json(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> Dict[str, Any]:
+        """Generate JSON (schema-constrained when the server supports json_schema)"""
+        response = self.generate(_json_prompt(prompt, max_tokens), max_tokens, temperature, model, prefix, response_schema)
+        return _parse_json_text(response, response_schema)
+
+    async def agenerate_json(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> Dict[str, Any]:
+        """Async variant of generate_json()"""
+        response = await self.agenerate(_json_prompt(prompt, max_tokens), max_tokens, temperature, model, prefix, response_schema)
+        return _parse_json_text(response, response_schema)
+
+    def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> Iterator[str]:
+        """
+        Stream text deltas from a server-sent event stream
+
+        Only opening the stream (up to the first delta) is retried.
+        """
+        body = self._body(prompt, max_tokens, temperature, model, prefix, response_schema, stream=True)
+
+        def open_stream(timeout: Optional[float]):
+            with telemetry.upstream():
+                try:
+                    response = self.client.send(self.client.build_request("POST", "/chat/completions", json=body, timeout=timeout), stream=True)
+                except httpx.HTTPError as e:
+                    raise _transport_error(e) from e
+                try:
+                    if response.status_code >= 400:
+                        response.read()
+                        _raise_for_status(response)
+                    lines = response.iter_lines()
+                    for line in lines:
+                        event = _sse_data(line)
+                        if event is None:
+                            continue
+                        _add_usage(event.get("usage"))
+                        text = _delta_text(event)
+                        if text:
+                            return text, lines, response
+                except httpx.HTTPError as e:
+                    response.close()
+                    raise _transport_error(e) from e
+                except Exception:
+                    response.close()
+                    raise
+                response.close()
+            raise EmptyResponseError("Empty response (server may be overloaded)")
+
+        first, lines, response = self.retry_policy.call(open_stream, self.breaker)
+        try:
+            yield first
+            for line in lines:
+                event = _sse_data(line)
+                if event is None:
+                    continue
+                # With include_usage the final event carries usage and no choices
+                _add_usage(event.get("usage"))
+                text = _delta_text(event)
+                if text:
+                    yield text
+        finally:
+            response.close()
+
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 4000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        prefix: Optional[str] = None,
+        response_schema=None
+    ) -> AsyncIterator[str]:
+        """Async variant of generate_stream()"""
+        body = self._body(prompt, max_tokens, temperature, model, prefix, response_schema, stream=True)
+
+        async def open_stream(timeout: Optional[float]):
+            client = self._async_client()
+            with telemetry.upstream():
+                try:
+                    response = await client.send(client.build_request("POST", "/chat/completions", json=body, timeout=timeout), stream=True)
+                except httpx.HTTPError as e:
+                    raise _transport_error(e) from e
+                try:
+                    if response.status_code >= 400:
+                        await response.aread()
+                        _raise_for_status(response)
+                    lines = response.aiter_lines()
+                    async for line in lines:
+                        event = _sse_data(line)
+                        if event is None:
+                            continue
+                        _add_usage(event.get("usage"))
+                        text = _delta_text(event)
+                        if text:
+                            return text, lines, response
+                except httpx.HTTPError as e:
+                    await response.aclose()
+                    raise _transport_error(e) from e
+                except BaseException:
+                    await response.aclose()
+                    raise
+                await response.aclose()
+            raise EmptyResponseError("Empty response (server may be overloaded)")
+
+        first, lines, response = await self.retry_policy.acall(open_stream, self.breaker)
+        try:
+            yield first
+            async for line in lines:
+                event = _sse_data(line)
+                if event is None:
+                    continue
+                _add_usage(event.get("usage"))
+                text = _delta_text(event)
+                if text:
+                    yield text
+        finally:
+            await response.aclose()
@@ -9,6 +9,8 @@ Contains all prompts for:
 
 from typing import Dict, Any, List
 
+from .compact import to_prompt
+
 
 class PromptTemplates:
     """Centralized prompt templates"""
@@ -102,16 +104,14 @@ Be harsh but fair. Real recruiters reject 75% of resumes. Your feedback should b
     @staticmethod
     def evaluator_user_prompt(jd_text: str, resume_json: Dict[str, Any]) -> str:
         """User prompt for evaluator"""
-        import json
-        
-        resume_str = json.dumps(resume_json, indent=2)
+        resume_str = to_prompt(resume_json)
         
         return f"""Evaluate this resume against the job description.
 
 JOB DESCRIPTION:
 {jd_text}
 
-RESUME (JSON):
+RESUME:
 {resume_str}
 
 Provide a detailed evaluation in JSON format:
@@ -162,15 +162,13 @@ Be strategic: focus on high-impact changes that will improve the score most."""
     @staticmethod
     def reviser_user_prompt(eval_report: Dict[str, Any], current_resume: Dict[str, Any]) -> str:
         """User prompt for reviser"""
-        import json
-        
         return f"""Create a revision plan based on this evaluation:
 
 EVALUATION REPORT:
-{json.dumps(eval_report, indent=2)}
+{to_prompt(eval_report)}
 
 CURRENT RESUME:
-{json.dumps(current_resume, indent=2)}
+{to_prompt(current_resume)}
 
 Generate a revision plan in JSON format:
 {{
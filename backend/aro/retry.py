@@ -0,0 +1,419 @@
+"""
+Retry Policy - Typed LLM errors, jittered backoff, deadlines, circuit breaker
+
+- classify_error() maps provider exceptions (google-genai APIError, httpx
+  timeouts, plain messages) to typed LLMError subclasses
+- RetryPolicy retries retriable errors with full-jitter exponential
+  backoff, honours server retry hints, and enforces a per-attempt timeout
+  and an overall deadline
+- CircuitBreaker is shared per provider: after repeated failures it fails
+  fast while open, then lets a single half-open probe through
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+
+
+class LLMError(Exception):
+    """Base class for classified LLM provider errors"""
+    retriable = False
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimitError(LLMError):
+    """429 / RESOURCE_EXHAUSTED - provider is throttling this client"""
+    retriable = True
+
+
+class ServiceUnavailableError(LLMError):
+    """5xx / overloaded - provider is unhealthy"""
+    retriable = True
+
+
+class EmptyResponseError(LLMError):
+    """Provider returned no text (usually under load)"""
+    retriable = True
+
+
+class LLMTimeoutError(LLMError):
+    """A single attempt took longer than the per-call timeout"""
+    retriable = True
+
+
+class InvalidRequestError(LLMError):
+    """4xx (bad request, auth, not found) - retrying will not help"""
+
+
+class SchemaValidationError(LLMError):
+    """Output parsed but does not match the requested response schema"""
+
+
+class CircuitOpenError(LLMError):
+    """Circuit breaker is open; the call was not attempted"""
+
+
+class DeadlineExceededError(LLMError):
+    """The overall retry deadline ran out"""
+
+
+# Errors that indicate the provider itself is unhealthy (trip the breaker)
+PROVIDER_FAILURES = (ServiceUnavailableError, LLMTimeoutError, EmptyResponseError)
+
+_RETRY_IN_PATTERN = re.compile(r'retry(?:Delay)?["\s:]*(?:in\s*)?"?(\d+(?:\.\d+)?)\s*s', re.IGNORECASE)
+
+
+def _retry_hint(error: Exception) -> Optional[float]:
+    """Extract a server-provided retry delay (Retry-After header, RetryInfo, message)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    details = getattr(error, "details", None)
+    text = json.dumps(details, default=str) if details else str(error)
+    match = _RETRY_IN_PATTERN.search(text)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def classify_error(error: Exception) -> LLMError:
+    """
+    Map any exception from a provider call to a typed LLMError
+
+    Uses the HTTP status code when the SDK provides one and falls back
+    to well-known message markers otherwise.
+    """
+    if isinstance(error, LLMError):
+        return error
+
+    message = str(error) or type(error).__name__
+    retry_after = _retry_hint(error)
+
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "timeout" in type(error).__name__.lower():
+        return LLMTimeoutError(f"LLM call timed out: {message}")
+
+    code = getattr(error, "code", None)
+    if not isinstance(code, int):
+        code = getattr(error, "status_code", None)
+    if isinstance(code, int):
+        if code == 429:
+            return RateLimitError(message, code, retry_after)
+        if code >= 500:
+            return ServiceUnavailableError(message, code, retry_after)
+        if 400 <= code < 500:
+            return InvalidRequestError(message, code)
+
+    lowered = message.lower()
+    if "429" in lowered or "resource_exhausted" in lowered or "rate limit" in lowered:
+        return RateLimitError(message, 429, retry_after)
+    if any(marker in lowered for marker in ("503", "500", "502", "504", "overloaded", "unavailable")):
+        return ServiceUnavailableError(message, 503, retry_after)
+    if "empty response" in lowered:
+        return EmptyResponseError(message)
+    return LLMError(message)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive provider failures.
+    Open -> half-open after `reset_timeout`; one probe call decides whether
+    to close again or re-open. A probe that is cancelled (or never reports
+    back within `reset_timeout`) frees the slot for the next probe.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str = "llm",
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError unless a call may proceed
+
+        Returns:
+            True if the call is the half-open probe (release it with
+            release_probe() if it ends without a result)
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return False
+            stale = self._clock() - self._probe_started >= self.reset_timeout
+            if state == self.HALF_OPEN and (not self._probe_in_flight or stale):
+                self._probe_in_flight = True
+                self._probe_started = self._clock()
+                return True
+
+            self._rejected += 1
+            retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+            raise CircuitOpenError(
+                f"{self.name} circuit is open (provider unhealthy), failing fast",
+                retry_after=retry_in
+            )
+
+    def release_probe(self) -> None:
+        """Free the probe slot of a call that was cancelled, counting neither success nor failure"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: LLMError) -> None:
+        with self._lock:
+            if not isinstance(error, PROVIDER_FAILURES):
+                # Request-level errors say nothing about provider health
+                self._probe_in_flight = False
+                return
+
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State for health checks and metrics"""
+        with self._lock:
+            state = self._current_state()
+            retry_in = 0.0
+            if state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "rejected_calls": self._rejected,
+                "retry_in_seconds": round(retry_in, 2)
+            }
+
+
+class RetryPolicy:
+    """
+    Retry retriable LLMErrors with full-jitter exponential backoff
+
+    Args:
+        max_attempts: Total attempts including the first
+        base_delay: Backoff base in seconds (attempt n sleeps up to base * 2**n)
+        max_delay: Cap for a single backoff sleep
+        attempt_timeout: Per-attempt timeout in seconds (None = no limit)
+        deadline: Total time budget across all attempts (None = no limit)
+        on_error: Called with the classified error of every failed attempt,
+            retried or not (e.g. AIMDLimiter.observe)
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 20.0,
+        attempt_timeout: Optional[float] = 120.0,
+        deadline: Optional[float] = 300.0,
+        rng: Callable[[], float] = random.random,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        asleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        on_error: Optional[Callable[[LLMError], None]] = None
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self._rng = rng
+        self._clock = clock
+        self._sleep = sleep
+        self._asleep = asleep
+        self.on_error = on_error
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Build from LLM_MAX_ATTEMPTS, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, LLM_CALL_TIMEOUT, LLM_DEADLINE"""
+        def optional(name: str, default: str) -> Optional[float]:
+            value = float(os.getenv(name, default))
+            return value if value > 0 else None
+
+        return cls(
+            max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "1")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "20")),
+            attempt_timeout=optional("LLM_CALL_TIMEOUT", "120"),
+            deadline=optional("LLM_DEADLINE", "300"),
+        )
+
+    def backoff(self, attempt: int, error: LLMError) -> float:
+        """Delay before retry number `attempt + 1` (0-based attempt that failed)"""
+        if error.retry_after is not None:
+            return min(error.retry_after, self.max_delay)
+        return self._rng() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def _attempt_timeout(self, started: float) -> Optional[float]:
+        """Timeout for the next attempt, clipped to what's left of the deadline"""
+        timeout = self.attempt_timeout
+        if self.deadline is not None:
+            remaining = self.deadline - (self._clock() - started)
+            if remaining <= 0:
+                raise DeadlineExceededError(f"LLM call exceeded its {self.deadline:.0f}s deadline")
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _next_delay(self, attempt: int, error: LLMError, started: float) -> Optional[float]:
+        """Return the backoff delay, or None if the error should be raised"""
+        if not error.retriable or attempt >= self.max_attempts - 1:
+            return None
+
+        delay = self.backoff(attempt, error)
+        if self.deadline is not None and self._clock() - started + delay >= self.deadline:
+            return None
+
+        print(f"   ⚠️  API issue ({type(error).__name__}), retrying in {delay:.1f}s... (attempt {attempt + 1}/{self.max_attempts})")
+        return delay
+
+    def call(self, fn: Callable[[Optional[float]], Any], breaker: Optional[CircuitBreaker] = None) -> Any:
+        """
+        Run fn(timeout) with retries
+
+        fn receives the per-attempt timeout in seconds (or None) and should
+        pass it to the underlying client.
+        """
+        started = self._clock()
+        for attempt in range(self.max_attempts):
+            timeout = self._attempt_timeout(started)
+            probe = breaker is not None and breaker.before_call()
+            try:
+                result = fn(timeout)
+            except Exception as e:
+                error = classify_error(e)
+                if breaker is not None:
+                    breaker.record_failure(error)
+                if self.on_error is not None:
+                    self.on_error(error)
+                delay = self._next_delay(attempt, error, started)
+                if delay is None:
+                    if error is e:
+                        raise
+                    raise error from e
+                self._sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (KeyboardInterrupt, GeneratorExit, ...): no verdict on the provider
+                if probe:
+                    breaker.release_probe()
+                raise
+
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    async def acall(self, fn: Callable[[Optional[float]], Awaitable[Any]], breaker: Optional[CircuitBreaker] = None) -> Any:
+        """Async variant of call(); the per-attempt timeout is enforced with asyncio.wait_for"""
+        started = self._clock()
+        for attempt in range(self.max_attempts):
+            timeout = self._attempt_timeout(started)
+            probe = breaker is not None and breaker.before_call()
+            try:
+                result = await asyncio.wait_for(fn(timeout), timeout)
+            except Exception as e:
+                error = classify_error(e)
+                if breaker is not None:
+                    breaker.record_failure(error)
+                if self.on_error is not None:
+                    self.on_error(error)
+                delay = self._next_delay(attempt, error, started)
+                if delay is None:
+                    if error is e:
+                        raise
+                    raise error from e
+                await self._asleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (task cancel, GeneratorExit, ...): no verdict on the provider
+                if probe:
+                    breaker.release_probe()
+                raise
+
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Process-wide breaker for a provider, shared by every adapter instance
+
+    Configured via LLM_BREAKER_THRESHOLD and LLM_BREAKER_RESET (seconds).
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def circuit_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every registered breaker"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
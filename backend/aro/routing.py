@@ -0,0 +1,467 @@
+"""
+Stage Routing - Per-agent model, sampling and token limits
+
+Each pipeline stage (generator, generator_section, evaluator,
+factuality, reviser, reviser_patch, reviser_section, generator_agent)
+looks up a StageRoute that decides which model it calls, at what
+temperature, with what output budget, and which model to fall back to
+if the call fails. Every routed
+call records latency, estimated tokens and estimated cost per stage so
+the table can be tuned.
+
+A JSON response that was cut off is repaired (see aro.json_stream); if
+schema-required keys are still missing or were truncated, one short
+continuation call asks for just those keys and merges them in, so the
+stage does not re-pay for the whole generation. Repair and continuation
+rates are reported per stage, and each call is traced as an
+aro.telemetry CallRecord (tokens, queue/upstream latency, attempts,
+cache hit).
+
+Each route also has an input budget (max_input_tokens). Prompt builders
+go through fit_prompt(), which estimates the prompt locally (see
+aro.tokens), shrinks inputs such as the job description or feedback
+until it fits, warns when it still does not, and reports the estimated
+cost of the call before it is made.
+
+The table is configured with LLM_ROUTES, either inline JSON or a path to
+a JSON file, e.g.:
+
+    LLM_ROUTES='{"evaluator": {"model": "gemini-2.5-flash-lite",
+                               "fallback_model": "gemini-2.5-flash"}}'
+"""
+from dataclasses import dataclass, asdict, replace
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+from pydantic import create_model
+
+from .llm_adapter import LLMAdapter, validate_json
+from .json_stream import RepairedJSON
+from .telemetry import track
+from .tokens import estimate_tokens, fit_inputs
+
+
+# USD per 1M (input, output) tokens
+MODEL_PRICES = {
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+# Model assumed for cost estimates when neither the route nor the adapter names one
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# model=None keeps the adapter's default model; max_input_tokens budgets
+# the whole prompt including the shared profile prefix
+DEFAULT_ROUTES = {
+    "generator": {"max_tokens": 8000, "max_input_tokens": 16000},
+    "generator_section": {"max_tokens": 3000, "max_input_tokens": 16000},
+    "generator_agent": {"max_tokens": 8000, "max_input_tokens": 8000},
+    "evaluator": {"max_tokens": 6000, "max_input_tokens": 8000},
+    "factuality": {"max_tokens": 10000, "max_input_tokens": 16000},
+    "reviser": {"max_tokens": 10000, "max_input_tokens": 20000},
+    "reviser_patch": {"max_tokens": 3000, "max_input_tokens": 20000},
+    "reviser_section": {"max_tokens": 3000, "max_input_tokens": 16000},
+}
+
+
+def remaining_keys(result: Dict[str, Any], schema=None) -> List[str]:
+    """Top-level keys still to produce: cut off by the repair, or required by the schema and absent"""
+    remaining = list(getattr(result, "truncated", []))
+    if schema is not None:
+        for name, field in schema.model_fields.items():
+            if field.is_required() and name not in result and name not in remaining:
+                remaining.append(name)
+    return remaining
+
+
+def partial_schema(schema, keys: List[str]):
+    """Response schema restricted to `keys` (None without a schema)"""
+    if schema is None:
+        return None
+    fields = {key: (schema.model_fields[key].annotation, ...) for key in keys if key in schema.model_fields}
+    return create_model(f"{schema.__name__}Remaining", **fields)
+
+
+def continuation_prompt(prompt: str, partial: Dict[str, Any], keys: List[str]) -> str:
+    """Ask for only the keys a cut-off response did not finish"""
+    done = {key: value for key, value in partial.items() if key not in keys}
+    return f"""{prompt}
+
+Your previous response was cut off. These keys are already done, do not repeat them:
+{json.dumps(done, ensure_ascii=False)}
+
+Return ONLY a JSON object with the remaining keys: {", ".join(keys)}"""
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of a call, 0 for models without a known price"""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class StageStats:
+    """Thread-safe per-stage, per-model latency and cost accounting"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, stage: str, model: str, seconds: float, prompt: str, output: Any, ok: bool, fallback: bool = False) -> None:
+        text = output if isinstance(output, str) else json.dumps(output) if output is not None else ""
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+
+        with self._lock:
+            entry = self._entry(stage)
+            entry["calls"] += 1
+            entry["failures"] += 0 if ok else 1
+            entry["fallbacks"] += 1 if fallback else 0
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["cost_usd"] += estimate_cost(model, input_tokens, output_tokens)
+            entry["models"][model] = entry["models"].get(model, 0) + 1
+
+    def _entry(self, stage: str) -> Dict[str, Any]:
+        return self._stages.setdefault(stage, {
+            "calls": 0, "failures": 0, "fallbacks": 0,
+            "total_seconds": 0.0, "max_seconds": 0.0,
+            "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+            "repairs": 0, "continuations": 0, "continuation_failures": 0,
+            "prompts_shrunk": 0, "prompts_over_budget": 0,
+            "models": {},
+        })
+
+    def count(self, stage: str, name: str) -> None:
+        """Bump a per-stage counter (repairs, continuations, prompts_shrunk, ...)"""
+        with self._lock:
+            self._entry(stage)[name] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for stage, entry in self._stages.items():
+                stats = dict(entry, models=dict(entry["models"]))
+                calls = entry["calls"] or 1
+                stats["avg_seconds"] = round(entry["total_seconds"] / calls, 3)
+                stats["repair_rate"] = round(entry["repairs"] / calls, 4)
+                stats["continuation_rate"] = round(entry["continuations"] / calls, 4)
+                stats["cost_usd"] = round(entry["cost_usd"], 6)
+                result[stage] = stats
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+stage_stats = StageStats()
+
+
+@dataclass
+class PromptBudget:
+    """Estimated size and cost of one stage call, computed before sending it"""
+
+    stage: str
+    model: str
+    input_tokens: int                       # prompt + prefix
+    prefix_tokens: int
+    max_input_tokens: Optional[int]
+    max_output_tokens: int
+    shrunk: Dict[str, int]                  # input name -> tokens removed
+
+    @property
+    def over_budget(self) -> bool:
+        return self.max_input_tokens is not None and self.input_tokens > self.max_input_tokens
+
+    @property
+    def max_cost_usd(self) -> float:
+        """Cost if the whole output budget is used"""
+        return estimate_cost(self.model, self.input_tokens, self.max_output_tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), over_budget=self.over_budget, max_cost_usd=round(self.max_cost_usd, 6))
+
+
+@dataclass
+class StageRoute:
+    """How one pipeline stage calls the LLM"""
+
+    stage: str
+    model: Optional[str] = None
+    temperature: float = 0
+    max_tokens: int = 4000
+    fallback_model: Optional[str] = None
+    max_input_tokens: Optional[int] = None
+
+    def _options(self, llm: LLMAdapter, model: Optional[str], prefix: Optional[str], schema=None) -> Dict[str, Any]:
+        """Only pass options that differ from the adapter defaults"""
+        options = {"prefix": prefix} if prefix and llm.supports_prefix else {}
+        if schema is not None:
+            options["response_schema"] = schema
+        if model and model != getattr(llm, "model", None):
+            options["model"] = model
+        if self.temperature:
+            options["temperature"] = self.temperature
+        return options
+
+    def _attempts(self, llm: LLMAdapter):
+        yield self.model, False
+        if self.fallback_model and self.fallback_model != self.model:
+            yield self.fallback_model, True
+
+    def _model_name(self, llm: LLMAdapter, model: Optional[str]) -> str:
+        return model or getattr(llm, "model", type(llm).__name__)
+
+    def fit_prompt(
+        self,
+        build: Callable[..., str],
+        inputs: Optional[Dict[str, str]] = None,
+        prefix: Optional[str] = None,
+        llm: Optional[LLMAdapter] = None,
+        report: bool = True
+    ) -> Tuple[str, PromptBudget]:
+        """
+        Build a prompt within this stage's input budget
+
+        Args:
+            build: Renders the prompt from `inputs` as keyword arguments
+            inputs: Inputs that may be shrunk to fit (largest first)
+            prefix: Shared prefix sent with the prompt (counted, never shrunk)
+            llm: Adapter the call will go to (names the model for the cost)
+            report: Warn and count shrunk/over-budget prompts in stage_stats
+                (off when only planning a run)
+
+        Returns:
+            (prompt, PromptBudget)
+        """
+        prefix_tokens = estimate_tokens(prefix or "")
+        if self.max_input_tokens is None:
+            prompt, shrunk = build(**(inputs or {})), {}
+        else:
+            prompt, shrunk = fit_inputs(build, inputs or {}, self.max_input_tokens, prefix_tokens)
+
+        model = self.model or (getattr(llm, "model", None) if llm is not None else None) or DEFAULT_MODEL
+        budget = PromptBudget(
+            self.stage, model, prefix_tokens + estimate_tokens(prompt), prefix_tokens,
+            self.max_input_tokens, self.max_tokens, shrunk
+        )
+        if not report:
+            return prompt, budget
+        if shrunk:
+            stage_stats.count(self.stage, "prompts_shrunk")
+            cut = ", ".join(f"{name} -{tokens}" for name, tokens in shrunk.items())
+            print(f"⚠️ {self.stage} prompt shrunk to fit {self.max_input_tokens} input tokens ({cut})")
+        if budget.over_budget:
+            stage_stats.count(self.stage, "prompts_over_budget")
+            print(f"⚠️ {self.stage} prompt is ~{budget.input_tokens} tokens, over its {self.max_input_tokens} token budget")
+        return prompt, budget
+
+    def generate_json(self, llm: LLMAdapter, prompt: str, prefix: Optional[str] = None, schema=None) -> Dict[str, Any]:
+        """
+        Routed generate_json(), retrying once on the fallback model
+
+        `prefix` is shared context (e.g. the user profile) sent ahead of
+        the prompt that the adapter may upload once and reuse. `schema` is
+        a Pydantic model sent as the response schema; the result is
+        validated against it (a mismatch counts as a failed call). A
+        truncated response is completed with complete_json() first.
+        """
+        error = None
+        sent = (prefix or "") + prompt
+        if prefix and not llm.supports_prefix:
+            prompt, prefix = sent, None
+        for model, fallback in self._attempts(llm):
+            start = time.monotonic()
+            try:
+                with track(self.stage, self._model_name(llm, model)):
+                    result = llm.generate_json(prompt, self.max_tokens, **self._options(llm, model, prefix, schema))
+                result = self.complete_json(llm, prompt, result, prefix, schema, model)
+                if schema is not None:
+                    result = validate_json(result, schema)
+            except Exception as e:
+                stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, sent, None, False, fallback)
+                error = error or e
+                continue
+            stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, sent, result, True, fallback)
+            return result
+        raise error
+
+    async def agenerate_json(self, llm: LLMAdapter, prompt: str, prefix: Optional[str] = None, schema=None) -> Dict[str, Any]:
+        """Async variant of generate_json()"""
+        error = None
+        sent = (prefix or "") + prompt
+        if prefix and not llm.supports_prefix:
+            prompt, prefix = sent, None
+        for model, fallback in self._attempts(llm):
+            start = time.monotonic()
+            try:
+                with track(self.stage, self._model_name(llm, model)):
+                    result = await llm.agenerate_json(prompt, self.max_tokens, **self._options(llm, model, prefix, schema))
+                result = await self.acomplete_json(llm, prompt, result, prefix, schema, model)
+                if schema is not None:
+                    result = validate_json(result, schema)
+            except Exception as e:
+                stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, sent, None, False, fallback)
+                error = error or e
+                continue
+            stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, sent, result, True, fallback)
+            return result
+        raise error
+
+    def _continuation(self, llm: LLMAdapter, prompt: str, result: Dict[str, Any], prefix: Optional[str], schema, model: Optional[str]):
+        """(keys to continue, continuation prompt, call options), counting the repair"""
+        if isinstance(result, RepairedJSON):
+            stage_stats.count(self.stage, "repairs")
+        keys = remaining_keys(result, schema)
+        if not keys:
+            return keys, None, None
+        stage_stats.count(self.stage, "continuations")
+        if prefix and not llm.supports_prefix:
+            prompt, prefix = prefix + prompt, None
+        return keys, continuation_prompt(prompt, result, keys), self._options(llm, model, prefix, partial_schema(schema, keys))
+
+    def _merge(self, result: Dict[str, Any], keys: List[str], continuation: Any) -> Dict[str, Any]:
+        """Fill `keys` from the continuation; counts a failure if any are still unfinished"""
+        continuation = continuation if isinstance(continuation, dict) else {}
+        truncated = getattr(continuation, "truncated", [])
+        finished = {key: continuation[key] for key in keys if key in continuation and key not in truncated}
+        if len(finished) < len(keys):
+            stage_stats.count(self.stage, "continuation_failures")
+        merged = dict(result)
+        merged.update(finished)
+        return merged
+
+    def complete_json(
+        self, llm: LLMAdapter, prompt: str, result: Dict[str, Any],
+        prefix: Optional[str] = None, schema=None, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Finish a parsed response whose tail was cut off
+
+        Keys that the repair closed early or that the schema requires but
+        never arrived are requested in one continuation call (sent with a
+        schema restricted to those keys) and merged into `result`. If the
+        continuation fails, `result` is returned as it is.
+        """
+        keys, continuation, options = self._continuation(llm, prompt, result, prefix, schema, model)
+        if not keys:
+            return result
+
+        start = time.monotonic()
+        try:
+            with track(self.stage, self._model_name(llm, model), "continuation"):
+                output = llm.generate_json(continuation, self.max_tokens, **options)
+        except Exception:
+            stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, continuation, None, False)
+            stage_stats.count(self.stage, "continuation_failures")
+            return result
+        stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, continuation, output, True)
+        return self._merge(result, keys, output)
+
+    async def acomplete_json(
+        self, llm: LLMAdapter, prompt: str, result: Dict[str, Any],
+        prefix: Optional[str] = None, schema=None, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async variant of complete_json()"""
+        keys, continuation, options = self._continuation(llm, prompt, result, prefix, schema, model)
+        if not keys:
+            return result
+
+        start = time.monotonic()
+        try:
+            with track(self.stage, self._model_name(llm, model), "continuation"):
+                output = await llm.agenerate_json(continuation, self.max_tokens, **options)
+        except Exception:
+            stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, continuation, None, False)
+            stage_stats.count(self.stage, "continuation_failures")
+            return result
+        stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, continuation, output, True)
+        return self._merge(result, keys, output)
+
+    async def agenerate_json_stream(self, llm: LLMAdapter, prompt: str, prefix: Optional[str] = None, schema=None) -> AsyncIterator[str]:
+        """
+        Routed agenerate_json_stream()
+
+        Falls back only if the primary model fails before its first delta;
+        output already sent to the caller is never replayed. The schema
+        constrains generation; validating the assembled JSON is up to the
+        caller.
+        """
+        error = None
+        sent = (prefix or "") + prompt
+        if prefix and not llm.supports_prefix:
+            prompt, prefix = sent, None
+        for model, fallback in self._attempts(llm):
+            start = time.monotonic()
+            chunks = []
+            try:
+                with track(self.stage, self._model_name(llm, model), "stream"):
+                    async for delta in llm.agenerate_json_stream(prompt, self.max_tokens, **self._options(llm, model, prefix, schema)):
+                        chunks.append(delta)
+                        yield delta
+            except Exception as e:
+                stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, sent, "".join(chunks), False, fallback)
+                if chunks:
+                    raise
+                error = error or e
+                continue
+            stage_stats.record(self.stage, self._model_name(llm, model), time.monotonic() - start, sent, "".join(chunks), True, fallback)
+            return
+        raise error
+
+
+class StageRouter:
+    """Routing table from stage name to StageRoute"""
+
+    def __init__(self, routes: Optional[Dict[str, Dict[str, Any]]] = None):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, StageRoute] = {}
+        for stage, fields in DEFAULT_ROUTES.items():
+            self._routes[stage] = StageRoute(stage, **fields)
+        for stage, fields in (routes or {}).items():
+            self.configure(stage, **fields)
+
+    def route(self, stage: str) -> StageRoute:
+        """Route for a stage (a default route if it is not in the table)"""
+        with self._lock:
+            return self._routes.get(stage) or StageRoute(stage)
+
+    def configure(self, stage: str, **fields) -> StageRoute:
+        """Override fields of a stage's route (model, temperature, max_tokens, max_input_tokens, fallback_model)"""
+        with self._lock:
+            current = self._routes.get(stage) or StageRoute(stage)
+            self._routes[stage] = replace(current, **fields)
+            return self._routes[stage]
+
+    def table(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {stage: asdict(route) for stage, route in self._routes.items()}
+
+    @classmethod
+    def from_env(cls) -> "StageRouter":
+        """Build the router from LLM_ROUTES (inline JSON or a JSON file path)"""
+        raw = os.getenv("LLM_ROUTES", "").strip()
+        if not raw:
+            return cls()
+        if not raw.startswith("{"):
+            with open(raw, "r", encoding="utf-8") as f:
+                raw = f.read()
+        return cls(json.loads(raw))
+
+
+_router: Optional[StageRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_stage_router() -> StageRouter:
+    """Process-wide routing table used by every agent unless a route is passed in"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = StageRouter.from_env()
+        return _router
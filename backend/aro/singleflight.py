@@ -0,0 +1,151 @@
+"""
+Single-flight - Coalesce identical in-flight LLM requests
+
+When the same prompt is requested again while a call for it is still
+running (double-clicked generate, two workers evaluating the same
+resume/JD pair), the later callers wait for the first call and share its
+result or error instead of paying for another upstream request.
+
+Only deterministic calls are coalesced: a sampled call (temperature != 0)
+asks for its own sample and always goes upstream.
+"""
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import copy
+import threading
+
+from .llm_adapter import LLMAdapter, LLMAdapterWrapper
+from .llm_cache import request_key
+
+
+class _Flight:
+    """A sync call in progress and the waiters sharing it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls by key, for threads and asyncio tasks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._tasks: Dict[Tuple[int, str], asyncio.Task] = {}
+        self._stats = {"calls": 0, "coalesced": 0}
+
+    def _count(self, coalesced: bool) -> None:
+        self._stats["calls"] += 1
+        if coalesced:
+            self._stats["coalesced"] += 1
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() once per key at a time; concurrent callers share its outcome"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            self._count(not leader)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of do()
+
+        The upstream call runs as its own task, so if the caller that
+        started it is cancelled the remaining waiters still get the result.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+
+        with self._lock:
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if leader:
+                task = self._tasks[task_key] = loop.create_task(fn())
+                task.add_done_callback(lambda done: self._forget(task_key, done))
+            self._count(not leader)
+
+        result = await asyncio.shield(task)
+        return result if leader else copy.deepcopy(result)
+
+    def _forget(self, task_key: Tuple[int, str], task: asyncio.Task) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
+        # Retrieve the error even if every waiter was cancelled, so asyncio
+        # does not log "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights) + len(self._tasks)
+        return stats
+
+
+class CoalescingAdapter(LLMAdapterWrapper):
+    """Shares one upstream call among concurrent identical requests"""
+
+    def __init__(self, inner: LLMAdapter, flights: SingleFlight = None):
+        super().__init__(inner)
+        self.flights = flights or SingleFlight()
+
+    def _key(self, kind: str, prompt: str, temperature: float, max_tokens: int, kwargs: Dict[str, Any]) -> str:
+        extra = {name: value for name, value in kwargs.items() if name != "temperature"}
+        return request_key(kind, self.model, prompt, temperature, max_tokens, **extra)
+
+    def generate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        if temperature != 0:
+            return self.inner.generate(prompt, max_tokens, temperature, **kwargs)
+        return self.flights.do(
+            self._key("text", prompt, temperature, max_tokens, kwargs),
+            lambda: self.inner.generate(prompt, max_tokens, temperature, **kwargs)
+        )
+
+    def generate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        if kwargs.get("temperature", 0) != 0:
+            return self.inner.generate_json(prompt, max_tokens, **kwargs)
+        return self.flights.do(
+            self._key("json", prompt, 0, max_tokens, kwargs),
+            lambda: self.inner.generate_json(prompt, max_tokens, **kwargs)
+        )
+
+    async def agenerate(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7, **kwargs) -> str:
+        if temperature != 0:
+            return await self.inner.agenerate(prompt, max_tokens, temperature, **kwargs)
+        return await self.flights.ado(
+            self._key("text", prompt, temperature, max_tokens, kwargs),
+            lambda: self.inner.agenerate(prompt, max_tokens, temperature, **kwargs)
+        )
+
+    async def agenerate_json(self, prompt: str, max_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+        if kwargs.get("temperature", 0) != 0:
+            return await self.inner.agenerate_json(prompt, max_tokens, **kwargs)
+        return await self.flights.ado(
+            self._key("json", prompt, 0, max_tokens, kwargs),
+            lambda: self.inner.agenerate_json(prompt, max_tokens, **kwargs)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """calls seen, coalesced (upstream calls saved) and currently in flight"""
+        return self.flights.stats()
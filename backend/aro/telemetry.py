@@ -0,0 +1,287 @@
+"""
+LLM Telemetry - Structured per-call records and histograms
+
+Every routed LLM call produces one CallRecord with:
+- stage and model
+- prompt / output / cached token counts from the provider's usage_metadata
+- latency split into queue time (client-side rate limiting) and upstream
+  time (inside provider attempts); the remainder is retry backoff and
+  local overhead
+- number of provider attempts (retries and hedges included)
+- response cache hit or miss
+
+StageRoute opens the record with track(); the adapters below it
+(CachedAdapter, RateLimitedAdapter, GeminiAdapter, MockAdapter) annotate
+the call in progress through a context variable, so nothing is threaded
+through adapter signatures. Records are aggregated into fixed-bucket
+histograms per stage and kept in a bounded ring for inspection:
+
+    from aro.telemetry import get_telemetry
+    get_telemetry().snapshot()      # per-stage counters and histograms
+    get_telemetry().recent(20)      # latest raw records
+"""
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import threading
+import time
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 5, 8)
+
+# Histogram name -> (CallRecord field, bucket upper bounds)
+HISTOGRAMS = {
+    "latency_seconds": ("total_seconds", LATENCY_BUCKETS),
+    "queue_seconds": ("queue_seconds", LATENCY_BUCKETS),
+    "upstream_seconds": ("upstream_seconds", LATENCY_BUCKETS),
+    "prompt_tokens": ("prompt_tokens", TOKEN_BUCKETS),
+    "output_tokens": ("output_tokens", TOKEN_BUCKETS),
+    "attempts": ("attempts", ATTEMPT_BUCKETS),
+}
+
+
+@dataclass
+class CallRecord:
+    """
+    One LLM call as seen from a pipeline stage
+
+    For streams, upstream_seconds covers opening the stream (time to the
+    first token); total_seconds covers the whole stream.
+    """
+
+    stage: str
+    model: str
+    kind: str = "json"                      # json | stream | continuation
+    started_at: float = 0.0                 # wall clock (time.time())
+    total_seconds: float = 0.0
+    queue_seconds: float = 0.0
+    upstream_seconds: float = 0.0
+    attempts: int = 0
+    prompt_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    cache: Optional[str] = None             # hit | miss | None when not cacheable
+    ok: bool = True
+    error: Optional[str] = None
+
+
+class Histogram:
+    """Fixed-bucket histogram (not thread-safe; Telemetry holds the lock)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (max for +Inf)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative(self) -> List[int]:
+        """Cumulative counts per bucket, +Inf last (Prometheus `le` semantics)"""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.cumulative())),
+        }
+
+
+class Telemetry:
+    """Thread-safe aggregation of CallRecords per stage"""
+
+    def __init__(self, max_records: int = 1000):
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records)
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, stage: str) -> Dict[str, Any]:
+        return self._stages.setdefault(stage, {
+            "calls": 0, "errors": 0, "cache_hits": 0, "cache_misses": 0,
+            "tokens": {"prompt": 0, "output": 0, "cached": 0},
+            "models": {},
+            "histograms": {name: Histogram(buckets) for name, (_, buckets) in HISTOGRAMS.items()},
+        })
+
+    def record(self, record: CallRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+            entry = self._entry(record.stage)
+            entry["calls"] += 1
+            entry["errors"] += 0 if record.ok else 1
+            entry["cache_hits"] += 1 if record.cache == "hit" else 0
+            entry["cache_misses"] += 1 if record.cache == "miss" else 0
+            entry["models"][record.model] = entry["models"].get(record.model, 0) + 1
+            for kind in entry["tokens"]:
+                entry["tokens"][kind] += getattr(record, f"{kind}_tokens") or 0
+            for name, (field, _) in HISTOGRAMS.items():
+                value = getattr(record, field)
+                # Cache hits never reached the provider: no attempts or tokens to observe
+                if value is not None and not (record.cache == "hit" and field != "total_seconds"):
+                    entry["histograms"][name].observe(value)
+
+    def stages(self) -> Dict[str, Dict[str, Any]]:
+        """Live per-stage entries with Histogram objects (for exporters); copy under lock"""
+        with self._lock:
+            return {
+                stage: dict(entry, models=dict(entry["models"]), tokens=dict(entry["tokens"]), histograms={
+                    name: _copy(histogram) for name, histogram in entry["histograms"].items()
+                })
+                for stage, entry in self._stages.items()
+            }
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage counters, cache hit rate and histogram summaries"""
+        result = {}
+        for stage, entry in self.stages().items():
+            lookups = entry["cache_hits"] + entry["cache_misses"]
+            result[stage] = {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "cache_hits": entry["cache_hits"],
+                "cache_misses": entry["cache_misses"],
+                "cache_hit_rate": round(entry["cache_hits"] / lookups, 4) if lookups else 0.0,
+                "tokens": entry["tokens"],
+                "models": entry["models"],
+                "histograms": {name: histogram.snapshot() for name, histogram in entry["histograms"].items()},
+            }
+        return result
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Latest records, newest first"""
+        with self._lock:
+            records = list(self._records)[-limit:] if limit > 0 else []
+        return [asdict(record) for record in reversed(records)]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._stages.clear()
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    clone = Histogram(histogram.buckets)
+    clone.counts = list(histogram.counts)
+    clone.count, clone.sum, clone.max = histogram.count, histogram.sum, histogram.max
+    return clone
+
+
+_telemetry = Telemetry()
+_current: ContextVar[Optional[CallRecord]] = ContextVar("llm_call", default=None)
+# Hedged attempts of one call may annotate its record from two threads
+_annotate_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """Process-wide telemetry collector"""
+    return _telemetry
+
+
+def current_call() -> Optional[CallRecord]:
+    """Record of the LLM call in progress in this context, if any"""
+    return _current.get()
+
+
+@contextmanager
+def track(stage: str, model: str, kind: str = "json", telemetry: Optional[Telemetry] = None) -> Iterator[CallRecord]:
+    """Open a CallRecord for the calls made inside the block, then record it"""
+    record = CallRecord(stage, model, kind, started_at=time.time())
+    token = _current.set(record)
+    start = time.monotonic()
+    try:
+        yield record
+    except BaseException as e:
+        record.ok = False
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.total_seconds = time.monotonic() - start
+        try:
+            _current.reset(token)
+        except ValueError:
+            # An async generator finalized in another context
+            _current.set(None)
+        (telemetry or _telemetry).record(record)
+
+
+def add_queue(seconds: float) -> None:
+    """Time spent waiting for rate limit budget or a concurrency slot"""
+    record = _current.get()
+    if record is not None and seconds > 0:
+        with _annotate_lock:
+            record.queue_seconds += seconds
+
+
+@contextmanager
+def upstream() -> Iterator[None]:
+    """Time one provider attempt (counted even if it fails)"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        record = _current.get()
+        if record is not None:
+            with _annotate_lock:
+                record.attempts += 1
+                record.upstream_seconds += time.monotonic() - start
+
+
+def add_usage(prompt_tokens: Optional[int], output_tokens: Optional[int], cached_tokens: Optional[int] = None) -> None:
+    """Add provider-reported token counts (summed over attempts and hedges)"""
+    record = _current.get()
+    if record is None:
+        return
+    with _annotate_lock:
+        for field, value in (("prompt_tokens", prompt_tokens), ("output_tokens", output_tokens), ("cached_tokens", cached_tokens)):
+            if value is not None:
+                setattr(record, field, (getattr(record, field) or 0) + value)
+
+
+def add_usage_metadata(response: Any) -> None:
+    """Token counts from a google-genai response (or stream chunk) usage_metadata"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        add_usage(
+            getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None),
+            getattr(usage, "cached_content_token_count", None)
+        )
+
+
+def note_cache(hit: bool) -> None:
+    """Mark the call in progress as a response cache hit or miss"""
+    record = _current.get()
+    if record is not None:
+        record.cache = "hit" if hit else "miss"
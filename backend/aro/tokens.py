@@ -0,0 +1,104 @@
+"""
+Token Estimates - Fast local token counts and prompt shrinking
+
+No tokenizer download or API call: counts are a heuristic close to the
+SentencePiece/BPE tokenizers used by Gemini and OpenAI models on English
+prose and JSON (usually within ~15%), which is enough to budget prompts
+before sending them:
+
+- a word is one token per ~6 letters (non-Latin scripts: one per character)
+- every digit is one token
+- a run of punctuation (JSON quotes, brackets, `": "`) is one token per
+  two marks
+- a line break plus its indentation is one token
+
+fit_inputs() rebuilds a prompt with its largest shrinkable inputs (job
+description, feedback) cut at line boundaries until it fits a budget.
+"""
+from typing import Callable, Dict, Tuple
+import re
+
+
+_WORD = re.compile(r"[^\W\d_]+")
+_DIGIT = re.compile(r"\d")
+_SYMBOLS = re.compile(r"(?:[^\w\s]|_)+")
+_BREAK = re.compile(r"\n[ \t]*")
+
+TRUNCATION_MARKER = "\n[... truncated to fit the prompt budget]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated token count of a string (0 for empty text)"""
+    if not text:
+        return 0
+    words = 0
+    for word in _WORD.findall(text):
+        words += (len(word) + 5) // 6 if word.isascii() else len(word)
+    symbols = sum((len(run) + 1) // 2 for run in _SYMBOLS.findall(text))
+    return words + len(_DIGIT.findall(text)) + symbols + len(_BREAK.findall(text))
+
+
+def shrink_text(text: str, max_tokens: int, marker: str = TRUNCATION_MARKER) -> str:
+    """
+    Keep the head of `text` within max_tokens (marker included)
+
+    The cut falls on the last line break (or sentence end) before the
+    limit when one is close enough, so requirement lists stay readable.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(marker)
+    if budget <= 0:
+        return ""
+
+    end = len(text)
+    while end > 0:
+        # Scale the cut by the observed characters-per-token ratio, then re-check
+        end = min(end - 1, int(end * budget / max(estimate_tokens(text[:end]), 1)))
+        cut = end
+        for boundary in ("\n", ". "):
+            position = text.rfind(boundary, 0, end)
+            if position >= end * 0.8:
+                cut = position + (1 if boundary == ". " else 0)
+                break
+        head = text[:cut].rstrip()
+        if estimate_tokens(head) <= budget:
+            return head + marker
+    return ""
+
+
+def fit_inputs(
+    build: Callable[..., str],
+    inputs: Dict[str, str],
+    max_tokens: int,
+    fixed_tokens: int = 0
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Build a prompt from `inputs`, shrinking the largest ones until it fits
+
+    Args:
+        build: Renders the prompt from the inputs as keyword arguments
+        inputs: Shrinkable prompt inputs by name (e.g. jd_text, feedback)
+        max_tokens: Budget for the whole input (prompt + fixed_tokens)
+        fixed_tokens: Tokens sent alongside that cannot be shrunk here
+            (e.g. the shared profile prefix)
+
+    Returns:
+        (prompt, tokens removed per input name); the prompt may still be
+        over budget if the fixed parts alone exceed it
+    """
+    inputs = dict(inputs)
+    removed: Dict[str, int] = {}
+    prompt = build(**inputs)
+    for _ in range(2 * len(inputs)):
+        overflow = fixed_tokens + estimate_tokens(prompt) - max_tokens
+        if overflow <= 0:
+            break
+        name = max(inputs, key=lambda key: estimate_tokens(inputs[key]))
+        before = estimate_tokens(inputs[name])
+        if before == 0:
+            break
+        inputs[name] = shrink_text(inputs[name], max(before - overflow, 0))
+        removed[name] = removed.get(name, 0) + before - estimate_tokens(inputs[name])
+        prompt = build(**inputs)
+    return prompt, removed
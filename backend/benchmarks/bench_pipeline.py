@@ -0,0 +1,114 @@
+"""
+Pipeline Benchmark - Reproducible end-to-end timing from a cassette
+
+Record a cassette once from a real run (needs GEMINI_API_KEY):
+    python benchmarks/bench_pipeline.py --record --cassette cassettes/job1.jsonl
+
+Replay it offline as often as you like:
+    python benchmarks/bench_pipeline.py --cassette cassettes/job1.jsonl --runs 10
+    python benchmarks/bench_pipeline.py --cassette cassettes/job1.jsonl --latency --concurrency 4
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import os
+import time
+from collections import defaultdict
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv()
+
+from aro.llm_adapter import LLMAdapter, get_llm_adapter
+from aro.cassette import RecordingAdapter, ReplayAdapter
+from src.providers import JobProvider
+from src.streaming_pipeline import aoptimize_resume_stream
+
+
+async def run_once(llm: LLMAdapter, username: str, job: dict):
+    """Run the streaming pipeline once, return (seconds, seconds per stage)"""
+    stage_seconds = defaultdict(float)
+    start = last = time.monotonic()
+    stage = None
+    
+    async for update in aoptimize_resume_stream(
+        username, job['jd_text'], job['company'], job['role'], llm=llm, flush_delay=0
+    ):
+        now = time.monotonic()
+        if stage is not None:
+            stage_seconds[stage] += now - last
+        stage, last = update["stage"], now
+        if stage == "error":
+            raise RuntimeError(update["message"])
+    
+    return time.monotonic() - start, stage_seconds
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def replay(args, job):
+    """Replay the cassette `runs` times with up to `concurrency` pipelines at once"""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    
+    async def one():
+        async with semaphore:
+            # Fresh adapter per run so repeated prompts replay in recorded order
+            llm = ReplayAdapter(args.cassette, playback_latency=args.latency, speed=args.speed)
+            return await run_once(llm, args.username, job)
+    
+    start = time.monotonic()
+    results = await asyncio.gather(*[one() for _ in range(args.runs)])
+    wall = time.monotonic() - start
+    
+    durations = [seconds for seconds, _ in results]
+    stages = defaultdict(list)
+    for _, stage_seconds in results:
+        for stage, seconds in stage_seconds.items():
+            stages[stage].append(seconds)
+    
+    print(f"\n{'='*60}")
+    print(f"PIPELINE BENCHMARK ({args.runs} runs, concurrency {args.concurrency}, "
+          f"latency playback {'on' if args.latency else 'off'})")
+    print(f"{'='*60}")
+    print(f"  Run time:   mean {statistics.mean(durations):.3f}s  "
+          f"p50 {percentile(durations, 50):.3f}s  p95 {percentile(durations, 95):.3f}s")
+    print(f"  Throughput: {args.runs / wall * 60:.1f} runs/min ({wall:.2f}s wall)")
+    print(f"\n  Mean seconds per stage:")
+    for stage, values in sorted(stages.items(), key=lambda item: -statistics.mean(item[1])):
+        print(f"    {stage:<28} {statistics.mean(values):8.3f}")
+
+
+async def record(args, job):
+    """Run the pipeline once against the real provider and record a cassette"""
+    if os.path.exists(args.cassette):
+        os.remove(args.cassette)
+    # Bypass the response cache so recorded latencies are real provider latencies
+    os.environ["LLM_CACHE"] = "0"
+    llm = RecordingAdapter(get_llm_adapter("gemini"), args.cassette)
+    seconds, _ = await run_once(llm, args.username, job)
+    print(f"✅ Recorded {args.cassette} in {seconds:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("--cassette", required=True, help="Cassette file (JSON Lines)")
+    parser.add_argument("--record", action="store_true", help="Record a new cassette from a real run")
+    parser.add_argument("--username", default="chandan")
+    parser.add_argument("--job", default="job1", help="Job id under database/jobs")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", action="store_true", help="Replay with recorded latencies")
+    parser.add_argument("--speed", type=float, default=1.0, help="Latency playback speed multiplier")
+    args = parser.parse_args()
+    
+    job = JobProvider.get(args.job)
+    asyncio.run(record(args, job) if args.record else replay(args, job))
+
+
+if __name__ == "__main__":
+    main()
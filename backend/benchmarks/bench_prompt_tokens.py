@@ -0,0 +1,78 @@
+"""
+Prompt Token Benchmark - Input tokens per stage, indented JSON vs compact notation
+
+Builds every stage's prompt for a stored job (as src/run_planner.py does,
+no LLM calls) once with PROMPT_COMPACT=0 and once with the compact
+notation from aro/compact.py, and checks that the notation round-trips
+the profile, resume and feedback losslessly:
+
+    python benchmarks/bench_prompt_tokens.py
+    python benchmarks/bench_prompt_tokens.py --job temp_armada --username chandan
+"""
+import argparse
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.compact import encode, decode
+from aro.mock_responses import MOCK_RESUME, mock_evaluation, mock_factuality
+from src.providers import UserProvider, JobProvider
+from src.run_planner import plan_run
+
+
+def stage_tokens(job: dict, user_profile: dict, compact: bool) -> dict:
+    """Input tokens per stage (prefix included) with or without compact notation"""
+    previous = os.environ.get("PROMPT_COMPACT")
+    os.environ["PROMPT_COMPACT"] = "1" if compact else "0"
+    try:
+        plan = plan_run(job["jd_text"], user_profile, job["company"], job["role"])
+    finally:
+        if previous is None:
+            del os.environ["PROMPT_COMPACT"]
+        else:
+            os.environ["PROMPT_COMPACT"] = previous
+    return {
+        stage["stage"] + (f" ({stage['step']})" if "step" in stage else ""): stage["input_tokens"]
+        for stage in plan["stages"]
+    }
+
+
+def check_round_trip(user_profile: dict) -> None:
+    rng = random.Random(0)
+    for name, data in (
+        ("profile", user_profile), ("resume", MOCK_RESUME),
+        ("evaluation", mock_evaluation(rng)), ("factuality", mock_factuality(rng))
+    ):
+        if decode(encode(data)) != data:
+            raise AssertionError(f"Compact notation is lossy for the {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--job", default="job1", help="Job id in database/jobs")
+    parser.add_argument("--username", default="chandan")
+    args = parser.parse_args()
+
+    job = JobProvider.get(args.job)
+    user_profile = UserProvider.get(args.username)
+    check_round_trip(user_profile)
+
+    before = stage_tokens(job, user_profile, compact=False)
+    after = stage_tokens(job, user_profile, compact=True)
+
+    print(f"\n{'='*60}")
+    print(f"PROMPT TOKENS PER STAGE ({args.job}, estimated)")
+    print(f"{'='*60}")
+    print(f"  {'STAGE':<24}{'JSON':>8}{'COMPACT':>9}{'SAVED':>8}")
+    for stage, tokens in before.items():
+        saved = 1 - after[stage] / tokens if tokens else 0.0
+        print(f"  {stage:<24}{tokens:>8}{after[stage]:>9}{saved:>8.0%}")
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print(f"  {'all stages (one call)':<24}{total_before:>8}{total_after:>9}{1 - total_after / total_before:>8.0%}")
+    print("\n  ✓ Compact notation round-trips profile, resume and feedback losslessly")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Fake Gemini - Local HTTP server implementing the Gemini REST surface
+
+Serves generateContent, streamGenerateContent (SSE) and cachedContents
+with the same stage-appropriate responses, latency distribution and
+faults as MockAdapter, so the real GeminiAdapter path (google-genai SDK,
+httpx connection pool, retries, circuit breaker) can be load tested with
+no network access.
+
+Start the fake provider, then point the API at it:
+    python benchmarks/fake_gemini.py --port 8090 --p50 2 --p99 12 --error-rate 0.02
+    GEMINI_BASE_URL=http://127.0.0.1:8090 GEMINI_API_KEY=fake python main.py
+
+The same server also answers the OpenAI-compatible
+/v1/chat/completions endpoint, standing in for a local llama.cpp/vLLM
+server behind OpenAICompatibleAdapter:
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1 LLM_PROVIDER=failover python main.py
+
+Drive load with benchmarks/load_test.py; GET /stats on the fake server
+shows how many upstream calls, faults and concurrent requests it saw.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from aro.llm_adapter import MockAdapter
+from aro.retry import EmptyResponseError
+
+
+# GeminiAdapter.generate_json() appends this instruction to JSON prompts
+JSON_MARKER = "Return ONLY valid JSON"
+
+
+def _error(code: int, status: str, message: str, details: Optional[list] = None) -> JSONResponse:
+    """Error body in the shape Google APIs return"""
+    body = {"error": {"code": code, "message": message, "status": status}}
+    if details:
+        body["error"]["details"] = details
+    return JSONResponse(body, status_code=code)
+
+
+def _usage(prompt: str, output: str, cached_tokens: int) -> Dict[str, int]:
+    prompt_tokens = len(prompt) // 4 + cached_tokens
+    output_tokens = len(output) // 4
+    usage = {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + output_tokens,
+    }
+    if cached_tokens:
+        usage["cachedContentTokenCount"] = cached_tokens
+    return usage
+
+
+def _candidate(text: str, finish: Optional[str] = "STOP") -> Dict[str, Any]:
+    candidate = {"index": 0}
+    if text:
+        candidate["content"] = {"role": "model", "parts": [{"text": text}]}
+    if finish:
+        candidate["finishReason"] = finish
+    return candidate
+
+
+def create_app(mock: Optional[MockAdapter] = None, rate_limit_rate: float = 0.0, seed: Optional[int] = None) -> FastAPI:
+    """
+    Build the fake Gemini app
+
+    Args:
+        mock: MockAdapter that decides latency, faults and response text
+            for every attempt (retry_policy is ignored - retrying is the
+            client's job here)
+        rate_limit_rate: Fraction of requests rejected with 429 RESOURCE_EXHAUSTED
+        seed: Seed for the 429 draws
+    """
+    mock = mock or MockAdapter()
+    app = FastAPI(title="Fake Gemini")
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    caches: Dict[str, int] = {}
+    stats = {"requests": 0, "streams": 0, "rate_limited": 0, "cache_uploads": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def count(name: str, amount: int = 1) -> None:
+        with lock:
+            stats[name] += amount
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+
+    def rate_limited() -> bool:
+        with lock:
+            limited = rng.random() < rate_limit_rate
+        if limited:
+            count("rate_limited")
+        return limited
+
+    def read_request(body: Dict[str, Any]):
+        """(prompt text, tokens served from cached content)"""
+        texts = [
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        ]
+        with lock:
+            cached_tokens = caches.get(body.get("cachedContent") or "", 0)
+        return "\n".join(texts), cached_tokens
+
+    @app.post("/{version}/models/{target}")
+    async def models(version: str, target: str, request: Request):
+        model, _, method = target.partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return _error(404, "NOT_FOUND", f"Method {method or target} not found")
+
+        prompt, cached_tokens = read_request(await request.json())
+        if rate_limited():
+            return _error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (fake quota).", [
+                {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "1s"}
+            ])
+
+        latency, outcome = mock.simulate_attempt(prompt, JSON_MARKER in prompt)
+        if isinstance(outcome, EmptyResponseError):
+            # Gemini answers with a candidate that has no content, not an error
+            outcome = ""
+        if method == "streamGenerateContent":
+            return await stream(model, prompt, cached_tokens, latency, outcome)
+
+        count("requests")
+        count("in_flight")
+        try:
+            if isinstance(outcome, Exception):
+                await asyncio.sleep(latency)
+                return _error(503, "UNAVAILABLE", "The model is overloaded. Please try again later.")
+            await asyncio.sleep(latency + mock.token_delay(outcome))
+        finally:
+            count("in_flight", -1)
+
+        return {
+            "candidates": [_candidate(outcome)],
+            "usageMetadata": _usage(prompt, outcome, cached_tokens),
+            "modelVersion": model,
+        }
+
+    async def stream(model: str, prompt: str, cached_tokens: int, latency: float, outcome: Any):
+        count("streams")
+        count("in_flight")
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            count("in_flight", -1)
+        if isinstance(outcome, Exception):
+            return _error(503, "UNAVAILABLE", "The model is overloaded. Please try again later.")
+
+        async def events():
+            count("in_flight")
+            try:
+                size = mock.CHUNK_SIZE
+                chunks = [outcome[i:i + size] for i in range(0, len(outcome), size)] or [""]
+                for index, chunk in enumerate(chunks):
+                    if index:
+                        await asyncio.sleep(mock.token_delay(chunk))
+                    last = index == len(chunks) - 1
+                    event = {"candidates": [_candidate(chunk, "STOP" if last else None)], "modelVersion": model}
+                    if last:
+                        event["usageMetadata"] = _usage(prompt, outcome, cached_tokens)
+                    yield f"data: {json.dumps(event)}\r\n\r\n"
+            finally:
+                count("in_flight", -1)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        model = body.get("model", "local-model")
+        if rate_limited():
+            return JSONResponse({"error": {"message": "Rate limit reached (fake quota).", "type": "rate_limit_error"}}, status_code=429, headers={"retry-after": "1"})
+
+        latency, outcome = mock.simulate_attempt(prompt, JSON_MARKER in prompt)
+        if isinstance(outcome, EmptyResponseError):
+            outcome = ""
+        usage = _usage(prompt, "" if isinstance(outcome, Exception) else outcome, 0)
+        usage = {"prompt_tokens": usage["promptTokenCount"], "completion_tokens": usage["candidatesTokenCount"], "total_tokens": usage["totalTokenCount"]}
+
+        count("streams" if body.get("stream") else "requests")
+        count("in_flight")
+        try:
+            await asyncio.sleep(latency + (0 if body.get("stream") or isinstance(outcome, Exception) else mock.token_delay(outcome)))
+        finally:
+            count("in_flight", -1)
+        if isinstance(outcome, Exception):
+            return JSONResponse({"error": {"message": "The model is overloaded. Please try again later.", "type": "server_error"}}, status_code=503)
+
+        if not body.get("stream"):
+            return {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": outcome}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        async def events():
+            count("in_flight")
+            try:
+                size = mock.CHUNK_SIZE
+                for index in range(0, len(outcome), size):
+                    chunk = outcome[index:index + size]
+                    if index:
+                        await asyncio.sleep(mock.token_delay(chunk))
+                    event = {"object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(event)}\n\n"
+                yield f"data: {json.dumps({'object': 'chat.completion.chunk', 'model': model, 'choices': [], 'usage': usage})}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                count("in_flight", -1)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/{version}/cachedContents")
+    async def create_cached_content(version: str, request: Request):
+        body = await request.json()
+        text = "\n".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        name = f"cachedContents/{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+        tokens = len(text) // 4
+        with lock:
+            caches[name] = tokens
+        count("cache_uploads")
+
+        now = datetime.now(timezone.utc)
+        ttl = float(str(body.get("ttl", "3600s")).rstrip("s"))
+        return {
+            "name": name,
+            "model": body.get("model", ""),
+            "displayName": body.get("displayName", ""),
+            "createTime": now.isoformat().replace("+00:00", "Z"),
+            "expireTime": (now + timedelta(seconds=ttl)).isoformat().replace("+00:00", "Z"),
+            "usageMetadata": {"totalTokenCount": tokens},
+        }
+
+    @app.get("/stats")
+    async def server_stats():
+        with lock:
+            server = dict(stats)
+        return {"server": server, "mock": mock.stats()}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Gemini API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--p50", type=float, default=2.0, help="Median latency per call (s)")
+    parser.add_argument("--p99", type=float, default=12.0, help="p99 latency per call (s)")
+    parser.add_argument("--seconds-per-token", type=float, default=0.004)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503s")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429s")
+    parser.add_argument("--empty-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--bad-fence-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    mock = MockAdapter(
+        latency_p50=args.p50,
+        latency_p99=args.p99,
+        seconds_per_token=args.seconds_per_token,
+        error_rate=args.error_rate,
+        empty_rate=args.empty_rate,
+        truncate_rate=args.truncate_rate,
+        bad_fence_rate=args.bad_fence_rate,
+        seed=args.seed
+    )
+
+    import uvicorn
+    print(f"🧪 Fake Gemini on http://{args.host}:{args.port} (p50={args.p50}s, p99={args.p99}s, 503s={args.error_rate:.0%}, 429s={args.rate_limit_rate:.0%})")
+    uvicorn.run(create_app(mock, args.rate_limit_rate, args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
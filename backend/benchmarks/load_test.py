@@ -0,0 +1,127 @@
+"""
+API Load Test - Concurrent requests against a running API
+
+Meant to run against the API pointed at benchmarks/fake_gemini.py, so
+the whole stack (routes, pipeline, adapter stack, SDK, HTTP pool) is
+exercised at hundreds of concurrent requests with no network access:
+
+    python benchmarks/fake_gemini.py --port 8090 --p50 2 --p99 12 --error-rate 0.02
+    GEMINI_BASE_URL=http://127.0.0.1:8090 GEMINI_API_KEY=fake python main.py
+    python benchmarks/load_test.py --endpoint stream --requests 400 --concurrency 200 \\
+        --fake-url http://127.0.0.1:8090
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+JD_TEXT = (
+    "Backend Software Engineer. Build Python and Java microservices on AWS with Docker "
+    "and Kubernetes, design REST APIs, and own PostgreSQL and Redis data stores."
+)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def call_generate(client: httpx.AsyncClient, args, index: int):
+    """Generation only (no optimization loop): (seconds, first event seconds, error)"""
+    start = time.monotonic()
+    response = await client.post("/api/generate", json={
+        "username": args.username, "jd_text": JD_TEXT, "company": args.company,
+        "role": "Backend Engineer", "optimize": False
+    })
+    seconds = time.monotonic() - start
+    error = None if response.status_code == 200 else f"HTTP {response.status_code}"
+    return seconds, seconds, error
+
+
+async def call_stream(client: httpx.AsyncClient, args, index: int):
+    """Full streaming pipeline: (seconds, first event seconds, error)"""
+    start = time.monotonic()
+    first = None
+    error = None
+    async with client.stream("POST", "/api/generate/stream", json={
+        "username": args.username, "jd_text": JD_TEXT, "company": args.company,
+        "role": "Backend Engineer"
+    }) as response:
+        if response.status_code != 200:
+            return time.monotonic() - start, None, f"HTTP {response.status_code}"
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            first = first if first is not None else time.monotonic() - start
+            update = json.loads(line[len("data: "):])
+            if update.get("stage") == "error":
+                error = update.get("error", "pipeline error")[:80]
+    return time.monotonic() - start, first, error
+
+
+ENDPOINTS = {"generate": call_generate, "stream": call_stream}
+
+
+async def run(args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    call = ENDPOINTS[args.endpoint]
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        async def one(index: int):
+            async with semaphore:
+                try:
+                    return await call(client, args, index)
+                except httpx.HTTPError as e:
+                    return None, None, type(e).__name__
+
+        start = time.monotonic()
+        results = await asyncio.gather(*[one(i) for i in range(args.requests)])
+        wall = time.monotonic() - start
+
+    durations = [seconds for seconds, _, error in results if error is None]
+    first_events = [first for _, first, error in results if error is None and first is not None]
+    errors = Counter(error for _, _, error in results if error is not None)
+
+    print(f"\n{'='*60}")
+    print(f"LOAD TEST: {args.endpoint} ({args.requests} requests, concurrency {args.concurrency})")
+    print(f"{'='*60}")
+    print(f"  Succeeded:  {len(durations)}/{args.requests}")
+    if durations:
+        print(f"  Latency:    p50 {percentile(durations, 50):.2f}s  p95 {percentile(durations, 95):.2f}s  "
+              f"p99 {percentile(durations, 99):.2f}s  max {max(durations):.2f}s")
+        print(f"  Mean:       {statistics.mean(durations):.2f}s")
+    if first_events and args.endpoint == "stream":
+        print(f"  First event p50 {percentile(first_events, 50):.2f}s  p95 {percentile(first_events, 95):.2f}s")
+    print(f"  Throughput: {len(durations) / wall:.2f} req/s ({wall:.1f}s wall)")
+    for error, count in errors.most_common():
+        print(f"  ❌ {count} x {error}")
+
+    if args.fake_url:
+        async with httpx.AsyncClient(base_url=args.fake_url) as client:
+            upstream = (await client.get("/stats")).json()
+        print(f"\n  Upstream (fake Gemini): {json.dumps(upstream['server'])}")
+        print(f"  Injected faults:        {json.dumps(upstream['mock'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the resume API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="generate")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--username", default="chandan")
+    parser.add_argument("--company", default="Load Test")
+    parser.add_argument("--fake-url", default=None, help="Fake Gemini URL, to print its stats")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
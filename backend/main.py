@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from api.routes import router
+from api.metrics import router as metrics_router, record_request_metrics
 
 app = FastAPI(
     title="LMARO API",
@@ -26,8 +27,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency for /metrics
+app.middleware("http")(record_request_metrics)
+
 # Include routes
 app.include_router(router, prefix="/api")
+app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -3,23 +3,71 @@ Evaluator - Scores resume against JD with detailed feedback
 """
 import re
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from aro.llm_adapter import LLMAdapter
+from aro.compact import to_prompt
+from aro.routing import StageRoute, PromptBudget, get_stage_router
+from src.schemas import EvaluationResult
+
+
+KEYWORD_PATTERNS = [
+    r'\b(Python|Java|JavaScript|TypeScript|Go|C\+\+|C#|SQL|Ruby|Rust)\b',
+    r'\b(React|Next\.js|Django|Flask|FastAPI|Spring|Node\.js|Express)\b',
+    r'\b(AWS|Azure|GCP|Kubernetes|Docker|Lambda|EC2|S3|SQS)\b',
+    r'\b(MySQL|PostgreSQL|MongoDB|Redis|DynamoDB)\b',
+    r'\b(Machine Learning|Deep Learning|PyTorch|TensorFlow|AI)\b',
+]
+
+
+def extract_jd_keywords(jd_text: str) -> Set[str]:
+    """Lower-cased technology keywords mentioned in the JD"""
+    jd_keywords = set()
+    for pattern in KEYWORD_PATTERNS:
+        matches = re.findall(pattern, jd_text, re.IGNORECASE)
+        jd_keywords.update([m.lower() for m in matches])
+    return jd_keywords
+
+
+class KeywordTracker:
+    """
+    Incremental keyword match (0-35) fed one resume section at a time,
+    so scoring can run while generation is still streaming
+    """
+    
+    def __init__(self, jd_text: str):
+        self.jd_keywords = extract_jd_keywords(jd_text)
+        self.matched: Set[str] = set()
+    
+    def add_section(self, key: str, value: Any) -> float:
+        """Record keywords found in a finished section, return running score"""
+        section_text = json.dumps({key: value}).lower()
+        for keyword in self.jd_keywords - self.matched:
+            if keyword in section_text:
+                self.matched.add(keyword)
+        return self.score()
+    
+    def score(self) -> float:
+        if not self.jd_keywords:
+            return 35.0
+        return round(len(self.matched) / len(self.jd_keywords) * 35, 2)
 
 
 class Evaluator:
-    def __init__(self, llm: LLMAdapter, debug: bool = False):
+    def __init__(self, llm: LLMAdapter, debug: bool = False, route: Optional[StageRoute] = None):
         self.llm = llm
         self.debug = debug
+        self.route = route or get_stage_router().route("evaluator")
+        self.last_budget: Optional[PromptBudget] = None
     
     def evaluate(
         self, 
         resume_json: Dict[str, Any], 
-        jd_text: str
+        jd_text: str,
+        keyword_score: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Evaluate resume against JD
@@ -27,6 +75,8 @@ class Evaluator:
         Args:
             resume_json: Generated resume JSON
             jd_text: Job description
+            keyword_score: Precomputed keyword score (e.g. from a KeywordTracker
+                fed during streaming); computed here if not given
         
         Returns:
             {
@@ -39,11 +89,32 @@ class Evaluator:
             }
         """
         # Keyword matching (35 points)
-        keyword_score = self._calculate_keyword_match(resume_json, jd_text)
+        if keyword_score is None:
+            keyword_score = self._calculate_keyword_match(resume_json, jd_text)
         
         # LLM evaluation (65 points) with section breakdown
         llm_result = self._llm_evaluate(resume_json, jd_text)
         
+        return self._combine(keyword_score, llm_result)
+    
+    async def aevaluate(
+        self, 
+        resume_json: Dict[str, Any], 
+        jd_text: str,
+        keyword_score: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Async variant of evaluate() for use inside the API event loop"""
+        if keyword_score is None:
+            keyword_score = self._calculate_keyword_match(resume_json, jd_text)
+        
+        prompt = self._build_prompt(resume_json, jd_text)
+        llm_result = await self.route.agenerate_json(self.llm, prompt, schema=EvaluationResult)
+        
+        return self._combine(keyword_score, llm_result)
+    
+    @staticmethod
+    def _combine(keyword_score: float, llm_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge keyword score and LLM result into the evaluation dict"""
         return {
             "total_score": keyword_score + llm_result['score'],
             "keyword_score": keyword_score,
@@ -55,18 +126,7 @@ class Evaluator:
     
     def _calculate_keyword_match(self, resume_json: Dict[str, Any], jd_text: str) -> float:
         """Calculate keyword match score (0-35)"""
-        jd_keywords = set()
-        patterns = [
-            r'\b(Python|Java|JavaScript|TypeScript|Go|C\+\+|C#|SQL|Ruby|Rust)\b',
-            r'\b(React|Next\.js|Django|Flask|FastAPI|Spring|Node\.js|Express)\b',
-            r'\b(AWS|Azure|GCP|Kubernetes|Docker|Lambda|EC2|S3|SQS)\b',
-            r'\b(MySQL|PostgreSQL|MongoDB|Redis|DynamoDB)\b',
-            r'\b(Machine Learning|Deep Learning|PyTorch|TensorFlow|AI)\b',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, jd_text, re.IGNORECASE)
-            jd_keywords.update([m.lower() for m in matches])
+        jd_keywords = extract_jd_keywords(jd_text)
         
         resume_text = json.dumps(resume_json).lower()
         resume_keywords = set()
@@ -84,6 +144,30 @@ class Evaluator:
     
     def _llm_evaluate(self, resume_json: Dict[str, Any], jd_text: str) -> Dict[str, Any]:
         """LLM-based evaluation (0-65 points) with detailed section feedback"""
+        prompt = self._build_prompt(resume_json, jd_text)
+        
+        # Route defaults to 6000 tokens for detailed feedback
+        result = self.route.generate_json(self.llm, prompt, schema=EvaluationResult)
+        return result
+    
+    def _build_prompt(self, resume_json: Dict[str, Any], jd_text: str) -> str:
+        """Build evaluation prompt within the stage's input budget (the JD is shortened if needed)"""
+        prompt, self.last_budget = self.route.fit_prompt(
+            lambda jd_text: self._render_prompt(resume_json, jd_text), {"jd_text": jd_text}, llm=self.llm
+        )
+        
+        if self.debug:
+            budget = self.last_budget
+            print("\n" + "="*60)
+            print("DEBUG: EVALUATOR PROMPT")
+            print("="*60)
+            print(f"Prompt length: ~{budget.input_tokens} tokens (budget {budget.max_input_tokens}), max cost ~${budget.max_cost_usd:.4f}")
+            print("="*60 + "\n")
+        
+        return prompt
+    
+    def _render_prompt(self, resume_json: Dict[str, Any], jd_text: str) -> str:
+        """Evaluation prompt text"""
         
         prompt = f"""You are an expert resume evaluator. Score this resume against the job description.
 
@@ -91,7 +175,7 @@ JOB DESCRIPTION:
 {jd_text}
 
 RESUME:
-{json.dumps(resume_json, indent=2)}
+{to_prompt(resume_json)}
 
 Evaluate critically on these criteria:
 
@@ -135,13 +219,4 @@ Return ONLY this JSON:
   }}
 }}"""
         
-        if self.debug:
-            print("\n" + "="*60)
-            print("DEBUG: EVALUATOR PROMPT")
-            print("="*60)
-            print(f"Prompt length: {len(prompt)} characters (~{len(prompt)//4} tokens)")
-            print("="*60 + "\n")
-        
-        # Increased to 6000 for detailed feedback
-        result = self.llm.generate_json(prompt, max_tokens=6000)
-        return result
+        return prompt
@@ -1,19 +1,24 @@
 """
 Factuality Checker - Verifies resume claims against user profile
 """
-import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from aro.llm_adapter import LLMAdapter
+from aro.compact import to_prompt
+from aro.routing import StageRoute, PromptBudget, get_stage_router
+from src.schemas import FactualityResult
+from src.profile_context import profile_prefix
 
 
 class FactualityChecker:
-    def __init__(self, llm: LLMAdapter, debug: bool = False):
+    def __init__(self, llm: LLMAdapter, debug: bool = False, route: Optional[StageRoute] = None):
         self.llm = llm
         self.debug = debug
+        self.route = route or get_stage_router().route("factuality")
+        self.last_budget: Optional[PromptBudget] = None
     
     def check(
         self, 
@@ -38,29 +43,50 @@ class FactualityChecker:
                 "skills_check": {...}
             }
         """
-        prompt = self._build_prompt(resume_json, user_profile)
+        prefix = profile_prefix(user_profile)
+        prompt = self._build_prompt(resume_json, prefix)
         
         if self.debug:
+            budget = self.last_budget
             print("\n" + "="*60)
             print("DEBUG: FACTUALITY CHECKER PROMPT")
             print("="*60)
-            print(f"Prompt length: {len(prompt)} characters (~{len(prompt)//4} tokens)")
+            print(f"Prompt length: ~{budget.input_tokens} tokens (profile prefix ~{budget.prefix_tokens}, budget {budget.max_input_tokens}), max cost ~${budget.max_cost_usd:.4f}")
             print("="*60 + "\n")
         
-        # Needs ~10000 tokens for large profile + detailed output
-        result = self.llm.generate_json(prompt, max_tokens=10000)
+        # Route allows ~10000 tokens for large profile + detailed output
+        result = self.route.generate_json(self.llm, prompt, prefix=prefix, schema=FactualityResult)
         return result
     
-    def _build_prompt(self, resume_json: Dict[str, Any], user_profile: Dict[str, Any]) -> str:
-        """Build factuality check prompt"""
+    async def acheck(
+        self, 
+        resume_json: Dict[str, Any], 
+        user_profile: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async variant of check() for use inside the API event loop"""
+        prefix = profile_prefix(user_profile)
+        prompt = self._build_prompt(resume_json, prefix)
+        result = await self.route.agenerate_json(self.llm, prompt, prefix=prefix, schema=FactualityResult)
+        return result
+    
+    def _build_prompt(self, resume_json: Dict[str, Any], prefix: Optional[str] = None) -> str:
+        """
+        Build factuality check prompt within the stage's input budget
+        
+        Both the resume and the profile prefix must be seen in full to
+        verify claims, so nothing is cut; an oversized prompt only warns.
+        """
+        prompt, self.last_budget = self.route.fit_prompt(
+            lambda: self._render_prompt(resume_json), prefix=prefix, llm=self.llm
+        )
+        return prompt
+    
+    def _render_prompt(self, resume_json: Dict[str, Any]) -> str:
+        """Factuality check prompt text (the profile goes in the shared prefix)"""
         
-        profile_str = json.dumps(user_profile, indent=2)
-        resume_str = json.dumps(resume_json, indent=2)
+        resume_str = to_prompt(resume_json)
         
-        prompt = f"""You are a strict factuality checker. Verify if ALL resume claims are accurate against the user's actual profile.
-
-USER'S ACTUAL PROFILE (SOURCE OF TRUTH):
-{profile_str}
+        prompt = f"""You are a strict factuality checker. Verify if ALL resume claims are accurate against the user's actual profile above.
 
 GENERATED RESUME (TO VERIFY):
 {resume_str}
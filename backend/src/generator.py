@@ -1,18 +1,90 @@
 """
 Generator - Creates resume JSON from JD and user profile
 """
-import json
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from aro.llm_adapter import LLMAdapter
+from aro.llm_adapter import LLMAdapter, validate_json
+from aro.json_stream import IncrementalJSONParser, PartialJSONError, missing_sections, repair_truncated
+from aro.routing import StageRoute, PromptBudget, get_stage_router
+from src.schemas import Resume
+from src.profile_context import profile_prefix
+from src.profile_ranker import relevant_profile
+
+
+RESUME_SECTIONS = ["header", "summary", "skills", "experience", "projects"]
+
+
+def validate_section(key: str, value: Any) -> List[str]:
+    """
+    Local structural checks for one finished resume section
+    
+    Cheap enough to run on each section while the rest is still streaming.
+    
+    Returns:
+        List of warnings (empty if the section looks right)
+    """
+    warnings = []
+    
+    if key == "summary":
+        if not isinstance(value, str):
+            return ["Summary must be a string"]
+        if not 520 <= len(value) <= 570:
+            warnings.append(f"Summary is {len(value)} chars (expected 520-570)")
+    
+    elif key == "skills":
+        if not isinstance(value, list):
+            return ["Skills must be a list"]
+        if len(value) != 7:
+            warnings.append(f"Expected 7 skill categories, got {len(value)}")
+        for skill in value:
+            items = skill.get("items", "") if isinstance(skill, dict) else ""
+            if not 70 <= len(items) <= 95:
+                warnings.append(f"Skill category '{skill.get('category', '?') if isinstance(skill, dict) else skill}' is {len(items)} chars (expected 70-95)")
+    
+    elif key == "experience":
+        if not isinstance(value, list):
+            return ["Experience must be a list"]
+        if len(value) != 2:
+            warnings.append(f"Expected 2 experience entries, got {len(value)}")
+        for job, expected in zip(value, (5, 4)):
+            bullets = job.get("bullets", []) if isinstance(job, dict) else []
+            if len(bullets) != expected:
+                warnings.append(f"{job.get('company', '?')} should have {expected} bullets, got {len(bullets)}")
+    
+    elif key == "projects":
+        if not isinstance(value, list):
+            return ["Projects must be a list"]
+        if len(value) != 3:
+            warnings.append(f"Expected 3 projects, got {len(value)}")
+        for project in value:
+            if not isinstance(project, dict) or not project.get("bullet1") or not project.get("bullet2"):
+                warnings.append(f"Project '{project.get('title', '?') if isinstance(project, dict) else project}' needs bullet1 and bullet2")
+    
+    return warnings
 
 
 class Generator:
-    def __init__(self, llm: LLMAdapter):
+    def __init__(self, llm: LLMAdapter, route: Optional[StageRoute] = None, sections: Optional[bool] = None):
+        """
+        Args:
+            llm: Adapter to generate with
+            route: Stage route (defaults to the router's "generator" route)
+            sections: Generate section by section in parallel (see
+                src.section_generator); defaults to GENERATOR_MODE=sections
+        """
         self.llm = llm
+        self.route = route or get_stage_router().route("generator")
+        self.last_budget: Optional[PromptBudget] = None
+        self.last_warnings: List[str] = []
+        if sections is None:
+            sections = os.getenv("GENERATOR_MODE", "single") == "sections"
+        self.sections = None
+        if sections:
+            from src.section_generator import SectionGenerator
+            self.sections = SectionGenerator(llm)
     
     def generate(self, jd_text: str, user_profile: Dict[str, Any], company: str, role: str) -> Dict[str, Any]:
         """
@@ -20,33 +92,107 @@ class Generator:
         
         Args:
             jd_text: Job description
-            user_profile: User data dict
+            user_profile: User data dict (only the JD-relevant slice is sent,
+                see src.profile_ranker)
             company: Company name
             role: Role title
         
         Returns:
             Resume JSON with summary, skills, experience, projects
         """
-        prompt = self._build_prompt(jd_text, user_profile, company, role)
-        resume_json = self.llm.generate_json(prompt, max_tokens=8000)
+        if self.sections is not None:
+            resume_json = self.sections.generate(jd_text, user_profile, company, role)
+            self.last_warnings = self.sections.last_warnings
+            return resume_json
+        prefix = profile_prefix(relevant_profile(user_profile, jd_text))
+        prompt = self._build_prompt(jd_text, company, role, prefix)
+        resume_json = self.route.generate_json(self.llm, prompt, prefix=prefix, schema=Resume)
+        return resume_json
+    
+    async def agenerate(self, jd_text: str, user_profile: Dict[str, Any], company: str, role: str) -> Dict[str, Any]:
+        """Async variant of generate() for use inside the API event loop"""
+        if self.sections is not None:
+            resume_json = await self.sections.agenerate(jd_text, user_profile, company, role)
+            self.last_warnings = self.sections.last_warnings
+            return resume_json
+        prefix = profile_prefix(relevant_profile(user_profile, jd_text))
+        prompt = self._build_prompt(jd_text, company, role, prefix)
+        resume_json = await self.route.agenerate_json(self.llm, prompt, prefix=prefix, schema=Resume)
         return resume_json
     
-    def _build_prompt(self, jd_text: str, user_profile: Dict[str, Any], company: str, role: str) -> str:
-        """Build generation prompt for LLM"""
+    async def agenerate_stream(
+        self, jd_text: str, user_profile: Dict[str, Any], company: str, role: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream resume generation
+        
+        Yields events:
+            {"type": "delta", "text": "..."}             raw token deltas
+            {"type": "section", "key": "...", "value": ..., "warnings": [...]}
+                                                          a top-level section finished
+            {"type": "done", "resume": {...}, "missing": [...], "warnings": [...]}
+                                                          parsed resume; if the tail was
+                                                          truncated, the repaired resume with
+                                                          unfinished sections continued
+        
+        In section mode there are no deltas: each section is yielded when
+        its call finishes and "warnings" lists cross-section problems.
+        """
+        if self.sections is not None:
+            async for event in self.sections.agenerate_stream(jd_text, user_profile, company, role):
+                if event["type"] == "done":
+                    self.last_warnings = event["warnings"]
+                yield event
+            return
+        
+        prefix = profile_prefix(relevant_profile(user_profile, jd_text))
+        prompt = self._build_prompt(jd_text, company, role, prefix)
+        parser = IncrementalJSONParser()
         
-        # Convert profile to simple string for prompt
-        profile_str = json.dumps(user_profile, indent=2)
+        async for delta in self.route.agenerate_json_stream(self.llm, prompt, prefix=prefix, schema=Resume):
+            yield {"type": "delta", "text": delta}
+            for key, value in parser.feed(delta):
+                yield {"type": "section", "key": key, "value": value, "warnings": validate_section(key, value)}
         
-        prompt = f"""You are an expert resume writer. Generate a tailored resume JSON for this role.
+        try:
+            resume = parser.finish()
+        except PartialJSONError:
+            resume = repair_truncated(parser.buffer)
+        
+        # Sections the stream never finished come from the repair or a continuation call
+        completed = await self.route.acomplete_json(self.llm, prompt, resume, prefix, Resume)
+        for key, value in completed.items():
+            if key not in parser.sections:
+                yield {"type": "section", "key": key, "value": value, "warnings": validate_section(key, value)}
+        resume = completed
+        missing = missing_sections(resume, RESUME_SECTIONS)
+        if not missing:
+            resume = validate_json(resume, Resume)
+        yield {"type": "done", "resume": resume, "missing": missing, "warnings": []}
+    
+    def _build_prompt(self, jd_text: str, company: str, role: str, prefix: Optional[str] = None) -> str:
+        """
+        Build generation prompt within the stage's input budget
+        
+        The profile goes in the shared prefix and is counted but not cut;
+        the JD is shortened if the two together are over budget.
+        """
+        prompt, self.last_budget = self.route.fit_prompt(
+            lambda jd_text: self._render_prompt(jd_text, company, role),
+            {"jd_text": jd_text}, prefix, self.llm
+        )
+        return prompt
+    
+    def _render_prompt(self, jd_text: str, company: str, role: str) -> str:
+        """Generation prompt text for LLM (the profile goes in the shared prefix)"""
+        
+        prompt = f"""You are an expert resume writer. Generate a tailored resume JSON for this role, using the user profile above.
 
 ROLE: {role} at {company}
 
 JOB DESCRIPTION:
 {jd_text}
 
-USER PROFILE:
-{profile_str}
-
 INSTRUCTIONS:
 1. Summary: 520-570 characters with **bold** markers
 2. Skills: Exactly 7 categories, 70-95 characters each
@@ -12,22 +12,28 @@ from src.generator import Generator
 from src.evaluator import Evaluator
 from src.factuality_checker import FactualityChecker
 from src.reviser import Reviser
+from src.revision_planner import SectionReviser, plan_revisions, targeted_revision_enabled
 from src.renderer import Renderer
 from src.providers import UserProvider, JobProvider, ResumeProvider
-from aro.llm_adapter import create_llm_adapter
+from aro.llm_adapter import LLMAdapter, get_llm_adapter
+from aro.compact import to_prompt
+from typing import Optional
 from dotenv import load_dotenv
 import json
 
 load_dotenv()
 
 
-def optimize_resume(username: str = "chandan", job_id: str = "job1"):
+def optimize_resume(username: str = "chandan", job_id: str = "job1", llm: Optional[LLMAdapter] = None):
     """
     Complete optimization pipeline:
     1. Generate resume
     2. Evaluate against JD (up to 3 revisions if score < 90)
     3. Check factuality (up to 3 revisions if score < 90)
     4. Save final resume
+    
+    Pass `llm` to run against a specific adapter (e.g. a cassette
+    ReplayAdapter for offline benchmarks); defaults to the shared adapter for LLM_PROVIDER.
     """
     print("=" * 70)
     print("RESUME OPTIMIZATION PIPELINE")
@@ -42,11 +48,13 @@ def optimize_resume(username: str = "chandan", job_id: str = "job1"):
     
     # Initialize components
     print("\n[SETUP] Initializing components...")
-    llm = create_llm_adapter("gemini")
+    llm = llm or get_llm_adapter()
     generator = Generator(llm)
     evaluator = Evaluator(llm, debug=False)
     factuality_checker = FactualityChecker(llm, debug=False)
     reviser = Reviser(llm, debug=False)
+    section_reviser = SectionReviser(llm)
+    targeted = targeted_revision_enabled()
     print("  ✓ All components ready")
     
     # PHASE 1: Initial Generation
@@ -89,10 +97,15 @@ def optimize_resume(username: str = "chandan", job_id: str = "job1"):
             print(f"  ⚠️  Max revisions reached, proceeding with score {score}")
             break
         
-        # Revise
-        print(f"  → Revising to improve score...")
-        feedback_text = json.dumps(eval_result, indent=2)
-        resume = reviser.revise(resume, job['jd_text'], user_profile, feedback_text, "evaluation")
+        # Revise only the failing sections (the whole resume if none stands out)
+        plan = plan_revisions(resume, eval_result=eval_result) if targeted else []
+        if plan:
+            print(f"  → Revising {', '.join(revision.section for revision in plan)} to improve score...")
+            resume = section_reviser.revise(resume, plan, job['jd_text'], user_profile, "evaluation")
+        else:
+            print(f"  → Revising to improve score...")
+            feedback_text = to_prompt(eval_result)
+            resume = reviser.revise(resume, job['jd_text'], user_profile, feedback_text, "evaluation")
         print(f"  ✓ Revision {eval_iteration} complete")
     
     # PHASE 3: Factuality Loop (max 3 revisions)
@@ -125,10 +138,15 @@ def optimize_resume(username: str = "chandan", job_id: str = "job1"):
             print(f"  ⚠️  Max revisions reached, proceeding with score {score}")
             break
         
-        # Revise
-        print(f"  → Revising to fix factuality issues...")
-        feedback_text = json.dumps(fact_result, indent=2)
-        resume = reviser.revise(resume, job['jd_text'], user_profile, feedback_text, "factuality")
+        # Revise only the sections flagged inaccurate
+        plan = plan_revisions(resume, fact_result=fact_result) if targeted else []
+        if plan:
+            print(f"  → Revising {', '.join(revision.section for revision in plan)} to fix factuality issues...")
+            resume = section_reviser.revise(resume, plan, job['jd_text'], user_profile, "factuality")
+        else:
+            print(f"  → Revising to fix factuality issues...")
+            feedback_text = to_prompt(fact_result)
+            resume = reviser.revise(resume, job['jd_text'], user_profile, feedback_text, "factuality")
         print(f"  ✓ Revision {fact_iteration} complete")
     
     # PHASE 4: Save Final Resume
@@ -0,0 +1,29 @@
+"""
+Profile Context - Shared prompt prefix carrying the user profile
+
+Generator, Reviser and FactualityChecker all need the profile. It is
+rendered here, identically for every stage, and sent as the prompt
+`prefix` so adapters with context caching upload it once per profile
+version instead of on every call. Generator and Reviser render the
+JD-relevant slice from src.profile_ranker (the same for every call of a
+run); the FactualityChecker renders the full profile.
+"""
+from typing import Dict, Any
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.compact import to_prompt
+
+
+def profile_prefix(user_profile: Dict[str, Any]) -> str:
+    """Stable prompt prefix for a profile (same profile -> same text)"""
+    profile_str = to_prompt(user_profile)
+    
+    return f"""The following candidate profile is the SOURCE OF TRUTH for every resume claim.
+Never invent employers, projects, metrics or technologies that are not in it.
+
+USER PROFILE (SOURCE OF TRUTH):
+{profile_str}
+
+"""
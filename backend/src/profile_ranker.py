@@ -0,0 +1,183 @@
+"""
+Profile Ranker - JD-relevant slice of the user profile for prompts
+
+The profile lists every project and job detail the candidate has, but a
+resume uses 3 projects and 9 experience bullets. Generator and Reviser
+send only the slice that matters for the job:
+
+- projects: the top PROFILE_TOP_PROJECTS (default 4: the 3 a resume
+  uses and one spare) by BM25 score against the job description, most
+  relevant first, without links and ranking-only fields
+- work: every job with its metrics and technologies, but only the top
+  PROFILE_TOP_DETAILS (default 6) achievements and responsibilities
+- positioning: only the strategy for the closest role type
+
+Everything else (personal, education, skills, ...) is kept as is. The
+FactualityChecker still gets the full profile, so a claim taken from
+the slice is always checked against the complete source of truth.
+Ranking is local and deterministic: the same profile and JD always
+give the same slice, so the prompt prefix stays cacheable.
+
+    PROFILE_TOP_PROJECTS=0 disables slicing (full profile in every prompt)
+"""
+from typing import Any, Dict, Iterator, List
+import math
+import os
+import re
+
+
+TOP_PROJECTS = 4
+TOP_DETAILS = 6
+
+# Project fields that never reach a resume (role hints are used for ranking only)
+PROJECT_SKIP_FIELDS = {
+    "id", "status", "github", "github_backend", "github_frontend", "live_backend", "live_frontend",
+    "category", "best_for_roles"
+}
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could do does
+done during each etc for from had has have having how i if in into is it its may more most must
+new not of on or other our out over own per plus preferred required role same should so some
+such than that the their them then there these they this those through to under up us using
+very via was we well were what when where which while who will with within work would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms without stopwords (keeps c++, c#, node.js)"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _strings(value: Any) -> Iterator[str]:
+    """Every string in a nested profile value (dict keys included, e.g. metric names)"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield key.replace("_", " ")
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+    elif isinstance(value, str):
+        yield value
+    elif value is not None and not isinstance(value, bool):
+        yield str(value)
+
+
+class BM25:
+    """
+    Okapi BM25 over a small in-memory corpus
+
+    Args:
+        documents: Tokenized documents
+        k1: Term frequency saturation
+        b: Document length normalization
+    """
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.frequencies = []
+        self.lengths = [len(document) for document in documents]
+        self.average_length = sum(self.lengths) / len(documents) if documents else 0.0
+        document_counts: Dict[str, int] = {}
+        for document in documents:
+            counts: Dict[str, int] = {}
+            for term in document:
+                counts[term] = counts.get(term, 0) + 1
+            self.frequencies.append(counts)
+            for term in counts:
+                document_counts[term] = document_counts.get(term, 0) + 1
+        total = len(documents)
+        self.idf = {
+            term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+            for term, count in document_counts.items()
+        }
+
+    def scores(self, query: List[str]) -> List[float]:
+        """Score of every document for a tokenized query"""
+        terms = set(query)
+        scores = []
+        for counts, length in zip(self.frequencies, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.average_length) if self.average_length else self.k1
+            score = 0.0
+            for term in terms:
+                frequency = counts.get(term)
+                if frequency:
+                    score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+
+def top_k(items: List[Any], query: List[str], k: int) -> List[Any]:
+    """The k items most relevant to the query, best first (ties keep profile order)"""
+    if k <= 0 or len(items) <= k:
+        return list(items)
+    scores = BM25([tokenize(" ".join(_strings(item))) for item in items]).scores(query)
+    ranked = sorted(range(len(items)), key=lambda index: (-scores[index], index))
+    return [items[index] for index in ranked[:k]]
+
+
+def _slice_job(job: Dict[str, Any], query: List[str], top_details: int) -> Dict[str, Any]:
+    job = dict(job)
+    for key in ("achievements", "responsibilities"):
+        if isinstance(job.get(key), list):
+            # Keep the chosen details in their original (usually chronological) order
+            chosen = top_k(job[key], query, top_details)
+            job[key] = [detail for detail in job[key] if detail in chosen]
+    return job
+
+
+def relevant_profile(
+    user_profile: Dict[str, Any],
+    jd_text: str,
+    top_projects: int = None,
+    top_details: int = None
+) -> Dict[str, Any]:
+    """
+    Profile reduced to the projects and job details relevant to a JD
+
+    Args:
+        user_profile: Full profile (not modified)
+        jd_text: Job description to rank against
+        top_projects: Projects to keep (defaults to PROFILE_TOP_PROJECTS,
+            or 4; 0 returns the full profile)
+        top_details: Achievements and responsibilities to keep per job
+            (defaults to PROFILE_TOP_DETAILS, or 6)
+
+    Returns:
+        New profile dict with the same structure
+    """
+    if top_projects is None:
+        top_projects = int(os.getenv("PROFILE_TOP_PROJECTS", str(TOP_PROJECTS)))
+    if top_details is None:
+        top_details = int(os.getenv("PROFILE_TOP_DETAILS", str(TOP_DETAILS)))
+    if top_projects <= 0:
+        return user_profile
+
+    query = tokenize(jd_text)
+    profile = dict(user_profile)
+
+    projects = profile.get("projects")
+    if isinstance(projects, list):
+        profile["projects"] = [
+            {key: value for key, value in project.items() if key not in PROJECT_SKIP_FIELDS}
+            if isinstance(project, dict) else project
+            for project in top_k(projects, query, top_projects)
+        ]
+
+    work = profile.get("work")
+    if isinstance(work, dict):
+        profile["work"] = {
+            name: _slice_job(job, query, top_details) if isinstance(job, dict) else job
+            for name, job in work.items()
+        }
+
+    positioning = profile.get("positioning")
+    if isinstance(positioning, dict):
+        # Ranked on the role type name and its strategy together
+        profile["positioning"] = dict(top_k(list(positioning.items()), query, 1))
+
+    return profile
@@ -1,19 +1,85 @@
 """
 Reviser - Improves resume based on feedback
+
+By default the LLM returns the complete revised resume. With
+REVISER_MODE=patch (or Reviser(..., patch=True)) it returns only the
+edits as a JSON Patch against the current resume, which is applied
+locally (aro.json_patch) and validated against the Resume schema, so
+output tokens scale with the size of the change. A patch that does not
+apply or validate falls back to a full revision.
 """
-import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from aro.llm_adapter import LLMAdapter
+from aro.llm_adapter import LLMAdapter, validate_json
+from aro.compact import to_prompt
+from aro.json_patch import PatchError, apply_patch
+from aro.retry import SchemaValidationError
+from aro.routing import StageRoute, PromptBudget, get_stage_router
+from src.schemas import Resume, ResumePatch
+from src.profile_context import profile_prefix
+from src.profile_ranker import relevant_profile
+
+
+# How the reply is written: the whole resume, or only the edits to it
+FULL_OUTPUT = """Return ONLY the complete revised resume JSON in the same format:
+{
+  "header": {"title": "..."},
+  "summary": "...",
+  "skills": [...],
+  "experience": [...],
+  "projects": [...]
+}"""
+
+PATCH_OUTPUT = """Return ONLY the edits as a JSON Patch (RFC 6902) against CURRENT RESUME, not the whole resume.
+Change only what the feedback asks for; everything else stays as it is.
+Paths are JSON Pointers with 0-based indexes:
+  /header/title, /summary
+  /skills/N/category, /skills/N/items
+  /experience/N/bullets/M (N=0 is the first job)
+  /projects/N/title, /projects/N/tech, /projects/N/bullet1, /projects/N/bullet2
+Use "replace" for changed text; "add" (index or -) and "remove" only for bullets.
+To swap a project, replace its title, tech, bullet1 and bullet2.
+Each "value" is the complete new text of that field.
+
+{
+  "edits": [
+    {"op": "replace", "path": "/experience/0/bullets/2", "value": "..."}
+  ]
+}
+
+Return {"edits": []} if nothing needs to change."""
 
 
 class Reviser:
-    def __init__(self, llm: LLMAdapter, debug: bool = False):
+    def __init__(
+        self,
+        llm: LLMAdapter,
+        debug: bool = False,
+        route: Optional[StageRoute] = None,
+        patch: Optional[bool] = None,
+        patch_route: Optional[StageRoute] = None
+    ):
+        """
+        Args:
+            llm: Adapter to revise with
+            debug: Print prompt sizes
+            route: Route for full revisions (defaults to "reviser")
+            patch: Ask for a JSON Patch instead of the whole resume;
+                defaults to REVISER_MODE=patch
+            patch_route: Route for patch revisions (defaults to "reviser_patch")
+        """
         self.llm = llm
         self.debug = debug
+        self.route = route or get_stage_router().route("reviser")
+        self.patch_route = patch_route or get_stage_router().route("reviser_patch")
+        if patch is None:
+            patch = os.getenv("REVISER_MODE", "full") == "patch"
+        self.patch = patch
+        self.last_budget: Optional[PromptBudget] = None
+        self.last_patch: Optional[List[Dict[str, Any]]] = None
     
     def revise(
         self,
@@ -29,38 +95,116 @@ class Reviser:
         Args:
             current_resume: Current resume JSON
             jd_text: Job description
-            user_profile: User profile
+            user_profile: User profile (only the JD-relevant slice is sent,
+                see src.profile_ranker)
             feedback: Feedback from evaluator or factuality checker
             revision_type: Type of revision needed
         
         Returns:
             Improved resume JSON
         """
-        prompt = self._build_prompt(current_resume, jd_text, user_profile, feedback, revision_type)
+        prefix = profile_prefix(relevant_profile(user_profile, jd_text))
+        self.last_patch = None
+        
+        if self.patch:
+            prompt = self._build_prompt(current_resume, jd_text, feedback, revision_type, prefix, patch=True)
+            self._debug_prompt(revision_type, "patch")
+            try:
+                response = self.patch_route.generate_json(self.llm, prompt, prefix=prefix, schema=ResumePatch)
+                return self._apply_edits(current_resume, response)
+            except (PatchError, SchemaValidationError) as e:
+                print(f"   ⚠️  Revision patch rejected ({e}); revising the whole resume")
         
-        if self.debug:
-            print("\n" + "="*60)
-            print(f"DEBUG: REVISER PROMPT ({revision_type})")
-            print("="*60)
-            print(f"Prompt length: {len(prompt)} characters (~{len(prompt)//4} tokens)")
-            print("="*60 + "\n")
+        prompt = self._build_prompt(current_resume, jd_text, feedback, revision_type, prefix)
+        self._debug_prompt(revision_type, "full")
         
-        # Needs tokens for large profile + revised resume output
-        revised_resume = self.llm.generate_json(prompt, max_tokens=10000)
+        # Route allows ~10000 tokens for large profile + revised resume output
+        revised_resume = self.route.generate_json(self.llm, prompt, prefix=prefix, schema=Resume)
         return revised_resume
     
-    def _build_prompt(
+    async def arevise(
         self,
         current_resume: Dict[str, Any],
         jd_text: str,
         user_profile: Dict[str, Any],
         feedback: str,
-        revision_type: str
+        revision_type: str = "evaluation"
+    ) -> Dict[str, Any]:
+        """Async variant of revise() for use inside the API event loop"""
+        prefix = profile_prefix(relevant_profile(user_profile, jd_text))
+        self.last_patch = None
+        
+        if self.patch:
+            prompt = self._build_prompt(current_resume, jd_text, feedback, revision_type, prefix, patch=True)
+            try:
+                response = await self.patch_route.agenerate_json(self.llm, prompt, prefix=prefix, schema=ResumePatch)
+                return self._apply_edits(current_resume, response)
+            except (PatchError, SchemaValidationError) as e:
+                print(f"   ⚠️  Revision patch rejected ({e}); revising the whole resume")
+        
+        prompt = self._build_prompt(current_resume, jd_text, feedback, revision_type, prefix)
+        revised_resume = await self.route.agenerate_json(self.llm, prompt, prefix=prefix, schema=Resume)
+        return revised_resume
+    
+    def _apply_edits(self, current_resume: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply a ResumePatch response to the current resume
+        
+        Raises:
+            PatchError: if an edit addresses a missing path or lacks a value
+            SchemaValidationError: if the patched resume is not a valid Resume
+        """
+        edits = [
+            {key: value for key, value in edit.items() if value is not None}
+            for edit in response.get("edits", [])
+        ]
+        revised_resume = validate_json(apply_patch(current_resume, edits), Resume)
+        self.last_patch = edits
+        return revised_resume
+    
+    def _debug_prompt(self, revision_type: str, mode: str) -> None:
+        if not self.debug:
+            return
+        budget = self.last_budget
+        print("\n" + "="*60)
+        print(f"DEBUG: REVISER PROMPT ({revision_type}, {mode})")
+        print("="*60)
+        print(f"Prompt length: ~{budget.input_tokens} tokens (profile prefix ~{budget.prefix_tokens}, budget {budget.max_input_tokens}), max cost ~${budget.max_cost_usd:.4f}")
+        print("="*60 + "\n")
+    
+    def _build_prompt(
+        self,
+        current_resume: Dict[str, Any],
+        jd_text: str,
+        feedback: str,
+        revision_type: str,
+        prefix: Optional[str] = None,
+        patch: bool = False
+    ) -> str:
+        """
+        Build revision prompt within the stage's input budget
+        
+        The resume is never cut; the JD and feedback are shortened
+        (largest first) if the prompt and profile prefix are over budget.
+        """
+        route = self.patch_route if patch else self.route
+        prompt, self.last_budget = route.fit_prompt(
+            lambda jd_text, feedback: self._render_prompt(current_resume, jd_text, feedback, revision_type, patch),
+            {"jd_text": jd_text, "feedback": feedback}, prefix, self.llm
+        )
+        return prompt
+    
+    def _render_prompt(
+        self,
+        current_resume: Dict[str, Any],
+        jd_text: str,
+        feedback: str,
+        revision_type: str,
+        patch: bool = False
     ) -> str:
-        """Build revision prompt"""
+        """Revision prompt text (the profile goes in the shared prefix)"""
         
-        profile_str = json.dumps(user_profile, indent=2)
-        resume_str = json.dumps(current_resume, indent=2)
+        resume_str = to_prompt(current_resume)
         
         if revision_type == "evaluation":
             focus = "JD alignment and relevance"
@@ -68,15 +212,13 @@ class Reviser:
         else:  # factuality
             focus = "factual accuracy"
             instruction = "Fix any inaccuracies or fabrications. Use ONLY real data from profile"
+        output = PATCH_OUTPUT if patch else FULL_OUTPUT
         
         prompt = f"""You are an expert resume writer. Revise this resume to improve {focus}.
 
 JOB DESCRIPTION:
 {jd_text}
 
-USER PROFILE (SOURCE OF TRUTH):
-{profile_str}
-
 CURRENT RESUME:
 {resume_str}
 
@@ -95,13 +237,7 @@ CRITICAL REQUIREMENTS:
 5. Use ONLY real metrics and technologies from user profile
 6. DO NOT fabricate or exaggerate
 
-Return ONLY the complete revised resume JSON in the same format:
-{{
-  "header": {{"title": "..."}},
-  "summary": "...",
-  "skills": [...],
-  "experience": [...],
-  "projects": [...]
-}}"""
+{output}"""
         
         return prompt
+
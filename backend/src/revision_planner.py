@@ -0,0 +1,281 @@
+"""
+Revision Planner - Revise only the resume sections that failed review
+
+The Evaluator scores each section (section_scores, section_feedback) and
+the Factuality Checker verdicts each section (*_check.is_accurate). Instead
+of sending the whole feedback blob and regenerating the whole resume,
+plan_revisions() picks the sections under their score threshold or flagged
+inaccurate, and SectionReviser rewrites just those, in parallel, one call
+per section (the same sections as src.section_generator: header + summary,
+skills, one per job, projects). Sections that passed are frozen: they are
+not sent to the LLM and come back unchanged.
+
+Section -> revision mapping:
+- evaluator experience/skills/projects -> the jobs, skills, projects
+  (experience feedback that names one company revises only that job)
+- evaluator presentation has no section of its own: its feedback is
+  passed to every section being revised
+- factuality summary/experience/skills/projects_check -> header + summary,
+  the jobs, skills, projects
+
+An empty plan (e.g. only the keyword score is low) means the pipeline
+falls back to a full Reviser pass. REVISION_SCOPE=resume always revises
+the whole resume.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import re
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter
+from aro.compact import to_prompt
+from aro.retry import SchemaValidationError
+from aro.routing import StageRoute, PromptBudget, get_stage_router
+from src.section_generator import (
+    SECTIONS, JOB_SECTIONS, SectionSpec, JDAnalysis,
+    analyze_jd, check_consistency, join_sections, split_resume
+)
+
+
+# A section passes evaluation at this share of its maximum points
+SECTION_PASS_RATIO = 0.8
+
+# Maximum evaluator points per section (src.schemas.SectionScores)
+SECTION_MAX = {"experience": 25, "skills": 20, "projects": 15, "presentation": 5}
+
+# Section calls that revise each evaluator section / factuality check
+EVAL_SECTIONS = {"experience": JOB_SECTIONS, "skills": ("skills",), "projects": ("projects",)}
+FACT_SECTIONS = {
+    "summary_check": ("summary",),
+    "experience_check": JOB_SECTIONS,
+    "skills_check": ("skills",),
+    "projects_check": ("projects",),
+}
+
+
+@dataclass
+class SectionRevision:
+    """One section to revise and the feedback lines it has to address"""
+    section: str
+    feedback: List[str]
+
+
+def targeted_revision_enabled() -> bool:
+    return os.getenv("REVISION_SCOPE", "sections") != "resume"
+
+
+def _company_names(job: Dict[str, Any]) -> List[str]:
+    """Ways feedback may name a job's company, e.g. "London Stock Exchange Group" and "LSEG" """
+    company = str(job.get("company", ""))
+    names = [company, company.split("(")[0].strip(), *re.findall(r"\(([^)]+)\)", company)]
+    return [name for name in names if name]
+
+
+def _targets(sections: Tuple[str, ...], text: str, resume: Dict[str, Any]) -> Tuple[str, ...]:
+    """Job sections the text names (all of them if it names none); other sections as given"""
+    if sections != JOB_SECTIONS:
+        return sections
+    named = tuple(
+        name for name, job in zip(JOB_SECTIONS, resume["experience"])
+        if any(re.search(rf"(?<!\w){re.escape(company)}(?!\w)", text, re.IGNORECASE) for company in _company_names(job))
+    )
+    return named or sections
+
+
+def plan_revisions(
+    resume: Dict[str, Any],
+    eval_result: Optional[Dict[str, Any]] = None,
+    fact_result: Optional[Dict[str, Any]] = None,
+    threshold: float = SECTION_PASS_RATIO
+) -> List[SectionRevision]:
+    """
+    Sections to revise for an evaluation and/or factuality result
+
+    Args:
+        resume: Resume the results are about
+        eval_result: Evaluator.evaluate() output
+        fact_result: FactualityChecker.check() output
+        threshold: Share of a section's maximum points it needs to pass
+
+    Returns:
+        Revisions in resume order (empty if no section failed or the resume
+        does not have the expected sections)
+    """
+    if split_resume(resume) is None:
+        return []
+    feedback: Dict[str, List[str]] = {}
+
+    if eval_result:
+        scores = eval_result.get("section_scores") or {}
+        notes = eval_result.get("section_feedback") or {}
+        failing = [
+            section for section, maximum in SECTION_MAX.items()
+            if section in scores and scores[section] < threshold * maximum
+        ]
+        for section in failing:
+            if section not in EVAL_SECTIONS:
+                continue
+            line = f"{section} ({scores[section]}/{SECTION_MAX[section]}): {notes.get(section, '')}"
+            for name in _targets(EVAL_SECTIONS[section], notes.get(section, ""), resume):
+                feedback.setdefault(name, []).append(line)
+        shared = []
+        if "presentation" in failing:
+            shared.append(f"presentation ({scores['presentation']}/{SECTION_MAX['presentation']}): {notes.get('presentation', '')}")
+        if eval_result.get("feedback"):
+            shared.append(f"overall: {eval_result['feedback']}")
+        for lines in feedback.values():
+            lines.extend(shared)
+
+    if fact_result:
+        for check, sections in FACT_SECTIONS.items():
+            verdict = fact_result.get(check) or {}
+            if verdict.get("is_accurate", True):
+                continue
+            issues = [str(issue) for issue in verdict.get("issues") or []]
+            lines = [f"inaccurate: {issue}" for issue in issues] or ["inaccurate: check every claim against the profile"]
+            for name in _targets(sections, " ".join(issues), resume):
+                feedback.setdefault(name, []).extend(lines)
+
+    return [SectionRevision(spec.name, feedback[spec.name]) for spec in SECTIONS if spec.name in feedback]
+
+
+class SectionReviser:
+    """Revises the planned sections in parallel and merges them into the frozen rest"""
+
+    def __init__(self, llm: LLMAdapter, route: Optional[StageRoute] = None):
+        self.llm = llm
+        self.route = route or get_stage_router().route("reviser_section")
+        self.last_budgets: Dict[str, PromptBudget] = {}
+        self.last_warnings: List[str] = []
+
+    def revise(
+        self,
+        current_resume: Dict[str, Any],
+        plan: List[SectionRevision],
+        jd_text: str,
+        user_profile: Dict[str, Any],
+        revision_type: str = "evaluation"
+    ) -> Dict[str, Any]:
+        """Revise the planned sections concurrently (threads) and merge them"""
+        analysis = analyze_jd(jd_text, user_profile, "", "")
+        outputs = split_resume(current_resume)
+        specs = {spec.name: spec for spec in SECTIONS}
+        prompts = {
+            revision.section: self._build_prompt(specs[revision.section], outputs[revision.section], revision, analysis, revision_type)
+            for revision in plan
+        }
+        with ThreadPoolExecutor(max_workers=max(len(plan), 1), thread_name_prefix="resume-revision") as executor:
+            futures = {
+                name: executor.submit(self.route.generate_json, self.llm, prompt, analysis.prefix, specs[name].schema)
+                for name, prompt in prompts.items()
+            }
+            revised = {}
+            for name, future in futures.items():
+                try:
+                    revised[name] = future.result()
+                except SchemaValidationError as e:
+                    print(f"   ⚠️  Revision of {name} rejected ({e}); keeping the current section")
+        return self._merge(outputs, revised, analysis)
+
+    async def arevise(
+        self,
+        current_resume: Dict[str, Any],
+        plan: List[SectionRevision],
+        jd_text: str,
+        user_profile: Dict[str, Any],
+        revision_type: str = "evaluation"
+    ) -> Dict[str, Any]:
+        """Async variant of revise() for use inside the API event loop"""
+        analysis = analyze_jd(jd_text, user_profile, "", "")
+        outputs = split_resume(current_resume)
+        specs = {spec.name: spec for spec in SECTIONS}
+        names = [revision.section for revision in plan]
+        results = await asyncio.gather(*(
+            self.route.agenerate_json(
+                self.llm,
+                self._build_prompt(specs[revision.section], outputs[revision.section], revision, analysis, revision_type),
+                analysis.prefix, specs[revision.section].schema
+            )
+            for revision in plan
+        ), return_exceptions=True)
+        revised = {}
+        for name, result in zip(names, results):
+            if isinstance(result, SchemaValidationError):
+                print(f"   ⚠️  Revision of {name} rejected ({result}); keeping the current section")
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                revised[name] = result
+        return self._merge(outputs, revised, analysis)
+
+    def _merge(
+        self, outputs: Dict[str, Dict[str, Any]], revised: Dict[str, Dict[str, Any]], analysis: JDAnalysis
+    ) -> Dict[str, Any]:
+        """Revised sections over the frozen ones, validated and checked for consistency"""
+        resume = join_sections({**outputs, **revised})
+        self.last_warnings = check_consistency(resume, analysis)
+        for warning in self.last_warnings:
+            print(f"   ⚠️  {warning}")
+        return resume
+
+    def _build_prompt(
+        self,
+        spec: SectionSpec,
+        current: Dict[str, Any],
+        revision: SectionRevision,
+        analysis: JDAnalysis,
+        revision_type: str
+    ) -> str:
+        """One section's revision prompt within the route's input budget (JD and feedback may be shortened)"""
+        prompt, self.last_budgets[spec.name] = self.route.fit_prompt(
+            lambda jd_text, feedback: self._render_prompt(spec, current, analysis, jd_text, feedback, revision_type),
+            {"jd_text": analysis.jd_text, "feedback": "\n".join(f"- {line}" for line in revision.feedback)},
+            analysis.prefix, self.llm
+        )
+        return prompt
+
+    @staticmethod
+    def _render_prompt(
+        spec: SectionSpec,
+        current: Dict[str, Any],
+        analysis: JDAnalysis,
+        jd_text: str,
+        feedback: str,
+        revision_type: str
+    ) -> str:
+        """Section revision prompt text (the profile goes in the shared prefix)"""
+        focus = "JD alignment and relevance" if revision_type == "evaluation" else "factual accuracy"
+        technologies = ", ".join(analysis.technologies) or "none detected, infer from the job description"
+        projects = ", ".join(analysis.projects) or "choose from the profile"
+
+        prompt = f"""You are an expert resume writer. Revise ONE section of a resume to improve {focus}, using the user profile above. The other sections passed review and stay exactly as they are.
+
+JOB DESCRIPTION:
+{jd_text}
+
+JD ANALYSIS:
+- Must-have technologies: {technologies}
+- Most relevant projects, best first: {projects}
+
+SECTION: {spec.name}
+
+CURRENT SECTION:
+{to_prompt(current)}
+
+FEEDBACK TO ADDRESS:
+{feedback}
+
+REQUIREMENTS:
+{spec.instructions}
+Use ONLY real metrics and technologies from the user profile. DO NOT fabricate or exaggerate.
+
+OUTPUT FORMAT (JSON only, no markdown):
+{spec.output_format}
+
+Return ONLY valid JSON."""
+
+        return prompt
@@ -0,0 +1,281 @@
+"""
+Run Planner - Estimated tokens, latency and cost of a full optimization run
+
+Builds the same prompts the pipeline would send (through each stage's
+input budget) without calling the LLM, and prices them:
+
+- input tokens: the real prompts for this JD and profile; the evaluator,
+  factuality and reviser prompts use a typical resume and feedback,
+  since the real ones do not exist before the run
+- output tokens and latency: the mean of this process's telemetry for
+  the stage when there is any, otherwise a typical response size and a
+  fixed overhead + decoding rate (with REVISER_MODE=patch the reviser is
+  planned as its reviser_patch stage with a typical three-edit patch)
+- revisions are planned as targeted section revisions (reviser_section,
+  a typical two sections in parallel: tokens add up, latency is the
+  slowest section) unless REVISION_SCOPE=resume
+- with GENERATOR_MODE=sections generation is planned as one
+  generator_section call per section, all in parallel (the JD analysis
+  and consistency check are local and free)
+
+The best case passes evaluation and factuality on the first attempt;
+the worst case uses every revision the pipeline allows.
+
+    python src/run_planner.py [username] [job_id]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Dict, Any, Optional
+import json
+import random
+
+from aro.llm_adapter import LLMAdapter
+from aro.compact import to_prompt
+from aro.mock_responses import MOCK_RESUME, mock_evaluation, mock_factuality
+from aro.routing import StageRoute, estimate_cost, get_stage_router
+from aro.telemetry import get_telemetry
+from aro.tokens import estimate_tokens
+from src.generator import Generator
+from src.evaluator import Evaluator
+from src.factuality_checker import FactualityChecker
+from src.reviser import Reviser
+from src.revision_planner import SectionReviser, targeted_revision_enabled
+from src.section_generator import SECTIONS, SectionGenerator, analyze_jd, split_resume
+from src.profile_context import profile_prefix
+from src.profile_ranker import relevant_profile
+
+
+# Latency model used until a stage has telemetry
+CALL_OVERHEAD_SECONDS = 1.5
+INPUT_TOKENS_PER_SECOND = 10000
+OUTPUT_TOKENS_PER_SECOND = 120
+
+# Pipeline defaults (src.main / src.streaming_pipeline)
+MAX_EVAL_REVISIONS = 3
+MAX_FACT_REVISIONS = 3
+
+# Typical patch-mode reviser output: two rewritten bullets and a skills row
+TYPICAL_PATCH = {"edits": [
+    {"op": "replace", "path": "/experience/0/bullets/1", "value": MOCK_RESUME["experience"][0]["bullets"][1]},
+    {"op": "replace", "path": "/experience/1/bullets/0", "value": MOCK_RESUME["experience"][1]["bullets"][0]},
+    {"op": "replace", "path": "/skills/2/items", "value": MOCK_RESUME["skills"][2]["items"]},
+]}
+
+# Typical targeted revision: the sections one failing review sends back
+TYPICAL_REVISED_SECTIONS = ("lseg", "projects")
+
+
+def _history(stage: str) -> Dict[str, Optional[float]]:
+    """Mean output tokens and seconds per call recorded for a stage (None if unseen)"""
+    entry = get_telemetry().stages().get(stage)
+    if entry is None:
+        return {"output_tokens": None, "seconds": None}
+    histograms = entry["histograms"]
+    output, latency = histograms["output_tokens"], histograms["latency_seconds"]
+    return {
+        "output_tokens": output.sum / output.count if output.count else None,
+        "seconds": latency.sum / latency.count if latency.count else None,
+    }
+
+
+def _plan_call(
+    route: StageRoute, build, inputs: Dict[str, str], prefix: Optional[str],
+    llm: Optional[LLMAdapter], typical_output: str, calls: tuple
+) -> Dict[str, Any]:
+    """Estimate one stage's prompt, output, latency and cost per call"""
+    _, budget = route.fit_prompt(build, inputs, prefix, llm, report=False)
+    history = _history(route.stage)
+    output_tokens = round(history["output_tokens"] or min(estimate_tokens(typical_output), route.max_tokens))
+    seconds = history["seconds"] or (
+        CALL_OVERHEAD_SECONDS
+        + budget.input_tokens / INPUT_TOKENS_PER_SECOND
+        + output_tokens / OUTPUT_TOKENS_PER_SECOND
+    )
+    return {
+        "stage": route.stage,
+        "model": budget.model,
+        "calls": {"min": calls[0], "max": calls[1]},
+        "input_tokens": budget.input_tokens,
+        "prefix_tokens": budget.prefix_tokens,
+        "max_input_tokens": budget.max_input_tokens,
+        "over_budget": budget.over_budget,
+        "shrunk": budget.shrunk,
+        "output_tokens": output_tokens,
+        "seconds": round(seconds, 2),
+        "cost_usd": round(estimate_cost(budget.model, budget.input_tokens, output_tokens), 6),
+        "from_telemetry": history["seconds"] is not None,
+    }
+
+
+def _plan_section_revision(
+    reviser: SectionReviser, revision_type: str, feedback: str, jd_text: str,
+    user_profile: Dict[str, Any], llm: Optional[LLMAdapter], calls: tuple
+) -> Dict[str, Any]:
+    """One targeted revision: TYPICAL_REVISED_SECTIONS revised in parallel"""
+    analysis = analyze_jd(jd_text, user_profile, "", "")
+    outputs = split_resume(MOCK_RESUME)
+    specs = {spec.name: spec for spec in SECTIONS}
+    sections = [
+        _plan_call(
+            reviser.route,
+            lambda jd_text, feedback, spec=specs[name]: reviser._render_prompt(
+                spec, outputs[spec.name], analysis, jd_text, feedback, revision_type
+            ),
+            {"jd_text": jd_text, "feedback": feedback}, analysis.prefix, llm, json.dumps(outputs[name]), calls
+        )
+        for name in TYPICAL_REVISED_SECTIONS
+    ]
+    return _parallel(sections, list(TYPICAL_REVISED_SECTIONS))
+
+
+def _plan_section_generation(
+    generator: SectionGenerator, jd_text: str, user_profile: Dict[str, Any],
+    company: str, role: str, llm: Optional[LLMAdapter]
+) -> Dict[str, Any]:
+    """Section-parallel generation: one generator_section call per SECTIONS entry"""
+    analysis = analyze_jd(jd_text, user_profile, company, role)
+    outputs = split_resume(MOCK_RESUME)
+    sections = [
+        _plan_call(
+            generator.route, lambda jd_text, spec=spec: generator._render_prompt(spec, analysis, jd_text),
+            {"jd_text": jd_text}, analysis.prefix, llm, json.dumps(outputs[spec.name]), (1, 1)
+        )
+        for spec in SECTIONS
+    ]
+    return _parallel(sections, [spec.name for spec in SECTIONS])
+
+
+def _parallel(sections, names) -> Dict[str, Any]:
+    """Concurrent section calls as one step: tokens and cost add up, latency is the slowest section"""
+    plan = dict(sections[0])
+    for key in ("input_tokens", "prefix_tokens", "output_tokens", "cost_usd"):
+        plan[key] = round(sum(section[key] for section in sections), 6)
+    plan["seconds"] = max(section["seconds"] for section in sections)
+    plan["max_input_tokens"] = max(section["max_input_tokens"] for section in sections)
+    plan["over_budget"] = any(section["over_budget"] for section in sections)
+    plan["shrunk"] = {
+        key: sum(section["shrunk"].get(key, 0) for section in sections)
+        for key in {key for section in sections for key in section["shrunk"]}
+    }
+    plan["from_telemetry"] = all(section["from_telemetry"] for section in sections)
+    plan["sections"] = names
+    return plan
+
+
+def _total(stages, bound: str) -> Dict[str, Any]:
+    totals = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "seconds": 0.0, "cost_usd": 0.0}
+    for stage in stages:
+        calls = stage["calls"][bound]
+        totals["calls"] += calls
+        for key in ("input_tokens", "output_tokens", "seconds", "cost_usd"):
+            totals[key] += stage[key] * calls
+    totals["seconds"] = round(totals["seconds"], 2)
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return totals
+
+
+def plan_run(
+    jd_text: str,
+    user_profile: Dict[str, Any],
+    company: str,
+    role: str,
+    llm: Optional[LLMAdapter] = None,
+    max_eval_revisions: int = MAX_EVAL_REVISIONS,
+    max_fact_revisions: int = MAX_FACT_REVISIONS
+) -> Dict[str, Any]:
+    """
+    Estimate a full optimization run without executing it
+
+    Args:
+        llm: Adapter the run would use (names the default model for
+            pricing); never called
+
+    Returns:
+        {
+            "stages": [{"stage", "calls": {"min", "max"}, "input_tokens",
+                        "output_tokens", "seconds", "cost_usd", ...}, ...],
+            "best_case": {"calls", "input_tokens", "output_tokens", "seconds", "cost_usd"},
+            "worst_case": {...}
+        }
+    """
+    router = get_stage_router()
+    # Generator and Reviser send the JD-relevant profile slice, the checker the full profile
+    prefix = profile_prefix(relevant_profile(user_profile, jd_text))
+    full_prefix = profile_prefix(user_profile)
+    rng = random.Random(0)
+    evaluation, factuality = mock_evaluation(rng), mock_factuality(rng)
+    resume_text = json.dumps(MOCK_RESUME)
+
+    generator = Generator(llm, router.route("generator"))
+    evaluator = Evaluator(llm, route=router.route("evaluator"))
+    checker = FactualityChecker(llm, route=router.route("factuality"))
+    reviser = Reviser(llm, route=router.route("reviser"), patch_route=router.route("reviser_patch"))
+    revise_route = reviser.patch_route if reviser.patch else reviser.route
+    revision_text = json.dumps(TYPICAL_PATCH) if reviser.patch else resume_text
+
+    stages = [
+        _plan_call(
+            generator.route, lambda jd_text: generator._render_prompt(jd_text, company, role),
+            {"jd_text": jd_text}, prefix, llm, resume_text, (1, 1)
+        ),
+        _plan_call(
+            evaluator.route, lambda jd_text: evaluator._render_prompt(MOCK_RESUME, jd_text),
+            {"jd_text": jd_text}, None, llm, json.dumps(evaluation), (1, max_eval_revisions + 1)
+        ),
+        _plan_call(
+            revise_route, lambda jd_text, feedback: reviser._render_prompt(MOCK_RESUME, jd_text, feedback, "evaluation", reviser.patch),
+            {"jd_text": jd_text, "feedback": to_prompt(evaluation)}, prefix, llm, revision_text, (0, max_eval_revisions)
+        ),
+        _plan_call(
+            checker.route, lambda: checker._render_prompt(MOCK_RESUME),
+            {}, full_prefix, llm, json.dumps(factuality), (1, max_fact_revisions + 1)
+        ),
+        _plan_call(
+            revise_route, lambda jd_text, feedback: reviser._render_prompt(MOCK_RESUME, jd_text, feedback, "factuality", reviser.patch),
+            {"jd_text": jd_text, "feedback": to_prompt(factuality)}, prefix, llm, revision_text, (0, max_fact_revisions)
+        ),
+    ]
+    if generator.sections is not None:
+        stages[0] = _plan_section_generation(
+            SectionGenerator(llm, router.route("generator_section")), jd_text, user_profile, company, role, llm
+        )
+    if targeted_revision_enabled():
+        section_reviser = SectionReviser(llm, router.route("reviser_section"))
+        for index, revision_type, result, calls in (
+            (2, "evaluation", evaluation, (0, max_eval_revisions)),
+            (4, "factuality", factuality, (0, max_fact_revisions)),
+        ):
+            notes = result.get("section_feedback") or {}
+            lines = [f"{key}: {note}" for key, note in notes.items()] or [f"inaccurate: {issue}" for issue in result["issues"]]
+            feedback = "\n".join(f"- {line}" for line in lines or ["inaccurate: check every claim against the profile"])
+            stages[index] = _plan_section_revision(section_reviser, revision_type, feedback, jd_text, user_profile, llm, calls)
+    stages[2]["step"], stages[4]["step"] = "evaluation", "factuality"
+
+    return {
+        "stages": stages,
+        "best_case": _total(stages, "min"),
+        "worst_case": _total(stages, "max"),
+    }
+
+
+def print_plan(plan: Dict[str, Any]) -> None:
+    """Human-readable plan table"""
+    print(f"{'STAGE':<28}{'CALLS':>7}{'IN TOK':>9}{'OUT TOK':>9}{'SEC':>8}{'USD':>11}")
+    for stage in plan["stages"]:
+        name = stage["stage"] + (f" ({stage['step']})" if "step" in stage else "")
+        calls = f"{stage['calls']['min']}-{stage['calls']['max']}"
+        flag = "  ⚠️ over budget" if stage["over_budget"] else ""
+        print(f"{name:<28}{calls:>7}{stage['input_tokens']:>9}{stage['output_tokens']:>9}{stage['seconds']:>8}{stage['cost_usd']:>11.6f}{flag}")
+    for case in ("best_case", "worst_case"):
+        total = plan[case]
+        print(f"{case.replace('_', ' '):<28}{total['calls']:>7}{total['input_tokens']:>9}{total['output_tokens']:>9}{total['seconds']:>8}{total['cost_usd']:>11.6f}")
+
+
+if __name__ == "__main__":
+    from src.providers import UserProvider, JobProvider
+
+    username = sys.argv[1] if len(sys.argv) > 1 else "chandan"
+    job = JobProvider.get(sys.argv[2] if len(sys.argv) > 2 else "job1")
+    print_plan(plan_run(job["jd_text"], UserProvider.get(username), job["company"], job["role"]))
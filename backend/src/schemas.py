@@ -0,0 +1,123 @@
+"""
+Schemas - Pydantic models for structured LLM output
+
+Each pipeline stage sends its model to the LLM as the response schema
+(constrained JSON output) and validates what comes back against it.
+api/models.py reuses them for API responses.
+
+Only explicit fields: the Gemini API does not accept free-form dict
+properties in a response schema.
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+
+class ResumeHeader(BaseModel):
+    """Resume title line"""
+    title: str
+
+
+class SkillCategory(BaseModel):
+    """One skills row"""
+    category: str
+    items: str = Field(..., description="Comma-separated skills, 70-95 characters")
+
+
+class ExperienceEntry(BaseModel):
+    """One job"""
+    company: str
+    role: str
+    location: str
+    duration: str
+    bullets: List[str] = Field(..., description="150-200 characters each, **bold** markers")
+
+
+class ProjectEntry(BaseModel):
+    """One project"""
+    title: str
+    tech: str
+    bullet1: str
+    bullet2: str
+
+
+class Resume(BaseModel):
+    """Generated or revised resume"""
+    header: Optional[ResumeHeader] = None
+    summary: str = Field(..., description="520-570 characters with **bold** markers")
+    skills: List[SkillCategory] = Field(..., description="Exactly 7 categories")
+    experience: List[ExperienceEntry]
+    projects: List[ProjectEntry] = Field(..., description="Exactly 3 projects")
+
+
+class HeaderSummarySection(BaseModel):
+    """Header and summary, written by one call in section-parallel generation"""
+    header: ResumeHeader
+    summary: str = Field(..., description="520-570 characters with **bold** markers")
+
+
+class SkillsSection(BaseModel):
+    """Skills, written by one call in section-parallel generation"""
+    skills: List[SkillCategory] = Field(..., description="Exactly 7 categories")
+
+
+class JobSection(BaseModel):
+    """One job, written by one call in section-parallel generation"""
+    job: ExperienceEntry
+
+
+class ProjectsSection(BaseModel):
+    """Project selection and bullets, written by one call in section-parallel generation"""
+    projects: List[ProjectEntry] = Field(..., description="Exactly 3 projects")
+
+
+class ResumeEdit(BaseModel):
+    """One JSON Patch (RFC 6902) operation on a text field or bullet of the resume"""
+    op: str = Field(..., description="replace, add or remove")
+    path: str = Field(..., description="JSON Pointer, e.g. /experience/0/bullets/2 or /projects/1/bullet2")
+    value: Optional[str] = Field(None, description="New text (not used by remove)")
+
+
+class ResumePatch(BaseModel):
+    """Patch-mode reviser output: only the edits, applied locally to the current resume"""
+    edits: List[ResumeEdit]
+
+
+class SectionScores(BaseModel):
+    """Evaluator points per section"""
+    experience: float = Field(..., ge=0, le=25)
+    skills: float = Field(..., ge=0, le=20)
+    projects: float = Field(..., ge=0, le=15)
+    presentation: float = Field(..., ge=0, le=5)
+
+
+class SectionFeedback(BaseModel):
+    """Evaluator feedback per section"""
+    experience: str
+    skills: str
+    projects: str
+    presentation: str
+
+
+class EvaluationResult(BaseModel):
+    """LLM part of an evaluation (the keyword score is added locally)"""
+    score: float = Field(..., ge=0, le=65)
+    section_scores: SectionScores
+    feedback: str
+    section_feedback: SectionFeedback
+
+
+class SectionCheck(BaseModel):
+    """Factuality verdict for one section"""
+    is_accurate: bool
+    issues: List[str]
+
+
+class FactualityResult(BaseModel):
+    """Factuality checker output"""
+    is_factual: bool
+    factuality_score: float = Field(..., ge=0, le=100)
+    issues: List[str]
+    summary_check: SectionCheck
+    experience_check: SectionCheck
+    projects_check: SectionCheck
+    skills_check: SectionCheck
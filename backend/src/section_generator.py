@@ -0,0 +1,353 @@
+"""
+Section Generator - Resume generation as concurrent section-level calls
+
+One generator call writes the header, summary, 7 skill categories, 9
+experience bullets and 6 project bullets, so its latency grows with the
+whole output. In section mode (GENERATOR_MODE=sections) the resume is
+split into five smaller calls that run at the same time:
+
+    summary   header + summary
+    skills    7 skill categories
+    lseg      LSEG entry, 5 bullets
+    infosys   Infosys entry, 4 bullets
+    projects  project selection, 2 bullets each
+
+Every call gets the same local JD analysis (the JD's technologies and the
+profile's most relevant projects, ranked by src.profile_ranker) and the
+same profile prefix, so the sections agree on what to emphasise and the
+prefix can be cached once for all five. Wall-clock time is roughly the
+slowest section instead of the sum.
+
+The merge step puts the sections in resume order, validates the result
+against the Resume schema and checks what no single call can see:
+technologies used in the text but missing from skills, bullets repeating
+the same point across sections, and duplicate or unknown projects.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import re
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter, validate_json
+from aro.routing import StageRoute, PromptBudget, get_stage_router
+from src.evaluator import KEYWORD_PATTERNS
+from src.generator import RESUME_SECTIONS, validate_section
+from src.profile_context import profile_prefix
+from src.profile_ranker import relevant_profile, tokenize
+from src.schemas import (
+    Resume, HeaderSummarySection, SkillsSection, JobSection, ProjectsSection
+)
+
+
+# Bullets sharing this much of their vocabulary make the same point twice
+DUPLICATE_BULLET_OVERLAP = 0.6
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    """One section call: its name, the resume keys it fills and its instructions"""
+    name: str
+    keys: Tuple[str, ...]
+    schema: Any
+    instructions: str
+    output_format: str
+
+
+LSEG_JOB = '''{"job": {
+  "company": "London Stock Exchange Group (LSEG)",
+  "role": "Software Engineer",
+  "location": "Bengaluru",
+  "duration": "08-2022 to 12-2024",
+  "bullets": ["bullet1", "bullet2", "bullet3", "bullet4", "bullet5"]
+}}'''
+
+INFOSYS_JOB = '''{"job": {
+  "company": "Infosys",
+  "role": "Software Engineer",
+  "location": "Bengaluru",
+  "duration": "10-2020 to 07-2022",
+  "bullets": ["bullet1", "bullet2", "bullet3", "bullet4"]
+}}'''
+
+SECTIONS = [
+    SectionSpec(
+        "summary", ("header", "summary"), HeaderSummarySection,
+        "Header title \"Role | MS CS @ Northeastern | Keywords\" with 2-3 of the must-have technologies.\n"
+        "Summary: 520-570 characters with **bold** markers, leading with the experience closest to the role.",
+        '{"header": {"title": "..."}, "summary": "..."}'
+    ),
+    SectionSpec(
+        "skills", ("skills",), SkillsSection,
+        "Skills: exactly 7 categories, 70-95 characters each. List every must-have technology the candidate "
+        "actually has, most relevant first, since the other sections will use them.",
+        '{"skills": [{"category": "Languages", "items": "Python, Java, Go, ..."}, ...6 more categories]}'
+    ),
+    SectionSpec(
+        "lseg", ("experience",), JobSection,
+        "LSEG experience: exactly 5 bullets (150-200 chars, **bold** markers) from the LSEG work entry only.",
+        LSEG_JOB
+    ),
+    SectionSpec(
+        "infosys", ("experience",), JobSection,
+        "Infosys experience: exactly 4 bullets (150-200 chars, **bold** markers) from the Infosys work entry only.",
+        INFOSYS_JOB
+    ),
+    SectionSpec(
+        "projects", ("projects",), ProjectsSection,
+        "Projects: the 3 most relevant projects (prefer the ranked list above), 2 bullets each "
+        "(max 200 chars, **bold**). Use each project's real title and tech stack.",
+        '{"projects": [{"title": "ProjectName", "tech": "Tech1, Tech2, Tech3", "bullet1": "...", "bullet2": "..."}, {...}, {...}]}'
+    ),
+]
+
+# Order of the jobs in resume["experience"]
+JOB_SECTIONS = ("lseg", "infosys")
+
+# Section call that writes each other resume key
+KEY_SECTIONS = {"header": "summary", "summary": "summary", "skills": "skills", "projects": "projects"}
+
+
+@dataclass
+class JDAnalysis:
+    """What every section call shares: computed once, locally, per run"""
+    company: str
+    role: str
+    jd_text: str
+    technologies: List[str]
+    projects: List[str]
+    profile_projects: List[str] = field(default_factory=list)
+    prefix: str = ""
+
+
+def jd_technologies(jd_text: str) -> List[str]:
+    """Technologies the JD mentions, in order of first mention, as written in the JD"""
+    found: Dict[str, Tuple[int, str]] = {}
+    for pattern in KEYWORD_PATTERNS:
+        for match in re.finditer(pattern, jd_text, re.IGNORECASE):
+            key = match.group(0).lower()
+            if key not in found or match.start() < found[key][0]:
+                found[key] = (match.start(), match.group(0))
+    return [name for _, name in sorted(found.values())]
+
+
+def analyze_jd(jd_text: str, user_profile: Dict[str, Any], company: str, role: str) -> JDAnalysis:
+    """Shared JD analysis and profile prefix for a section-parallel run (no LLM call)"""
+    profile = relevant_profile(user_profile, jd_text)
+    return JDAnalysis(
+        company=company,
+        role=role,
+        jd_text=jd_text,
+        technologies=jd_technologies(jd_text),
+        projects=[project.get("title", "") for project in profile.get("projects", []) if isinstance(project, dict)],
+        profile_projects=[project.get("title", "") for project in user_profile.get("projects", []) if isinstance(project, dict)],
+        prefix=profile_prefix(profile),
+    )
+
+
+def _mentions(text: str, term: str) -> bool:
+    return re.search(rf"(?<!\w){re.escape(term)}(?!\w)", text, re.IGNORECASE) is not None
+
+
+def _bullets(resume: Dict[str, Any]) -> List[str]:
+    bullets = []
+    for job in resume.get("experience", []):
+        bullets.extend(job.get("bullets", []) if isinstance(job, dict) else [])
+    for project in resume.get("projects", []):
+        if isinstance(project, dict):
+            bullets.extend(project.get(key, "") for key in ("bullet1", "bullet2"))
+    return [bullet for bullet in bullets if isinstance(bullet, str) and bullet]
+
+
+def check_consistency(resume: Dict[str, Any], analysis: JDAnalysis) -> List[str]:
+    """
+    Cross-section checks for a merged resume
+
+    Returns:
+        List of warnings (empty if the sections agree)
+    """
+    warnings = []
+
+    skills_text = " ".join(
+        skill.get("items", "") for skill in resume.get("skills", []) if isinstance(skill, dict)
+    )
+    used_text = " ".join([
+        str((resume.get("header") or {}).get("title", "")),
+        str(resume.get("summary", "")),
+        *_bullets(resume),
+        *(project.get("tech", "") for project in resume.get("projects", []) if isinstance(project, dict)),
+    ])
+    for technology in analysis.technologies:
+        if _mentions(used_text, technology) and not _mentions(skills_text, technology):
+            warnings.append(f"{technology} is used in the resume but missing from skills")
+
+    bullets = _bullets(resume)
+    vocabularies = [set(tokenize(bullet.replace("*", ""))) for bullet in bullets]
+    for i in range(len(bullets)):
+        for j in range(i + 1, len(bullets)):
+            union = vocabularies[i] | vocabularies[j]
+            if union and len(vocabularies[i] & vocabularies[j]) / len(union) >= DUPLICATE_BULLET_OVERLAP:
+                warnings.append(f"Bullets repeat the same point: '{bullets[i][:60]}...' and '{bullets[j][:60]}...'")
+
+    titles = [project.get("title", "") for project in resume.get("projects", []) if isinstance(project, dict)]
+    known = [title.lower() for title in analysis.profile_projects]
+    seen = set()
+    for title in titles:
+        key = title.lower()
+        if key in seen:
+            warnings.append(f"Project '{title}' is listed twice")
+        seen.add(key)
+        if known and not any(key in name or name in key for name in known):
+            warnings.append(f"Project '{title}' is not in the profile")
+
+    return warnings
+
+
+def split_resume(resume: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    A resume as section outputs (the inverse of join_sections)
+
+    Returns:
+        {section name: output in the section's schema}, or None if the
+        resume does not have one experience entry per job section
+    """
+    experience = resume.get("experience") or []
+    if len(experience) != len(JOB_SECTIONS):
+        return None
+    outputs = {name: {"job": job} for name, job in zip(JOB_SECTIONS, experience)}
+    outputs["summary"] = {key: resume[key] for key in ("header", "summary") if key in resume}
+    outputs["skills"] = {"skills": resume.get("skills")}
+    outputs["projects"] = {"projects": resume.get("projects")}
+    return outputs
+
+
+def section_value(key: str, outputs: Dict[str, Dict[str, Any]]) -> Any:
+    """A resume key's value once every section call it needs has finished (else None)"""
+    if key == "experience":
+        if not all(name in outputs for name in JOB_SECTIONS):
+            return None
+        return [outputs[name]["job"] for name in JOB_SECTIONS]
+    output = outputs.get(KEY_SECTIONS[key])
+    return output.get(key) if output is not None else None
+
+
+def join_sections(outputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Resume in section order from section outputs, validated against the schema"""
+    resume = {key: section_value(key, outputs) for key in RESUME_SECTIONS}
+    return validate_json(resume, Resume)
+
+
+class SectionGenerator:
+    """Section-parallel variant of Generator (see module docstring)"""
+
+    def __init__(self, llm: LLMAdapter, route: Optional[StageRoute] = None):
+        self.llm = llm
+        self.route = route or get_stage_router().route("generator_section")
+        self.last_budgets: Dict[str, PromptBudget] = {}
+        self.last_warnings: List[str] = []
+
+    def generate(self, jd_text: str, user_profile: Dict[str, Any], company: str, role: str) -> Dict[str, Any]:
+        """Generate all sections concurrently (threads) and merge them"""
+        analysis = analyze_jd(jd_text, user_profile, company, role)
+        prompts = {spec.name: self._build_prompt(spec, analysis) for spec in SECTIONS}
+        with ThreadPoolExecutor(max_workers=len(SECTIONS), thread_name_prefix="resume-section") as executor:
+            futures = {
+                spec.name: executor.submit(
+                    self.route.generate_json, self.llm, prompts[spec.name], analysis.prefix, spec.schema
+                )
+                for spec in SECTIONS
+            }
+            outputs = {name: future.result() for name, future in futures.items()}
+        return self._merge(outputs, analysis)
+
+    async def agenerate(self, jd_text: str, user_profile: Dict[str, Any], company: str, role: str) -> Dict[str, Any]:
+        """Async variant of generate()"""
+        resume = None
+        async for event in self.agenerate_stream(jd_text, user_profile, company, role):
+            if event["type"] == "done":
+                resume = event["resume"]
+        return resume
+
+    async def agenerate_stream(
+        self, jd_text: str, user_profile: Dict[str, Any], company: str, role: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate all sections concurrently, yielding each resume section as soon as it is complete
+
+        Yields the same events as Generator.agenerate_stream() without
+        token deltas: "section" per top-level resume key (experience once
+        both jobs are done), then "done" with the merged resume and the
+        consistency warnings.
+        """
+        analysis = analyze_jd(jd_text, user_profile, company, role)
+        specs = {spec.name: spec for spec in SECTIONS}
+        tasks = {
+            asyncio.ensure_future(
+                self.route.agenerate_json(self.llm, self._build_prompt(spec, analysis), analysis.prefix, spec.schema)
+            ): spec.name
+            for spec in SECTIONS
+        }
+        outputs: Dict[str, Dict[str, Any]] = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    outputs[name] = task.result()
+                    for key in specs[name].keys:
+                        value = section_value(key, outputs)
+                        if value is not None:
+                            yield {"type": "section", "key": key, "value": value, "warnings": validate_section(key, value)}
+        finally:
+            for task in pending:
+                task.cancel()
+
+        resume = self._merge(outputs, analysis)
+        yield {"type": "done", "resume": resume, "missing": [], "warnings": self.last_warnings}
+
+    def _merge(self, outputs: Dict[str, Dict[str, Any]], analysis: JDAnalysis) -> Dict[str, Any]:
+        """Resume in section order, validated against the schema and checked for consistency"""
+        resume = join_sections(outputs)
+        self.last_warnings = check_consistency(resume, analysis)
+        for warning in self.last_warnings:
+            print(f"   ⚠️  {warning}")
+        return resume
+
+    def _build_prompt(self, spec: SectionSpec, analysis: JDAnalysis) -> str:
+        """One section's prompt within the route's input budget (the JD may be shortened)"""
+        prompt, self.last_budgets[spec.name] = self.route.fit_prompt(
+            lambda jd_text: self._render_prompt(spec, analysis, jd_text),
+            {"jd_text": analysis.jd_text}, analysis.prefix, self.llm
+        )
+        return prompt
+
+    @staticmethod
+    def _render_prompt(spec: SectionSpec, analysis: JDAnalysis, jd_text: str) -> str:
+        """Section prompt text (the profile goes in the shared prefix)"""
+        technologies = ", ".join(analysis.technologies) or "none detected, infer from the job description"
+        projects = ", ".join(analysis.projects) or "choose from the profile"
+
+        prompt = f"""You are an expert resume writer. Write ONE section of a tailored resume for this role, using the user profile above. The other sections are written at the same time from the same analysis.
+
+ROLE: {analysis.role} at {analysis.company}
+
+JOB DESCRIPTION:
+{jd_text}
+
+JD ANALYSIS (shared by every section):
+- Must-have technologies: {technologies}
+- Most relevant projects, best first: {projects}
+
+SECTION: {spec.name}
+{spec.instructions}
+
+OUTPUT FORMAT (JSON only, no markdown):
+{spec.output_format}
+
+Return ONLY valid JSON."""
+
+        return prompt
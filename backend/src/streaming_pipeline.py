@@ -7,24 +7,96 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pathlib import Path
 from src.generator import Generator
-from src.evaluator import Evaluator
+from src.evaluator import Evaluator, KeywordTracker
 from src.factuality_checker import FactualityChecker
 from src.reviser import Reviser
+from src.revision_planner import SectionReviser, plan_revisions, targeted_revision_enabled
 from src.renderer import Renderer
 from src.providers import UserProvider, JobProvider, ResumeProvider
-from aro.llm_adapter import create_llm_adapter
+from aro.llm_adapter import LLMAdapter, get_llm_adapter
+from aro.compact import to_prompt
+from aro.metrics import metrics
+from collections import defaultdict
+from typing import Optional
 from dotenv import load_dotenv
-import json
 import time
+import asyncio
 
 load_dotenv()
 
 
-def optimize_resume_stream(username: str, jd_text: str, company: str, role: str):
+def optimize_resume_stream(
+    username: str, jd_text: str, company: str, role: str,
+    llm: Optional[LLMAdapter] = None, flush_delay: float = 0.5
+):
     """
     Resume optimization with streaming status updates.
     Yields status dictionaries at each stage.
+    
+    Blocking wrapper around aoptimize_resume_stream() for scripts and
+    sync callers; the API uses the async generator directly.
     """
+    loop = asyncio.new_event_loop()
+    llm = llm or get_llm_adapter()
+    updates = aoptimize_resume_stream(username, jd_text, company, role, llm, flush_delay)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(updates.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(updates.aclose())
+        # Connections opened on this loop cannot be closed after it is
+        loop.run_until_complete(llm.aclose())
+        loop.close()
+
+
+async def aoptimize_resume_stream(
+    username: str, jd_text: str, company: str, role: str,
+    llm: Optional[LLMAdapter] = None, flush_delay: float = 0.5
+):
+    """
+    Async resume optimization with streaming status updates.
+    Yields status dictionaries at each stage without blocking the event loop.
+    
+    Time spent producing each stage (not the time the caller takes to
+    consume an update) is reported to /metrics, along with the number of
+    runs in flight and how they finished.
+    
+    Args:
+        llm: Adapter to use (defaults to the shared adapter for LLM_PROVIDER); pass a
+            cassette ReplayAdapter for offline runs and benchmarks
+        flush_delay: Pause after milestone events so SSE clients render
+            them (0 for benchmarks)
+    """
+    updates = _pipeline_updates(username, jd_text, company, role, llm, flush_delay)
+    stage_seconds = defaultdict(float)
+    stage, outcome = None, "cancelled"
+    metrics.inc("aro_pipeline_in_flight")
+    try:
+        last = time.monotonic()
+        async for update in updates:
+            if stage is not None:
+                stage_seconds[stage] += time.monotonic() - last
+            stage = update["stage"]
+            if stage in ("complete", "error"):
+                outcome = stage
+            yield update
+            last = time.monotonic()
+    finally:
+        await updates.aclose()
+        metrics.inc("aro_pipeline_in_flight", -1)
+        metrics.inc("aro_pipeline_runs_total", outcome=outcome)
+        for name, seconds in stage_seconds.items():
+            metrics.observe("aro_pipeline_stage_duration_seconds", seconds, stage=name)
+
+
+async def _pipeline_updates(
+    username: str, jd_text: str, company: str, role: str,
+    llm: Optional[LLMAdapter], flush_delay: float
+):
+    """The optimization pipeline itself (see aoptimize_resume_stream)"""
     try:
         # Setup
         yield {
@@ -32,14 +104,16 @@ def optimize_resume_stream(username: str, jd_text: str, company: str, role: str)
             "message": "Loading user profile and initializing components...",
             "progress": 5
         }
-        time.sleep(0.5)  # Allow SSE to flush
+        await asyncio.sleep(flush_delay)  # Allow SSE to flush
         
         user_profile = UserProvider.get(username)
-        llm = create_llm_adapter("gemini")
+        llm = llm or get_llm_adapter()
         generator = Generator(llm)
         evaluator = Evaluator(llm, debug=False)
         factuality_checker = FactualityChecker(llm, debug=False)
         reviser = Reviser(llm, debug=False)
+        section_reviser = SectionReviser(llm)
+        targeted = targeted_revision_enabled()
         
         # PHASE 1: Generation
         yield {
@@ -47,21 +121,57 @@ def optimize_resume_stream(username: str, jd_text: str, company: str, role: str)
             "message": "Generating initial resume from job description...",
             "progress": 10
         }
-        time.sleep(0.5)  # Allow SSE to flush
+        await asyncio.sleep(flush_delay)  # Allow SSE to flush
         
-        resume = generator.generate(
+        # Stream tokens and finished sections so the client sees content immediately.
+        # Each finished section is validated and keyword-scored locally while
+        # the rest of the resume is still being generated.
+        resume = None
+        generation_warnings = []
+        sections_done = 0
+        keyword_tracker = KeywordTracker(jd_text)
+        async for event in generator.agenerate_stream(
             jd_text=jd_text,
             user_profile=user_profile,
             company=company,
             role=role
-        )
+        ):
+            if event["type"] == "delta":
+                yield {
+                    "stage": "generating_tokens",
+                    "message": "Generating initial resume from job description...",
+                    "progress": 10 + sections_done * 3,
+                    "delta": event["text"]
+                }
+            elif event["type"] == "section":
+                sections_done += 1
+                yield {
+                    "stage": "generating_section",
+                    "message": f"Generated {event['key']} section",
+                    "progress": 10 + sections_done * 3,
+                    "section": event["key"],
+                    "content": event["value"],
+                    "warnings": event["warnings"],
+                    "keyword_score": keyword_tracker.add_section(event["key"], event["value"])
+                }
+            else:
+                resume = event["resume"]
+                generation_warnings = event.get("warnings", [])
+                if event["missing"]:
+                    yield {
+                        "stage": "generating_truncated",
+                        "message": f"Generation was cut off, missing sections: {', '.join(event['missing'])}",
+                        "progress": 25,
+                        "missing": event["missing"]
+                    }
         
         yield {
             "stage": "generated",
             "message": "Initial resume created successfully",
-            "progress": 25
+            "progress": 25,
+            "warnings": generation_warnings
         }
-        time.sleep(0.5)  # Allow SSE to flush
+        await asyncio.sleep(flush_delay)  # Allow SSE to flush
         
         # PHASE 2: Evaluation Loop
         eval_threshold = 90
@@ -76,7 +186,11 @@ def optimize_resume_stream(username: str, jd_text: str, company: str, role: str)
                 "iteration": eval_iteration
             }
             
-            eval_result = evaluator.evaluate(resume, jd_text)
+            # The streamed keyword score is only valid for the unrevised resume
+            eval_result = await evaluator.aevaluate(
+                resume, jd_text,
+                keyword_score=keyword_tracker.score() if eval_iteration == 1 else None
+            )
             score = eval_result['total_score']
             
             yield {
@@ -103,14 +217,21 @@ def optimize_resume_stream(username: str, jd_text: str, company: str, role: str)
                 }
                 break
             
+            # Revise only the sections under their threshold; the rest stay frozen
+            plan = plan_revisions(resume, eval_result=eval_result) if targeted else []
+            sections = [revision.section for revision in plan]
             yield {
                 "stage": "revising_evaluation",
-                "message": f"Improving resume based on feedback (revision {eval_iteration})...",
-                "progress": 35 + (eval_iteration * 10)
+                "message": f"Improving {', '.join(sections) if sections else 'resume'} based on feedback (revision {eval_iteration})...",
+                "progress": 35 + (eval_iteration * 10),
+                "sections": sections
             }
             
-            feedback_text = json.dumps(eval_result, indent=2)
-            resume = reviser.revise(resume, jd_text, user_profile, feedback_text, "evaluation")
+            if plan:
+                resume = await section_reviser.arevise(resume, plan, jd_text, user_profile, "evaluation")
+            else:
+                feedback_text = to_prompt(eval_result)
+                resume = await reviser.arevise(resume, jd_text, user_profile, feedback_text, "evaluation")
         
         # PHASE 3: Factuality Check Loop
         fact_threshold = 90
@@ -125,7 +246,7 @@ def optimize_resume_stream(username: str, jd_text: str, company: str, role: str)
                 "iteration": fact_iteration
             }
             
-            fact_result = factuality_checker.check(resume, user_profile)
+            fact_result = await factuality_checker.acheck(resume, user_profile)
             score = fact_result['factuality_score']
             
             yield {
@@ -152,14 +273,20 @@ def optimize_resume_stream(username: str, jd_text: str, company: str, role: str)
                 }
                 break
             
+            plan = plan_revisions(resume, fact_result=fact_result) if targeted else []
+            sections = [revision.section for revision in plan]
             yield {
                 "stage": "revising_factuality",
-                "message": f"Fixing factuality issues (revision {fact_iteration})...",
-                "progress": 60 + (fact_iteration * 10)
+                "message": f"Fixing factuality issues{' in ' + ', '.join(sections) if sections else ''} (revision {fact_iteration})...",
+                "progress": 60 + (fact_iteration * 10),
+                "sections": sections
             }
             
-            feedback_text = json.dumps(fact_result, indent=2)
-            resume = reviser.revise(resume, jd_text, user_profile, feedback_text, "factuality")
+            if plan:
+                resume = await section_reviser.arevise(resume, plan, jd_text, user_profile, "factuality")
+            else:
+                feedback_text = to_prompt(fact_result)
+                resume = await reviser.arevise(resume, jd_text, user_profile, feedback_text, "factuality")
         
         # PHASE 4: Save and Render
         yield {
@@ -197,7 +324,7 @@ def optimize_resume_stream(username: str, jd_text: str, company: str, role: str)
             output_dir = Path(__file__).parent.parent / "output"
             output_dir.mkdir(exist_ok=True)
             docx_output = output_dir / f"{username}_{job_id}.docx"
-            saved_docx_path = renderer.render(resume, str(docx_output))
+            saved_docx_path = await asyncio.to_thread(renderer.render, resume, str(docx_output))
         
         # Final result
         yield {
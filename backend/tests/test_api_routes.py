@@ -0,0 +1,102 @@
+"""
+Test the async API routes end to end with the MockAdapter (offline)
+"""
+import sys
+import os
+from pathlib import Path
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from aro.mock_responses import MOCK_RESUME
+
+# api.routes creates its shared adapter on import
+_provider = os.environ.get("LLM_PROVIDER")
+os.environ["LLM_PROVIDER"] = "mock"
+try:
+    from main import app
+finally:
+    if _provider is None:
+        del os.environ["LLM_PROVIDER"]
+    else:
+        os.environ["LLM_PROVIDER"] = _provider
+
+
+client = TestClient(app)
+JD = "Backend engineer with Python, AWS, Docker and PostgreSQL experience."
+BACKEND = Path(__file__).parent.parent
+JOBS = BACKEND / "database" / "jobs"
+RESUMES = BACKEND / "database" / "resumes" / "chandan"
+OUTPUT = BACKEND / "output"
+
+
+def test_generate_without_optimization():
+    try:
+        response = client.post("/api/generate", json={
+            "jd_text": JD, "company": "Route Test", "role": "Backend Engineer", "optimize": False
+        })
+    finally:
+        (JOBS / "temp_route_test.json").unlink(missing_ok=True)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["success"] and body["scores"] is None
+    assert body["resume"]["summary"] == MOCK_RESUME["summary"]
+
+
+def test_generate_with_optimization_uses_async_pipeline():
+    job_id = "temp_route_test_backend_engineer"
+    try:
+        # The blocking pipeline must not be used (it would tie up a worker thread)
+        with patch("src.main.optimize_resume", side_effect=AssertionError("sync pipeline used")):
+            response = client.post("/api/generate", json={
+                "jd_text": JD, "company": "Route Test", "role": "Backend Engineer", "optimize": True
+            })
+    finally:
+        for path in (
+            JOBS / "temp_route_test.json", JOBS / f"{job_id}.json",
+            RESUMES / f"{job_id}.json", OUTPUT / f"chandan_{job_id}.docx",
+        ):
+            path.unlink(missing_ok=True)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["success"] and set(body["scores"]) == {"evaluation", "factuality"}
+    assert 0 <= body["scores"]["evaluation"] <= 100
+    assert body["paths"]["json"].endswith(f"{job_id}.json")
+
+
+def test_evaluate_and_factuality():
+    response = client.post("/api/evaluate", json={"job_id": "job1"})
+    assert response.status_code == 200, response.text
+    assert 0 <= response.json()["total_score"] <= 100
+
+    response = client.post("/api/factuality", json={"job_id": "job1"})
+    assert response.status_code == 200, response.text
+    assert response.json()["is_factual"]
+
+    response = client.post("/api/evaluate", json={"job_id": "no_such_job"})
+    assert response.status_code == 404
+
+
+def test_plan_stages_and_health():
+    response = client.post("/api/generate/plan", json={"jd_text": JD, "company": "Acme", "role": "Engineer"})
+    assert response.status_code == 200, response.text
+    assert response.json()["stages"][0]["stage"] in ("generator", "generator_section")
+
+    response = client.get("/api/stages")
+    assert response.status_code == 200 and "generator" in response.json()["routes"]
+
+    response = client.get("/api/telemetry", params={"limit": 5})
+    assert response.status_code == 200 and len(response.json()["recent"]) <= 5
+
+    response = client.get("/api/health")
+    assert response.status_code == 200, response.text
+    assert response.json()["gemini_api"] == "available"
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ API ROUTE TESTS PASSED")
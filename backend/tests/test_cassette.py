@@ -0,0 +1,121 @@
+"""
+Test cassette record/replay adapters (offline)
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter
+from aro.cassette import RecordingAdapter, ReplayAdapter, CassetteMissError
+from src.evaluator import Evaluator
+
+
+class ScriptedAdapter(LLMAdapter):
+    """Fake provider with a little latency and a counter in every answer"""
+
+    model = "gemini-2.5-flash"
+    supports_prefix = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7, **kwargs):
+        self.calls += 1
+        time.sleep(0.02)
+        return f"answer {self.calls}"
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        self.calls += 1
+        time.sleep(0.02)
+        sections = ("experience", "skills", "projects", "presentation")
+        return {
+            "score": 10, "section_scores": dict.fromkeys(sections, 2.5),
+            "feedback": f"call {self.calls}", "section_feedback": dict.fromkeys(sections, "ok")
+        }
+
+    async def agenerate_json_stream(self, prompt, max_tokens=4000, **kwargs):
+        for chunk in ['{"summary": ', '"streamed"', '}']:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+
+def cassette_path():
+    return os.path.join(tempfile.mkdtemp(), "run.jsonl")
+
+
+def test_record_then_replay_offline():
+    path = cassette_path()
+    recorder = RecordingAdapter(ScriptedAdapter(), path)
+    first = recorder.generate_json("evaluate this", 6000, prefix="PROFILE")
+    second = recorder.generate("hello", 100, 0)
+
+    replay = ReplayAdapter(path)
+    assert replay.model == "gemini-2.5-flash"
+    assert replay.generate_json("evaluate this", 6000, prefix="PROFILE") == first
+    assert replay.generate("hello", 100, 0) == second
+    assert replay.stats()["hits"] == 2
+
+    # Options are part of the key
+    try:
+        replay.generate_json("evaluate this", 6000, prefix="OTHER PROFILE")
+        assert False, "expected a cassette miss"
+    except CassetteMissError:
+        pass
+
+
+def test_repeated_prompts_replay_in_order():
+    path = cassette_path()
+    recorder = RecordingAdapter(ScriptedAdapter(), path)
+    recorder.generate("same", 100, 0)
+    recorder.generate("same", 100, 0)
+
+    replay = ReplayAdapter(path)
+    assert [replay.generate("same", 100, 0) for _ in range(3)] == ["answer 1", "answer 2", "answer 2"]
+
+
+def test_stream_chunks_and_latency_playback():
+    path = cassette_path()
+    recorder = RecordingAdapter(ScriptedAdapter(), path)
+
+    async def collect(llm):
+        return [delta async for delta in llm.agenerate_json_stream("gen", 8000)]
+
+    recorded = asyncio.run(collect(recorder))
+
+    fast = ReplayAdapter(path)
+    start = time.monotonic()
+    assert asyncio.run(collect(fast)) == recorded
+    assert time.monotonic() - start < 0.02
+
+    timed = ReplayAdapter(path, playback_latency=True)
+    start = time.monotonic()
+    asyncio.run(collect(timed))
+    assert time.monotonic() - start >= 0.025
+
+    # A recorded stream also answers a plain JSON request for the same prompt
+    assert ReplayAdapter(path).generate_json("gen", 8000) == {"summary": "streamed"}
+
+
+def test_agent_runs_against_replay():
+    path = cassette_path()
+    live = Evaluator(RecordingAdapter(ScriptedAdapter(), path))
+    expected = asyncio.run(live.aevaluate({"summary": "Python"}, "Python developer"))
+
+    replayed = Evaluator(ReplayAdapter(path))
+    assert asyncio.run(replayed.aevaluate({"summary": "Python"}, "Python developer")) == expected
+
+    with open(path) as f:
+        record = json.loads(f.readline())
+    assert record["kind"] == "json" and record["latency"] > 0
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ CASSETTE TESTS PASSED")
@@ -0,0 +1,99 @@
+"""
+Test the compact prompt notation (offline)
+"""
+import sys
+import os
+import json
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.compact import encode, decode, to_prompt
+from aro.json_stream import RepairedJSON
+from aro.llm_adapter import _parse_json_text
+from aro.mock_responses import MOCK_RESUME, mock_evaluation
+from aro.tokens import estimate_tokens
+from src.evaluator import Evaluator
+from src.profile_context import profile_prefix
+from src.providers import UserProvider
+from src.schemas import Resume, ResumePatch
+from aro.llm_adapter import MockAdapter
+
+
+PROFILE = UserProvider.get("chandan")
+
+
+def test_round_trip_is_lossless():
+    tricky = {
+        "yes": "yes", "number": "1.5", "date": "2022-08-01", "null": "null", "empty": "",
+        "bold": "**Python** and **Go**", "colon": "Key: value", "dash": "- item", "hash": "#1 rank",
+        "quote": "it's \"quoted\"", "newline": "line one\nline two", "space": " padded ",
+        "unicode": "简历 · café", "int": 7, "float": 99.9, "bool": False, "none": None,
+        "nested": [{"a": [1, "2", [3]]}, []], "empty_map": {}
+    }
+    for data in (PROFILE, MOCK_RESUME, mock_evaluation(random.Random(3)), tricky, "text", 42, None, []):
+        assert decode(encode(data)) == data
+
+
+def test_encoding_is_readable_and_smaller():
+    text = encode(MOCK_RESUME)
+    assert text.startswith("header: {title: ")
+    assert "\n- {category: Languages, items: " in text
+    for data in (PROFILE, MOCK_RESUME):
+        assert estimate_tokens(encode(data)) < estimate_tokens(json.dumps(data, indent=2))
+    assert estimate_tokens(encode(PROFILE)) < 0.85 * estimate_tokens(json.dumps(PROFILE, indent=2))
+
+
+def test_subclasses_encode_like_their_base():
+    assert encode(RepairedJSON({"summary": "x"}, ["skills"])) == "summary: x"
+
+
+def test_prompt_builders_use_compact_notation():
+    assert "name: " in profile_prefix(PROFILE) and '"name": ' not in profile_prefix(PROFILE)
+    prompt = Evaluator(MockAdapter())._render_prompt(MOCK_RESUME, "JD")
+    assert to_prompt(MOCK_RESUME) in prompt
+
+    os.environ["PROMPT_COMPACT"] = "0"
+    try:
+        assert to_prompt(MOCK_RESUME) == json.dumps(MOCK_RESUME, indent=2)
+        assert '"name": ' in profile_prefix(PROFILE)
+    finally:
+        del os.environ["PROMPT_COMPACT"]
+
+
+def test_output_parser_accepts_compact_responses():
+    assert _parse_json_text(encode(MOCK_RESUME), Resume) == MOCK_RESUME
+    assert _parse_json_text(json.dumps(MOCK_RESUME)) == MOCK_RESUME
+    assert _parse_json_text(json.dumps(MOCK_RESUME), Resume) == MOCK_RESUME
+
+
+def test_output_parser_rejects_prose_and_unexpected_compact():
+    def rejected(text, schema=None):
+        try:
+            _parse_json_text(text, schema)
+        except Exception as e:
+            return "Invalid JSON" in str(e)
+        return False
+
+    # Prose is still an error, not a YAML string or mapping
+    assert rejected("I cannot help with that.")
+    assert rejected("Note: I could not find AWS experience in the profile.", Resume)
+    assert rejected("Note: I could not find AWS experience in the profile.", ResumePatch)
+    # Keys the schema does not have, or a schema's required key missing
+    assert rejected(encode({"summary": "x", "notes": "y"}), Resume)
+    assert rejected(encode({"summary": "x"}), Resume)
+    # Without a schema there is nothing to match the keys against
+    assert rejected(encode(MOCK_RESUME))
+    # Compact output is only expected while prompts use the notation
+    os.environ["PROMPT_COMPACT"] = "0"
+    try:
+        assert rejected(encode(MOCK_RESUME), Resume)
+    finally:
+        del os.environ["PROMPT_COMPACT"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ COMPACT NOTATION TESTS PASSED")
@@ -0,0 +1,158 @@
+"""
+Test prompt prefix (context) caching (offline)
+"""
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter, GeminiAdapter
+from aro.context_cache import ContextCache, PrefixCacheAdapter
+from aro.mock_responses import mock_response, MOCK_RESUME
+from aro.retry import RetryPolicy, CircuitBreaker, InvalidRequestError
+from src.generator import Generator
+from src.reviser import Reviser
+from src.factuality_checker import FactualityChecker
+from src.profile_context import profile_prefix
+
+
+PROFILE = {"name": "Test User", "experience": [{"company": "LSEG", "bullets": ["Built pipelines"] * 50}]}
+
+
+class PromptRecorder(LLMAdapter):
+    """Fake client that records the full prompt it receives"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7, **kwargs):
+        self.prompts.append(prompt)
+        return "ok"
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        self.prompts.append(prompt)
+        return mock_response(prompt) or {"summary": "ok"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_prefix_uploaded_once_and_reused():
+    clock = FakeClock()
+    cache = ContextCache(ttl_seconds=100, min_prefix_tokens=0, clock=clock)
+    uploads = []
+
+    def create(model, prefix, ttl):
+        uploads.append((model, ttl))
+        return f"cachedContents/{len(uploads)}"
+
+    assert cache.get_or_create("m", "profile", create) == "cachedContents/1"
+    assert cache.get_or_create("m", "profile", create) == "cachedContents/1"
+    assert cache.get_or_create("other-model", "profile", create) == "cachedContents/2"
+
+    clock.now = 95  # past the local expiry (90% of TTL)
+    assert cache.get_or_create("m", "profile", create) == "cachedContents/3"
+    stats = cache.stats()
+    assert stats["uploads"] == 3 and stats["reuses"] == 1
+
+
+def test_short_prefix_and_failed_upload_sent_inline():
+    clock = FakeClock()
+    cache = ContextCache(min_prefix_tokens=10, failure_backoff=60, clock=clock)
+    assert cache.get_or_create("m", "short", lambda *a: "x") is None
+    assert cache.stats()["skipped"] == 1
+
+    def failing(*args):
+        raise RuntimeError("too small")
+
+    long_prefix = "p" * 100
+    assert cache.get_or_create("m", long_prefix, failing) is None
+    # Not retried during the backoff window
+    assert cache.get_or_create("m", long_prefix, lambda *a: "late") is None
+    clock.now = 61
+    assert cache.get_or_create("m", long_prefix, lambda *a: "late") == "late"
+    assert cache.stats()["failures"] == 1
+
+
+def test_pipeline_stages_share_one_profile_prefix():
+    inner = PromptRecorder()
+    llm = PrefixCacheAdapter(inner)
+    resume = MOCK_RESUME
+
+    Generator(llm).generate("JD text", PROFILE, "Acme", "Engineer")
+    FactualityChecker(llm).check(resume, PROFILE)
+    asyncio.run(Reviser(llm).arevise(resume, "JD text", PROFILE, "feedback"))
+
+    prefix = profile_prefix(PROFILE)
+    assert all(prompt.startswith(prefix) for prompt in inner.prompts)
+    assert all(prompt.count('Test User') == 1 for prompt in inner.prompts)
+    stats = llm.stats()
+    assert stats["uploads"] == 1 and stats["reuses"] == 2
+
+
+def test_adapter_without_prefix_support_gets_inline_profile():
+    inner = PromptRecorder()
+    Generator(inner).generate("JD text", PROFILE, "Acme", "Engineer")
+    assert inner.prompts[0].startswith(profile_prefix(PROFILE))
+
+
+def make_gemini(fake_models):
+    os.environ.setdefault("GEMINI_API_KEY", "test-key")
+    llm = GeminiAdapter(
+        retry_policy=RetryPolicy(max_attempts=1, attempt_timeout=None, deadline=None),
+        breaker=CircuitBreaker("context-test"),
+        context_cache=ContextCache(min_prefix_tokens=0)
+    )
+    created = []
+
+    def create(model, config):
+        created.append(config.contents)
+        return SimpleNamespace(name=f"cachedContents/{len(created)}")
+
+    llm.client = SimpleNamespace(models=fake_models, caches=SimpleNamespace(create=create))
+    return llm, created
+
+
+def test_gemini_references_cached_content():
+    calls = []
+
+    def generate_content(model, contents, config):
+        calls.append((contents, config.cached_content))
+        return SimpleNamespace(text="answer")
+
+    llm, created = make_gemini(SimpleNamespace(generate_content=generate_content))
+    llm.generate("question", prefix="PROFILE\n\n")
+    llm.generate("question 2", prefix="PROFILE\n\n")
+
+    assert len(created) == 1
+    assert all(cached == "cachedContents/1" for _, cached in calls)
+    assert all(not contents.startswith("PROFILE") for contents, _ in calls)
+
+
+def test_gemini_resends_prefix_when_cache_is_gone():
+    calls = []
+
+    def generate_content(model, contents, config):
+        calls.append((contents, config.cached_content))
+        if config.cached_content:
+            raise InvalidRequestError("CachedContent not found", status=404)
+        return SimpleNamespace(text="answer")
+
+    llm, _ = make_gemini(SimpleNamespace(generate_content=generate_content))
+    assert llm.generate("question", prefix="PROFILE\n\n") == "answer"
+    assert calls[-1][0].startswith("PROFILE\n\nquestion")
+    assert calls[-1][1] is None
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ CONTEXT CACHE TESTS PASSED")
@@ -0,0 +1,255 @@
+"""
+Test the OpenAI-compatible adapter and provider failover (offline)
+
+OpenAICompatibleAdapter talks to the fake server's /v1/chat/completions
+in-process via ASGITransport; failover routing is driven with
+MockAdapters that fail on demand and a fake clock.
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from aro.llm_adapter import LLMAdapter, MockAdapter, PooledAdapter, RateLimitedAdapter, create_llm_adapter
+from aro.openai_compat import OpenAICompatibleAdapter
+from aro.failover import FailoverAdapter
+from aro.retry import RetryPolicy, CircuitBreaker, ServiceUnavailableError, InvalidRequestError
+from aro.telemetry import Telemetry, track
+from benchmarks.fake_gemini import create_app
+from src.schemas import Resume
+
+BASE_URL = "http://fake-openai/v1"
+
+
+def make_openai(app, max_attempts=1):
+    return OpenAICompatibleAdapter(
+        base_url=BASE_URL,
+        model="fake-local",
+        retry_policy=RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0, attempt_timeout=None, deadline=None),
+        breaker=CircuitBreaker("fake-openai-test", failure_threshold=100),
+        async_transport=httpx.ASGITransport(app=app)
+    )
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Flaky(LLMAdapter):
+    """Answers after `seconds` of fake time, or raises `error` while set"""
+
+    def __init__(self, name, clock, seconds=1.0, error=None):
+        self.name, self.clock, self.seconds, self.error = name, clock, seconds, error
+        self.calls = []
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7, **kwargs):
+        self.calls.append((prompt, kwargs))
+        self.clock.now += self.seconds
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        return {"provider": self.generate(prompt, max_tokens, **kwargs)}
+
+
+def failover(clock, *providers, **options):
+    return FailoverAdapter({p.name: p for p in providers}, breakers={}, clock=clock, **options)
+
+
+def test_openai_chat_completion_json_and_usage():
+    telemetry = Telemetry()
+    adapter = make_openai(create_app())
+
+    async def run():
+        with track("openai_test", adapter.model, telemetry=telemetry):
+            return await adapter.agenerate_json("Generate a tailored resume JSON for this role", response_schema=Resume, prefix="PROFILE\n")
+
+    resume = asyncio.run(run())
+    assert len(resume["experience"]) == 2
+    record = telemetry.recent(1)[0]
+    assert record["attempts"] == 1 and record["prompt_tokens"] > 0 and record["output_tokens"] > 0
+
+
+def test_openai_request_body():
+    adapter = OpenAICompatibleAdapter(base_url=BASE_URL, model="fake-local")
+    body = adapter._body("Prompt", 100, 0, None, "PROFILE", Resume, stream=True)
+    assert body["messages"] == [{"role": "system", "content": "PROFILE"}, {"role": "user", "content": "Prompt"}]
+    assert body["response_format"]["json_schema"]["name"] == "Resume"
+    assert body["stream"] and body["model"] == "fake-local"
+
+
+def test_openai_stream():
+    adapter = make_openai(create_app())
+
+    async def run():
+        return [delta async for delta in adapter.agenerate_stream("hello")]
+
+    deltas = asyncio.run(run())
+    assert "".join(deltas) == "Mock response"
+
+
+def test_openai_async_client_per_loop_closed_by_aclose():
+    adapter = make_openai(create_app())
+    stack = FailoverAdapter({"openai": RateLimitedAdapter(PooledAdapter(lambda: adapter, 1))}, breakers={})
+    clients = []
+
+    async def run():
+        assert await stack.agenerate("hello") == "Mock response"
+        clients.append(adapter._async_client())
+        await stack.aclose()  # as a sync wrapper does before closing its loop
+
+    # Each short-lived loop gets its own client, and aclose() closes it before the loop goes away
+    for _ in range(2):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+    assert clients[0] is not clients[1]
+    assert all(client.is_closed for client in clients)
+    assert len(adapter._aclients) == 0
+
+
+def test_openai_errors_are_typed_and_retried():
+    app = create_app(MockAdapter(error_rate=1.0, seed=1))
+    adapter = make_openai(app, max_attempts=2)
+    try:
+        asyncio.run(adapter.agenerate("hello"))
+        assert False, "should raise"
+    except ServiceUnavailableError as e:
+        assert e.status == 503
+
+    unreachable = OpenAICompatibleAdapter(
+        base_url="http://127.0.0.1:9/v1",
+        retry_policy=RetryPolicy(max_attempts=1, attempt_timeout=None, deadline=None),
+        breaker=CircuitBreaker("unreachable-test")
+    )
+    try:
+        unreachable.generate("hello")
+        assert False, "should raise"
+    except ServiceUnavailableError:
+        pass
+
+
+def test_primary_serves_while_healthy():
+    clock = Clock()
+    gemini, local = Flaky("gemini", clock), Flaky("openai", clock)
+    llm = failover(clock, gemini, local)
+    assert llm.generate("hi", model="gemini-2.5-flash-lite") == "gemini"
+    assert gemini.calls[0][1] == {"model": "gemini-2.5-flash-lite"} and local.calls == []
+
+
+def test_fails_over_and_ejects_unhealthy_provider():
+    clock = Clock()
+    gemini = Flaky("gemini", clock, error=ServiceUnavailableError("overloaded", 503))
+    local = Flaky("openai", clock)
+    llm = failover(clock, gemini, local, cooldown=30)
+
+    assert llm.generate_json("hi", model="gemini-2.5-flash") == {"provider": "openai"}
+    # The secondary gets its own default model, not the primary's
+    assert local.calls[0][1] == {}
+    assert llm.health()["gemini"]["healthy"] is False
+    assert llm.stats()["failovers"] == 1
+
+    # While ejected, gemini is not tried first
+    llm.generate("again")
+    assert len(gemini.calls) == 1
+
+    # After the cooldown real traffic probes it again
+    gemini.error = None
+    clock.now += 31
+    assert llm.generate("later") == "gemini"
+    assert llm.health()["gemini"]["healthy"] is True
+
+
+def test_request_errors_fail_over_without_ejecting():
+    clock = Clock()
+    gemini = Flaky("gemini", clock, error=InvalidRequestError("schema not supported", 400))
+    local = Flaky("openai", clock)
+    llm = failover(clock, gemini, local)
+    assert llm.generate("hi") == "openai"
+    assert llm.health()["gemini"]["healthy"] is True
+
+
+def test_last_provider_error_is_raised():
+    clock = Clock()
+    llm = failover(
+        clock,
+        Flaky("gemini", clock, error=ServiceUnavailableError("down", 503)),
+        Flaky("openai", clock, error=ServiceUnavailableError("also down", 503))
+    )
+    try:
+        llm.generate("hi")
+        assert False, "should raise"
+    except ServiceUnavailableError as e:
+        assert "also down" in str(e)
+
+
+def test_routes_to_much_faster_provider_during_brownout():
+    clock = Clock()
+    gemini, local = Flaky("gemini", clock, seconds=1.0), Flaky("openai", clock, seconds=1.0)
+    llm = failover(clock, gemini, local, latency_ratio=2.0, alpha=1.0)
+    llm.generate("warm up")
+    llm._states[1].ewma_seconds = 1.0
+
+    gemini.seconds = 1.5          # slower, but within the ratio: stays primary
+    llm.generate("a")
+    assert [s.name for s in llm.candidates()][0] == "gemini"
+
+    gemini.seconds = 5.0          # brownout: more than 2x slower
+    llm.generate("b")
+    assert [s.name for s in llm.candidates()][0] == "openai"
+
+
+def test_prefix_prepended_for_providers_without_prefix_support():
+    clock = Clock()
+    gemini = Flaky("gemini", clock, error=ServiceUnavailableError("down", 503))
+    gemini.supports_prefix = True
+    local = Flaky("openai", clock)
+    llm = failover(clock, gemini, local)
+    llm.generate("PROMPT", prefix="PROFILE\n")
+    assert gemini.calls[0] == ("PROMPT", {"prefix": "PROFILE\n"})
+    assert local.calls[0] == ("PROFILE\nPROMPT", {})
+
+
+def test_stream_fails_over_before_first_delta():
+    class DeadStream(MockAdapter):
+        async def agenerate_stream(self, prompt, max_tokens=4000, temperature=0.7, **kwargs):
+            raise ServiceUnavailableError("down", 503)
+            yield
+
+    llm = FailoverAdapter({"gemini": DeadStream(), "openai": MockAdapter()}, breakers={})
+
+    async def run():
+        return [delta async for delta in llm.agenerate_stream("hello")]
+
+    assert "".join(asyncio.run(run())) == "Mock response"
+    assert llm.health()["gemini"]["healthy"] is False
+
+
+def test_factory_builds_failover_over_configured_providers():
+    os.environ.setdefault("GEMINI_API_KEY", "test-key")
+    os.environ["LLM_FAILOVER_PROVIDERS"] = "mock,openai"
+    try:
+        llm = create_llm_adapter("failover", cache=False)
+    finally:
+        del os.environ["LLM_FAILOVER_PROVIDERS"]
+    assert isinstance(llm, FailoverAdapter)
+    assert list(llm.providers) == ["mock", "openai"]
+    assert isinstance(llm.providers["openai"], OpenAICompatibleAdapter)
+    assert llm.providers["openai"].retry_policy.max_attempts == 2
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ FAILOVER TESTS PASSED")
@@ -0,0 +1,105 @@
+"""
+Test GeminiAdapter against the local fake Gemini server (offline)
+
+The SDK's async httpx client is pointed at the fake app in-process via
+ASGITransport, so the real request/response and retry path is exercised
+without binding a port.
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from google import genai
+
+from aro.llm_adapter import GeminiAdapter, MockAdapter
+from aro.retry import RetryPolicy, CircuitBreaker, EmptyResponseError
+from aro.context_cache import ContextCache
+from benchmarks.fake_gemini import create_app
+
+BASE_URL = "http://fake-gemini"
+
+
+def make_adapter(app, max_attempts=1, min_prefix_tokens=1024):
+    adapter = GeminiAdapter(
+        api_key="fake",
+        retry_policy=RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0, attempt_timeout=None, deadline=None),
+        breaker=CircuitBreaker("fake-gemini-test", failure_threshold=100),
+        context_cache=ContextCache(min_prefix_tokens=min_prefix_tokens),
+        base_url=BASE_URL
+    )
+    adapter.client = genai.Client(api_key="fake", http_options=genai.types.HttpOptions(
+        base_url=BASE_URL, async_client_args={"transport": httpx.ASGITransport(app=app)}
+    ))
+    return adapter
+
+
+def test_base_url_override():
+    adapter = GeminiAdapter(api_key="fake", base_url="http://127.0.0.1:8090")
+    assert adapter.client._api_client._http_options.base_url.startswith("http://127.0.0.1:8090")
+
+
+def test_generate_content_returns_stage_json():
+    adapter = make_adapter(create_app())
+    resume = asyncio.run(adapter.agenerate_json("Generate a tailored resume JSON for this role"))
+    assert len(resume["experience"]) == 2 and len(resume["skills"]) == 7
+    assert asyncio.run(adapter.agenerate("hello")) == "Mock response"
+
+
+def test_stream_generate_content():
+    adapter = make_adapter(create_app())
+
+    async def collect():
+        return [d async for d in adapter.agenerate_json_stream("You are an expert resume evaluator.", 6000)]
+
+    deltas = asyncio.run(collect())
+    assert len(deltas) > 1 and '"section_scores"' in "".join(deltas)
+
+
+def test_503s_and_429s_are_retried():
+    app = create_app(MockAdapter(error_rate=0.3, seed=5), rate_limit_rate=0.2, seed=5)
+    adapter = make_adapter(app, max_attempts=10)
+
+    async def run():
+        return await asyncio.gather(*[adapter.agenerate_json("x") for _ in range(10)])
+
+    assert asyncio.run(run()) == [{"mock": "data"}] * 10
+
+
+def test_empty_candidate_is_empty_response():
+    adapter = make_adapter(create_app(MockAdapter(empty_rate=1.0)))
+    try:
+        asyncio.run(adapter.agenerate("x"))
+        assert False, "expected an empty response"
+    except EmptyResponseError:
+        pass
+
+
+def test_cached_content_tokens_are_reported():
+    adapter = make_adapter(create_app())
+    types = adapter.types
+    prefix = "USER PROFILE (SOURCE OF TRUTH):\n" + "x" * 4000
+
+    async def run():
+        cached = await adapter.client.aio.caches.create(
+            model=adapter.model,
+            config=types.CreateCachedContentConfig(contents=[prefix], ttl="60s")
+        )
+        return await adapter.client.aio.models.generate_content(
+            model=adapter.model,
+            contents="You are a strict factuality checker.",
+            config=types.GenerateContentConfig(cached_content=cached.name)
+        )
+
+    response = asyncio.run(run())
+    assert response.usage_metadata.cached_content_token_count == len(prefix) // 4
+    assert '"is_factual": true' in response.text
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ FAKE GEMINI TESTS PASSED")
@@ -0,0 +1,209 @@
+"""
+Test hedged LLM requests (offline)
+"""
+import sys
+import os
+import time
+import asyncio
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter, RateLimitedAdapter, AIMDLimiter
+from aro.hedging import HedgedAdapter, LatencyWindow, HedgeBudget
+
+
+class ScriptedAdapter(LLMAdapter):
+    """
+    Fake client whose Nth call takes delays[N] seconds (or, with
+    by_tokens, the delay for its max_tokens; queued `stalls` override
+    either for the next calls); streams arrive in 10 chunks
+    """
+
+    CHUNKS = 10
+
+    def __init__(self, delays=(0.0,), by_tokens=None):
+        self.delays = list(delays)
+        self.by_tokens = by_tokens or {}
+        self.calls = 0
+        self.cancelled = 0
+        self.chunks_sent = []
+        self.stalls = []
+        self._lock = threading.Lock()
+
+    def _next_delay(self, max_tokens=4000):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+            if self.stalls:
+                return index, self.stalls.pop(0)
+        if max_tokens in self.by_tokens:
+            return index, self.by_tokens[max_tokens]
+        return index, self.delays[min(index, len(self.delays) - 1)]
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7):
+        index, delay = self._next_delay(max_tokens)
+        time.sleep(delay)
+        return f"call{index}"
+
+    def generate_json(self, prompt, max_tokens=4000):
+        return {"call": self.generate(prompt)}
+
+    def generate_stream(self, prompt, max_tokens=4000, temperature=0.7, **kwargs):
+        index, delay = self._next_delay(max_tokens)
+        text = f"call{index}".ljust(self.CHUNKS)
+        sent = 0
+        try:
+            for chunk in text:
+                time.sleep(delay / self.CHUNKS)
+                sent += 1
+                yield chunk
+        except GeneratorExit:
+            with self._lock:
+                self.cancelled += 1
+            raise
+        finally:
+            with self._lock:
+                self.chunks_sent.append((index, sent))
+
+    async def agenerate(self, prompt, max_tokens=4000, temperature=0.7):
+        index, delay = self._next_delay()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"call{index}"
+
+
+def warm(llm, seconds=0.01, count=20, max_tokens=4000, model=None):
+    """Fill the latency window for one kind of call"""
+    window = llm.window((model, max_tokens))
+    for _ in range(count):
+        window.record(seconds)
+    return llm
+
+
+def test_latency_window_percentile():
+    window = LatencyWindow(min_samples=3)
+    window.record(1.0)
+    assert window.percentile(95) is None
+    for value in (2.0, 3.0, 4.0, 5.0):
+        window.record(value)
+    assert window.percentile(50) == 3.0
+    assert window.percentile(100) == 5.0
+
+
+def test_budget_caps_hedges():
+    budget = HedgeBudget(ratio=0.5, burst=1.0)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.earn()
+    budget.earn()
+    assert budget.try_spend()
+
+
+def test_no_hedge_until_window_warm():
+    inner = ScriptedAdapter([0.0])
+    llm = HedgedAdapter(inner, min_delay=0.0)
+    assert llm.generate("x").strip() == "call0"
+    assert llm.stats()["hedged"] == 0
+    assert llm.stats()["samples"] == 1
+
+
+def test_cold_calls_skip_streaming():
+    # Until a hedge is possible, calls keep the inner generate/generate_json path (and its retries)
+    inner = ScriptedAdapter([0.0])
+    llm = HedgedAdapter(inner, min_delay=0.0)
+    assert llm.generate_json("x") == {"call": "call0"}
+    assert llm.generate("x") == "call1"
+    assert inner.chunks_sent == []
+    warm(llm)
+    assert llm.generate("x").strip() == "call2"
+    assert inner.chunks_sent == [(2, ScriptedAdapter.CHUNKS)]
+
+
+def test_executor_sized_from_rate_limiter():
+    limited = RateLimitedAdapter(ScriptedAdapter(), limiter=AIMDLimiter(initial=4, max_limit=12))
+    assert HedgedAdapter(limited)._executor._max_workers == 24
+    assert HedgedAdapter(limited, max_workers=3)._executor._max_workers == 3
+
+
+def test_sync_hedge_wins_when_primary_slow():
+    inner = ScriptedAdapter([0.5, 0.01])
+    llm = warm(HedgedAdapter(inner, min_delay=0.05))
+    start = time.monotonic()
+    assert llm.generate("x").strip() == "call1"
+    assert time.monotonic() - start < 0.4
+    stats = llm.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_sync_loser_stream_is_closed():
+    inner = ScriptedAdapter([0.5, 0.01])
+    llm = warm(HedgedAdapter(inner, min_delay=0.05))
+    assert llm.generate("x").strip() == "call1"
+    time.sleep(0.2)  # the primary notices at its next chunk
+    assert inner.cancelled == 1
+    sent = dict(inner.chunks_sent)
+    assert sent[1] == ScriptedAdapter.CHUNKS and sent[0] < ScriptedAdapter.CHUNKS
+
+
+def test_mixed_workload_hedges_per_kind_of_call():
+    # Short evaluator-style calls (~10ms) and long generator-style calls (up to ~600ms)
+    inner = ScriptedAdapter(by_tokens={500: 0.01, 8000: 0.3})
+    llm = HedgedAdapter(inner, min_delay=0.05)
+    warm(llm, seconds=0.01, max_tokens=500)
+    for seconds in (0.2, 0.3, 0.4, 0.6):
+        warm(llm, seconds=seconds, count=5, max_tokens=8000)
+    delays = llm.stats()["hedge_delays"]
+    assert delays == {"default/500": 0.05, "default/8000": 0.6}
+
+    # A long call at its normal latency is not duplicated
+    llm.generate("long", 8000)
+    assert inner.calls == 1 and llm.stats()["hedged"] == 0
+
+    # A stalled short call is hedged after ~50ms, not after the long calls' p95
+    inner.stalls.append(0.4)
+    start = time.monotonic()
+    llm.generate("short", 500)
+    assert time.monotonic() - start < 0.3
+    assert llm.stats()["hedged"] == 1 and llm.stats()["hedge_wins"] == 1
+
+
+def test_async_hedge_cancels_loser():
+    inner = ScriptedAdapter([0.5, 0.01])
+    llm = warm(HedgedAdapter(inner, min_delay=0.05))
+
+    async def run():
+        result = await llm.agenerate("x")
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == "call1"
+    assert inner.cancelled == 1
+    assert llm.stats()["hedge_wins"] == 1
+
+
+def test_fast_primary_not_hedged():
+    inner = ScriptedAdapter([0.0])
+    llm = warm(HedgedAdapter(inner, min_delay=0.2))
+    assert asyncio.run(llm.agenerate("x")) == "call0"
+    assert inner.calls == 1
+    assert llm.stats()["hedged"] == 0
+
+
+def test_exhausted_budget_waits_for_primary():
+    inner = ScriptedAdapter([0.1])
+    llm = warm(HedgedAdapter(inner, min_delay=0.01, budget_ratio=0.0))
+    llm.budget._tokens = 0
+    assert llm.generate("x").strip() == "call0"
+    assert inner.calls == 1
+    assert llm.stats()["budget_denied"] == 1
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ HEDGING TESTS PASSED")
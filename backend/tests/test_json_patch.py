@@ -0,0 +1,139 @@
+"""
+Test JSON Patch application and patch-mode revision (offline)
+"""
+import sys
+import os
+import copy
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.json_patch import PatchError, apply_patch
+from aro.llm_adapter import MockAdapter
+from aro.mock_responses import MOCK_RESUME
+from aro.routing import StageRouter
+from src.reviser import Reviser
+from src.providers import UserProvider
+
+
+PROFILE = UserProvider.get("chandan")
+NEW_BULLET = "Cut **AWS** costs by **30%** by moving batch jobs to **Spot** instances with checkpointed **Python** workers"
+
+
+class PatchAdapter(MockAdapter):
+    """Answers patch prompts with a fixed response and records which prompts it saw"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+        self.prompts = []
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        self.prompts.append((prompt, max_tokens))
+        if "JSON Patch" in prompt:
+            return copy.deepcopy(self.response)
+        return super().generate_json(prompt, max_tokens, **kwargs)
+
+    async def agenerate_json(self, prompt, max_tokens=4000, **kwargs):
+        return self.generate_json(prompt, max_tokens, **kwargs)
+
+
+def make_reviser(llm):
+    router = StageRouter()
+    return Reviser(llm, route=router.route("reviser"), patch=True, patch_route=router.route("reviser_patch"))
+
+
+def test_apply_patch_ops():
+    doc = {"a": {"b": [1, 2, 3]}, "c/d": "x", "e~f": "y"}
+    result = apply_patch(doc, [
+        {"op": "replace", "path": "/a/b/0", "value": 10},
+        {"op": "remove", "path": "/a/b/1"},
+        {"op": "add", "path": "/a/b/-", "value": 4},
+        {"op": "add", "path": "/a/b/0", "value": 0},
+        {"op": "replace", "path": "/c~1d", "value": "z"},
+        {"op": "remove", "path": "/e~0f"},
+        {"op": "add", "path": "/g", "value": {"h": True}},
+    ])
+    assert result == {"a": {"b": [0, 10, 3, 4]}, "c/d": "z", "g": {"h": True}}
+    assert doc == {"a": {"b": [1, 2, 3]}, "c/d": "x", "e~f": "y"}  # input untouched
+    assert apply_patch(doc, []) == doc and apply_patch(doc, []) is not doc
+    assert apply_patch(doc, [{"op": "replace", "path": "", "value": [1]}]) == [1]
+
+
+def test_apply_patch_rejects_bad_operations():
+    doc = {"a": [1, 2], "s": "text"}
+    for operation in (
+        {"op": "replace", "path": "/missing", "value": 1},
+        {"op": "replace", "path": "/a/2", "value": 1},
+        {"op": "replace", "path": "/a/-", "value": 1},
+        {"op": "remove", "path": "/a/01"},
+        {"op": "add", "path": "/a/x", "value": 1},
+        {"op": "replace", "path": "/s/0", "value": "x"},
+        {"op": "replace", "path": "/a/0"},
+        {"op": "move", "path": "/a/0", "from": "/a/1"},
+        {"op": "replace", "path": "a", "value": 1},
+        {"op": "remove", "path": ""},
+        "replace /a/0",
+    ):
+        try:
+            apply_patch(doc, [operation])
+            assert False, f"should reject {operation}"
+        except PatchError:
+            pass
+    assert doc == {"a": [1, 2], "s": "text"}
+
+
+def test_patch_revision_edits_only_addressed_fields():
+    llm = PatchAdapter({"edits": [
+        {"op": "replace", "path": "/experience/0/bullets/2", "value": NEW_BULLET},
+        {"op": "replace", "path": "/projects/1/tech", "value": "Python, FastAPI"},
+    ]})
+    reviser = make_reviser(llm)
+    revised = reviser.revise(MOCK_RESUME, "Python AWS", PROFILE, "Bullet 3 lacks AWS cost impact", "evaluation")
+
+    expected = copy.deepcopy(MOCK_RESUME)
+    expected["experience"][0]["bullets"][2] = NEW_BULLET
+    expected["projects"][1]["tech"] = "Python, FastAPI"
+    assert revised == expected
+    assert [edit["path"] for edit in reviser.last_patch] == ["/experience/0/bullets/2", "/projects/1/tech"]
+    # One patch call on the small patch route, no full revision
+    assert len(llm.prompts) == 1 and llm.prompts[0][1] == 3000
+    assert "Bullet 3 lacks AWS cost impact" in llm.prompts[0][0]
+
+
+def test_empty_patch_keeps_resume():
+    reviser = make_reviser(PatchAdapter({"edits": []}))
+    assert asyncio.run(reviser.arevise(MOCK_RESUME, "JD", PROFILE, "Looks good", "factuality")) == MOCK_RESUME
+    assert reviser.last_patch == []
+
+
+def test_bad_patch_falls_back_to_full_revision():
+    for response in (
+        {"edits": [{"op": "replace", "path": "/experience/5/bullets/0", "value": "x"}]},  # no such job
+        {"edits": [{"op": "replace", "path": "/skills", "value": "Python"}]},  # not a Resume afterwards
+        {"edits": [{"op": "replace", "path": "/summary"}]},  # no value
+    ):
+        llm = PatchAdapter(response)
+        reviser = make_reviser(llm)
+        revised = reviser.revise(MOCK_RESUME, "JD", PROFILE, "feedback", "evaluation")
+        assert revised == MOCK_RESUME and reviser.last_patch is None
+        assert len(llm.prompts) == 2 and llm.prompts[1][1] == 10000
+        assert "complete revised resume" in llm.prompts[1][0]
+
+
+def test_mock_adapter_and_mode_switch():
+    os.environ["REVISER_MODE"] = "patch"
+    try:
+        reviser = Reviser(MockAdapter())
+    finally:
+        del os.environ["REVISER_MODE"]
+    assert reviser.patch and not Reviser(MockAdapter()).patch
+    assert reviser.revise(MOCK_RESUME, "JD", PROFILE, "feedback", "evaluation") == MOCK_RESUME
+    assert reviser.last_patch[0]["path"] == "/experience/0/bullets/0"
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ JSON PATCH TESTS PASSED")
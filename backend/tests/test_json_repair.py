@@ -0,0 +1,141 @@
+"""
+Test repair and continuation of truncated JSON output (offline)
+"""
+import sys
+import os
+import json
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter, _parse_json_text
+from aro.llm_cache import LLMCache, CachedAdapter
+from aro.json_stream import repair_json, repair_truncated, PartialJSONError
+from aro.mock_responses import MOCK_RESUME
+from aro.routing import StageRoute, stage_stats, remaining_keys, partial_schema
+from src.generator import Generator
+from src.schemas import Resume
+
+
+RESUME_TEXT = json.dumps(MOCK_RESUME)
+
+
+def cut_at(marker, offset=0):
+    return RESUME_TEXT[:RESUME_TEXT.index(marker) + offset]
+
+
+class TruncatingAdapter(LLMAdapter):
+    """Cuts the first response off at `cut`, answers continuations in full"""
+
+    def __init__(self, cut):
+        self.cut = cut
+        self.prompts = []
+        self.options = []
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7, **kwargs):
+        return self.cut
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        self.prompts.append(prompt)
+        self.options.append(kwargs)
+        if len(self.prompts) == 1:
+            return _parse_json_text(self.cut)
+        return json.loads(RESUME_TEXT)
+
+    async def agenerate_json_stream(self, prompt, max_tokens=4000, **kwargs):
+        self.prompts.append(prompt)
+        for i in range(0, len(self.cut), 50):
+            yield self.cut[i:i + 50]
+
+
+def test_repair_closes_strings_and_brackets():
+    assert json.loads(repair_json('{"a": "half a sent')) == {"a": "half a sent"}
+    assert json.loads(repair_json('```json\n{"a": [{"b": 1}, {"c": [1, 2')) == {"a": [{"b": 1}, {"c": [1]}]}
+    assert json.loads(repair_json('{"a": "x\\u00')) == {"a": "x"}
+    assert json.loads(repair_json('{"a": true, "b": fal')) == {"a": True}
+
+
+def test_repair_drops_dangling_element():
+    assert json.loads(repair_json('{"a": 1, "b')) == {"a": 1}
+    assert json.loads(repair_json('{"a": 1, "b": ')) == {"a": 1}
+    assert json.loads(repair_json('{"a": [1,')) == {"a": [1]}
+    assert json.loads(repair_json('{"a": [{"b": 1}, {"c"')) == {"a": [{"b": 1}]}
+    assert json.loads(repair_json('{"a": 1} trailing text')) == {"a": 1}
+
+
+def test_repair_truncated_reports_cut_off_keys():
+    repaired = repair_truncated(cut_at('"bullet2"', 30))
+    assert repaired.truncated == ["projects"]
+    assert repaired["experience"] == MOCK_RESUME["experience"]
+    try:
+        repair_truncated('{"summ')
+        assert False, "should raise"
+    except PartialJSONError:
+        pass
+
+
+def test_remaining_keys_and_partial_schema():
+    result = repair_truncated(cut_at('"experience"'))
+    assert remaining_keys(result, Resume) == ["experience", "projects"]
+    schema = partial_schema(Resume, ["experience", "projects"])
+    assert list(schema.model_fields) == ["experience", "projects"]
+
+
+def test_route_continues_only_missing_keys():
+    stage_stats.reset()
+    llm = TruncatingAdapter(cut_at('"experience"'))
+    result = StageRoute("repair_test").generate_json(llm, "Write a resume.", schema=Resume)
+
+    assert result["experience"] == MOCK_RESUME["experience"]
+    assert result["projects"] == MOCK_RESUME["projects"]
+    assert "Return ONLY a JSON object with the remaining keys: experience, projects" in llm.prompts[1]
+    assert list(llm.options[1]["response_schema"].model_fields) == ["experience", "projects"]
+
+    stats = stage_stats.snapshot()["repair_test"]
+    assert stats["repairs"] == 1 and stats["continuations"] == 1
+    assert stats["continuation_failures"] == 0
+    assert stats["calls"] == 2 and stats["repair_rate"] == 0.5
+
+
+def test_failed_continuation_is_counted():
+    class NoContinuation(TruncatingAdapter):
+        def generate_json(self, prompt, max_tokens=4000, **kwargs):
+            if self.prompts:
+                raise RuntimeError("still overloaded")
+            return super().generate_json(prompt, max_tokens, **kwargs)
+
+    stage_stats.reset()
+    route = StageRoute("repair_test")
+    try:
+        route.generate_json(NoContinuation(cut_at('"projects"')), "Write a resume.", schema=Resume)
+        assert False, "missing projects should fail validation"
+    except Exception:
+        pass
+    assert stage_stats.snapshot()["repair_test"]["continuation_failures"] == 1
+
+
+def test_repaired_output_not_cached():
+    cache = LLMCache(use_disk=False)
+    llm = CachedAdapter(TruncatingAdapter(cut_at('"projects"')), cache)
+    llm.generate_json("Write a resume.")
+    assert cache.stats()["stores"] == 0
+
+
+def test_stream_continues_truncated_generation():
+    llm = TruncatingAdapter(cut_at('"skills"'))
+
+    async def run():
+        return [event async for event in Generator(llm).agenerate_stream("JD", {"name": "X"}, "Acme", "Engineer")]
+
+    events = asyncio.run(run())
+    sections = [event["key"] for event in events if event["type"] == "section"]
+    done = events[-1]
+    assert sections == ["header", "summary", "skills", "experience", "projects"]
+    assert done["missing"] == [] and done["resume"]["projects"] == MOCK_RESUME["projects"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ JSON REPAIR TESTS PASSED")
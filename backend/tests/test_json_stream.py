@@ -0,0 +1,99 @@
+"""
+Test incremental JSON parsing of streamed LLM output (offline)
+"""
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.json_stream import IncrementalJSONParser, PartialJSONError, parse_sections
+from aro.llm_adapter import _parse_json_text
+from src.evaluator import Evaluator, KeywordTracker
+from src.generator import validate_section
+
+
+RESUME = {
+    "header": {"title": "SWE | Python, {braces} and \"quotes\""},
+    "summary": "Backend engineer \\ with **Python** and AWS",
+    "skills": [{"category": "Languages", "items": "Python, Java, Go"}],
+    "experience": [{"company": "LSEG", "bullets": ["a", "b"]}],
+    "projects": [{"title": "X", "bullet1": "y", "bullet2": "z"}],
+    "count": 3,
+    "flag": True
+}
+
+
+def _feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return parser, completed
+
+
+def test_sections_emitted_in_order_for_any_chunking():
+    text = "```json\n" + json.dumps(RESUME, indent=2) + "\n```"
+    for size in (1, 2, 5, 17, len(text)):
+        parser, completed = _feed_in_chunks(text, size)
+        assert [key for key, _ in completed] == list(RESUME)
+        assert dict(completed) == RESUME
+        assert parser.finish() == RESUME
+
+
+def test_section_emitted_before_stream_ends():
+    text = json.dumps(RESUME)
+    cut = text.index('"skills"')
+    parser = IncrementalJSONParser()
+    completed = parser.feed(text[:cut])
+    assert [key for key, _ in completed] == ["header", "summary"]
+    assert not parser.complete
+
+
+def test_truncated_tail_salvages_finished_sections():
+    text = json.dumps(RESUME)
+    truncated = text[:text.index('"projects"') + 20]
+
+    parser, _ = _feed_in_chunks(truncated, 7)
+    try:
+        parser.finish()
+        assert False, "strict finish should raise"
+    except PartialJSONError as e:
+        assert "experience" in e.sections
+
+    salvaged = parse_sections(truncated)
+    assert list(salvaged) == ["header", "summary", "skills", "experience"]
+
+    # The repair keeps the same sections; the dangling "projects" start is dropped
+    repaired = _parse_json_text("```json\n" + truncated)
+    assert repaired == salvaged and repaired.truncated == []
+
+
+def test_nothing_salvageable_raises():
+    try:
+        _parse_json_text('{"summary')
+        assert False, "should raise"
+    except Exception as e:
+        assert "Invalid JSON" in str(e)
+
+
+def test_keyword_tracker_matches_full_score():
+    jd = "We use Python, Go, AWS, Docker and PostgreSQL"
+    tracker = KeywordTracker(jd)
+    for key, value in RESUME.items():
+        tracker.add_section(key, value)
+    evaluator = Evaluator(llm=None)
+    assert tracker.score() == evaluator._calculate_keyword_match(RESUME, jd)
+
+
+def test_validate_section_warnings():
+    assert validate_section("skills", RESUME["skills"])
+    assert validate_section("summary", "x" * 540) == []
+    assert validate_section("projects", "oops") == ["Projects must be a list"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ JSON STREAM TESTS PASSED")
@@ -0,0 +1,159 @@
+"""
+Test LLM Response Cache (offline, no API calls)
+"""
+import sys
+import os
+import time
+import asyncio
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel
+
+from aro.llm_adapter import LLMAdapter
+from aro.llm_cache import LLMCache, CachedAdapter, MemoryCache, request_key
+
+
+class CountingAdapter(LLMAdapter):
+    """Fake adapter that counts upstream calls"""
+    model = "fake-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7):
+        self.calls += 1
+        return f"text:{prompt}:{self.calls}"
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        self.calls += 1
+        return {"prompt": prompt, "call": self.calls}
+
+
+def _cached(tmp_dir, **kwargs):
+    inner = CountingAdapter()
+    return inner, CachedAdapter(inner, LLMCache(cache_dir=tmp_dir, **kwargs))
+
+
+def test_key_depends_on_every_input():
+    base = request_key("json", "m", "p", 0, 100)
+    assert base == request_key("json", "m", "p", 0, 100)
+    assert base != request_key("json", "m2", "p", 0, 100)
+    assert base != request_key("json", "m", "p2", 0, 100)
+    assert base != request_key("json", "m", "p", 0.5, 100)
+    assert base != request_key("json", "m", "p", 0, 200)
+
+
+def test_json_calls_hit_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        inner, llm = _cached(tmp)
+        first = llm.generate_json("same prompt", max_tokens=100)
+        second = llm.generate_json("same prompt", max_tokens=100)
+
+        assert first == second
+        assert inner.calls == 1
+        stats = llm.cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+        # Returned values are copies, callers may mutate them safely
+        second["prompt"] = "mutated"
+        assert llm.generate_json("same prompt", max_tokens=100)["prompt"] == "same prompt"
+
+
+def test_sampled_text_is_not_cached():
+    with tempfile.TemporaryDirectory() as tmp:
+        inner, llm = _cached(tmp)
+        llm.generate("p", temperature=0.7)
+        llm.generate("p", temperature=0.7)
+        assert inner.calls == 2
+
+        llm.generate("p", temperature=0)
+        llm.generate("p", temperature=0)
+        assert inner.calls == 3
+
+
+def test_sampled_json_is_not_cached():
+    async def drain(stream):
+        return "".join([delta async for delta in stream])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inner, llm = _cached(tmp)
+        llm.generate_json("p", temperature=0.7)
+        llm.generate_json("p", temperature=0.7)
+        asyncio.run(llm.agenerate_json("p", temperature=0.7))
+        asyncio.run(drain(llm.agenerate_json_stream("p", temperature=0.7)))
+        asyncio.run(drain(llm.agenerate_json_stream("p", temperature=0.7)))
+        assert inner.calls == 5
+        assert llm.cache.stats()["hits"] == llm.cache.stats()["misses"] == 0
+
+        llm.generate_json("p", temperature=0)
+        asyncio.run(llm.agenerate_json("p", temperature=0))
+        assert inner.calls == 6
+
+
+def test_invalid_payload_is_not_cached():
+    class Answer(BaseModel):
+        prompt: str
+        call: int
+
+    class Other(BaseModel):
+        summary: str
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inner, llm = _cached(tmp)
+        # Parses, but fails the schema: the next call asks the model again
+        llm.generate_json("p", response_schema=Other)
+        assert asyncio.run(llm.agenerate_json("p", response_schema=Other))["call"] == 2
+        assert llm.cache.stats()["hits"] == 0
+
+        llm.generate_json("p", response_schema=Answer)
+        assert llm.generate_json("p", response_schema=Answer)["call"] == 3
+        assert inner.calls == 3
+
+
+def test_disk_tier_survives_new_process_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        inner, llm = _cached(tmp)
+        llm.generate_json("persist me")
+
+        inner2, llm2 = _cached(tmp)
+        assert llm2.generate_json("persist me")["call"] == 1
+        assert inner2.calls == 0
+        assert llm2.cache.stats()["disk_hits"] == 1
+
+
+def test_ttl_expires_disk_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        inner, llm = _cached(tmp, ttl_seconds=0.05)
+        llm.generate_json("short lived")
+        llm.cache.memory.clear()
+        time.sleep(0.1)
+        llm.generate_json("short lived")
+        assert inner.calls == 2
+
+
+def test_memory_lru_eviction():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+
+def test_async_path_shares_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        inner, llm = _cached(tmp)
+        llm.generate_json("shared")
+        result = asyncio.run(llm.agenerate_json("shared"))
+        assert result["call"] == 1
+        assert inner.calls == 1
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ LLM CACHE TESTS PASSED")
@@ -0,0 +1,77 @@
+"""
+Test shared LLM client pool (offline)
+"""
+import sys
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter, PooledAdapter, get_llm_adapter, reset_llm_adapters
+
+
+class SlowAdapter(LLMAdapter):
+    """Fake client that records which instance served each call"""
+    created = 0
+
+    def __init__(self):
+        SlowAdapter.created += 1
+        self.name = f"client{SlowAdapter.created}"
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return self.name
+
+    def generate_json(self, prompt, max_tokens=4000):
+        return {"client": self.generate(prompt)}
+
+
+def test_pool_spreads_concurrent_calls():
+    pool = PooledAdapter(SlowAdapter, size=3)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        served = list(executor.map(lambda i: pool.generate(f"p{i}"), range(3)))
+
+    assert sorted(served) == sorted(member.name for member in pool.members)
+    assert all(member.max_active == 1 for member in pool.members)
+    assert pool.stats()["in_flight"] == [0, 0, 0]
+
+
+def test_pool_releases_lease_on_error():
+    class Failing(SlowAdapter):
+        def generate(self, prompt, max_tokens=4000, temperature=0.7):
+            raise RuntimeError("boom")
+
+    pool = PooledAdapter(Failing, size=2)
+    try:
+        pool.generate("x")
+    except RuntimeError:
+        pass
+    assert pool.stats()["in_flight"] == [0, 0]
+
+
+def test_shared_adapter_is_singleton():
+    reset_llm_adapters()
+    first = get_llm_adapter("mock", pool_size=2)
+    second = get_llm_adapter("mock")
+    assert first is second
+    assert first.inner.inner.size == 2
+    assert first.generate_json("x") == {"mock": "data"}
+    reset_llm_adapters()
+    assert get_llm_adapter("mock") is not first
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ LLM POOL TESTS PASSED")
@@ -0,0 +1,148 @@
+"""
+Test the load-testing MockAdapter (stage responses, latency, faults)
+"""
+import sys
+import os
+import time
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import MockAdapter, create_llm_adapter
+from aro.mock_responses import MOCK_RESUME
+from aro.retry import RetryPolicy, CircuitBreaker, ServiceUnavailableError, EmptyResponseError
+from src.generator import Generator, validate_section, RESUME_SECTIONS
+from src.evaluator import Evaluator
+from src.factuality_checker import FactualityChecker
+from src.reviser import Reviser
+
+
+PROFILE = {"name": "Test User", "skills": ["Python", "AWS"]}
+JD = "Backend engineer with Python, AWS, Docker and PostgreSQL experience."
+
+
+def test_pipeline_stages_get_schema_valid_responses():
+    llm = MockAdapter()
+    resume = Generator(llm).generate(JD, PROFILE, "Acme", "Backend Engineer")
+    for key in RESUME_SECTIONS:
+        assert key in resume
+        assert validate_section(key, resume[key]) == [], key
+    
+    evaluation = Evaluator(llm).evaluate(resume, JD)
+    assert 0 <= evaluation["llm_score"] <= 65
+    assert evaluation["llm_score"] == sum(evaluation["section_scores"].values())
+    
+    facts = FactualityChecker(llm).check(resume, PROFILE)
+    assert facts["is_factual"] and 0 <= facts["factuality_score"] <= 100
+    
+    resume["summary"] = resume["summary"].replace("Software", "Backend")
+    revised = Reviser(llm).revise(resume, JD, PROFILE, "Tighten the summary")
+    assert revised == resume
+    
+    # Unrecognised prompts keep the old answers
+    assert llm.generate_json("x") == {"mock": "data"}
+    assert llm.generate("x") == "Mock response"
+
+
+def test_async_calls_match_sync():
+    llm = MockAdapter()
+    
+    async def run():
+        return (
+            await llm.agenerate_json("Generate a tailored resume JSON"),
+            await llm.agenerate_json("x"),
+            await llm.agenerate("x"),
+            await Evaluator(llm).aevaluate(MOCK_RESUME, JD),
+            await FactualityChecker(llm).acheck(MOCK_RESUME, PROFILE),
+        )
+    
+    resume, unknown, text, evaluation, facts = asyncio.run(run())
+    assert llm.stats()["calls"] == 5
+    assert resume == MOCK_RESUME == llm.generate_json("Generate a tailored resume JSON")
+    assert unknown == {"mock": "data"} and text == "Mock response"
+    assert 0 <= evaluation["llm_score"] <= 65
+    assert evaluation["llm_score"] == sum(evaluation["section_scores"].values())
+    assert facts["is_factual"]
+
+
+def test_async_stream_parses_to_resume():
+    async def run():
+        events = [e async for e in Generator(MockAdapter()).agenerate_stream(JD, PROFILE, "Acme", "Backend Engineer")]
+        return events[-1]
+    
+    done = asyncio.run(run())
+    assert done["missing"] == []
+
+
+def test_latency_distribution_matches_percentiles():
+    llm = MockAdapter(latency_p50=0.2, latency_p99=1.0, seed=7)
+    samples = sorted(llm.simulate_attempt("x", False)[0] for _ in range(4000))
+    p50, p99 = samples[2000], samples[3960]
+    assert 0.18 < p50 < 0.22, p50
+    assert 0.8 < p99 < 1.25, p99
+
+
+def test_token_proportional_delay():
+    llm = MockAdapter(seconds_per_token=0.001)
+    start = time.monotonic()
+    llm.generate_json("Generate a tailored resume JSON")
+    # ~5000 characters of resume JSON -> ~1.2s at 1ms/token
+    assert time.monotonic() - start > 0.8
+    
+    start = time.monotonic()
+    llm.generate("x")
+    assert time.monotonic() - start < 0.1
+
+
+def test_injected_503s_are_retried():
+    policy = RetryPolicy(max_attempts=10, base_delay=0, attempt_timeout=None, deadline=None)
+    llm = MockAdapter(error_rate=0.3, seed=3, retry_policy=policy, breaker=CircuitBreaker("mock-test", failure_threshold=100))
+    for _ in range(20):
+        assert asyncio.run(llm.agenerate_json("x")) == {"mock": "data"}
+    stats = llm.stats()
+    assert stats["unavailable"] > 0 and stats["calls"] == 20 + stats["unavailable"]
+    
+    try:
+        MockAdapter(error_rate=1.0).generate("x")
+        assert False, "expected a 503"
+    except ServiceUnavailableError as e:
+        assert e.status == 503
+
+
+def test_empty_truncated_and_fenced_output():
+    try:
+        MockAdapter(empty_rate=1.0).generate("x")
+        assert False, "expected an empty response"
+    except EmptyResponseError:
+        pass
+    
+    # Truncated resumes come back repaired, flagging the cut-off sections (or a parse error)
+    llm = MockAdapter(truncate_rate=1.0, seed=1)
+    for _ in range(5):
+        try:
+            resume = llm.generate_json("Generate a tailored resume JSON")
+            assert resume.truncated or len(resume) < len(RESUME_SECTIONS)
+        except Exception as e:
+            assert "Invalid JSON" in str(e)
+    
+    text = MockAdapter(bad_fence_rate=1.0).generate("Generate a tailored resume JSON")
+    assert "``" in text and not text.startswith("{")
+
+
+def test_create_llm_adapter_reads_env():
+    os.environ.update({"LLM_MOCK_P50": "0.5", "LLM_MOCK_P99": "2", "LLM_MOCK_ERROR_RATE": "0.1", "LLM_MOCK_SEED": "1"})
+    try:
+        llm = create_llm_adapter("mock")
+    finally:
+        for name in ("LLM_MOCK_P50", "LLM_MOCK_P99", "LLM_MOCK_ERROR_RATE", "LLM_MOCK_SEED"):
+            os.environ.pop(name)
+    assert isinstance(llm, MockAdapter)
+    assert llm.latency_p50 == 0.5 and llm.latency_p99 == 2.0
+    assert llm.rates[0] == 0.1 and llm.retry_policy is not None
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ MOCK ADAPTER TESTS PASSED")
@@ -0,0 +1,87 @@
+"""
+Test JD-relevant profile slicing (offline)
+"""
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import MockAdapter
+from aro.mock_responses import MOCK_RESUME
+from aro.tokens import estimate_tokens
+from src.generator import Generator
+from src.profile_context import profile_prefix
+from src.profile_ranker import BM25, tokenize, top_k, relevant_profile, PROJECT_SKIP_FIELDS
+from src.providers import UserProvider, JobProvider
+
+
+PROFILE = UserProvider.get("chandan")
+ML_JD = "AI Intern: train deep learning models with PyTorch, reinforcement learning, computer vision and neural networks."
+DEVOPS_JD = "Platform engineer: Kubernetes operators in Go, Docker, CRDs, cloud infrastructure and DevOps automation."
+
+
+def test_tokenize_keeps_tech_names():
+    assert tokenize("Experience with C++, C#, Node.js and the AWS cloud.") == ["experience", "c++", "c#", "node.js", "aws", "cloud"]
+
+
+def test_bm25_prefers_rare_matching_terms():
+    documents = [tokenize(text) for text in ("python kubernetes go", "python django", "python flask")]
+    scores = BM25(documents).scores(tokenize("kubernetes python"))
+    assert scores[0] > scores[1] == scores[2] > 0
+    assert top_k(["a", "b", "c"], tokenize("nothing matches"), 2) == ["a", "b"]
+
+
+def test_projects_ranked_by_jd():
+    ml = [project["title"] for project in relevant_profile(PROFILE, ML_JD)["projects"]]
+    devops = [project["title"] for project in relevant_profile(PROFILE, DEVOPS_JD)["projects"]]
+    assert len(ml) == len(devops) == 4
+    assert ml[0] == "Dino Game Deep RL Agent"
+    assert devops[0] == "Orion Platform"
+
+
+def test_slice_keeps_facts_and_drops_links():
+    sliced = relevant_profile(PROFILE, DEVOPS_JD, top_projects=3, top_details=3)
+    orion = sliced["projects"][0]
+    original = next(project for project in PROFILE["projects"] if project["title"] == "Orion Platform")
+    assert orion["metrics"] == original["metrics"] and orion["tech_stack"] == original["tech_stack"]
+    assert not PROJECT_SKIP_FIELDS & set(orion)
+
+    lseg = sliced["work"]["lseg"]
+    assert lseg["metrics"] == PROFILE["work"]["lseg"]["metrics"]
+    assert len(lseg["achievements"]) == 3
+    assert all(detail in PROFILE["work"]["lseg"]["achievements"] for detail in lseg["achievements"])
+    assert list(sliced["positioning"]) == ["devops_platform"]
+    assert sliced["skills"] == PROFILE["skills"] and sliced["education"] == PROFILE["education"]
+
+    # The full profile is untouched and slicing can be switched off
+    assert len(PROFILE["projects"]) == 20
+    assert relevant_profile(PROFILE, DEVOPS_JD, top_projects=0) is PROFILE
+
+
+def test_slice_halves_profile_prefix():
+    job = JobProvider.get("job1")
+    full = estimate_tokens(profile_prefix(PROFILE))
+    sliced = estimate_tokens(profile_prefix(relevant_profile(PROFILE, job["jd_text"])))
+    assert sliced < full * 0.55
+    # Deterministic: the same JD gives a byte-identical (cacheable) prefix
+    assert profile_prefix(relevant_profile(PROFILE, job["jd_text"])) == profile_prefix(relevant_profile(PROFILE, job["jd_text"]))
+
+
+def test_generator_sends_sliced_profile():
+    class Capture(MockAdapter):
+        def generate_json(self, prompt, max_tokens=4000, **kwargs):
+            self.prefix = kwargs.get("prefix")
+            return json.loads(json.dumps(MOCK_RESUME))
+
+    llm = Capture()
+    Generator(llm).generate(DEVOPS_JD, PROFILE, "Acme", "Platform Engineer")
+    assert "Orion Platform" in llm.prefix
+    assert "Bingo Game" not in llm.prefix and "Orion-platform" not in llm.prefix
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ PROFILE RANKER TESTS PASSED")
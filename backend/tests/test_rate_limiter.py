@@ -0,0 +1,258 @@
+"""
+Test client-side rate limiting and adaptive concurrency (offline)
+"""
+import sys
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter, TokenBucket, AIMDLimiter, RateLimitedAdapter, _limited_pool
+from aro.retry import RetryPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class OverloadingAdapter(LLMAdapter):
+    """Fake provider that returns 503 whenever more than `capacity` calls overlap"""
+
+    def __init__(self, capacity: int, latency: float = 0.02):
+        self.capacity = capacity
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.overloads = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            if self.active > self.capacity:
+                self.active -= 1
+                self.overloads += 1
+                raise Exception("503 UNAVAILABLE: The model is overloaded.")
+
+    def _exit(self):
+        with self._lock:
+            self.active -= 1
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7):
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            return "ok"
+        finally:
+            self._exit()
+
+    def generate_json(self, prompt, max_tokens=4000):
+        return {"text": self.generate(prompt)}
+
+    async def agenerate(self, prompt, max_tokens=4000, temperature=0.7):
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            return "ok"
+        finally:
+            self._exit()
+
+
+class FlakyAdapter(LLMAdapter):
+    """Fake provider client whose first `failures` attempts fail with `error`, retried by its RetryPolicy"""
+
+    def __init__(self, retry_policy, failures, error="429 RESOURCE_EXHAUSTED: quota exceeded"):
+        self.retry_policy = retry_policy
+        self.failures = failures
+        self.error = error
+        self.attempts = 0
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7):
+        def attempt(timeout):
+            self.attempts += 1
+            if self.attempts <= self.failures:
+                raise Exception(self.error)
+            return "ok"
+        return self.retry_policy.call(attempt)
+
+    def generate_json(self, prompt, max_tokens=4000):
+        return {"text": self.generate(prompt)}
+
+
+def test_token_bucket_queues_instead_of_failing():
+    clock = FakeClock()
+    bucket = TokenBucket(per_minute=60, capacity=2, clock=clock)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # Bucket empty: the next two callers wait 1 s and 2 s (1 token/s)
+    assert abs(bucket.reserve() - 1.0) < 1e-9
+    assert abs(bucket.reserve() - 2.0) < 1e-9
+    clock.now = 10
+    assert bucket.reserve() == 0
+
+
+def test_aimd_shrinks_on_overload_and_grows_on_success():
+    clock = FakeClock()
+    limiter = AIMDLimiter(initial=8, min_limit=1, max_limit=10, cooldown=1.0, clock=clock)
+
+    limiter.acquire()
+    limiter.release(overloaded=True)
+    assert limiter.limit == 4
+
+    # A burst of overload signals inside the cooldown counts once
+    limiter.acquire()
+    limiter.release(overloaded=True)
+    assert limiter.limit == 4
+
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release()
+    assert 6 < limiter.limit <= 10
+
+
+def test_limiter_adapts_to_overloaded_provider():
+    provider = OverloadingAdapter(capacity=2)
+    llm = RateLimitedAdapter(provider, limiter=AIMDLimiter(initial=8, cooldown=0.0))
+
+    def call(i):
+        try:
+            return llm.generate(f"p{i}")
+        except Exception:
+            return "failed"
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        first_wave = list(executor.map(call, range(16)))
+    assert "failed" in first_wave
+    assert llm.limiter.limit <= 4
+
+    # With the limit at the provider's capacity, a burst queues instead of failing
+    llm.limiter.limit = llm.limiter.max_limit = 2
+    provider.overloads = 0
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        second_wave = list(executor.map(call, range(16)))
+    assert second_wave.count("ok") == 16
+    assert provider.overloads == 0
+    assert llm.stats()["overloaded"] > 0
+
+
+def test_async_calls_respect_concurrency_limit():
+    provider = OverloadingAdapter(capacity=3)
+    llm = RateLimitedAdapter(provider, limiter=AIMDLimiter(initial=3, max_limit=3))
+
+    async def run():
+        return await asyncio.gather(*(llm.agenerate(f"p{i}") for i in range(12)))
+
+    assert asyncio.run(run()) == ["ok"] * 12
+    assert provider.peak <= 3
+    assert llm.stats()["in_flight"] == 0
+
+
+def test_limiter_sees_throttled_attempts_that_were_retried():
+    limiter = AIMDLimiter(initial=8, cooldown=60.0)
+    policy = RetryPolicy(max_attempts=3, base_delay=0, sleep=lambda seconds: None, on_error=limiter.observe)
+    provider = FlakyAdapter(policy, failures=2)
+    llm = RateLimitedAdapter(provider, limiter=limiter)
+
+    # The call succeeds on its third attempt, but the limiter already backed off on the first 429
+    assert llm.generate("p") == "ok"
+    assert provider.attempts == 3
+    assert limiter.limit < 8 and llm.stats()["overloaded"] == 0
+
+    # Errors that are not overload leave the limit alone
+    limiter = AIMDLimiter(initial=8)
+    policy = RetryPolicy(max_attempts=1, on_error=limiter.observe)
+    llm = RateLimitedAdapter(FlakyAdapter(policy, failures=1, error="400 INVALID_ARGUMENT"), limiter=limiter)
+    try:
+        llm.generate("p")
+        assert False, "should raise"
+    except Exception:
+        pass
+    assert limiter.limit >= 8
+
+
+def test_limited_pool_wires_retry_hook_to_limiter():
+    os.environ["LLM_MOCK_ERROR_RATE"] = "0.5"
+    try:
+        llm = _limited_pool("mock", 2)
+    finally:
+        del os.environ["LLM_MOCK_ERROR_RATE"]
+    assert all(member.retry_policy.on_error == llm.limiter.observe for member in llm.inner.members)
+
+
+def test_async_waiters_are_woken_by_release():
+    limiter = AIMDLimiter(initial=1, max_limit=1)
+    order = []
+
+    async def worker(i):
+        await limiter.aacquire()
+        order.append((i, time.monotonic()))
+        await asyncio.sleep(0.01)
+        limiter.release()
+
+    async def run():
+        limiter.acquire()  # held by a thread
+        workers = [asyncio.create_task(worker(i)) for i in range(3)]
+        abandoned = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0.05)
+        assert order == [] and len(limiter._waiters) == 4
+        abandoned.cancel()
+
+        released = time.monotonic()
+        threading.Thread(target=limiter.release).start()
+        await asyncio.gather(*workers)
+        return released
+
+    released = asyncio.run(run())
+    # Woken in arrival order as soon as a slot is free, not on a polling tick
+    assert [i for i, _ in order] == [0, 1, 2]
+    assert order[0][1] - released < 0.05
+    assert limiter.in_flight == 0 and not limiter._waiters
+
+
+def test_cancelled_waiter_returns_a_granted_slot():
+    limiter = AIMDLimiter(initial=1, max_limit=1)
+
+    async def run():
+        limiter.acquire()
+        waiter = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        limiter.release()  # hands the slot to the waiter
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert limiter.in_flight == 0
+    limiter.acquire()  # the slot is free again, not leaked
+    limiter.release()
+
+
+def test_requests_per_minute_budget_delays_calls():
+    provider = OverloadingAdapter(capacity=100, latency=0)
+    llm = RateLimitedAdapter(provider, requests_per_minute=600)
+    llm.requests.tokens = 0
+
+    start = time.monotonic()
+    llm.generate("a")
+    llm.generate("b")
+    elapsed = time.monotonic() - start
+    # 600 RPM = one call per 0.1 s once the bucket is drained
+    assert elapsed >= 0.15
+    assert llm.stats()["queued"] == 2
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ RATE LIMITER TESTS PASSED")
@@ -0,0 +1,201 @@
+"""
+Test retry policy, error classification and circuit breaker (offline)
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.retry import (
+    RetryPolicy, CircuitBreaker, classify_error,
+    RateLimitError, ServiceUnavailableError, InvalidRequestError,
+    LLMTimeoutError, CircuitOpenError, DeadlineExceededError
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class APIError(Exception):
+    """Shape of google.genai.errors.APIError"""
+
+    def __init__(self, code, message, details=None):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.details = details
+
+
+def _policy(clock, **kwargs):
+    kwargs.setdefault("rng", lambda: 1.0)
+    return RetryPolicy(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def _flaky(failures):
+    """Callable failing with the given exceptions before succeeding"""
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return "ok"
+    return fn, calls
+
+
+def test_classification_uses_status_codes_and_messages():
+    assert isinstance(classify_error(APIError(429, "RESOURCE_EXHAUSTED")), RateLimitError)
+    assert isinstance(classify_error(APIError(503, "UNAVAILABLE")), ServiceUnavailableError)
+    assert isinstance(classify_error(APIError(400, "INVALID_ARGUMENT")), InvalidRequestError)
+    assert isinstance(classify_error(Exception("The model is overloaded")), ServiceUnavailableError)
+    assert isinstance(classify_error(asyncio.TimeoutError()), LLMTimeoutError)
+
+
+def test_retry_hint_is_honoured():
+    details = {"error": {"details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "7s"}]}}
+    error = classify_error(APIError(429, "quota", details))
+    assert error.retry_after == 7.0
+
+    clock = FakeClock()
+    fn, calls = _flaky([APIError(429, "quota", details)])
+    assert _policy(clock).call(fn) == "ok"
+    assert clock.now == 7.0
+
+
+def test_full_jitter_exponential_backoff():
+    clock = FakeClock()
+    policy = _policy(clock, base_delay=1.0, max_delay=5.0, rng=lambda: 0.5)
+    error = ServiceUnavailableError("503")
+    assert [policy.backoff(n, error) for n in range(5)] == [0.5, 1.0, 2.0, 2.5, 2.5]
+
+
+def test_non_retriable_errors_raise_immediately():
+    clock = FakeClock()
+    fn, calls = _flaky([APIError(400, "bad request")])
+    try:
+        _policy(clock).call(fn)
+        assert False, "should raise"
+    except InvalidRequestError as e:
+        assert e.status == 400
+        assert isinstance(e.__cause__, APIError)
+    assert len(calls) == 1
+
+
+def test_deadline_bounds_total_time():
+    clock = FakeClock()
+    failures = [APIError(503, "down")] * 10
+    fn, calls = _flaky(failures)
+    policy = _policy(clock, max_attempts=10, base_delay=4.0, max_delay=4.0, attempt_timeout=30, deadline=10)
+    try:
+        policy.call(fn)
+        assert False, "should raise"
+    except (ServiceUnavailableError, DeadlineExceededError):
+        pass
+    assert clock.now < 10
+    # Per-attempt timeout is clipped to the remaining deadline
+    assert calls[0] == 10 and calls[1] < 10
+
+
+def test_breaker_opens_fails_fast_and_probes_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30, clock=clock)
+    policy = _policy(clock, max_attempts=1)
+    down, calls = _flaky([APIError(503, "down")] * 3)
+
+    for _ in range(2):
+        try:
+            policy.call(down, breaker)
+        except ServiceUnavailableError:
+            pass
+    assert breaker.state == CircuitBreaker.OPEN
+
+    try:
+        policy.call(down, breaker)
+        assert False, "should fail fast"
+    except CircuitOpenError:
+        pass
+    assert len(calls) == 2
+
+    clock.now += 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    healthy, _ = _flaky([])
+    assert policy.call(healthy, breaker) == "ok"
+    assert breaker.snapshot()["state"] == CircuitBreaker.CLOSED
+
+
+def _half_open_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure(ServiceUnavailableError("down"))
+    clock.now += 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+def test_cancelled_probe_lets_the_next_call_through():
+    clock = FakeClock()
+    breaker = _half_open_breaker(clock)
+    policy = RetryPolicy(max_attempts=1, clock=clock)
+
+    async def hang(timeout):
+        await asyncio.sleep(10)
+
+    async def healthy(timeout):
+        return "ok"
+
+    async def run():
+        probe = asyncio.ensure_future(policy.acall(hang, breaker))
+        await asyncio.sleep(0.01)
+        probe.cancel()  # e.g. a hedge loser or a disconnected SSE client
+        try:
+            await probe
+        except asyncio.CancelledError:
+            pass
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        return await policy.acall(healthy, breaker)
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stale_probe_expires():
+    clock = FakeClock()
+    breaker = _half_open_breaker(clock)
+    assert breaker.before_call()  # a probe that never reports back
+    try:
+        breaker.before_call()
+        assert False, "only one probe at a time"
+    except CircuitOpenError:
+        pass
+    clock.now += 30
+    assert breaker.before_call()
+    # Calls while closed are not probes
+    breaker.record_success()
+    assert breaker.before_call() is False
+
+
+def test_async_attempt_timeout():
+    async def slow(timeout):
+        await asyncio.sleep(1)
+        return "late"
+
+    policy = RetryPolicy(max_attempts=2, base_delay=0, attempt_timeout=0.05, deadline=None)
+    try:
+        asyncio.run(policy.acall(slow))
+        assert False, "should time out"
+    except LLMTimeoutError:
+        pass
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ RETRY TESTS PASSED")
@@ -0,0 +1,147 @@
+"""
+Test targeted section revision (offline)
+"""
+import sys
+import os
+import copy
+import time
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import MockAdapter
+from aro.mock_responses import MOCK_RESUME, mock_section_revision
+from aro.retry import SchemaValidationError
+from aro.routing import StageRoute
+from src.revision_planner import SectionReviser, plan_revisions
+from src.section_generator import SECTIONS, analyze_jd
+from src.providers import UserProvider
+
+
+PROFILE = UserProvider.get("chandan")
+JD = "Backend engineer: Python and Go services on AWS with Kubernetes, PostgreSQL and Redis."
+ROUTE = StageRoute("reviser_section_test", max_tokens=3000)
+NEW_BULLET = "Cut **AWS** costs by **30%** by moving batch jobs to **Spot** instances with checkpointed **Python** workers and retries"
+
+
+def evaluation(experience=23, skills=19, projects=14, presentation=5, notes=None):
+    return {
+        "total_score": 80,
+        "section_scores": {"experience": experience, "skills": skills, "projects": projects, "presentation": presentation},
+        "feedback": "Tie more bullets to the JD.",
+        "section_feedback": {
+            "experience": "Add AWS cost impact.", "skills": "Fine.", "projects": "Fine.", "presentation": "Fine.",
+            **(notes or {})
+        },
+    }
+
+
+def factuality(**failing):
+    result = {"is_factual": not failing, "factuality_score": 80, "issues": []}
+    for check in ("summary_check", "experience_check", "projects_check", "skills_check"):
+        result[check] = {"is_accurate": check not in failing, "issues": failing.get(check, [])}
+    return result
+
+
+class SectionLLM(MockAdapter):
+    """Rewrites the first LSEG bullet, echoes every other section, and records the sections asked for"""
+
+    def __init__(self, delay=0.0, invalid=()):
+        super().__init__()
+        self.delay = delay
+        self.invalid = invalid
+        self.sections = []
+
+    def _answer(self, prompt):
+        section = mock_section_revision(prompt)
+        name = prompt.split("\nSECTION: ", 1)[1].split("\n", 1)[0]
+        self.sections.append(name)
+        if name in self.invalid:
+            raise SchemaValidationError("Response does not match JobSection")
+        if name == "lseg":
+            section["job"]["bullets"][0] = NEW_BULLET
+        return section
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        time.sleep(self.delay)
+        return self._answer(prompt)
+
+    async def agenerate_json(self, prompt, max_tokens=4000, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self._answer(prompt)
+
+
+def test_plan_picks_failing_sections():
+    assert plan_revisions(MOCK_RESUME, evaluation()) == []
+    plan = plan_revisions(MOCK_RESUME, evaluation(experience=15, projects=9))
+    assert [revision.section for revision in plan] == ["lseg", "infosys", "projects"]
+    assert plan[0].feedback == ["experience (15/25): Add AWS cost impact.", "overall: Tie more bullets to the JD."]
+    # Presentation has no section of its own; its feedback goes to the sections being revised
+    assert plan_revisions(MOCK_RESUME, evaluation(presentation=2)) == []
+    plan = plan_revisions(MOCK_RESUME, evaluation(skills=10, presentation=2, notes={"presentation": "Bold metrics."}))
+    assert [revision.section for revision in plan] == ["skills"]
+    assert "presentation (2/5): Bold metrics." in plan[0].feedback
+
+
+def test_plan_targets_the_job_the_feedback_names():
+    plan = plan_revisions(MOCK_RESUME, evaluation(experience=15, notes={"experience": "The LSEG bullets lack metrics."}))
+    assert [revision.section for revision in plan] == ["lseg"]
+    plan = plan_revisions(MOCK_RESUME, fact_result=factuality(
+        experience_check=["Infosys bullet claims Kafka, not in profile"],
+        summary_check=["4+ years overstates experience"],
+    ))
+    assert [revision.section for revision in plan] == ["summary", "infosys"]
+    assert plan[0].feedback == ["inaccurate: 4+ years overstates experience"]
+    assert plan_revisions(MOCK_RESUME, fact_result=factuality()) == []
+    # Resumes without one entry per job are revised whole
+    resume = copy.deepcopy(MOCK_RESUME)
+    resume["experience"] = resume["experience"][:1]
+    assert plan_revisions(resume, evaluation(experience=5)) == []
+
+
+def test_only_planned_sections_are_sent_and_the_rest_stay_frozen():
+    llm = SectionLLM()
+    plan = plan_revisions(MOCK_RESUME, evaluation(experience=15, notes={"experience": "LSEG bullets need AWS cost impact."}))
+    reviser = SectionReviser(llm, ROUTE)
+    revised = reviser.revise(MOCK_RESUME, plan, JD, PROFILE)
+    assert llm.sections == ["lseg"]
+    expected = copy.deepcopy(MOCK_RESUME)
+    expected["experience"][0]["bullets"][0] = NEW_BULLET
+    assert revised == expected
+    assert list(revised) == ["header", "summary", "skills", "experience", "projects"]
+
+    prompt = reviser._build_prompt(
+        SECTIONS[2], {"job": MOCK_RESUME["experience"][0]}, plan[0], analyze_jd(JD, PROFILE, "", ""), "evaluation"
+    )
+    assert "- experience (15/25): LSEG bullets need AWS cost impact." in prompt
+    assert MOCK_RESUME["projects"][0]["bullet1"] not in prompt  # frozen sections are not sent
+
+
+def test_sections_revise_concurrently():
+    plan = plan_revisions(MOCK_RESUME, evaluation(experience=10, skills=10, projects=5))
+    assert len(plan) == 4
+    start = time.monotonic()
+    SectionReviser(SectionLLM(delay=0.2), ROUTE).revise(MOCK_RESUME, plan, JD, PROFILE)
+    assert time.monotonic() - start < 0.6
+    start = time.monotonic()
+    revised = asyncio.run(SectionReviser(SectionLLM(delay=0.2), ROUTE).arevise(MOCK_RESUME, plan, JD, PROFILE))
+    assert time.monotonic() - start < 0.6
+    assert revised["experience"][0]["bullets"][0] == NEW_BULLET
+
+
+def test_rejected_section_keeps_current_text():
+    plan = plan_revisions(MOCK_RESUME, evaluation(experience=10, projects=5))
+    for run in (
+        lambda reviser: reviser.revise(MOCK_RESUME, plan, JD, PROFILE),
+        lambda reviser: asyncio.run(reviser.arevise(MOCK_RESUME, plan, JD, PROFILE)),
+    ):
+        llm = SectionLLM(invalid=("lseg",))
+        assert run(SectionReviser(llm, ROUTE)) == MOCK_RESUME
+        assert sorted(llm.sections) == ["infosys", "lseg", "projects"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ REVISION PLANNER TESTS PASSED")
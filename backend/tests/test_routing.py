@@ -0,0 +1,101 @@
+"""
+Test per-stage model routing (offline)
+"""
+import sys
+import os
+import json
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter
+from aro.mock_responses import mock_response
+from aro.routing import StageRoute, StageRouter, stage_stats, estimate_cost
+from src.evaluator import Evaluator
+
+
+class RecordingAdapter(LLMAdapter):
+    """Fake client that records per-call options and can fail for one model"""
+
+    model = "gemini-2.5-flash"
+
+    def __init__(self, failing_model=None):
+        self.calls = []
+        self.failing_model = failing_model
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7, **kwargs):
+        return "ok"
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        self.calls.append(dict(kwargs, max_tokens=max_tokens))
+        if kwargs.get("model", self.model) == self.failing_model:
+            raise RuntimeError("model unavailable")
+        return mock_response(prompt) or {"model": kwargs.get("model", self.model)}
+
+    async def agenerate_json_stream(self, prompt, max_tokens=4000, **kwargs):
+        self.calls.append(dict(kwargs, max_tokens=max_tokens))
+        if kwargs.get("model", self.model) == self.failing_model:
+            raise RuntimeError("model unavailable")
+        yield json.dumps({"model": kwargs.get("model", self.model)})
+
+
+def test_default_route_keeps_adapter_defaults():
+    llm = RecordingAdapter()
+    route = StageRouter().route("evaluator")
+    assert route.generate_json(llm, "p") == {"model": "gemini-2.5-flash"}
+    assert llm.calls == [{"max_tokens": 6000}]
+
+
+def test_route_overrides_model_and_temperature():
+    llm = RecordingAdapter()
+    router = StageRouter({"reviser": {"model": "gemini-2.5-flash-lite", "temperature": 0.3}})
+    router.route("reviser").generate_json(llm, "p")
+    assert llm.calls == [{"model": "gemini-2.5-flash-lite", "temperature": 0.3, "max_tokens": 10000}]
+
+
+def test_fallback_model_used_on_failure():
+    stage_stats.reset()
+    llm = RecordingAdapter(failing_model="gemini-2.5-flash-lite")
+    route = StageRoute("factuality", model="gemini-2.5-flash-lite", fallback_model="gemini-2.5-flash")
+    assert asyncio.run(route.agenerate_json(llm, "p")) == {"model": "gemini-2.5-flash"}
+
+    stats = stage_stats.snapshot()["factuality"]
+    assert stats["calls"] == 2 and stats["failures"] == 1 and stats["fallbacks"] == 1
+    assert stats["models"] == {"gemini-2.5-flash-lite": 1, "gemini-2.5-flash": 1}
+
+
+def test_stream_falls_back_before_first_delta():
+    llm = RecordingAdapter(failing_model="gemini-2.5-pro")
+    route = StageRoute("generator", model="gemini-2.5-pro", fallback_model="gemini-2.5-flash")
+
+    async def collect():
+        return [delta async for delta in route.agenerate_json_stream(llm, "p")]
+
+    assert json.loads("".join(asyncio.run(collect()))) == {"model": "gemini-2.5-flash"}
+
+
+def test_agent_uses_injected_route():
+    stage_stats.reset()
+    llm = RecordingAdapter()
+    evaluator = Evaluator(llm, route=StageRoute("evaluator", model="gemini-2.5-flash-lite", max_tokens=2000))
+    evaluator._llm_evaluate({"summary": "x"}, "Python developer")
+    assert llm.calls[0]["model"] == "gemini-2.5-flash-lite"
+    assert llm.calls[0]["max_tokens"] == 2000
+    assert stage_stats.snapshot()["evaluator"]["cost_usd"] > 0
+
+
+def test_router_from_env_and_cost():
+    os.environ["LLM_ROUTES"] = '{"evaluator": {"max_tokens": 3000}}'
+    try:
+        assert StageRouter.from_env().route("evaluator").max_tokens == 3000
+    finally:
+        del os.environ["LLM_ROUTES"]
+    assert estimate_cost("gemini-2.5-flash", 1_000_000, 0) == 0.30
+    assert estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ ROUTING TESTS PASSED")
@@ -0,0 +1,118 @@
+"""
+Test schema-constrained structured output (offline)
+"""
+import sys
+import os
+import copy
+import json
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google import genai
+from google.genai import _transformers
+
+from aro.llm_adapter import LLMAdapter, GeminiAdapter, validate_json
+from aro.llm_cache import request_key
+from aro.mock_responses import MOCK_RESUME, mock_response
+from aro.retry import RetryPolicy, CircuitBreaker, SchemaValidationError
+from aro.routing import StageRoute
+from src.schemas import Resume, EvaluationResult, FactualityResult
+from src.evaluator import Evaluator
+
+
+class SequenceAdapter(LLMAdapter):
+    """Fake client returning queued answers and recording options"""
+
+    model = "gemini-2.5-flash"
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7, **kwargs):
+        return "ok"
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        self.calls.append(kwargs)
+        return self.answers.pop(0)
+
+
+def test_schemas_are_accepted_by_the_gemini_api():
+    client = genai.Client(api_key="test-key")
+    for schema in (Resume, EvaluationResult, FactualityResult):
+        converted = _transformers.t_schema(client._api_client, schema)
+        assert converted.additional_properties is None
+
+
+def test_gemini_sends_schema_and_json_mime_type():
+    configs = []
+
+    def generate_content(model, contents, config):
+        configs.append(config)
+        return SimpleNamespace(text=json.dumps(MOCK_RESUME))
+
+    llm = GeminiAdapter(
+        api_key="test-key",
+        retry_policy=RetryPolicy(max_attempts=1, attempt_timeout=None, deadline=None),
+        breaker=CircuitBreaker("schema-test")
+    )
+    llm.client = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+
+    assert llm.generate_json("resume please", response_schema=Resume) == MOCK_RESUME
+    assert configs[0].response_mime_type == "application/json"
+    assert configs[0].response_schema is Resume
+
+    llm.generate_json("no schema")
+    assert configs[1].response_mime_type is None and configs[1].response_schema is None
+
+
+def test_validate_json_coerces_and_rejects():
+    evaluation = mock_response("You are an expert resume evaluator.")
+    evaluation["score"] = "55"
+    assert validate_json(evaluation, EvaluationResult)["score"] == 55.0
+
+    evaluation["score"] = 80
+    try:
+        validate_json(evaluation, EvaluationResult)
+        assert False, "expected a schema error"
+    except SchemaValidationError as e:
+        assert "score" in str(e)
+
+    # Optional fields the model left out are not filled in
+    resume = copy.deepcopy(MOCK_RESUME)
+    del resume["header"]
+    assert "header" not in validate_json(resume, Resume)
+
+
+def test_route_passes_schema_and_falls_back_on_invalid_output():
+    evaluation = mock_response("You are an expert resume evaluator.")
+    llm = SequenceAdapter(dict(evaluation, score=80), evaluation)
+    route = StageRoute("evaluator", fallback_model="gemini-2.5-pro")
+
+    assert route.generate_json(llm, "evaluate", schema=EvaluationResult) == evaluation
+    assert llm.calls[0]["response_schema"] is EvaluationResult
+    assert llm.calls[1]["model"] == "gemini-2.5-pro"
+
+
+def test_agent_validates_its_stage_output():
+    evaluator = Evaluator(SequenceAdapter({"score": 50, "feedback": "x"}))
+    try:
+        evaluator.evaluate({"summary": "x"}, "Python developer")
+        assert False, "expected a schema error"
+    except SchemaValidationError:
+        pass
+
+
+def test_schema_is_part_of_the_cache_key():
+    plain = request_key("json", "m", "p", 0, 100)
+    with_schema = request_key("json", "m", "p", 0, 100, response_schema=Resume)
+    assert plain != with_schema
+    assert with_schema == request_key("json", "m", "p", 0, 100, response_schema=Resume)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ SCHEMA TESTS PASSED")
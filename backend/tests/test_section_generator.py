@@ -0,0 +1,150 @@
+"""
+Test section-parallel resume generation (offline)
+"""
+import sys
+import os
+import copy
+import time
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import MockAdapter
+from aro.mock_responses import MOCK_RESUME, mock_section
+from aro.retry import ServiceUnavailableError
+from aro.routing import StageRoute
+from src.generator import Generator
+from src.section_generator import (
+    SectionGenerator, SECTIONS, JDAnalysis, analyze_jd, check_consistency, jd_technologies
+)
+from src.providers import UserProvider
+
+
+PROFILE = UserProvider.get("chandan")
+JD = "Backend engineer: Python and Go services on AWS with Kubernetes, PostgreSQL and Redis."
+ROUTE = StageRoute("generator_section_test", max_tokens=3000)
+
+
+class SlowSections(MockAdapter):
+    """Answers each section after a per-section delay, recording prompts and prefixes"""
+
+    def __init__(self, delays=None, fail=None):
+        super().__init__()
+        self.delays = delays or {}
+        self.fail = fail
+        self.calls = []
+
+    def _section(self, prompt):
+        return next(spec.name for spec in SECTIONS if f"SECTION: {spec.name}\n" in prompt)
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        name = self._section(prompt)
+        self.calls.append((name, kwargs.get("prefix")))
+        time.sleep(self.delays.get(name, 0.2))
+        if name == self.fail:
+            raise ServiceUnavailableError("down", 503)
+        return mock_section(prompt)
+
+    async def agenerate_json(self, prompt, max_tokens=4000, **kwargs):
+        name = self._section(prompt)
+        self.calls.append((name, kwargs.get("prefix")))
+        await asyncio.sleep(self.delays.get(name, 0.2))
+        if name == self.fail:
+            raise ServiceUnavailableError("down", 503)
+        return mock_section(prompt)
+
+
+def clean_analysis():
+    return JDAnalysis(
+        company="Acme", role="Engineer", jd_text=JD, technologies=jd_technologies(JD),
+        projects=[], profile_projects=[project["title"] for project in MOCK_RESUME["projects"]]
+    )
+
+
+def test_sections_run_concurrently():
+    llm = SlowSections()
+    start = time.monotonic()
+    resume = SectionGenerator(llm, ROUTE).generate(JD, PROFILE, "Acme", "Engineer")
+    assert time.monotonic() - start < 0.6  # five 0.2s calls, not 1.0s
+    assert resume == MOCK_RESUME
+
+    start = time.monotonic()
+    resume = asyncio.run(SectionGenerator(llm, ROUTE).agenerate(JD, PROFILE, "Acme", "Engineer"))
+    assert time.monotonic() - start < 0.6 and resume == MOCK_RESUME
+
+
+def test_all_sections_share_one_analysis_and_prefix():
+    llm = SlowSections(delays={name: 0 for name in ("summary", "skills", "lseg", "infosys", "projects")})
+    generator = SectionGenerator(llm, ROUTE)
+    generator.generate(JD, PROFILE, "Acme", "Engineer")
+    assert sorted(name for name, _ in llm.calls) == ["infosys", "lseg", "projects", "skills", "summary"]
+    assert len({prefix for _, prefix in llm.calls}) == 1
+    assert "Orion Platform" in llm.calls[0][1] and "Bingo Game" not in llm.calls[0][1]
+
+    analysis = analyze_jd(JD, PROFILE, "Acme", "Engineer")
+    assert analysis.technologies == ["Python", "Go", "AWS", "Kubernetes", "PostgreSQL", "Redis"]
+    prompt = generator._render_prompt(SECTIONS[0], analysis, JD)
+    assert "Must-have technologies: Python, Go, AWS, Kubernetes, PostgreSQL, Redis" in prompt
+    assert f"Most relevant projects, best first: {analysis.projects[0]}" in prompt
+
+
+def test_stream_yields_sections_as_they_finish_in_resume_order():
+    llm = SlowSections(delays={"summary": 0.3, "skills": 0.0, "lseg": 0.2, "infosys": 0.05, "projects": 0.1})
+
+    async def run():
+        return [event async for event in SectionGenerator(llm, ROUTE).agenerate_stream(JD, PROFILE, "Acme", "Engineer")]
+
+    events = asyncio.run(run())
+    assert [event.get("key") for event in events] == ["skills", "projects", "experience", "header", "summary", None]
+    done = events[-1]
+    assert done["type"] == "done" and list(done["resume"]) == ["header", "summary", "skills", "experience", "projects"]
+    assert [job["company"] for job in done["resume"]["experience"]] == ["London Stock Exchange Group (LSEG)", "Infosys"]
+    assert all(event["warnings"] == [] for event in events[:-1])
+
+
+def test_section_failure_fails_generation():
+    llm = SlowSections(delays={"lseg": 0.0}, fail="lseg")
+    for run in (
+        lambda: SectionGenerator(llm, ROUTE).generate(JD, PROFILE, "Acme", "Engineer"),
+        lambda: asyncio.run(SectionGenerator(llm, ROUTE).agenerate(JD, PROFILE, "Acme", "Engineer")),
+    ):
+        try:
+            run()
+            assert False, "should raise"
+        except ServiceUnavailableError:
+            pass
+
+
+def test_consistency_checks():
+    analysis = clean_analysis()
+    assert check_consistency(MOCK_RESUME, analysis) == []
+
+    resume = copy.deepcopy(MOCK_RESUME)
+    resume["skills"][0]["items"] = resume["skills"][0]["items"].replace("Go, ", "")
+    resume["experience"][1]["bullets"][0] = resume["experience"][0]["bullets"][0]
+    resume["projects"][2] = dict(resume["projects"][0])
+    resume["projects"][1]["title"] = "Invented Project"
+    warnings = check_consistency(resume, analysis)
+    assert "Go is used in the resume but missing from skills" in warnings
+    assert any(warning.startswith("Bullets repeat the same point") for warning in warnings)
+    assert "Project 'Multi-Agent Resume Optimizer' is listed twice" in warnings
+    assert "Project 'Invented Project' is not in the profile" in warnings
+
+
+def test_generator_mode_switch():
+    os.environ["GENERATOR_MODE"] = "sections"
+    try:
+        generator = Generator(MockAdapter())
+    finally:
+        del os.environ["GENERATOR_MODE"]
+    assert isinstance(generator.sections, SectionGenerator)
+    resume = generator.generate(JD, PROFILE, "Acme", "Engineer")
+    assert resume == MOCK_RESUME and generator.last_warnings  # mock projects are not in the real profile
+    assert Generator(MockAdapter()).sections is None
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ SECTION GENERATOR TESTS PASSED")
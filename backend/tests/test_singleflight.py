@@ -0,0 +1,161 @@
+"""
+Test single-flight coalescing of identical in-flight LLM calls (offline)
+"""
+import sys
+import os
+import time
+import asyncio
+import threading
+import gc
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import LLMAdapter
+from aro.singleflight import CoalescingAdapter
+
+
+class CountingAdapter(LLMAdapter):
+    """Slow fake client that counts upstream calls"""
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, max_tokens=4000, temperature=0.7):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.1)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"answer:{prompt}"
+
+    def generate_json(self, prompt, max_tokens=4000, **kwargs):
+        return {"answer": self.generate(prompt)}
+
+    async def agenerate(self, prompt, max_tokens=4000, temperature=0.7):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"answer:{prompt}"
+
+    async def agenerate_json(self, prompt, max_tokens=4000, **kwargs):
+        return {"answer": await self.agenerate(prompt)}
+
+
+def test_sync_calls_share_one_upstream_call():
+    inner = CountingAdapter()
+    llm = CoalescingAdapter(inner)
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(lambda _: llm.generate_json("same"), range(5)))
+
+    assert inner.calls == 1
+    assert all(r == {"answer": "answer:same"} for r in results)
+    # Waiters get their own copy
+    results[1]["answer"] = "changed"
+    assert results[2]["answer"] == "answer:same"
+    stats = llm.stats()
+    assert stats["calls"] == 5 and stats["coalesced"] == 4 and stats["in_flight"] == 0
+
+
+def test_sync_error_fans_out():
+    inner = CountingAdapter(fail=True)
+    llm = CoalescingAdapter(inner)
+
+    def call(_):
+        try:
+            llm.generate("same", temperature=0)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        errors = list(executor.map(call, range(3)))
+    assert errors == ["upstream down"] * 3
+    assert inner.calls == 1
+
+
+def test_different_prompts_not_coalesced():
+    inner = CountingAdapter()
+    llm = CoalescingAdapter(inner)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda i: llm.generate(f"p{i}"), range(3)))
+    assert inner.calls == 3
+    assert llm.stats()["coalesced"] == 0
+
+
+def test_sampled_calls_are_not_coalesced():
+    inner = CountingAdapter()
+    llm = CoalescingAdapter(inner)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda _: llm.generate("same", temperature=0.7), range(3)))
+    assert inner.calls == 3
+
+    async def run():
+        await asyncio.gather(*[llm.agenerate("same", temperature=0.7) for _ in range(2)])
+        await asyncio.gather(*[llm.agenerate_json("same", temperature=0.7) for _ in range(2)])
+
+    asyncio.run(run())
+    assert inner.calls == 7
+    assert llm.stats()["coalesced"] == 0
+
+
+def test_async_calls_share_one_upstream_call():
+    inner = CountingAdapter()
+    llm = CoalescingAdapter(inner)
+
+    async def run():
+        return await asyncio.gather(*[llm.agenerate("same", temperature=0) for _ in range(4)])
+
+    assert asyncio.run(run()) == ["answer:same"] * 4
+    assert inner.calls == 1
+    assert llm.stats()["coalesced"] == 3
+
+
+def test_async_error_fans_out_and_survives_leader_cancel():
+    inner = CountingAdapter(fail=True)
+    llm = CoalescingAdapter(inner)
+
+    async def run():
+        tasks = [asyncio.create_task(llm.agenerate_json("same")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        tasks[0].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert all(isinstance(r, RuntimeError) for r in results[1:])
+    assert inner.calls == 1
+
+    # Nothing is left registered, so the next call goes upstream again
+    inner.fail = False
+    assert asyncio.run(llm.agenerate_json("same")) == {"answer": "answer:same"}
+    assert inner.calls == 2
+
+
+def test_error_is_retrieved_when_every_waiter_is_cancelled():
+    inner = CountingAdapter(fail=True)
+    llm = CoalescingAdapter(inner)
+    unhandled = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        tasks = [asyncio.create_task(llm.agenerate_json("same")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0.15)  # the upstream call fails with nobody waiting
+        gc.collect()
+
+    asyncio.run(run())
+    assert inner.calls == 1
+    assert unhandled == []
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ SINGLE-FLIGHT TESTS PASSED")
@@ -0,0 +1,88 @@
+"""
+Test the order of streaming pipeline events with the MockAdapter (offline)
+"""
+import sys
+import os
+import json
+import asyncio
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import MockAdapter
+from src.generator import RESUME_SECTIONS
+from src.streaming_pipeline import aoptimize_resume_stream, optimize_resume_stream
+
+
+JD = "Backend engineer with Python, AWS, Docker and PostgreSQL experience."
+JOBS = Path(__file__).parent.parent / "database" / "jobs"
+
+
+def run_pipeline():
+    async def collect():
+        return [
+            update async for update in aoptimize_resume_stream(
+                "chandan", JD, "Stream Test", "Backend Engineer", llm=MockAdapter(), flush_delay=0
+            )
+        ]
+
+    return remove_outputs(asyncio.run(collect()))
+
+
+def remove_outputs(events):
+    # The run saves its job, resume and DOCX like a real one; remove them
+    paths = events[-1].get("data", {}).get("paths", {})
+    for path in (JOBS / f"{paths.get('job_id')}.json", paths.get("json_path"), paths.get("docx_path")):
+        if path:
+            Path(path).unlink(missing_ok=True)
+    return events
+
+
+def test_tokens_then_sections_then_result():
+    events = run_pipeline()
+    stages = [event["stage"] for event in events]
+    assert "error" not in stages, events[-1]
+
+    tokens = [i for i, stage in enumerate(stages) if stage == "generating_tokens"]
+    sections = [i for i, stage in enumerate(stages) if stage == "generating_section"]
+    generated = stages.index("generated")
+    # Tokens start streaming before the first section completes, every section
+    # arrives before generation ends, and the final result comes last
+    assert tokens and sections
+    assert tokens[0] < sections[0] and max(tokens + sections) < generated
+    assert stages[:2] == ["setup", "generating"]
+    assert stages[-3:] == ["saving", "rendering", "complete"]
+
+    section_events = [events[i] for i in sections]
+    assert [event["section"] for event in section_events] == list(RESUME_SECTIONS)
+    streamed = json.loads("".join(events[i]["delta"] for i in tokens))
+    assert {event["section"]: event["content"] for event in section_events} == {
+        key: streamed[key] for key in RESUME_SECTIONS
+    }
+
+    assert events[-1]["progress"] == 100
+    assert set(events[-1]["data"]["resume"]) >= set(RESUME_SECTIONS)
+
+
+def test_sync_wrapper_closes_adapter_before_its_loop():
+    class ClosingAdapter(MockAdapter):
+        closed_on = None
+
+        async def aclose(self):
+            loop = asyncio.get_running_loop()
+            assert not loop.is_closed()
+            self.closed_on = loop
+
+    llm = ClosingAdapter()
+    events = remove_outputs(list(optimize_resume_stream(
+        "chandan", JD, "Stream Test", "Backend Engineer", llm=llm, flush_delay=0
+    )))
+    assert events[-1]["stage"] == "complete", events[-1]
+    assert llm.closed_on is not None and llm.closed_on.is_closed()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ STREAMING PIPELINE TESTS PASSED")
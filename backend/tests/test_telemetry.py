@@ -0,0 +1,111 @@
+"""
+Test per-call LLM telemetry records and histograms (offline)
+"""
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import MockAdapter, GeminiAdapter, RateLimitedAdapter, TokenBucket
+from aro.llm_cache import LLMCache, CachedAdapter
+from aro.retry import RetryPolicy, CircuitBreaker
+from aro.routing import StageRoute
+from aro.telemetry import Histogram, Telemetry, get_telemetry, track, current_call
+
+
+EVALUATOR_PROMPT = "You are an expert resume evaluator. Score this resume."
+
+
+def last_record():
+    return get_telemetry().recent(1)[0]
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((1, 2, 5))
+    for value in (0.5, 1.5, 1.8, 4, 9):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"1": 1, "2": 3, "5": 4, "+Inf": 5}
+    assert snapshot["p50"] == 2 and snapshot["p99"] == 9
+    assert Histogram((1,)).quantile(0.5) is None
+
+
+def test_routed_call_records_tokens_attempts_and_upstream_time():
+    get_telemetry().reset()
+    StageRoute("evaluator").generate_json(MockAdapter(latency_p50=0.02, latency_p99=0.05, seed=1), EVALUATOR_PROMPT)
+
+    record = last_record()
+    assert record["stage"] == "evaluator" and record["model"] == "MockAdapter" and record["ok"]
+    assert record["attempts"] == 1 and record["prompt_tokens"] > 0 and record["output_tokens"] > 0
+    assert 0 < record["upstream_seconds"] <= record["total_seconds"]
+    assert record["cache"] is None
+
+    stage = get_telemetry().snapshot()["evaluator"]
+    assert stage["calls"] == 1 and stage["histograms"]["attempts"]["count"] == 1
+
+
+def test_retries_counted_as_attempts():
+    get_telemetry().reset()
+    policy = RetryPolicy(max_attempts=10, base_delay=0.001, attempt_timeout=None, deadline=None)
+    llm = MockAdapter(error_rate=0.5, seed=4, retry_policy=policy, breaker=CircuitBreaker("telemetry-test", failure_threshold=100))
+    asyncio.run(StageRoute("evaluator").agenerate_json(llm, EVALUATOR_PROMPT))
+    assert last_record()["attempts"] == llm.stats()["calls"] > 1
+
+
+def test_cache_hits_and_queue_time():
+    get_telemetry().reset()
+    limited = RateLimitedAdapter(MockAdapter(), requests_per_minute=600)
+    limited.requests = TokenBucket(600, capacity=1)  # second call waits ~0.1s
+    llm = CachedAdapter(limited, LLMCache(use_disk=False))
+    route = StageRoute("evaluator")
+
+    route.generate_json(llm, EVALUATOR_PROMPT)
+    route.generate_json(llm, EVALUATOR_PROMPT)
+    route.generate_json(llm, EVALUATOR_PROMPT + " Again.")
+
+    newest, hit, miss = get_telemetry().recent(3)
+    assert miss["cache"] == "miss" and hit["cache"] == "hit" and hit["attempts"] == 0
+    assert newest["queue_seconds"] > 0.05
+    stage = get_telemetry().snapshot()["evaluator"]
+    assert stage["cache_hits"] == 1 and stage["cache_hit_rate"] == round(1 / 3, 4)
+    # The hit never reached the provider, so it adds no attempts observation
+    assert stage["histograms"]["attempts"]["count"] == 2
+
+
+def test_gemini_usage_metadata_recorded():
+    usage = SimpleNamespace(prompt_token_count=1200, candidates_token_count=300, cached_content_token_count=800)
+
+    def generate_content(model, contents, config):
+        return SimpleNamespace(text='{"score": 1}', usage_metadata=usage)
+
+    os.environ.setdefault("GEMINI_API_KEY", "test-key")
+    llm = GeminiAdapter(retry_policy=RetryPolicy(max_attempts=1, attempt_timeout=None, deadline=None), breaker=CircuitBreaker("telemetry-gemini"))
+    llm.client = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+
+    telemetry = Telemetry()
+    with track("evaluator", llm.model, telemetry=telemetry):
+        llm.generate_json("score")
+    record = telemetry.recent(1)[0]
+    assert (record["prompt_tokens"], record["output_tokens"], record["cached_tokens"]) == (1200, 300, 800)
+    assert record["attempts"] == 1
+
+
+def test_failed_call_recorded_and_context_restored():
+    telemetry = Telemetry()
+    try:
+        with track("reviser", "m", telemetry=telemetry):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert telemetry.recent(1)[0]["error"] == "ValueError"
+    assert telemetry.snapshot()["reviser"]["errors"] == 1
+    assert current_call() is None
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ TELEMETRY TESTS PASSED")
@@ -0,0 +1,126 @@
+"""
+Test local token estimates, the per-stage prompt budget and run planning (offline)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aro.llm_adapter import MockAdapter
+from aro.mock_responses import MOCK_RESUME
+from aro.routing import StageRoute, stage_stats
+from aro.telemetry import get_telemetry
+from aro.tokens import estimate_tokens, shrink_text, fit_inputs, TRUNCATION_MARKER
+from src.evaluator import Evaluator
+from src.reviser import Reviser
+from src.profile_context import profile_prefix
+from src.run_planner import plan_run
+
+
+JD = "\n".join(f"- Requirement {i}: experience with distributed systems, Kubernetes and Python services." for i in range(200))
+PROFILE = {"personal": {"name": "Test User"}, "skills": ["Python", "Go", "AWS"]}
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("The quick brown fox jumps over the lazy dog.") == 10
+    # Digits and JSON punctuation cost more than prose of the same length
+    assert estimate_tokens('{"a": [1, 2, 3]}') > len('{"a": [1, 2, 3]}') // 4
+    assert estimate_tokens("简历优化") == 4
+
+
+def test_shrink_text_cuts_at_line_boundary():
+    shrunk = shrink_text(JD, 300)
+    assert estimate_tokens(shrunk) <= 300
+    assert shrunk.endswith(TRUNCATION_MARKER)
+    assert shrunk[:-len(TRUNCATION_MARKER)].endswith("Python services.")
+    assert shrink_text("short", 300) == "short"
+
+
+def test_fit_inputs_shrinks_largest_input_first():
+    build = lambda jd_text, feedback: f"JD:\n{jd_text}\nFEEDBACK:\n{feedback}"
+    prompt, removed = fit_inputs(build, {"jd_text": JD, "feedback": "Add metrics."}, 1000, fixed_tokens=200)
+    assert estimate_tokens(prompt) + 200 <= 1000
+    assert list(removed) == ["jd_text"] and "Add metrics." in prompt
+
+
+def test_route_fit_prompt_reports_budget():
+    stage_stats.reset()
+    route = StageRoute("budget_test", max_tokens=2000, max_input_tokens=1500)
+    prompt, budget = route.fit_prompt(lambda jd_text: f"JD:\n{jd_text}", {"jd_text": JD}, prefix="PROFILE " * 100)
+    assert budget.input_tokens <= 1500 and not budget.over_budget
+    assert budget.prefix_tokens == estimate_tokens("PROFILE " * 100)
+    assert budget.shrunk["jd_text"] > 0 and budget.max_cost_usd > 0
+    assert stage_stats.snapshot()["budget_test"]["prompts_shrunk"] == 1
+
+    # Nothing shrinkable: the prompt is sent as is and counted as over budget
+    _, budget = route.fit_prompt(lambda: "x " * 2000)
+    assert budget.over_budget
+    assert stage_stats.snapshot()["budget_test"]["prompts_over_budget"] == 1
+
+
+def test_agents_fit_prompts_to_their_route():
+    route = StageRoute("evaluator", max_input_tokens=2500)
+    evaluator = Evaluator(MockAdapter(), route=route)
+    prompt = evaluator._build_prompt(MOCK_RESUME, JD)
+    assert TRUNCATION_MARKER in prompt and evaluator.last_budget.input_tokens <= 2500
+
+    reviser = Reviser(MockAdapter(), route=StageRoute("reviser", max_input_tokens=4000))
+    prefix = profile_prefix(PROFILE)
+    prompt = reviser._build_prompt(MOCK_RESUME, JD, "Add metrics.", "evaluation", prefix)
+    assert "Add metrics." in prompt and reviser.last_budget.shrunk["jd_text"] > 0
+    assert reviser.last_budget.prefix_tokens == estimate_tokens(prefix)
+
+
+def test_plan_run_without_calling_llm():
+    class NoCalls(MockAdapter):
+        def generate_json(self, *args, **kwargs):
+            raise AssertionError("plan must not call the LLM")
+
+    stage_stats.reset()
+    get_telemetry().reset()
+    plan = plan_run(JD, PROFILE, "Acme", "Engineer", NoCalls(), max_eval_revisions=2, max_fact_revisions=1)
+    stages = [(stage["stage"], stage.get("step"), stage["calls"]["max"]) for stage in plan["stages"]]
+    assert stages == [
+        ("generator", None, 1), ("evaluator", None, 3), ("reviser_section", "evaluation", 2),
+        ("factuality", None, 2), ("reviser_section", "factuality", 1)
+    ]
+    assert plan["stages"][2]["sections"] == ["lseg", "projects"]
+    best, worst = plan["best_case"], plan["worst_case"]
+    assert best["calls"] == 3 and worst["calls"] == 9
+    assert 0 < best["input_tokens"] < worst["input_tokens"]
+    assert 0 < best["seconds"] < worst["seconds"]
+    # Planning is not a real prompt: nothing is counted against the stages
+    assert stage_stats.snapshot() == {}
+
+    os.environ["REVISION_SCOPE"] = "resume"
+    try:
+        plan = plan_run(JD, PROFILE, "Acme", "Engineer", NoCalls())
+    finally:
+        del os.environ["REVISION_SCOPE"]
+    assert [stage["stage"] for stage in plan["stages"]][2::2] == ["reviser", "reviser"]
+
+
+def test_plan_run_section_generation():
+    get_telemetry().reset()  # latencies come from the model, not earlier tests' mock calls
+    os.environ["GENERATOR_MODE"] = "sections"
+    try:
+        plan = plan_run(JD, PROFILE, "Acme", "Engineer")
+    finally:
+        del os.environ["GENERATOR_MODE"]
+    single = plan_run(JD, PROFILE, "Acme", "Engineer")["stages"][0]
+    generation = plan["stages"][0]
+    assert generation["stage"] == "generator_section" and generation["calls"] == {"min": 1, "max": 1}
+    assert generation["sections"] == ["summary", "skills", "lseg", "infosys", "projects"]
+    # Five prompts, each with the shared prefix; the calls overlap, so latency is the slowest one
+    assert generation["input_tokens"] > generation["prefix_tokens"]
+    assert generation["prefix_tokens"] == 5 * single["prefix_tokens"]
+    assert generation["seconds"] < single["seconds"]
+    assert plan["best_case"]["seconds"] < plan_run(JD, PROFILE, "Acme", "Engineer")["best_case"]["seconds"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
+    print("\n✓ TOKEN BUDGET TESTS PASSED")